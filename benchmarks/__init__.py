@@ -0,0 +1,5 @@
+"""
+Замеры производительности основных операций с кодами маркировки.
+
+Запуск: python -m benchmarks (см. benchmarks/__main__.py).
+"""
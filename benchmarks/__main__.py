@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Замеры производительности операций с кодами маркировки.
+
+Замеряются разбор кодов GS1, индекс кодов в памяти, фильтр дубликатов, сохранение, чтение
+и поиск кодов, отметка использованных, файлы агрегации, заказы СУЗ, номенклатура, лог API-запросов
+и полный цикл (получение кодов, агрегация, нанесение) на имитации СУЗ. Результаты сохраняются в JSON;
+при указании эталона выводится сравнение, и при замедлении больше порога скрипт
+завершается с кодом 1.
+
+Пример:
+    python -m benchmarks --sizes 10000 100000 --output bench.json
+    python -m benchmarks --sizes 1000000 --only save_marking_codes flow
+    python -m benchmarks --compare bench.json --threshold 0.15
+    python -m benchmarks --compare bench.json --current bench_new.json
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import cases  # noqa: F401 - регистрация замеров
+from benchmarks.harness import (BENCHMARKS, DEFAULT_THRESHOLD, compare_results, format_comparison,
+                                load_results, run_benchmarks, save_results)
+
+DEFAULT_SIZES = [10000, 100000]
+
+
+def main():
+    """Точка входа в скрипт"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Замеры производительности операций с кодами маркировки")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Размеры наборов данных (количество кодов), например 10000 100000 1000000")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество повторов каждой операции")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Выполнить только указанные замеры")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="Файл эталонных результатов для сравнения")
+    parser.add_argument("--current", help="Сравнить с эталоном сохраненные результаты вместо нового запуска")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое замедление относительно эталона (0.1 - 10 %%)")
+    args = parser.parse_args()
+
+    # Журнал приложения не смешивается с результатами замеров
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.current:
+        current = load_results(args.current)
+    else:
+        current = run_benchmarks(args.only or list(BENCHMARKS), args.sizes, args.repeat)
+        if args.output:
+            save_results(current, args.output)
+            print(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), current, args.threshold)
+        print(format_comparison(rows, args.threshold))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
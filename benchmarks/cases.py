@@ -0,0 +1,241 @@
+"""
+Замеры операций базы данных и полного цикла работы с кодами.
+
+Размер набора данных (size) - количество кодов маркировки. Количество заказов СУЗ
+и записей лога API-запросов выводится из него (size / 100 и size / 10).
+"""
+from models.api_log import APILog
+
+from benchmarks.datasets import (GTIN, OMSID, ORDER_ID, close_database, create_database, make_aggregation_files,
+                                 make_api_logs, make_api_orders, make_codes, write_aggregation_files)
+from benchmarks.harness import benchmark
+
+
+@benchmark("save_marking_codes")
+def bench_save_marking_codes(bench, size):
+    """Сохранение кодов, полученных из заказа, в пустую базу данных"""
+    codes = make_codes(size)
+    bench.measure(
+        lambda db: db.save_marking_codes(codes, GTIN, ORDER_ID),
+        setup=lambda: create_database(bench.path("codes.db")),
+        teardown=close_database,
+    )
+
+
+@benchmark("get_marking_codes")
+def bench_get_marking_codes(bench, size):
+    """Чтение всех кодов заказа"""
+    db = create_database(bench.path("codes.db"), make_codes(size))
+    bench.measure(lambda _: db.get_marking_codes(order_id=ORDER_ID, limit=size))
+    close_database(db)
+
+
+@benchmark("get_marking_code_ids_by_barcodes")
+def bench_get_marking_code_ids_by_barcodes(bench, size):
+    """Поиск ID кодов по значениям (как при импорте файла агрегации)"""
+    codes = make_codes(size)
+    db = create_database(bench.path("codes.db"), codes)
+    bench.measure(lambda _: db.get_marking_code_ids_by_barcodes(codes))
+    close_database(db)
+
+
+@benchmark("mark_codes_as_used")
+def bench_mark_codes_as_used(bench, size):
+    """Отметка всех кодов как использованных (перед каждым повтором отметка снимается)"""
+    db = create_database(bench.path("codes.db"), make_codes(size))
+    code_ids = [row["id"] for row in db.get_marking_codes(order_id=ORDER_ID, limit=size)]
+
+    def setup():
+        db.unmark_codes_as_used(code_ids)
+
+    bench.measure(lambda _: db.mark_codes_as_used(code_ids), setup=setup)
+    close_database(db)
+
+
+@benchmark("aggregation_files")
+def bench_aggregation_files(bench, size):
+    """Добавление файлов агрегации по одному и чтение их списка"""
+    codes = make_codes(size)
+    files = make_aggregation_files(codes)
+
+    def add_files(db):
+        for item in files:
+            db.add_aggregation_file(**item)
+
+    bench.measure(
+        add_files,
+        setup=lambda: create_database(bench.path("aggregation.db"), codes),
+        teardown=close_database,
+        label="add_aggregation_file",
+    )
+
+    db = create_database(bench.path("aggregation.db"), codes)
+    add_files(db)
+    bench.measure(lambda _: db.get_aggregation_files(), label="get_aggregation_files", items=len(files))
+    close_database(db)
+
+
+@benchmark("save_api_orders")
+def bench_save_api_orders(bench, size):
+    """Сохранение списка заказов СУЗ (size / 100 заказов) поверх уже сохраненного"""
+    orders = make_api_orders(max(1, size // 100))
+    db = create_database(bench.path("orders.db"))
+    db.save_api_orders(orders)
+    bench.measure(lambda _: db.save_api_orders(orders), items=len(orders))
+    close_database(db)
+
+
+@benchmark("api_log")
+def bench_api_log(bench, size):
+    """Запись лога API-запросов (size / 10 записей), расчет статистики и поиск по содержимому"""
+    logs = make_api_logs(max(1, size // 10))
+
+    def add_logs(db):
+        for item in logs:
+            db.add_api_log(**item)
+
+    bench.measure(
+        add_logs,
+        setup=lambda: create_database(bench.path("logs.db")),
+        teardown=close_database,
+        label="add_api_log",
+        items=len(logs),
+    )
+
+    db = create_database(bench.path("logs.db"))
+    add_logs(db)
+    api_log = APILog(db=db)
+    bench.measure(lambda _: api_log.get_stats("day"), label="APILog.get_stats", items=len(logs))
+    report_ids = [f"report-{index}" for index in range(0, len(logs), max(1, len(logs) // 10))]
+    bench.measure(lambda _: [api_log.search(report_id) for report_id in report_ids],
+                  label="APILog.search", items=len(report_ids))
+    close_database(db)
+
+
+@benchmark("flow")
+def bench_flow(bench, size):
+    """Полный цикл на имитации СУЗ: получение кодов, импорт файлов агрегации, отчеты о нанесении
+
+    Клиентский ограничитель частоты настроен без ограничений, чтобы замерялись
+    накладные расходы приложения, а не лимиты СУЗ.
+    """
+    import time
+
+    from models.api_client import APIClient
+    from utils.aggregation_importer import AggregationBatchImporter
+    from utils.code_export import to_gs1, to_gs_text
+    from utils.mock_suz import MockSUZConfig, MockSUZServer
+    from utils.rate_limiter import DEFAULT_LIMITS, RateLimiter
+    from utils.utilisation_submitter import UtilisationReportSubmitter
+
+    unlimited = RateLimiter({endpoint_class: (100000.0, 100000) for endpoint_class in DEFAULT_LIMITS})
+    config = MockSUZConfig(block_size=10000, max_order_quantity=size, seed=1)
+
+    with MockSUZServer(config) as server:
+        db = create_database(bench.path("flow.db"))
+        client = APIClient(base_url=server.url, extension="pharma", omsid=OMSID, db=db,
+                           api_logger=APILog(db=db), rate_limiter=unlimited)
+        order_id = server.state.create_order(OMSID, {"products": [{"gtin": GTIN, "quantity": size}]})["orderId"]
+
+        # Получение кодов блоками с сохранением каждого блока
+        started = time.perf_counter()
+        codes = []
+        last_block_id = None
+        while len(codes) < size:
+            response = client.get_codes_from_order(order_id, GTIN, min(150000, size - len(codes)), last_block_id)
+            if not response.get("success"):
+                raise RuntimeError(f"Имитация СУЗ не выдала коды: {response}")
+            block = [to_gs_text(code) for code in response["codes"]]
+            db.save_marking_codes(block, GTIN, order_id)
+            codes.extend(block)
+            last_block_id = response["blockId"]
+        bench.record("flow.pull", [time.perf_counter() - started])
+
+        # Импорт файлов агрегации, сформированных линией упаковки
+        paths = write_aggregation_files(bench.path("aggregation"), codes)
+        started = time.perf_counter()
+        imported = AggregationBatchImporter(db).run(paths)
+        bench.record("flow.aggregate", [time.perf_counter() - started])
+
+        # Отчеты о нанесении по каждому файлу агрегации
+        started = time.perf_counter()
+        submitter = UtilisationReportSubmitter(client, db)
+        for file_id in imported["file_ids"]:
+            aggregation_file = db.get_aggregation_file_by_id(file_id, with_content=False)
+            submitter.submit(file_id, {
+                "sntins": [to_gs1(code) for code in aggregation_file.marking_codes],
+                "expirationDate": "2030-12-31",
+                "seriesNumber": "001",
+                "usageType": "VERIFIED",
+                "omsId": OMSID,
+            })
+        bench.record("flow.utilise", [time.perf_counter() - started])
+        close_database(db)
+
+
+@benchmark("gs1")
+def bench_gs1(bench, size):
+    """Разбор кодов на GTIN, серийный номер и криптохвост и приведение к формам хранения и печати"""
+    from utils.gs1 import parse_codes, printer_forms, storage_keys
+
+    codes = make_codes(size)
+    printed = printer_forms(codes)
+    bench.measure(lambda _: parse_codes(printed), label="gs1.parse_codes")
+    bench.measure(lambda _: storage_keys(printed), label="gs1.storage_keys")
+    bench.measure(lambda _: printer_forms(codes), label="gs1.printer_forms")
+
+
+@benchmark("code_pool")
+def bench_code_pool(bench, size):
+    """Загрузка индекса кодов в память и проверка отсканированных кодов (без криптохвоста)"""
+    from utils.code_pool import CodePool
+    from utils.gs1 import identities
+
+    codes = make_codes(size)
+    db = create_database(bench.path("pool.db"), codes)
+    pool = CodePool()
+    bench.measure(lambda _: pool.load(db), label="CodePool.load")
+    scanned = identities(codes)
+    bench.measure(lambda _: pool.lookup_many(scanned), label="CodePool.lookup")
+    bench.results[f"CodePool.lookup[{size}]"]["bytes_per_code"] = round(pool.memory_bytes() / size, 1)
+    close_database(db)
+
+
+@benchmark("code_filter")
+def bench_code_filter(bench, size):
+    """Построение фильтра дубликатов по таблице кодов и проверка пакетов новых и известных кодов"""
+    from utils.gs1 import identities
+
+    codes = make_codes(size)
+    db = create_database(bench.path("filter.db"), codes)
+    bench.measure(lambda _: db.rebuild_code_filter("codes"), label="code_filter.rebuild")
+    bloom = db.get_code_filter("codes")
+    new_keys = identities(make_codes(size, gtin="04600000000099"))
+    bench.measure(lambda _: bloom.screen(new_keys), label="code_filter.screen_new")
+    known_keys = identities(codes)
+    bench.measure(lambda _: bloom.screen(known_keys), label="code_filter.screen_known")
+    bench.results[f"code_filter.screen_new[{size}]"]["false_positives"] = len(bloom.screen(new_keys))
+    close_database(db)
+
+
+@benchmark("nomenclature")
+def bench_nomenclature(bench, size):
+    """Импорт справочника номенклатуры (size / 10 записей) и поиск по названию и GTIN"""
+    from utils.nomenclature_import import NomenclatureItem
+
+    count = max(size // 10, 1)
+    items = [NomenclatureItem(f"Товар {index} молоко {index % 7}%", f"0460{index:010d}", "milk")
+             for index in range(count)]
+    bench.measure(
+        lambda db: db.import_nomenclature(items),
+        setup=lambda: create_database(bench.path("nomenclature.db")),
+        teardown=close_database,
+        label="Database.import_nomenclature",
+        items=count,
+    )
+    db = create_database(bench.path("nomenclature.db"))
+    db.import_nomenclature(items)
+    queries = ["молоко 5", f"товар {count // 2}", "0460000001", "46000000"]
+    bench.measure(lambda _: [db.search_nomenclature(query) for query in queries],
+                  label="Database.search_nomenclature", items=len(queries))
+    close_database(db)
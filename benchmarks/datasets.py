@@ -0,0 +1,138 @@
+"""
+Синтетические наборы данных для замеров.
+
+Данные детерминированы (зависят только от размера и начального значения), поэтому
+результаты разных запусков и версий сопоставимы.
+"""
+import json
+import os
+import random
+import string
+from typing import Dict, List, Tuple
+
+from models.database import Database
+from models.models import APIOrder
+
+GTIN = "04601234567890"
+ORDER_ID = "bench-order"
+OMSID = "bench-oms"
+TOKEN = "bench-token"
+
+# Размер короба и количество кодов в одном файле агрегации
+BOX_SIZE = 10
+CODES_PER_FILE = 1000
+
+_ALPHABET = string.ascii_letters + string.digits
+
+
+def make_codes(size: int, gtin: str = GTIN, seed: int = 1) -> List[str]:
+    """Коды маркировки в том виде, в котором они хранятся в базе данных (разделитель [GS])"""
+    rnd = random.Random(seed)
+    return [
+        f"01{gtin}21{index:013d}[GS]91EE10[GS]92{''.join(rnd.choices(_ALPHABET, k=44))}"
+        for index in range(size)
+    ]
+
+
+def make_boxes(codes: List[str], box_size: int = BOX_SIZE) -> List[Tuple[str, List[str]]]:
+    """Распределение кодов по коробам: список (код короба SSCC, коды в коробе)"""
+    return [
+        (f"00{index:018d}", codes[start:start + box_size])
+        for index, start in enumerate(range(0, len(codes), box_size))
+    ]
+
+
+def make_aggregation_files(codes: List[str], codes_per_file: int = CODES_PER_FILE) -> List[Dict]:
+    """Файлы агрегации в виде аргументов Database.add_aggregation_file"""
+    files = []
+    for number, start in enumerate(range(0, len(codes), codes_per_file)):
+        chunk = codes[start:start + codes_per_file]
+        boxes = make_boxes(chunk)
+        files.append({
+            "filename": f"bench_{number:06d}.json",
+            "product": "Тестовая продукция",
+            "marking_codes": chunk,
+            "level1_codes": [box for box, _ in boxes],
+            "level2_codes": [],
+        })
+    return files
+
+
+def aggregation_file_json(product: str, boxes: List[Tuple[str, List[str]]]) -> str:
+    """Содержимое файла агрегации в формате линии упаковки: плоский список items,
+    в котором за кодами каждого короба следует код самого короба"""
+    items = []
+    for box, box_codes in boxes:
+        items.extend({"level": 0, "Barcode": code} for code in box_codes)
+        items.append({"level": 1, "Barcode": box})
+    return json.dumps({"NameProduct": product, "items": items}, ensure_ascii=False)
+
+
+def write_aggregation_files(folder: str, codes: List[str], codes_per_file: int = CODES_PER_FILE) -> List[str]:
+    """Запись файлов агрегации в папку
+
+    Returns:
+        List[str]: Пути к записанным файлам
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for number, start in enumerate(range(0, len(codes), codes_per_file)):
+        path = os.path.join(folder, f"bench_{number:06d}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(aggregation_file_json("Тестовая продукция", make_boxes(codes[start:start + codes_per_file])))
+        paths.append(path)
+    return paths
+
+
+def make_api_orders(count: int) -> List[APIOrder]:
+    """Заказы СУЗ для Database.save_api_orders"""
+    return [
+        APIOrder(
+            order_id=f"order-{index:08d}",
+            order_status="ACTIVE",
+            created_timestamp="1700000000000",
+            total_quantity=1000,
+            num_of_products=1,
+            product_group_type="pharma",
+            signed=True,
+            verified=True,
+            buffers=[{"gtin": GTIN, "leftInBuffer": 1000, "totalCodes": 1000}],
+        )
+        for index in range(count)
+    ]
+
+
+def make_api_logs(count: int) -> List[Dict]:
+    """Записи лога API-запросов в виде аргументов Database.add_api_log"""
+    endpoints = ["ping", "version", "orders", "codes", "utilisation", "aggregation", "report/info"]
+    logs = []
+    for index in range(count):
+        endpoint = endpoints[index % len(endpoints)]
+        status_code = 200 if index % 20 else 500
+        logs.append({
+            "method": "POST" if endpoint in ("utilisation", "aggregation") else "GET",
+            "url": f"https://suz.example/api/v2/pharma/{endpoint}?omsId={OMSID}",
+            "request": {"index": index},
+            "response": {"omsId": OMSID, "reportId": f"report-{index}"},
+            "status_code": status_code,
+            "success": status_code == 200,
+        })
+    return logs
+
+
+def create_database(path: str, codes: List[str] = None) -> Database:
+    """Новая база данных с учетными данными для API-клиента и, при необходимости, кодами"""
+    if os.path.exists(path):
+        os.remove(path)
+    db = Database(path)
+    db.add_credentials(OMSID, TOKEN, "", "", None)
+    if codes:
+        db.save_marking_codes(codes, GTIN, ORDER_ID)
+    return db
+
+
+def close_database(db: Database):
+    """Закрытие базы данных без ожидания сборщика мусора"""
+    db.conn.commit()
+    db.conn.close()
+    db.conn = None
@@ -0,0 +1,177 @@
+"""
+Регистрация и выполнение замеров, сохранение результатов в JSON и сравнение с эталоном.
+
+Замер - функция bench(size), зарегистрированная декоратором benchmark. Внутри она
+готовит данные и вызывает bench.measure для каждой замеряемой операции: подготовка
+(setup) в замер не входит, операция выполняется repeat раз, в результат попадают
+минимальное, медианное и среднее время.
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Зарегистрированные замеры: имя -> функция (bench, size)
+BENCHMARKS: Dict[str, Callable] = {}
+
+# Допустимое замедление относительно эталона по умолчанию
+DEFAULT_THRESHOLD = 0.10
+
+
+def benchmark(name: str):
+    """Регистрация функции замера под указанным именем"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class Bench:
+    """Контекст выполнения замера: рабочая папка, число повторов и собранные результаты"""
+
+    def __init__(self, name: str, size: int, repeat: int, workdir: str):
+        self.name = name
+        self.size = size
+        self.repeat = repeat
+        self.workdir = workdir
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def path(self, name: str) -> str:
+        """Путь к файлу в рабочей папке замера"""
+        return os.path.join(self.workdir, name)
+
+    def measure(self, fn: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+                teardown: Optional[Callable[[Any], None]] = None, label: Optional[str] = None,
+                items: Optional[int] = None, repeat: Optional[int] = None):
+        """Замер операции
+
+        Args:
+            fn: Замеряемая операция, получает результат setup
+            setup: Подготовка перед каждым повтором (не замеряется)
+            teardown: Освобождение ресурсов после каждого повтора (не замеряется)
+            label: Имя операции (по умолчанию имя замера)
+            items: Количество обработанных элементов для расчета скорости (по умолчанию size)
+            repeat: Количество повторов (по умолчанию из параметров запуска)
+        """
+        timings = []
+        for _ in range(repeat or self.repeat):
+            arg = setup() if setup else None
+            started = time.perf_counter()
+            fn(arg)
+            timings.append(time.perf_counter() - started)
+            if teardown:
+                teardown(arg)
+        self.record(label or self.name, timings, items)
+
+    def record(self, label: str, timings: List[float], items: Optional[int] = None):
+        """Сохранение результата операции, замеренной вызывающим кодом"""
+        median = statistics.median(timings)
+        items = self.size if items is None else items
+        self.results[f"{label}[{self.size}]"] = {
+            "benchmark": self.name,
+            "operation": label,
+            "size": self.size,
+            "items": items,
+            "repeat": len(timings),
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.mean(timings),
+            "items_per_second": items / median if median > 0 else None,
+        }
+
+
+def run_benchmarks(names: List[str], sizes: List[int], repeat: int,
+                   log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Выполнение замеров для каждого размера набора данных
+
+    Returns:
+        Dict[str, Any]: Результаты (meta и results по ключу "операция[размер]")
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    skipped: Dict[str, str] = {}
+    for size in sizes:
+        for name in names:
+            workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+            bench = Bench(name, size, repeat, workdir)
+            try:
+                BENCHMARKS[name](bench, size)
+            except ImportError as e:
+                # Замер требует зависимость, которая не установлена
+                skipped[name] = str(e)
+                log(f"{name}[{size}]: пропущен ({e})")
+                continue
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            for key, result in bench.results.items():
+                results[key] = result
+                log(f"{key}: медиана {result['median'] * 1000:.1f} мс, "
+                    f"{(result['items_per_second'] or 0):,.0f} эл/с".replace(",", " "))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "skipped": skipped,
+        },
+        "results": results,
+    }
+
+
+def save_results(data: Dict[str, Any], path: str):
+    """Сохранение результатов в JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Загрузка результатов из JSON"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Сравнение медианного времени операций с эталоном
+
+    Args:
+        baseline: Результаты эталонного запуска
+        current: Результаты текущего запуска
+        threshold: Допустимое замедление (0.1 - на 10 %)
+
+    Returns:
+        List[Dict[str, Any]]: Операции, присутствующие в обоих запусках, с отношением
+            времени (ratio) и признаком регрессии (regression)
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base or not base["median"]:
+            continue
+        ratio = result["median"] / base["median"]
+        rows.append({
+            "key": key,
+            "baseline": base["median"],
+            "current": result["median"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], threshold: float) -> str:
+    """Таблица сравнения с эталоном"""
+    lines = [f"{'операция':<48} {'эталон, мс':>12} {'сейчас, мс':>12} {'изменение':>10}"]
+    for row in rows:
+        mark = "  РЕГРЕССИЯ" if row["regression"] else ""
+        lines.append(f"{row['key']:<48} {row['baseline'] * 1000:>12.1f} {row['current'] * 1000:>12.1f} "
+                     f"{(row['ratio'] - 1) * 100:>+9.1f}%{mark}")
+    regressions = sum(1 for row in rows if row["regression"])
+    lines.append(f"\nРегрессий (замедление более {threshold * 100:.0f} %): {regressions}")
+    return "\n".join(lines)
@@ -0,0 +1,480 @@
+#!/usr/bin/env python
+"""
+Работа с СУЗ без графического интерфейса.
+
+Команды используют те же Database и APIClient, что и приложение, и настройки
+(активное подключение, учетные данные, расширение API) из той же базы данных.
+Результат каждой команды выводится в stdout в формате JSON, журнал - в stderr;
+код завершения 0 означает успех.
+
+Команды:
+    pull-codes          получение кодов маркировки из заказа
+    import-aggregation  импорт файлов агрегации (папка, файл или маска)
+    send-utilisation    отправка отчета о нанесении по файлу агрегации
+    send-aggregation    отправка отчета об агрегации по файлу агрегации
+    report-status       проверка статуса отчета о нанесении или об агрегации
+    outbox              отправка очереди и досылка частей отчетов о нанесении
+    scan                проверка отсканированных кодов по индексу в памяти
+    watch               режим службы: импорт файлов из папки и отправка очереди
+
+Пример:
+    python -m cli pull-codes --order-id 1f6c... --gtin 04601234567890 --quantity 100
+    python -m cli import-aggregation D:/line1/out --comment "Линия 1"
+    scanner | python -m cli scan
+    python -m cli watch D:/line1/out --interval 10 --usage-type VERIFIED --expiration-date 2027-12-31
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from models.api_client import APIClient
+from models.api_log import APILog
+from models.database import Database
+from models.models import ReportStatus
+from utils.aggregation_importer import AggregationBatchImporter, collect_aggregation_files
+from utils.aggregation_report import AggregationReportBuilder
+from utils.code_export import to_gs1, to_gs_text
+from utils.code_pool import CodePool
+from utils.logging_setup import setup_logging
+from utils.outbox import OutboxDispatcher, apply_sent_result, is_connection_error
+from utils.profiling import monitor
+from utils.utilisation_submitter import CHUNK_PENDING, UtilisationReportSubmitter, response_error
+
+logger = logging.getLogger("cli")
+
+# Подпапки папки обмена для обработанных и отклоненных файлов
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+
+
+class HeadlessClient:
+    """Операции приложения над базой данных и API-клиентом без интерфейса"""
+
+    def __init__(self, db_path: str = "database.db"):
+        self.db = Database(db_path)
+        monitor.load_settings(self.db)
+        self.api_client = APIClient(db=self.db, api_logger=APILog(db=self.db))
+        self.api_client.load_rate_limits()
+        self.api_client.apply_settings(self.db)
+        self.outbox = OutboxDispatcher(self.api_client, self.db)
+        self.code_pool: Optional[CodePool] = None
+
+    def pull_codes(self, order_id: str, gtin: str, quantity: int) -> Dict[str, Any]:
+        """Получение кодов маркировки из заказа и сохранение их в базе данных"""
+        response = self.api_client.get_codes_from_order(order_id=order_id, gtin=gtin, quantity=quantity)
+        if not response.get("success", False):
+            return {"success": False, "order_id": order_id, "gtin": gtin,
+                    "error": response_error(response)}
+
+        # Разделитель GS хранится в базе данных в текстовом виде [GS]
+        codes = [to_gs_text(code) for code in response.get("codes", [])]
+        saved = self.db.save_marking_codes(codes, gtin, order_id) if codes else True
+        return {
+            "success": bool(saved),
+            "order_id": order_id,
+            "gtin": gtin,
+            "received": len(codes),
+            "block_id": response.get("blockId"),
+        }
+
+    def import_aggregation(self, sources: List[str], comment: str = "",
+                           progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Any]:
+        """Импорт файлов агрегации по путям к папкам, файлам или маскам"""
+        files = []
+        for source in sources:
+            files.extend(path for path in collect_aggregation_files(source) if path not in files)
+        result = AggregationBatchImporter(self.db).run(files, comment, progress_callback)
+        result["success"] = not result["errors"]
+        result["errors"] = [{"file": filename, "error": error} for filename, error in result["errors"]]
+        result["duplicates"] = [{"file": filename, "codes": count} for filename, count in result["duplicates"]]
+        return result
+
+    def send_utilisation(self, file_id: int, usage_type: str, expiration_date: str,
+                         series_number: str = "001") -> Dict[str, Any]:
+        """Отправка отчета о нанесении по всем кодам файла агрегации частями"""
+        aggregation_file = self.db.get_aggregation_file_by_id(file_id, with_content=False)
+        if not aggregation_file:
+            return {"success": False, "file_id": file_id, "error": f"Файл агрегации {file_id} не найден"}
+        if not aggregation_file.marking_codes:
+            return {"success": False, "file_id": file_id, "error": "В файле агрегации нет кодов маркировки"}
+
+        report_data = {
+            "sntins": [to_gs1(code) for code in aggregation_file.marking_codes],
+            "expirationDate": expiration_date,
+            "seriesNumber": series_number,
+            "usageType": usage_type,
+            "omsId": self.api_client.omsid,
+        }
+        return self._submit_utilisation(file_id, report_data)
+
+    def resume_utilisation(self, file_id: Optional[int] = None) -> Dict[str, Any]:
+        """Досылка неотправленных частей отчетов о нанесении по файлу или по всем файлам"""
+        file_ids = [file_id] if file_id else self.db.get_files_with_unsent_report_chunks()
+        files = [self._submit_utilisation(current_id) for current_id in file_ids]
+        return {"success": all(item["success"] for item in files), "files": files}
+
+    def _submit_utilisation(self, file_id: int, report_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Отправка (досылка) частей отчета о нанесении и сохранение reportId в файле агрегации"""
+        result = UtilisationReportSubmitter(self.api_client, self.db).submit(file_id, report_data)
+        if result["report_ids"]:
+            # Для проверки статуса в файле агрегации сохраняется reportId первой части
+            self.db.update_aggregation_file_report_id(file_id, result["report_ids"][0])
+        return {
+            "success": result["total"] > 0 and not result["failed"],
+            "file_id": file_id,
+            "total": result["total"],
+            "sent": result["sent"],
+            "failed": result["failed"],
+            "report_ids": result["report_ids"],
+            "errors": [{"chunk": index, "error": error} for index, error in result["errors"]],
+        }
+
+    def send_aggregation(self, file_id: int, production_line_id: str, production_order_id: str,
+                         participant_id: str = "", unit_codes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Формирование отчетов об агрегации по файлу агрегации и их отправка
+
+        Отчеты, не отправленные из-за ошибки соединения, ставятся в очередь отправки.
+        """
+        if not participant_id:
+            # ИНН берется из первых учетных данных, как в диалоге отчета об агрегации
+            credentials = self.db.get_credentials()
+            participant_id = credentials[0].inn if credentials else ""
+        header = {
+            "participantId": participant_id,
+            "productionLineId": production_line_id,
+            "productionOrderId": production_order_id,
+            "omsId": self.api_client.omsid,
+        }
+        reports, errors = AggregationReportBuilder(self.db).build(file_id, header, unit_codes=unit_codes or None)
+        if errors:
+            return {"success": False, "file_id": file_id, "errors": errors}
+
+        result = {"success": False, "file_id": file_id, "total": len(reports), "report_ids": [], "queued": 0}
+        for index, report in enumerate(reports, start=1):
+            response = self.api_client.post_aggregation(report, prevalidated=True)
+            if is_connection_error(response):
+                # Этот и оставшиеся отчеты ставятся в очередь отправки
+                for queued_report in reports[index - 1:]:
+                    self.outbox.enqueue("aggregation", queued_report, ref_id=file_id)
+                result["queued"] = len(reports) - index + 1
+                break
+            if not response.get("success", False) or "reportId" not in response:
+                result["error"] = response_error(response)
+                break
+            result["report_ids"].append(response["reportId"])
+
+        if result["report_ids"]:
+            self.db.update_aggregation_file_aggregation_report_id(file_id, result["report_ids"][0])
+            self.db.update_aggregation_file_aggregation_status(file_id, ReportStatus.SENT)
+        result["success"] = len(result["report_ids"]) + result["queued"] == len(reports)
+        return result
+
+    def report_status(self, kind: str, file_id: Optional[int] = None,
+                      report_id: Optional[str] = None) -> Dict[str, Any]:
+        """Проверка статуса отчета о нанесении (utilisation) или об агрегации (aggregation)
+
+        Если указан только файл агрегации, проверяется сохраненный в нем reportId,
+        а полученный статус записывается в файл.
+        """
+        if not report_id and file_id:
+            summaries = self.db.get_aggregation_file_summaries(file_id)
+            if summaries:
+                summary = summaries[0]
+                report_id = summary.report_id if kind == "utilisation" else summary.aggregation_report_id
+        if not report_id:
+            return {"success": False, "kind": kind, "file_id": file_id, "error": "Отсутствует идентификатор отчета"}
+
+        success, response, status_code = self.api_client.get_report_info(report_id)
+        if not success:
+            return {"success": False, "kind": kind, "file_id": file_id, "report_id": report_id,
+                    "status_code": status_code, "error": response.get("error", "Неизвестная ошибка")}
+
+        status = response.get("status") or response.get("reportStatus")
+        status_text = ReportStatus.get_description(status) if status else ""
+        if file_id and status:
+            if kind == "utilisation":
+                self.db.update_aggregation_file_report_status(file_id, status_text)
+            else:
+                self.db.update_aggregation_file_aggregation_status(file_id, status_text)
+        return {"success": bool(status), "kind": kind, "file_id": file_id, "report_id": report_id,
+                "status": status, "status_text": status_text, "response": response}
+
+    def replay_outbox(self) -> Dict[str, Any]:
+        """Отправка очереди и досылка частей отчетов о нанесении, не отправленных из-за ошибки соединения"""
+        result = self.outbox.dispatch(on_sent=lambda item, response: apply_sent_result(self.db, item, response))
+        if not result["postponed"]:
+            for file_id in self.db.get_files_with_unsent_report_chunks([CHUNK_PENDING]):
+                chunks_result = self._submit_utilisation(file_id)
+                result["sent"] += chunks_result["sent"]
+        result["pending"] = self.outbox.pending_count()
+        result["success"] = not result["failed"] and not result["postponed"]
+        return result
+
+    def scan(self, barcodes: Iterable[str], emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Проверка отсканированных кодов без обращения к базе данных
+
+        Коды проверяются по индексу CodePool, загружаемому при первом вызове; результат
+        по каждому коду передается в emit сразу после чтения.
+        """
+        if self.code_pool is None:
+            self.code_pool = CodePool()
+            self.code_pool.attach(self.db)
+        counts = {"scanned": 0, "known": 0, "unknown": 0, "repeated": 0}
+        seen = set()
+        for barcode in barcodes:
+            barcode = barcode.strip()
+            if not barcode:
+                continue
+            entry = self.code_pool.lookup(barcode)
+            repeated = barcode in seen
+            seen.add(barcode)
+            counts["scanned"] += 1
+            counts["known" if entry else "unknown"] += 1
+            counts["repeated"] += repeated
+            emit({"barcode": barcode, "known": entry is not None,
+                  "code_id": entry.code_id if entry else None,
+                  "status": entry.status if entry else None,
+                  "repeated": repeated})
+        return {"success": not counts["unknown"], **counts}
+
+    def has_unsent(self) -> bool:
+        """Есть ли записи очереди или части отчетов, ожидающие отправки"""
+        return bool(self.outbox.pending_count() or self.db.get_files_with_unsent_report_chunks([CHUNK_PENDING]))
+
+
+class DropFolderWatcher:
+    """Режим службы: импорт файлов агрегации, появляющихся в папке обмена
+
+    Импортированные файлы переносятся в подпапку processed, файлы с ошибками - в failed.
+    На каждом проходе также отправляется очередь; при заданном типе использования
+    по каждому импортированному файлу отправляется отчет о нанесении.
+    """
+
+    def __init__(self, client: HeadlessClient, folder: str, comment: str = "",
+                 settle_time: float = 2.0, utilisation: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            client: Клиент HeadlessClient
+            folder: Папка обмена
+            comment: Комментарий к импортируемым файлам
+            settle_time: Файл берется в работу, если он не изменялся указанное время в секундах
+                (защита от чтения файла, который еще записывается)
+            utilisation: Параметры отчета о нанесении (usage_type, expiration_date, series_number)
+        """
+        self.client = client
+        self.folder = folder
+        self.comment = comment
+        self.settle_time = settle_time
+        self.utilisation = utilisation
+        self.stopped = False
+
+    def ready_files(self) -> List[str]:
+        """Файлы папки обмена, запись которых завершена"""
+        now = time.time()
+        files = []
+        for path in collect_aggregation_files(self.folder):
+            try:
+                if now - os.path.getmtime(path) >= self.settle_time:
+                    files.append(path)
+            except OSError:
+                # Файл удален или перемещен между получением списка и проверкой
+                continue
+        return files
+
+    def move_file(self, path: str, subfolder: str) -> str:
+        """Перенос файла в подпапку папки обмена без перезаписи одноименных файлов"""
+        target_dir = os.path.join(self.folder, subfolder)
+        os.makedirs(target_dir, exist_ok=True)
+        name, ext = os.path.splitext(os.path.basename(path))
+        target = os.path.join(target_dir, name + ext)
+        if os.path.exists(target):
+            target = os.path.join(target_dir, f"{name}_{time.strftime('%Y%m%d%H%M%S')}{ext}")
+        shutil.move(path, target)
+        return target
+
+    def run_once(self) -> Dict[str, Any]:
+        """Один проход: импорт готовых файлов и отправка очереди
+
+        Returns:
+            Dict[str, Any]: Итоги прохода (import, utilisation, outbox); пустые разделы не включаются
+        """
+        cycle: Dict[str, Any] = {}
+        files = self.ready_files()
+        if files:
+            result = self.client.import_aggregation(files, self.comment)
+            failed = {item["file"] for item in result["errors"]}
+            for path in files:
+                try:
+                    self.move_file(path, FAILED_DIR if os.path.basename(path) in failed else PROCESSED_DIR)
+                except OSError as e:
+                    logger.error(f"Не удалось перенести файл {path}: {str(e)}")
+            cycle["import"] = result
+
+            # Файлы с кодами, уже включенными в другие файлы, не отправляются повторно
+            skipped = set(result["duplicate_file_ids"])
+            file_ids = [file_id for file_id in result["file_ids"] if file_id not in skipped]
+            if self.utilisation and file_ids:
+                cycle["utilisation"] = [
+                    self.client.send_utilisation(file_id, **self.utilisation) for file_id in file_ids
+                ]
+
+        if self.client.has_unsent():
+            cycle["outbox"] = self.client.replay_outbox()
+        return cycle
+
+    def run(self, interval: float, emit: Callable[[Dict[str, Any]], None]):
+        """Проходы с заданным интервалом до остановки (Ctrl+C или SIGTERM)"""
+        logger.info(f"Наблюдение за папкой {self.folder}, интервал {interval} с")
+        while not self.stopped:
+            try:
+                cycle = self.run_once()
+                if cycle:
+                    cycle["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                    emit(cycle)
+            except Exception as e:
+                logger.error(f"Ошибка при обработке папки обмена: {str(e)}", exc_info=True)
+            # Короткие интервалы ожидания позволяют быстро реагировать на остановку
+            deadline = time.monotonic() + interval
+            while not self.stopped and time.monotonic() < deadline:
+                time.sleep(min(0.5, interval))
+        logger.info("Наблюдение за папкой обмена остановлено")
+
+    def stop(self, *args):
+        """Остановка после текущего прохода"""
+        self.stopped = True
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Описание аргументов командной строки"""
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Работа с СУЗ без графического интерфейса")
+    parser.add_argument("--db", default="database.db", help="Путь к базе данных приложения")
+    parser.add_argument("--indent", type=int, default=None, help="Отступ JSON (по умолчанию одна строка)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Подробный журнал в stderr")
+    parser.add_argument("--log-file", help="Файл журнала с ротацией по размеру (по умолчанию журнал только в stderr)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pull = subparsers.add_parser("pull-codes", help="Получение кодов маркировки из заказа")
+    pull.add_argument("--order-id", required=True, help="Идентификатор заказа")
+    pull.add_argument("--gtin", required=True, help="GTIN товара")
+    pull.add_argument("--quantity", type=int, required=True, help="Количество кодов")
+
+    imp = subparsers.add_parser("import-aggregation", help="Импорт файлов агрегации")
+    imp.add_argument("sources", nargs="+", help="Папки, файлы или маски файлов агрегации")
+    imp.add_argument("--comment", default="", help="Комментарий к файлам")
+
+    utilisation = subparsers.add_parser("send-utilisation", help="Отправка отчета о нанесении по файлу агрегации")
+    utilisation.add_argument("--file-id", type=int, help="ID файла агрегации")
+    utilisation.add_argument("--resume", action="store_true",
+                             help="Дослать неотправленные части (по файлу или по всем файлам)")
+    add_utilisation_arguments(utilisation)
+
+    aggregation = subparsers.add_parser("send-aggregation", help="Отправка отчета об агрегации по файлу агрегации")
+    aggregation.add_argument("--file-id", type=int, required=True, help="ID файла агрегации")
+    aggregation.add_argument("--production-line-id", default="", help="Идентификатор производственной линии")
+    aggregation.add_argument("--production-order-id", default="", help="Идентификатор производственного заказа")
+    aggregation.add_argument("--participant-id", default="", help="ИНН участника (по умолчанию из учетных данных)")
+    aggregation.add_argument("--unit", action="append", dest="units",
+                             help="Код единицы агрегации (можно указать несколько раз; по умолчанию все)")
+
+    status = subparsers.add_parser("report-status", help="Проверка статуса отчета")
+    status.add_argument("--kind", choices=["utilisation", "aggregation"], default="utilisation",
+                        help="Вид отчета: о нанесении или об агрегации")
+    status.add_argument("--file-id", type=int, help="ID файла агрегации (статус записывается в файл)")
+    status.add_argument("--report-id", help="Идентификатор отчета (по умолчанию из файла агрегации)")
+
+    subparsers.add_parser("outbox", help="Отправка очереди и досылка частей отчетов о нанесении")
+
+    scan = subparsers.add_parser("scan", help="Проверка отсканированных кодов (по одному в строке stdin)")
+    scan.add_argument("barcodes", nargs="*", help="Коды для проверки (по умолчанию читаются из stdin)")
+
+    watch = subparsers.add_parser("watch", help="Режим службы: наблюдение за папкой обмена")
+    watch.add_argument("folder", help="Папка обмена с файлами агрегации")
+    watch.add_argument("--interval", type=float, default=10.0, help="Интервал проверки папки в секундах")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="Файл берется в работу, если не изменялся указанное время в секундах")
+    watch.add_argument("--comment", default="", help="Комментарий к импортируемым файлам")
+    watch.add_argument("--once", action="store_true", help="Выполнить один проход и завершиться")
+    add_utilisation_arguments(watch, auto=True)
+    return parser
+
+
+def add_utilisation_arguments(parser: argparse.ArgumentParser, auto: bool = False):
+    """Параметры отчета о нанесении"""
+    prefix = "При указании отправляется отчет о нанесении по каждому импортированному файлу. " if auto else ""
+    parser.add_argument("--usage-type", help=prefix + "Тип использования кодов")
+    parser.add_argument("--expiration-date", help="Срок годности (ГГГГ-ММ-ДД)")
+    parser.add_argument("--series-number", default="001", help="Номер серии")
+
+
+def run_command(client: HeadlessClient, args, emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Выполнение команды"""
+    if args.command == "pull-codes":
+        return client.pull_codes(args.order_id, args.gtin, args.quantity)
+    if args.command == "import-aggregation":
+        return client.import_aggregation(args.sources, args.comment)
+    if args.command == "send-utilisation":
+        if args.resume:
+            return client.resume_utilisation(args.file_id)
+        if not args.file_id or not args.usage_type or not args.expiration_date:
+            return {"success": False,
+                    "error": "Укажите --file-id, --usage-type и --expiration-date или --resume"}
+        return client.send_utilisation(args.file_id, args.usage_type, args.expiration_date, args.series_number)
+    if args.command == "send-aggregation":
+        return client.send_aggregation(args.file_id, args.production_line_id, args.production_order_id,
+                                       args.participant_id, args.units)
+    if args.command == "report-status":
+        return client.report_status(args.kind, args.file_id, args.report_id)
+    if args.command == "outbox":
+        return client.replay_outbox()
+    if args.command == "scan":
+        return client.scan(args.barcodes or sys.stdin, emit)
+    if args.command == "watch":
+        utilisation = None
+        if args.usage_type:
+            if not args.expiration_date:
+                return {"success": False, "error": "Для отчета о нанесении укажите --expiration-date"}
+            utilisation = {"usage_type": args.usage_type, "expiration_date": args.expiration_date,
+                           "series_number": args.series_number}
+        watcher = DropFolderWatcher(client, args.folder, args.comment, args.settle, utilisation)
+        if args.once:
+            cycle = watcher.run_once()
+            return {"success": all(section.get("success", True) for section in
+                                   [cycle.get("import", {}), cycle.get("outbox", {})] + cycle.get("utilisation", [])),
+                    **cycle}
+        signal.signal(signal.SIGINT, watcher.stop)
+        signal.signal(signal.SIGTERM, watcher.stop)
+        watcher.run(args.interval, emit)
+        return {"success": True, "stopped": True}
+    return {"success": False, "error": f"Неизвестная команда: {args.command}"}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа в скрипт"""
+    args = build_parser().parse_args(argv)
+    setup_logging(level=logging.INFO if args.verbose else logging.WARNING, log_file=args.log_file,
+                  stream=sys.stderr)
+
+    def emit(result: Dict[str, Any]):
+        print(json.dumps(result, ensure_ascii=False, indent=args.indent, default=str), flush=True)
+
+    client = HeadlessClient(args.db)
+    try:
+        result = run_command(client, args, emit)
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении команды {args.command}: {str(e)}", exc_info=args.verbose)
+        result = {"success": False, "error": str(e)}
+    finally:
+        client.db.commit()
+        client.db.save_code_filters()
+    emit(result)
+    return 0 if result.get("success") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Фикстура mock_suz (имитация СУЗ) для тестов
+pytest_plugins = ["utils.mock_suz"]
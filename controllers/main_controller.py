@@ -1,60 +1,171 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 import logging
 import requests
-from models.models import Order, Connection, Credentials, Nomenclature, Extension, EmissionType, Country, OrderStatus, APIOrder, ReportStatus
+from models.models import Order, Connection, Credentials, Nomenclature, Extension, EmissionType, Country, OrderStatus, APIOrder, ReportStatus, CodeStatus
 import datetime
 import os
 import time
 import json
+import threading
 from typing import List, Dict, Union, Optional, Any, Callable
-from PyQt6.QtCore import Qt
-import csv
+from PyQt6.QtCore import Qt, QTimer
 
 from models.database import Database
 from models.api_client import APIClient
 from models.api_log import APILog
+from utils.aggregation_reader import AggregationFileContent, normalize_barcode, parse_aggregation_data, read_aggregation_file
+from utils.code_export import export_codes_to_file, export_format_for_path
+from utils.utilisation_submitter import CHUNK_PENDING, UtilisationReportSubmitter, response_error
+from utils.outbox import OutboxDispatcher, apply_sent_result, is_connection_error
+from utils.aggregation_report import AggregationReportBuilder
+from utils.startup import StartupTimer
+from utils.gs1 import storage_keys
+from utils.profiling import monitor, timed
 
 logger = logging.getLogger(__name__)
 
 class MainController(QObject):
     """Контроллер приложения"""
-    def __init__(self, view, db, api_client, api_logger):
+    
+    # Результат фоновой проверки доступности API: (доступен, текст ошибки)
+    api_check_finished = pyqtSignal(bool, str)
+    # Итоги обработки очереди отправки в фоновом потоке (None - СУЗ недоступна)
+    outbox_processed = pyqtSignal(object)
+    
+    def __init__(self, view, db, api_client, api_logger, startup_timer: Optional[StartupTimer] = None):
         super().__init__()
         self.view = view
         self.db = db
         self.api_client = api_client
         self.api_logger = api_logger
+        self.startup_timer = startup_timer or StartupTimer()
         
         # Устанавливаем ссылку на базу данных в объект view
         self.view.db = self.db
         
+        # Параметры замера времени операций и профилирования из настроек
+        monitor.load_settings(self.db)
+        
         # Подключение сигналов и слотов
         self.connect_signals()
+        self.api_check_finished.connect(self.on_background_api_check)
+        self.outbox_processed.connect(self.on_outbox_processed)
         
-        # Загрузка данных при запуске
-        self.load_orders()
-        self.load_api_orders_from_db()  # Загружаем API заказы из базы данных
-        self.load_connections()
-        self.load_credentials()
-        self.load_nomenclature()
-        self.load_extensions()
-        self.load_api_logs()
-        self.load_countries()
+        # До показа окна выполняются только быстрые операции с базой данных:
+        # загрузка таблиц и проверка API выполняются после запуска цикла событий
+        with self.startup_timer.stage("api_client_settings"):
+            # Инициализация API-клиента с активными параметрами
+            self.update_api_client_settings()
+            
+            # Обновляем информацию о сервере в строке состояния
+            self.update_server_status_bar()
+        
+        # Очередь отправки запросов, не отправленных из-за ошибки соединения;
+        # проверяется по таймеру и при каждой успешной проверке доступности API
+        self.outbox = OutboxDispatcher(self.api_client, self.db)
+        self._outbox_thread = None
+        self.outbox_timer = QTimer(self)
+        self.outbox_timer.timeout.connect(self.process_outbox)
+        self.outbox_timer.start(60000)
+        
+        # Данные вкладок загружаются при первом открытии вкладки
+        self.tab_loaders = {
+            "orders": self.load_orders,
+            "api_orders": self.load_api_orders_from_db,
+            "performance": self.load_performance,
+        }
+        
+        QTimer.singleShot(0, self.run_deferred_startup)
+    
+    @timed()
+    def run_deferred_startup(self):
+        """Загрузка данных после показа окна
         
-        # Инициализация API-клиента с активными параметрами
-        self.update_api_client_settings()
+        Загружаются справочники и текущая вкладка, остальные вкладки загружаются
+        при первом открытии. Проверка API выполняется в фоновом потоке.
+        """
+        self.startup_timer.mark("event_loop")
         
-        # Загрузка описаний API из файла или экспорт текущих описаний
-        self.load_or_export_api_descriptions()
+        with self.startup_timer.stage("current_tab"):
+            self.view.activate_current_tab()
+        self.startup_timer.mark("interactive")
         
-        # Обновляем информацию о сервере в строке состояния
-        self.update_server_status_bar()
+        with self.startup_timer.stage("references"):
+            self.load_connections()
+            self.load_credentials()
+            self.load_nomenclature()
+            self.load_extensions()
+            self.load_countries()
+            # Очередь отправки загружается сразу: количество ожидающих запросов видно в заголовке вкладки
+            self.load_outbox()
+        
+        with self.startup_timer.stage("api_descriptions"):
+            # Загрузка описаний API из файла или экспорт текущих описаний
+            self.load_or_export_api_descriptions()
         
         # Проверка доступности API при запуске
-        self.check_api()
+        self.check_api_in_background()
+        
+        logger.info(self.startup_timer.summary())
+        self.startup_timer.save(self.db)
+        
+        # Напоминание о неотправленных частях отчетов о нанесении с прошлого запуска
+        unsent_files = self.db.get_files_with_unsent_report_chunks()
+        if unsent_files:
+            logger.warning(f"Есть неотправленные части отчетов о нанесении для файлов: {unsent_files}")
+            self.view.show_message(
+                "Отчет о нанесении",
+                f"Есть неотправленные части отчетов о нанесении ({len(unsent_files)} файлов агрегации). "
+                "Дошлите их кнопкой \"Дослать отчеты о нанесении\" на вкладке файлов агрегации."
+            )
+    
+    def on_tab_activated(self, tab_name):
+        """Загрузка данных вкладки при ее первом открытии
         
-        # Загрузка кодов маркировки при инициализации данных
-        self.load_marking_codes()
+        Args:
+            tab_name (str): Имя вкладки (ключ MainWindow.tab_names)
+        """
+        loader = self.tab_loaders.get(tab_name)
+        if loader:
+            started = time.perf_counter()
+            with monitor.measure(f"tab.{tab_name}"):
+                loader()
+            logger.info(f"Вкладка {tab_name} загружена за {(time.perf_counter() - started) * 1000:.0f} мс")
+    
+    def check_api_in_background(self):
+        """Проверка доступности API в фоновом потоке без сообщений пользователю
+        
+        Результат передается в основной поток сигналом api_check_finished.
+        """
+        if not self.api_client.base_url or not self.api_client.omsid:
+            logger.warning("Проверка API при запуске пропущена: не настроено подключение или OMSID")
+            self.view.update_api_status(False)
+            return
+        
+        def worker():
+            try:
+                # get_ping не вызывает исключение на ответы 4xx/5xx, доступность - по коду ответа
+                response = self.api_client.ping(allow_stale=False)
+                if response["success"]:
+                    self.api_check_finished.emit(True, "")
+                else:
+                    self.api_check_finished.emit(False, str(response.get("error") or response))
+            except Exception as e:
+                self.api_check_finished.emit(False, str(e))
+        
+        threading.Thread(target=worker, name="startup-api-check", daemon=True).start()
+    
+    def on_background_api_check(self, is_available, error):
+        """Обработка результата фоновой проверки доступности API"""
+        self.view.update_api_status(is_available)
+        if is_available:
+            logger.info(f"API доступен (проверка при запуске, {self.startup_timer.elapsed():.2f} с от старта)")
+            # СУЗ доступна - досылаем очередь отправки
+            self.replay_outbox()
+        else:
+            logger.warning(f"API недоступен: {error}. Приложение работает в автономном режиме")
+        if self.view.is_tab_loaded("api_logs"):
+            self.load_api_logs()
     
     def load_or_export_api_descriptions(self):
         """Загрузка описаний API из файла или экспорт текущих описаний"""
@@ -121,6 +232,7 @@ class MainController(QObject):
         self.view.edit_nomenclature_signal.connect(self.edit_nomenclature)
         self.view.delete_nomenclature_signal.connect(self.delete_nomenclature)
         self.view.search_nomenclature_signal.connect(self.search_nomenclature)
+        self.view.import_nomenclature_signal.connect(self.import_nomenclature)
         
         # Сигналы для работы с расширениями API
         self.view.add_extension_signal.connect(self.add_extension)
@@ -130,6 +242,7 @@ class MainController(QObject):
         
         # Сигналы для работы с логами API
         self.view.load_api_logs_signal.connect(self.load_api_logs)
+        self.view.search_api_logs_signal.connect(self.search_api_logs)
         self.view.get_api_log_details_signal.connect(self.on_get_api_log_details)
         self.view.export_api_descriptions_signal.connect(self.export_api_descriptions)
         
@@ -153,16 +266,32 @@ class MainController(QObject):
         self.view.add_marking_codes_signal.connect(self.add_marking_codes)
         self.view.delete_marking_codes_signal.connect(self.delete_marking_codes)
         self.view.export_marking_codes_signal.connect(self.export_marking_codes)
+        self.view.export_marking_codes_by_filter_signal.connect(self.export_marking_codes_to_file)
         
         # Сигналы для работы с файлами агрегации
         self.view.load_aggregation_files_signal.connect(self.load_aggregation_files)
         self.view.add_aggregation_file_signal.connect(self.add_aggregation_file)
+        self.view.import_aggregation_file_signal.connect(self.import_aggregation_file)
+        self.view.import_aggregation_folder_signal.connect(self.import_aggregation_folder)
         self.view.delete_aggregation_file_signal.connect(self.delete_aggregation_file)
         self.view.export_aggregation_file_signal.connect(self.export_aggregation_file)
         self.view.send_utilisation_report_signal.connect(self.send_utilisation_report)
+        self.view.resume_utilisation_reports_signal.connect(self.resume_utilisation_reports)
+        
+        # Сигналы для очереди отправки
+        self.view.load_outbox_signal.connect(self.load_outbox)
+        self.view.tab_activated_signal.connect(self.on_tab_activated)
+        self.view.replay_outbox_signal.connect(self.replay_outbox)
+        self.view.retry_outbox_item_signal.connect(self.retry_outbox_item)
+        self.view.delete_outbox_item_signal.connect(self.delete_outbox_item)
         self.view.check_report_status_signal.connect(self.check_report_status)
         self.view.check_aggregation_status_signal.connect(self.check_aggregation_status)
         self.view.send_aggregation_report_signal.connect(self.send_aggregation_report)
+        
+        # Сигналы для панели производительности
+        self.view.load_performance_signal.connect(self.load_performance)
+        self.view.save_performance_settings_signal.connect(self.save_performance_settings)
+        self.view.clear_performance_signal.connect(self.clear_performance)
     
     def load_all_data(self):
         """Загрузка всех данных из базы данных"""
@@ -177,6 +306,7 @@ class MainController(QObject):
         self.load_marking_codes()
         self.load_aggregation_files()
     
+    @timed()
     def load_orders(self):
         """Загрузка заказов из базы данных"""
         try:
@@ -235,6 +365,7 @@ class MainController(QObject):
             self.view.show_message("Ошибка", 
                 f"Ошибка при загрузке расширений API из базы данных: {str(e)}")
     
+    @timed()
     def load_api_logs(self):
         """Загрузка логов API"""
         try:
@@ -244,6 +375,24 @@ class MainController(QObject):
             logger.error(f"Ошибка при загрузке логов API: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при загрузке логов API: {str(e)}")
     
+    @timed()
+    def search_api_logs(self, query):
+        """Поиск логов API по содержимому запросов и ответов
+        
+        Args:
+            query (str): Код маркировки, reportId или слова; пустая строка - последние записи
+        """
+        try:
+            if not query:
+                self.load_api_logs()
+                return
+            logs = self.api_logger.search(query, limit=500)
+            logger.debug("Найдено %d записей лога API по запросу '%s'", len(logs), query)
+            self.view.update_api_logs_table(logs)
+        except Exception as e:
+            logger.error(f"Ошибка при поиске в логах API: {str(e)}")
+            self.view.show_message("Ошибка", f"Ошибка при поиске в логах API: {str(e)}")
+    
     def get_api_log_details(self, log_id):
         """Получение деталей лога API по ID"""
         try:
@@ -282,52 +431,12 @@ class MainController(QObject):
     def update_api_client_settings(self):
         """Обновление настроек API-клиента из базы данных"""
         try:
-            # Получаем активное подключение
-            connection = self.db.get_active_connection()
+            connection = self.api_client.apply_settings(self.db)
+            # Обновляем информацию о сервере в строке состояния
             if connection:
-                self.api_client.base_url = connection.url
-                # Обновляем информацию о сервере в строке состояния
                 self.view.update_server_status(connection.name, connection.url)
-                
-                # Получаем учетные данные для активного подключения
-                try:
-                    credentials_list = self.db.get_credentials_for_connection(connection.id)
-                    if credentials_list:
-                        # Используем первые учетные данные для этого подключения
-                        self.api_client.omsid = credentials_list[0].omsid
-                        # Токен будет использоваться в запросе ping
-                except Exception as e:
-                    logger.warning(f"Не удалось получить учетные данные для подключения: {str(e)}")
             else:
-                # Если нет активного подключения, очищаем информацию в строке состояния
                 self.view.update_server_status("", "")
-            
-            # Получаем активное расширение API
-            try:
-                extension = self.db.get_active_extension()
-                if extension:
-                    self.api_client.extension = extension.code
-            except Exception as e:
-                logger.warning(f"Не удалось получить активное расширение API: {str(e)}")
-            
-            # Если OMSID еще не установлен, получаем из настроек или первых учетных данных
-            if not hasattr(self.api_client, 'omsid') or not self.api_client.omsid:
-                try:
-                    omsid = self.db.get_setting("omsid", "")
-                    if not omsid:
-                        # Здесь мы берем любые учетные данные, не важно к какому подключению они привязаны
-                        credentials = self.db.get_credentials()
-                        if credentials:
-                            omsid = credentials[0].omsid
-                            # Сохраняем в настройки для будущего использования
-                            self.db.set_setting("omsid", omsid)
-                    self.api_client.omsid = omsid
-                except Exception as e:
-                    logger.warning(f"Не удалось получить OMSID: {str(e)}")
-                    self.api_client.omsid = ""
-            
-            # Устанавливаем ссылку на базу данных в API-клиенте для логирования
-            self.api_client.db = self.db
         except Exception as e:
             logger.error(f"Ошибка при обновлении настроек API-клиента: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при обновлении настроек API-клиента: {str(e)}")
@@ -357,6 +466,9 @@ class MainController(QObject):
             self.view.update_api_status(True)
             self.view.show_message("Проверка API", "API доступен")
             
+            # СУЗ доступна - досылаем очередь отправки
+            self.replay_outbox()
+            
             # Обновляем таблицу логов API
             self.load_api_logs()
             
@@ -699,28 +811,50 @@ class MainController(QObject):
                 self.load_nomenclature()
                 return
                 
-            logger.info(f"Поиск номенклатуры по запросу: {search_query}")
-            
-            # В текущей версии поиск осуществляется через загрузку всех записей
-            # и их фильтрацию на стороне клиента
-            all_nomenclature = self.db.get_nomenclature()
-            
-            # Фильтруем список по поисковому запросу (ищем в названии и GTIN)
-            search_query = search_query.lower()
-            filtered_nomenclature = [
-                item for item in all_nomenclature
-                if search_query in item.name.lower() or search_query in item.gtin.lower()
-            ]
+            # Поиск по полнотекстовому индексу: по началу слов названия и по началу GTIN
+            filtered_nomenclature = self.db.search_nomenclature(search_query)
             
             # Обновляем таблицу с отфильтрованными результатами
             self.view.update_nomenclature_table(filtered_nomenclature)
             
-            logger.info(f"Найдено {len(filtered_nomenclature)} записей по запросу '{search_query}'")
+            logger.debug("Найдено %d записей номенклатуры по запросу '%s'", len(filtered_nomenclature), search_query)
             
         except Exception as e:
             logger.error(f"Ошибка при поиске номенклатуры: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при поиске номенклатуры: {str(e)}")
     
+    @timed()
+    def import_nomenclature(self, file_path):
+        """Пакетный импорт номенклатуры из файла CSV, XLSX или JSON
+        
+        Args:
+            file_path (str): Путь к файлу; записи с существующим GTIN обновляются
+        """
+        from utils.nomenclature_import import read_nomenclature_file
+        
+        try:
+            items, errors = read_nomenclature_file(file_path)
+            if not items:
+                self.view.show_message("Предупреждение", f"В файле {os.path.basename(file_path)} не найдено записей номенклатуры")
+                return
+            
+            result = self.db.import_nomenclature(items)
+            logger.info(f"Импорт номенклатуры из {file_path}: добавлено {result['inserted']}, "
+                        f"обновлено {result['updated']}, пропущено строк {len(errors)}")
+            self.load_nomenclature()
+            
+            message = f"Добавлено записей: {result['inserted']}\nОбновлено записей: {result['updated']}"
+            if errors:
+                # Показываем только первые ошибки
+                errors_text = "\n".join(f"Строка {number}: {error}" for number, error in errors[:10])
+                message += f"\n\nПропущено строк ({len(errors)}):\n{errors_text}"
+                self.view.show_message("Предупреждение", message)
+            else:
+                self.view.show_message("Успех", message)
+        except Exception as e:
+            logger.error(f"Ошибка при импорте номенклатуры: {str(e)}")
+            self.view.show_message("Ошибка", f"Ошибка при импорте номенклатуры: {str(e)}")
+    
     # Методы для работы с расширениями API
     def set_active_extension(self, extension_id):
         """Установка активного расширения API"""
@@ -895,6 +1029,7 @@ class MainController(QObject):
         expected_complete_str = ""
         status = "Непринят"  # По умолчанию статус "Непринят"
         response = None
+        queued = False  # Заказ поставлен в очередь отправки из-за ошибки соединения
         
         try:
             # Обновляем настройки API-клиента перед отправкой запроса
@@ -924,8 +1059,18 @@ class MainController(QObject):
             # Создаем заказ через API
             response = self.api_client.create_order(order_data)
             
+            # Заказ, не отправленный из-за ошибки соединения, ставится в очередь отправки
+            if is_connection_error(response):
+                status = "В очереди"
+                queued = True
+                logger.warning(f"СУЗ недоступна, заказ на эмиссию будет поставлен в очередь отправки: {response.get('error')}")
+                self.view.show_message(
+                    "Предупреждение",
+                    "СУЗ недоступна. Заказ на эмиссию сохранен и будет отправлен автоматически "
+                    "при восстановлении связи (вкладка \"Очередь отправки\")."
+                )
             # Обновляем данные для сохранения заказа
-            if response:
+            elif response:
                 order_id = response.get("orderId", "Не указан")
                 expected_complete_ms = response.get("expectedCompleteTimestamp", 0)
                 
@@ -1001,6 +1146,11 @@ class MainController(QObject):
                     quantity=product.get("quantity", 0)
                 )
             
+            # Ставим заказ в очередь отправки с привязкой к локальной записи
+            if queued:
+                self.outbox.enqueue("order", order_data, ref_id=saved_order.id)
+                self.load_outbox()
+            
             # Обновляем таблицу заказов
             self.load_orders()
             logger.info(f"Заказ сохранен в базу данных со статусом '{status}'")
@@ -1145,7 +1295,13 @@ class MainController(QObject):
         if connection:
             self.view.update_server_status(connection.name, connection.url)
         else:
-            self.view.update_server_status("", "") 
+            self.view.update_server_status("", "")
+        
+        # Доступность API по последнему ответу ping из кэша: строка состояния
+        # не ждет сервер, устаревший ответ обновляется в фоне
+        api_status = self.api_client.cached_api_status()
+        if api_status is not None:
+            self.view.update_api_status(api_status)
 
     def get_order_details(self, order_id):
         """Получение деталей заказа"""
@@ -1162,7 +1318,8 @@ class MainController(QObject):
         """Получение заказов из API в новом формате для вкладки API заказы
         
         Внимание: Этот метод должен вызываться только по прямому запросу пользователя (кнопка "Обновить заказы"),
-        так как на сервере есть ограничение по количеству вызовов API.
+        так как на сервере есть ограничение по количеству вызовов API. Частота запросов
+        дополнительно ограничивается на стороне клиента (utils.rate_limiter).
         """
         try:
             # Обновляем настройки API-клиента перед отправкой запроса
@@ -1341,6 +1498,7 @@ class MainController(QObject):
             logger.error(f"Ошибка при удалении статуса заказа: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при удалении статуса заказа: {str(e)}")
 
+    @timed()
     def load_api_orders_from_db(self):
         """Загрузка сохраненных API заказов из базы данных
         
@@ -1414,6 +1572,7 @@ class MainController(QObject):
             logger.error(f"Ошибка при удалении API заказа: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при удалении API заказа: {str(e)}")
     
+    @timed()
     def get_km_from_order(self, order_id, gtin, quantity):
         """Получение КМ из заказа
         
@@ -1435,8 +1594,8 @@ class MainController(QObject):
                 quantity=quantity
             )
             
-            # Логируем полный ответ для отладки
-            logger.debug(f"Полный ответ от API: {response}")
+            # Полный ответ с кодами форматируется только при включенном уровне DEBUG
+            logger.debug("Полный ответ от API: %s", response)
             
             # Проверяем успешность выполнения запроса
             if response.get("success", False):
@@ -1449,71 +1608,8 @@ class MainController(QObject):
                 
                 # Если есть коды, отображаем их в представлении и сохраняем в БД
                 if codes_count > 0:
-                    # Проверяем существование таблицы marking_codes
-                    cursor = self.db.conn.cursor()
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='marking_codes'")
-                    if not cursor.fetchone():
-                        logger.error("Таблица marking_codes не существует. Создаем таблицу...")
-                        cursor.execute('''
-                            CREATE TABLE IF NOT EXISTS marking_codes (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                code TEXT NOT NULL,
-                                gtin TEXT NOT NULL,
-                                order_id TEXT NOT NULL,
-                                used INTEGER DEFAULT 0,
-                                exported INTEGER DEFAULT 0,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                            )
-                        ''')
-                        self.db.conn.commit()
-                        logger.info("Таблица marking_codes создана")
-                    
-                    # Очищаем коды от возможных невалидных символов для БД
-                    # Конвертируем контрольные символы в текстовое представление
-                    processed_codes = []
-                    for i, code in enumerate(codes):
-                        # Логируем каждый код для отладки
-                        logger.debug(f"Исходный код {i}: {repr(code)}")
-                        
-                        # Заменяем Group Separator (GS, ASCII 29, \u001d) на текстовое представление [GS]
-                        processed_code = code.replace('\u001d', '[GS]')
-                        
-                        # Проверяем, что все непечатаемые символы заменены
-                        if any(ord(c) < 32 for c in processed_code):
-                            logger.warning(f"Код содержит непечатаемые символы после обработки: {repr(processed_code)}")
-                            # Заменяем все непечатаемые символы на их представление
-                            processed_code = ''.join(c if ord(c) >= 32 else f'[{ord(c)}]' for c in processed_code)
-                            
-                        processed_codes.append(processed_code)
-                        logger.debug(f"Обработанный код {i}: {repr(processed_code)}")
-                    
-                    # Пробуем сохранить коды напрямую
-                    try:
-                        cursor = self.db.conn.cursor()
-                        
-                        # Подготавливаем данные для вставки
-                        data = [(code, gtin, order_id) for code in processed_codes]
-                        
-                        # Выполняем вставку каждого кода по отдельности для лучшей диагностики
-                        for i, (code, g, o_id) in enumerate(data):
-                            try:
-                                cursor.execute(
-                                    "INSERT INTO marking_codes (code, gtin, order_id) VALUES (?, ?, ?)",
-                                    (code, g, o_id)
-                                )
-                                logger.debug(f"Код {i} успешно вставлен в БД")
-                            except Exception as e:
-                                logger.error(f"Ошибка при вставке кода {i}: {str(e)}")
-                        
-                        self.db.conn.commit()
-                        save_result = True
-                        logger.info(f"Коды сохранены напрямую в базу данных: {len(processed_codes)} шт.")
-                    except Exception as e:
-                        logger.error(f"Ошибка при прямом сохранении кодов: {str(e)}")
-                        
-                        # Пробуем использовать метод из класса Database
-                        save_result = self.db.save_marking_codes(processed_codes, gtin, order_id)
+                    # Коды разбираются, проверяются на дубликаты и сохраняются одной вставкой
+                    save_result = self.db.save_marking_codes(codes, gtin, order_id)
                     
                     if save_result:
                         message += " и сохранено в базу данных"
@@ -1521,16 +1617,12 @@ class MainController(QObject):
                     else:
                         message += ", но не удалось сохранить их в базу данных"
                         logger.warning(f"Не удалось сохранить коды в базу данных для заказа {order_id}")
-                    
-                    # Добавляем 2 потерянных кода вручную (если они были получены ранее)
-                    if not save_result and len(codes) >= 2:
+                        
+                        # Все полученные коды сохраняются в файл для восстановления
                         try:
-                            # Сохраняем первые 2 кода в отдельный файл для восстановления
                             with open(f"recovered_codes_{order_id}.txt", "w", encoding="utf-8") as f:
-                                for i, code in enumerate(codes[:2]):
-                                    processed_code = code.replace('\u001d', '[GS]')
-                                    f.write(f"{processed_code}\n")
-                            logger.info(f"Сохранены 2 кода для восстановления в файл recovered_codes_{order_id}.txt")
+                                f.writelines(f"{code}\n" for code in storage_keys(codes))
+                            logger.info(f"Сохранено {codes_count} кодов для восстановления в файл recovered_codes_{order_id}.txt")
                         except Exception as e:
                             logger.error(f"Ошибка при сохранении кодов в файл: {str(e)}")
                     
@@ -1612,6 +1704,11 @@ class MainController(QObject):
             # Обновляем таблицу в интерфейсе
             self.view.update_marking_codes_table(codes)
             
+            # Сводка по статусам считается по индексу, без чтения самих кодов
+            self.view.update_code_status_counts(
+                self.db.get_code_status_counts(order_id=filters.get("order_id"), gtin=filters.get("gtin"))
+            )
+            
             # Логируем результат
             logger.info(f"Получено {len(codes)} кодов маркировки")
             
@@ -1673,6 +1770,7 @@ class MainController(QObject):
             logger.error(f"Ошибка при отметке кодов как экспортированных: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при отметке кодов как экспортированных: {str(e)}")
     
+    @timed()
     def load_marking_codes(self):
         """Загрузка кодов маркировки из базы данных"""
         try:
@@ -1685,6 +1783,7 @@ class MainController(QObject):
             
             # Обновляем таблицу в интерфейсе
             self.view.update_marking_codes_table(codes)
+            self.view.update_code_status_counts(self.db.get_code_status_counts())
             logger.info(f"Таблица кодов маркировки обновлена, получено {len(codes)} записей")
         except Exception as e:
             logger.error(f"Ошибка при загрузке кодов маркировки: {str(e)}")
@@ -1731,18 +1830,8 @@ class MainController(QObject):
             if not self.view.show_confirmation("Удаление кодов маркировки", f"Вы действительно хотите удалить {len(code_ids)} кодов маркировки?"):
                 return
             
-            # Удаляем коды маркировки из базы данных
-            # Предполагаем, что в базе есть метод для удаления кодов маркировки
-            # Если такого метода нет, его нужно будет реализовать
-            deleted_count = 0
-            for code_id in code_ids:
-                # Удаляем код маркировки по ID
-                cursor = self.db.conn.cursor()
-                cursor.execute("DELETE FROM marking_codes WHERE id = ?", (code_id,))
-                deleted_count += cursor.rowcount
-            
-            # Сохраняем изменения в базе данных
-            self.db.commit()
+            # Удаляем коды маркировки из базы данных одним запросом
+            deleted_count = self.db.delete_marking_codes(code_ids)
             
             if deleted_count > 0:
                 logger.info(f"Удалено {deleted_count} кодов маркировки")
@@ -1763,7 +1852,7 @@ class MainController(QObject):
         
         Args:
             code_ids (list): Список ID кодов маркировки для экспорта
-            export_path (str): Путь для сохранения файла
+            export_path (str): Путь для сохранения файла (.csv - таблица, иначе коды GS1 построчно)
         """
         try:
             # Проверяем входные данные
@@ -1771,50 +1860,59 @@ class MainController(QObject):
                 self.view.show_message("Ошибка", "Не выбраны коды маркировки для экспорта")
                 return
             
+            self.export_marking_codes_to_file({"code_ids": code_ids}, export_path, export_format_for_path(export_path))
+            
+        except Exception as e:
+            logger.error(f"Ошибка при экспорте кодов маркировки: {str(e)}")
+            self.view.show_message("Ошибка", f"Ошибка при экспорте кодов маркировки: {str(e)}")
+
+    @timed()
+    def export_marking_codes_to_file(self, filters, export_path, export_format):
+        """Потоковый экспорт кодов маркировки по фильтру с отметкой об экспорте
+        
+        Args:
+            filters (dict): Фильтры выборки
+                code_ids (list, optional): Список ID кодов
+                order_id (str, optional): Фильтр по ID заказа
+                gtin (str, optional): Фильтр по GTIN
+                status (str, optional): Фильтр по статусу кода
+            export_path (str): Путь для сохранения файла
+            export_format (str): Формат выгрузки (gs1, gs, csv, txt)
+        """
+        try:
             if not export_path:
                 self.view.show_message("Ошибка", "Не указан путь для сохранения файла")
                 return
             
-            # Получаем коды маркировки из базы данных
-            cursor = self.db.conn.cursor()
-            placeholders = ", ".join(["?"] * len(code_ids))
-            query = f"SELECT id, code, gtin, order_id, created_at FROM marking_codes WHERE id IN ({placeholders})"
-            cursor.execute(query, code_ids)
-            codes = cursor.fetchall()
+            # Коды читаются из базы порциями и сразу пишутся в файл
+            count = export_codes_to_file(
+                self.db, export_path, export_format,
+                code_ids=filters.get("code_ids"),
+                order_id=filters.get("order_id"),
+                gtin=filters.get("gtin"),
+                statuses=filters.get("statuses")
+            )
             
-            if not codes:
-                self.view.show_message("Ошибка", "Не удалось получить коды маркировки для экспорта")
+            if not count:
+                self.view.show_message("Ошибка", "Не найдено кодов маркировки для экспорта")
                 return
             
-            # Экспортируем коды маркировки в CSV файл
-            with open(export_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f, delimiter=";")
-                # Записываем заголовок
-                writer.writerow(["ID", "Код", "GTIN", "Заказ", "Дата создания"])
-                # Записываем данные
-                for code in codes:
-                    writer.writerow([
-                        code["id"],
-                        code["code"],
-                        code["gtin"],
-                        code["order_id"],
-                        code["created_at"]
-                    ])
-            
-            # Отмечаем коды как экспортированные
-            self.mark_codes_as_exported(code_ids)
+            # Обновляем таблицу кодов маркировки
+            self.get_marking_codes(getattr(self, "_last_marking_codes_filters", {}))
             
-            logger.info(f"Экспортировано {len(codes)} кодов маркировки в файл {export_path}")
-            self.view.show_message("Успех", f"Экспортировано {len(codes)} кодов маркировки")
+            logger.info(f"Экспортировано {count} кодов маркировки в файл {export_path}")
+            self.view.show_message("Успех", f"Экспортировано {count} кодов маркировки")
             
         except Exception as e:
             logger.error(f"Ошибка при экспорте кодов маркировки: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при экспорте кодов маркировки: {str(e)}")
 
+    @timed()
     def load_aggregation_files(self):
         """Загрузка файлов агрегации из базы данных"""
         try:
-            files = self.db.get_aggregation_files()
+            # Для таблицы достаточно сводки, полные данные загружаются при открытии отчета
+            files = self.db.get_aggregation_file_summaries()
             self.view.update_aggregation_files_table(files)
             logger.info("Таблица файлов агрегации обновлена")
         except Exception as e:
@@ -1830,177 +1928,125 @@ class MainController(QObject):
             comment (str): Комментарий к файлу
         """
         try:
-            # Получаем название продукции
-            product = data.get('NameProduct', "")
-            # Если название продукции пустое, попробуем найти в других возможных полях
-            if not product:
-                # Проверяем другие возможные названия поля продукции
-                possible_product_fields = ['nameProduct', 'productName', 'name', 'product', 'Product']
-                for field in possible_product_fields:
-                    if field in data and data[field]:
-                        product = data[field]
-                        logger.info(f"Найдено название продукции в поле '{field}': {product}")
-                        break
-                        
-                # Если всё еще не нашли, попробуем поискать в глубине JSON
-                if not product:
-                    def find_product_name(obj, path=""):
-                        if isinstance(obj, dict):
-                            for key, value in obj.items():
-                                key_lower = key.lower()
-                                if 'product' in key_lower and 'name' in key_lower and isinstance(value, str):
-                                    return value
-                                elif key_lower in ['nameproduct', 'productname', 'name', 'product'] and isinstance(value, str):
-                                    return value
-                                
-                                result = find_product_name(value, f"{path}.{key}" if path else key)
-                                if result:
-                                    return result
-                        elif isinstance(obj, list):
-                            for i, item in enumerate(obj):
-                                result = find_product_name(item, f"{path}[{i}]")
-                                if result:
-                                    return result
-                        return None
-                        
-                    product_from_search = find_product_name(data)
-                    if product_from_search:
-                        product = product_from_search
-                        logger.info(f"Найдено название продукции при глубоком поиске: {product}")
-            
-            logger.info(f"Обработка файла агрегации: {filename}")
-            logger.info(f"Название продукции: {product}")
-            
-            # Попробуем найти элементы разными способами
-            marking_codes = []  # уровень 0
-            level1_codes = []   # уровень 1
-            level2_codes = []   # уровень 2
-            
-            # Для хранения всех кодов (для отметки использованных)
-            all_codes = set()
-            
-            # Логирование ключей в JSON
-            logger.info(f"Ключи в JSON: {list(data.keys())}")
-            
-            # Метод 1: Проверяем наличие поля 'items'
-            items = data.get('items', [])
-            if items and isinstance(items, list):
-                logger.info(f"Найдено поле 'items' с {len(items)} элементами")
-                for item in items:
-                    if not isinstance(item, dict):
-                        continue
-                    level = item.get('level', 0)
-                    barcode = item.get('Barcode', '')
-                    if barcode:
-                        # Нормализуем формат кода - заменяем \u001d на [GS]
-                        normalized_barcode = self.normalize_barcode(barcode)
-                        all_codes.add(normalized_barcode)  # Добавляем в общий набор кодов
-                        if level == 0:
-                            marking_codes.append(normalized_barcode)
-                        elif level == 1:
-                            level1_codes.append(normalized_barcode)
-                        elif level == 2:
-                            level2_codes.append(normalized_barcode)
-            
-            # Если кодов всё ещё нет, попробуем другой метод
-            if not marking_codes and not level1_codes and not level2_codes:
-                # Метод 2: Проверяем каждый ключ в данных
-                for key, value in data.items():
-                    if isinstance(value, dict):
-                        # Если значение - словарь, проверяем его поля
-                        level = value.get('level', None)
-                        barcode = value.get('Barcode', '')
-                        if barcode and level is not None:
-                            # Нормализуем формат кода
-                            normalized_barcode = self.normalize_barcode(barcode)
-                            all_codes.add(normalized_barcode)  # Добавляем в общий набор кодов
-                            if level == 0:
-                                marking_codes.append(normalized_barcode)
-                            elif level == 1:
-                                level1_codes.append(normalized_barcode)
-                            elif level == 2:
-                                level2_codes.append(normalized_barcode)
-                    elif isinstance(value, list):
-                        # Если значение - список, проверяем каждый элемент
-                        for item in value:
-                            if isinstance(item, dict):
-                                level = item.get('level', None)
-                                barcode = item.get('Barcode', '')
-                                if barcode and level is not None:
-                                    # Нормализуем формат кода
-                                    normalized_barcode = self.normalize_barcode(barcode)
-                                    all_codes.add(normalized_barcode)  # Добавляем в общий набор кодов
-                                    if level == 0:
-                                        marking_codes.append(normalized_barcode)
-                                    elif level == 1:
-                                        level1_codes.append(normalized_barcode)
-                                    elif level == 2:
-                                        level2_codes.append(normalized_barcode)
-            
-            # Если кодов все ещё нет, попробуем рекурсивный метод для поиска
-            if not marking_codes and not level1_codes and not level2_codes:
-                logger.info("Пробуем рекурсивный поиск Barcode и level")
-                
-                def search_in_json(obj, path=""):
-                    if isinstance(obj, dict):
-                        # Проверяем, есть ли в этом словаре Barcode и level
-                        barcode = obj.get('Barcode', '')
-                        level = obj.get('level', None)
-                        if barcode and level is not None:
-                            logger.info(f"Найден Barcode: {barcode}, level: {level} по пути {path}")
-                            # Нормализуем формат кода
-                            normalized_barcode = self.normalize_barcode(barcode)
-                            all_codes.add(normalized_barcode)  # Добавляем в общий набор кодов
-                            if level == 0:
-                                marking_codes.append(normalized_barcode)
-                            elif level == 1:
-                                level1_codes.append(normalized_barcode)
-                            elif level == 2:
-                                level2_codes.append(normalized_barcode)
-                        
-                        # Проверяем вложенные элементы
-                        for key, value in obj.items():
-                            search_in_json(value, f"{path}.{key}" if path else key)
-                    elif isinstance(obj, list):
-                        for i, item in enumerate(obj):
-                            search_in_json(item, f"{path}[{i}]")
-                
-                search_in_json(data)
-            
-            # Логирование результатов
-            logger.info(f"Найдено кодов маркировки (уровень 0): {len(marking_codes)}")
-            logger.info(f"Найдено кодов агрегации 1 уровня: {len(level1_codes)}")
-            logger.info(f"Найдено кодов агрегации 2 уровня: {len(level2_codes)}")
-            logger.info(f"Всего уникальных кодов: {len(all_codes)}")
-            
-            # Сохраняем полное содержимое JSON
-            json_content = json.dumps(data)
-            
-            # Добавляем файл в базу данных
-            file = self.db.add_aggregation_file(
-                filename=filename,
-                product=product,
-                marking_codes=marking_codes,
-                level1_codes=level1_codes,
-                level2_codes=level2_codes,
-                comment=comment,
-                json_content=json_content
-            )
+            # Разбираем уже загруженный документ за один проход
+            content = parse_aggregation_data(data)
+            content.json_content = json.dumps(data)
+            self.save_aggregation_file_content(filename, content, comment)
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении файла агрегации: {str(e)}")
+            logger.exception("Подробная информация об ошибке:")
+            self.view.show_message("Ошибка", f"Ошибка при добавлении файла агрегации: {str(e)}")
+
+    @timed()
+    def import_aggregation_file(self, file_path: str, comment: str):
+        """Импорт файла агрегации с диска потоковым разбором
+        
+        Args:
+            file_path (str): Путь к JSON-файлу агрегации
+            comment (str): Комментарий к файлу
+        """
+        try:
+            # Исходный текст файла сохраняется как есть, без повторной сериализации
+            content = read_aggregation_file(file_path)
+            self.save_aggregation_file_content(os.path.basename(file_path), content, comment)
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении файла агрегации: {str(e)}")
+            logger.exception("Подробная информация об ошибке:")
+            self.view.show_message("Ошибка", f"Ошибка при добавлении файла агрегации: {str(e)}")
+
+    @timed()
+    def import_aggregation_folder(self, source: str, comment: str):
+        """Пакетный импорт файлов агрегации из папки или по маске
+        
+        Файлы разбираются параллельно, записываются пачками, таблицы обновляются один раз в конце.
+        
+        Args:
+            source (str): Папка с JSON-файлами или glob-маска
+            comment (str): Комментарий, сохраняемый для каждого файла
+        """
+        # Пул процессов нужен только для пакетного импорта - модуль загружается при первом вызове
+        from utils.aggregation_importer import AggregationBatchImporter, collect_aggregation_files
+        
+        try:
+            files = collect_aggregation_files(source)
+            if not files:
+                self.view.show_message("Предупреждение", f"Не найдено файлов агрегации: {source}")
+                return
             
-            # Отмечаем коды как использованные в таблице "Коды маркировки"
-            if all_codes:
-                self.mark_codes_used_by_barcodes(list(all_codes))
+            logger.info(f"Пакетный импорт {len(files)} файлов агрегации из {source}")
+            importer = AggregationBatchImporter(self.db)
+            result = importer.run(files, comment, progress_callback=self.view.update_import_progress)
             
-            # Обновляем таблицу файлов агрегации
+            # Обновляем таблицы один раз после импорта всех файлов
             self.load_aggregation_files()
-            
-            logger.info(f"Файл агрегации '{filename}' успешно добавлен")
-            self.view.show_message("Успех", f"Файл агрегации '{filename}' успешно добавлен")
-            
+            self.get_marking_codes(getattr(self, "_last_marking_codes_filters", {}))
+            
+            message = (f"Импортировано файлов: {result['imported']} из {result['total']}\n"
+                       f"Отмечено кодов как использованные: {result['marked_codes']}")
+            if result["duplicates"]:
+                duplicates_text = "\n".join(f"{filename}: {count}" for filename, count in result["duplicates"][:10])
+                message += f"\n\nКоды уже включены в другие файлы агрегации ({len(result['duplicates'])}):\n{duplicates_text}"
+            if result["errors"]:
+                # Показываем только первые ошибки, полный список - в логе
+                errors_text = "\n".join(f"{filename}: {error}" for filename, error in result["errors"][:10])
+                message += f"\n\nОшибки ({len(result['errors'])}):\n{errors_text}"
+                self.view.show_message("Предупреждение", message)
+            else:
+                self.view.show_message("Успех", message)
+                
         except Exception as e:
-            logger.error(f"Ошибка при добавлении файла агрегации: {str(e)}")
+            logger.error(f"Ошибка при пакетном импорте файлов агрегации: {str(e)}")
             logger.exception("Подробная информация об ошибке:")
-            self.view.show_message("Ошибка", f"Ошибка при добавлении файла агрегации: {str(e)}")
+            self.view.show_message("Ошибка", f"Ошибка при пакетном импорте файлов агрегации: {str(e)}")
+
+    def save_aggregation_file_content(self, filename: str, content: AggregationFileContent, comment: str):
+        """Сохранение разобранного файла агрегации и отметка его кодов как использованных
+        
+        Args:
+            filename (str): Имя файла
+            content (AggregationFileContent): Результат разбора файла
+            comment (str): Комментарий к файлу
+        """
+        logger.info(f"Обработка файла агрегации: {filename}")
+        logger.info(f"Название продукции: {content.product}")
+        logger.info(f"Найдено кодов маркировки (уровень 0): {len(content.marking_codes)}")
+        logger.info(f"Найдено кодов агрегации 1 уровня: {len(content.level1_codes)}")
+        logger.info(f"Найдено кодов агрегации 2 уровня: {len(content.level2_codes)}")
+        logger.info(f"Всего уникальных кодов: {len(content.all_codes)}")
+        
+        # Коды, уже включенные в ранее импортированные файлы агрегации
+        duplicates = self.db.find_aggregated_codes(content.marking_codes)
+        if duplicates:
+            code, file_id = duplicates[0]
+            logger.warning(f"Файл агрегации {filename}: {len(duplicates)} кодов уже включены в другие файлы "
+                           f"(например, {code} в файле ID {file_id})")
+        
+        # Добавляем файл в базу данных
+        file = self.db.add_aggregation_file(
+            filename=filename,
+            product=content.product,
+            marking_codes=content.marking_codes,
+            level1_codes=content.level1_codes,
+            level2_codes=content.level2_codes,
+            comment=comment,
+            json_content=content.json_content,
+            json_path=content.source_path
+        )
+        
+        # Отмечаем коды как использованные в таблице "Коды маркировки"
+        if content.all_codes:
+            self.mark_codes_used_by_barcodes(list(content.all_codes), file_id=file.id)
+        
+        # Обновляем таблицу файлов агрегации
+        self.load_aggregation_files()
+        
+        logger.info(f"Файл агрегации '{filename}' успешно добавлен")
+        if duplicates:
+            self.view.show_message("Предупреждение",
+                                   f"Файл агрегации '{filename}' добавлен, но {len(duplicates)} кодов "
+                                   f"уже включены в другие файлы агрегации (например, {duplicates[0][0]})")
+        else:
+            self.view.show_message("Успех", f"Файл агрегации '{filename}' успешно добавлен")
 
     def normalize_barcode(self, barcode):
         """Нормализует формат штрих-кода, заменяя различные представления разделителя GS
@@ -2011,21 +2057,7 @@ class MainController(QObject):
         Returns:
             str: Нормализованный штрих-код
         """
-        # Заменяем различные представления разделителя GS на [GS]
-        normalized = barcode
-        
-        # Заменяем \u001d (unicode) на [GS]
-        normalized = normalized.replace('\u001d', '[GS]')
-        
-        # Заменяем литеральную строку '\u001d' на [GS]
-        normalized = normalized.replace('\\u001d', '[GS]')
-        
-        # Заменяем ASCII-код 29 (GS) на [GS]
-        if '\x1d' in normalized:
-            normalized = normalized.replace('\x1d', '[GS]')
-        
-        logger.debug(f"Нормализация штрих-кода: '{barcode}' -> '{normalized}'")
-        return normalized
+        return normalize_barcode(barcode)
 
     def delete_aggregation_file(self, file_id: int):
         """Удаление файла агрегации
@@ -2034,8 +2066,8 @@ class MainController(QObject):
             file_id (int): ID файла агрегации
         """
         try:
-            # Получаем информацию о файле для сообщения
-            file = self.db.get_aggregation_file_by_id(file_id)
+            # Получаем информацию о файле для сообщения (нужны только списки кодов)
+            file = self.db.get_aggregation_file_by_id(file_id, with_content=False)
             if not file:
                 self.view.show_message("Ошибка", f"Файл агрегации с ID {file_id} не найден")
                 return
@@ -2050,7 +2082,7 @@ class MainController(QObject):
             if self.db.delete_aggregation_file(file_id):
                 # Отмечаем коды как неиспользованные в таблице "Коды маркировки"
                 if all_codes:
-                    self.unmark_codes_used_by_barcodes(list(all_codes))
+                    self.unmark_codes_used_by_barcodes(list(all_codes), file_id=file_id)
                     
                 # Обновляем таблицу файлов агрегации
                 self.load_aggregation_files()
@@ -2064,40 +2096,43 @@ class MainController(QObject):
             logger.error(f"Ошибка при удалении файла агрегации: {str(e)}")
             self.view.show_message("Ошибка", f"Ошибка при удалении файла агрегации: {str(e)}")
         
-    def mark_codes_used_by_barcodes(self, barcodes: List[str]):
+    def mark_codes_used_by_barcodes(self, barcodes: List[str], file_id: Optional[int] = None):
         """Отметить коды маркировки как использованные по значению штрих-кода
         
         Args:
             barcodes (List[str]): Список штрих-кодов
+            file_id (int, optional): ID файла агрегации, в который входят коды
         """
         try:
-            # Получаем ID кодов маркировки по значениям штрих-кодов
-            code_ids = self.db.get_marking_code_ids_by_barcodes(barcodes)
+            # Отметка выполняется одним запросом через временную таблицу штрих-кодов
+            count = self.db.mark_codes_used_by_barcodes(barcodes, used=True, file_id=file_id)
             
-            if code_ids:
-                logger.info(f"Найдено {len(code_ids)} кодов маркировки для отметки как использованные")
-                # Отмечаем их как использованные
-                self.mark_codes_as_used(code_ids)
+            if count:
+                logger.info(f"Успешно отмечено {count} кодов как использованные")
+                self.view.show_message("Успех", f"Успешно отмечено {count} кодов как использованные")
+                
+                # Обновляем таблицу кодов маркировки
+                last_filters = getattr(self, "_last_marking_codes_filters", {})
+                self.get_marking_codes(last_filters)
             else:
                 logger.info("Не найдено кодов маркировки для отметки как использованные")
                 
         except Exception as e:
             logger.error(f"Ошибка при отметке кодов как использованных по штрих-кодам: {str(e)}")
         
-    def unmark_codes_used_by_barcodes(self, barcodes: List[str]):
+    def unmark_codes_used_by_barcodes(self, barcodes: List[str], file_id: Optional[int] = None):
         """Снять отметку 'использованные' с кодов маркировки по значению штрих-кода
         
         Args:
             barcodes (List[str]): Список штрих-кодов
+            file_id (int, optional): ID удаляемого файла агрегации
         """
         try:
-            # Получаем ID кодов маркировки по значениям штрих-кодов
-            code_ids = self.db.get_marking_code_ids_by_barcodes(barcodes)
+            # Снятие отметки выполняется одним запросом через временную таблицу штрих-кодов
+            count = self.db.mark_codes_used_by_barcodes(barcodes, used=False, file_id=file_id)
             
-            if code_ids:
-                logger.info(f"Найдено {len(code_ids)} кодов маркировки для снятия отметки 'использованные'")
-                # Снимаем отметку 'использованные'
-                self.db.unmark_codes_as_used(code_ids)
+            if count:
+                logger.info(f"Снята отметка 'использованные' с {count} кодов маркировки")
                 # Обновляем таблицу кодов маркировки, если она открыта
                 self.load_marking_codes()
             else:
@@ -2114,8 +2149,8 @@ class MainController(QObject):
             export_path (str): Путь для сохранения файла
         """
         try:
-            # Получаем файл агрегации по ID
-            file = self.db.get_aggregation_file_by_id(file_id)
+            # Получаем файл агрегации по ID; содержимое JSON записывается как есть, без разбора
+            file = self.db.get_aggregation_file_by_id(file_id, parse_content=False)
             if not file:
                 self.view.show_message("Ошибка", f"Файл агрегации с ID {file_id} не найден")
                 return False
@@ -2192,50 +2227,53 @@ class MainController(QObject):
                 )
                 logger.warning("omsId не найден для отчета о нанесении!")
             
+            # Определяем файл агрегации, по которому сформирован отчет
+            file_id = report_data.pop('file_id', None)
+            
+            # Если file_id не передан, пытаемся получить его из первого выбранного элемента в таблице
+            if not file_id:
+                try:
+                    # Получаем выбранный файл агрегации из представления
+                    selected_items = self.view.aggregation_files_table.selectedItems()
+                    if selected_items:
+                        row = selected_items[0].row()
+                        item = self.view.aggregation_files_table.item(row, 0)
+                        if item:
+                            file_id = int(item.data(Qt.ItemDataRole.UserRole))
+                            logger.info(f"Получен file_id из выбранной строки: {file_id}")
+                except Exception as e:
+                    logger.error(f"Ошибка при получении file_id из выбранной строки: {str(e)}")
+            
+            # Отчет по файлу агрегации отправляется по частям с сохранением состояния каждой части
+            if file_id:
+                self.submit_utilisation_report(file_id, report_data)
+                return
+            
             # Отправляем отчет через API-клиент
             response = self.api_client.post_utilisation(report_data)
             
+            # Отчет, не отправленный из-за ошибки соединения, ставится в очередь отправки
+            if is_connection_error(response):
+                self.outbox.enqueue("utilisation", report_data)
+                self.load_outbox()
+                self.view.show_message(
+                    "Отчет о нанесении",
+                    "СУЗ недоступна. Отчет поставлен в очередь и будет отправлен при восстановлении связи."
+                )
+                return
+            
             # Обрабатываем ответ
             if response.get('success', False):
                 # Проверяем, содержит ли ответ omsId и reportId
                 if 'omsId' in response and 'reportId' in response:
-                    # Извлекаем reportId для сохранения в БД
-                    oms_id = response['omsId']
                     report_id = response['reportId']
                     logger.info(f"Получен reportId отчета о нанесении: {report_id}")
                     
-                    # Находим file_id из report_data
-                    file_id = None
-                    # Для этого метода нам нужно знать, какой файл агрегации использовался
-                    # Мы можем получить эту информацию из контекста вызова
-                    # В данном случае предполагаем, что file_id доступен через аргументы
-                    if hasattr(report_data, 'file_id'):
-                        file_id = report_data.file_id
-                    elif isinstance(report_data, dict) and 'file_id' in report_data:
-                        file_id = report_data['file_id']
-                    
-                    # Если file_id не найден, пытаемся получить его из первого выбранного элемента в таблице
-                    if not file_id:
-                        try:
-                            # Получаем выбранный файл агрегации из представления
-                            selected_items = self.view.aggregation_files_table.selectedItems()
-                            if selected_items:
-                                row = selected_items[0].row()
-                                item = self.view.aggregation_files_table.item(row, 0)
-                                if item:
-                                    file_id = int(item.data(Qt.ItemDataRole.UserRole))
-                                    logger.info(f"Получен file_id из выбранной строки: {file_id}")
-                        except Exception as e:
-                            logger.error(f"Ошибка при получении file_id из выбранной строки: {str(e)}")
-                    
-                    # Если удалось получить file_id, сохраняем reportId
-                    if file_id:
-                        try:
-                            # Добавляем запись в таблицу или обновляем существующую
-                            self.db.update_aggregation_file_report_id(file_id, report_id)
-                            logger.info(f"Сохранен reportId для файла агрегации с ID {file_id}: {report_id}")
-                        except Exception as e:
-                            logger.error(f"Ошибка при сохранении reportId: {str(e)}")
+                    # Переводим переданные в отчете коды в статус UTILISED
+                    utilised = self.db.transition_codes_by_barcodes(
+                        report_data['sntins'], CodeStatus.UTILISED, "utilisation_report", report_id
+                    )
+                    logger.info(f"Переведено в статус UTILISED кодов: {utilised}")
                     
                     # Отображаем сообщение с дополнительной информацией о reportId
                     self.view.show_message(
@@ -2246,23 +2284,56 @@ class MainController(QObject):
                     # Стандартное сообщение об успехе
                     self.view.show_message("Отчет о нанесении", "Отчет успешно отправлен")
             else:
-                error_message = "Ошибка при отправке отчета"
-                if 'fieldErrors' in response:
-                    field_errors = []
-                    for field_error in response['fieldErrors']:
-                        field_errors.append(f"{field_error.get('fieldName')}: {field_error.get('fieldError')}")
-                    error_message += ": " + ", ".join(field_errors)
-                elif 'globalErrors' in response:
-                    error_message += ": " + ", ".join(response['globalErrors'])
-                elif 'error' in response and isinstance(response['error'], dict) and 'message' in response['error']:
-                    error_message += ": " + response['error']['message']
-                
-                self.view.show_message("Ошибка", error_message)
+                self.view.show_message("Ошибка", f"Ошибка при отправке отчета: {response_error(response)}")
             
         except Exception as e:
             logger.error(f"Ошибка при отправке отчета: {str(e)}")
             self.view.show_message("Ошибка", f"Не удалось отправить отчет: {str(e)}")
 
+    @timed()
+    def submit_utilisation_report(self, file_id, report_data=None):
+        """Отправка отчета о нанесении по файлу агрегации частями
+        
+        Args:
+            file_id (int): ID файла агрегации
+            report_data (dict, optional): Данные нового отчета; если не указаны,
+                досылаются ранее сохраненные неотправленные части
+        """
+        try:
+            submitter = UtilisationReportSubmitter(self.api_client, self.db)
+            result = submitter.submit(file_id, report_data)
+            
+            if result["report_ids"]:
+                # Для проверки статуса в файле агрегации сохраняется reportId первой части
+                self.db.update_aggregation_file_report_id(file_id, result["report_ids"][0])
+            
+            self.load_aggregation_files()
+            self.load_api_logs()
+            
+            message = (f"Отправлено частей отчета: {result['sent']} из {result['total']}\n"
+                       f"Идентификаторы отчетов: {', '.join(result['report_ids']) or 'нет'}")
+            if result["failed"]:
+                errors = "\n".join(f"Часть {index}: {error}" for index, error in result["errors"][:10])
+                self.view.show_message(
+                    "Предупреждение",
+                    f"{message}\n\nНе отправлено частей: {result['failed']}\n{errors}\n\n"
+                    "Неотправленные части можно дослать кнопкой \"Дослать отчеты о нанесении\""
+                )
+            else:
+                self.view.show_message("Отчет о нанесении", f"Отчет успешно отправлен\n{message}")
+        except Exception as e:
+            logger.error(f"Ошибка при отправке отчета о нанесении по частям: {str(e)}")
+            self.view.show_message("Ошибка", f"Не удалось отправить отчет: {str(e)}")
+    
+    def resume_utilisation_reports(self):
+        """Досылка неотправленных частей отчетов о нанесении (в том числе после перезапуска)"""
+        file_ids = self.db.get_files_with_unsent_report_chunks()
+        if not file_ids:
+            self.view.show_message("Отчет о нанесении", "Нет неотправленных частей отчетов о нанесении")
+            return
+        for file_id in file_ids:
+            self.submit_utilisation_report(file_id)
+    
     def send_aggregation_report(self, report_data):
         """Отправка отчета об агрегации
         
@@ -2275,6 +2346,10 @@ class MainController(QObject):
                 self.view.show_message("Ошибка", "API-клиент не настроен. Добавьте подключение и учетные данные.")
                 return
             
+            # Отчет по файлу агрегации формируется из иерархии кодов в базе данных
+            if 'aggregationUnits' not in report_data and report_data.get('file_id'):
+                return self.submit_aggregation_reports(report_data)
+            
             # Логируем данные отчета
             logger.info(f"Отправка отчета об агрегации с {len(report_data.get('aggregationUnits', []))} единицами агрегации")
             
@@ -2290,13 +2365,23 @@ class MainController(QObject):
                 unit_capacity = unit.get('aggregationUnitCapacity', 0)
                 sntins_count = len(unit.get('sntins', []))
                 if unit_capacity != sntins_count:
-                    logger.warning(f"Емкость упаковки ({unit_capacity}) не соответствует количеству кодов маркировки ({sntins_count}) в единице #{i+1}")
+                    logger.warning("Емкость упаковки (%s) не соответствует количеству кодов маркировки (%d) "
+                                   "в единице #%d, емкость исправлена", unit_capacity, sntins_count, i + 1)
                     unit['aggregationUnitCapacity'] = sntins_count
-                    logger.info(f"Обновлена емкость упаковки для единицы #{i+1}: {sntins_count}")
             
             # Отправка отчета через API-клиент
             response = self.api_client.post_aggregation(report_data)
             
+            # Отчет, не отправленный из-за ошибки соединения, ставится в очередь отправки
+            if is_connection_error(response):
+                self.outbox.enqueue("aggregation", report_data, ref_id=report_data.get('file_id'))
+                self.load_outbox()
+                self.view.show_message(
+                    "Отчет об агрегации",
+                    "СУЗ недоступна. Отчет поставлен в очередь и будет отправлен при восстановлении связи."
+                )
+                return response
+            
             if response and response.get('success', False):
                 # Обновляем ID отчета в таблице aggregation_files
                 file_id = int(report_data.get('file_id', 0))
@@ -2347,6 +2432,224 @@ class MainController(QObject):
             self.view.show_message("Ошибка", f"Ошибка при отправке отчета об агрегации: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def load_outbox(self):
+        """Загрузка очереди отправки в представление"""
+        try:
+            items = self.db.get_outbox_items()
+            self.view.update_outbox_table(items)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке очереди отправки: {str(e)}")
+    
+    def load_performance(self):
+        """Загрузка сводки времени операций в панель производительности"""
+        try:
+            data = monitor.snapshot()
+            data["operations"] = sorted(monitor.operations)
+            self.view.update_performance_panel(data)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке сводки производительности: {str(e)}")
+    
+    def save_performance_settings(self, settings):
+        """Сохранение параметров замера времени и профилирования
+        
+        Args:
+            settings (dict): Значения настроек perf_tracing, perf_slow_ms, perf_profile_operation, perf_profiler
+        """
+        try:
+            for key, value in settings.items():
+                self.db.set_setting(key, value)
+            monitor.load_settings(self.db)
+            self.load_performance()
+            if settings.get("perf_profile_operation"):
+                self.view.show_message(
+                    "Профилирование",
+                    f"Следующий вызов операции {settings['perf_profile_operation']} будет профилирован. "
+                    f"Результат будет сохранен в папку {monitor.profile_dir}"
+                )
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении настроек производительности: {str(e)}")
+            self.view.show_message("Ошибка", f"Не удалось сохранить настройки: {str(e)}")
+    
+    def clear_performance(self):
+        """Сброс сводки времени операций и списка медленных вызовов"""
+        monitor.reset()
+        self.load_performance()
+    
+    def process_outbox(self):
+        """Проверка очереди отправки по таймеру: при наличии ожидающих запросов
+        проверяет доступность СУЗ и досылает очередь в фоновом потоке"""
+        if not self.outbox.pending_count() and not self.db.get_files_with_unsent_report_chunks([CHUNK_PENDING]):
+            return
+        if not self.api_client.base_url or not self.api_client.omsid:
+            return
+        self.replay_outbox(check_api=True)
+    
+    def replay_outbox(self, check_api: bool = False):
+        """Запуск отправки запросов из очереди и досылки частей отчетов о нанесении
+        в фоновом потоке
+        
+        Запросы к СУЗ и запись результатов выполняются в рабочем потоке через его
+        собственное соединение с базой данных (Database.conn); итоги передаются
+        в основной поток сигналом outbox_processed.
+        
+        Args:
+            check_api (bool): Перед отправкой проверить доступность СУЗ
+        """
+        if self._outbox_thread and self._outbox_thread.is_alive():
+            logger.debug("Очередь отправки уже обрабатывается")
+            return
+        
+        def worker():
+            if check_api:
+                try:
+                    available = self.api_client.ping(allow_stale=False, force=True)["success"]
+                except Exception as e:
+                    logger.info(f"СУЗ недоступна, очередь отправки ожидает: {str(e)}")
+                    available = False
+                if not available:
+                    self.outbox_processed.emit(None)
+                    return
+            result = self.dispatch_outbox()
+            result["api_available"] = check_api
+            self.outbox_processed.emit(result)
+        
+        self._outbox_thread = threading.Thread(target=worker, name="outbox-dispatch", daemon=True)
+        self._outbox_thread.start()
+    
+    @timed()
+    def dispatch_outbox(self):
+        """Отправка запросов из очереди и досылка частей отчетов о нанесении,
+        не отправленных из-за ошибки соединения (выполняется в фоновом потоке)"""
+        try:
+            result = self.outbox.dispatch(on_sent=self.on_outbox_item_sent)
+            
+            if not result["postponed"]:
+                submitter = UtilisationReportSubmitter(self.api_client, self.db)
+                for file_id, chunks_result in submitter.resume_all([CHUNK_PENDING]).items():
+                    if chunks_result["report_ids"]:
+                        self.db.update_aggregation_file_report_id(file_id, chunks_result["report_ids"][0])
+                    result["sent"] += chunks_result["sent"]
+            return result
+        except Exception as e:
+            logger.error(f"Ошибка при обработке очереди отправки: {str(e)}")
+            return {"sent": 0, "failed": 0, "postponed": 0}
+    
+    def on_outbox_processed(self, result):
+        """Обновление окна по итогам обработки очереди отправки в фоновом потоке"""
+        if result is None:
+            self.view.update_api_status(False)
+            return
+        if result.get("api_available"):
+            self.view.update_api_status(True)
+        if result["sent"] or result["failed"]:
+            self.load_orders()
+            self.load_aggregation_files()
+            self.load_api_logs()
+        self.load_outbox()
+    
+    def on_outbox_item_sent(self, item, response):
+        """Обработка ответа на запрос, отправленный из очереди
+        
+        Args:
+            item (dict): Запись очереди отправки
+            response (dict): Ответ API
+        """
+        apply_sent_result(self.db, item, response)
+    
+    def retry_outbox_item(self, item_id):
+        """Повторная отправка записи очереди (в том числе отклоненной) без ожидания задержки"""
+        if self.db.requeue_outbox_item(item_id):
+            self.replay_outbox()
+        else:
+            self.load_outbox()
+    
+    def delete_outbox_item(self, item_id):
+        """Удаление записи из очереди отправки"""
+        if self.db.delete_outbox_item(item_id):
+            logger.info(f"Запись очереди отправки {item_id} удалена")
+        self.load_outbox()
+    
+    @timed()
+    def submit_aggregation_reports(self, report_data):
+        """Формирование отчетов об агрегации по файлу агрегации и их отправка
+        
+        Args:
+            report_data (dict): Реквизиты отчета, file_id, а также необязательные
+                unit_codes (выбранные единицы) и capacities (емкость упаковки по коду единицы)
+        """
+        file_id = int(report_data['file_id'])
+        header = {key: value for key, value in report_data.items()
+                  if key not in ('file_id', 'unit_codes', 'capacities')}
+        
+        builder = AggregationReportBuilder(self.db)
+        reports, errors = builder.build(
+            file_id, header, unit_codes=report_data.get('unit_codes'),
+            capacities=report_data.get('capacities')
+        )
+        if errors:
+            logger.error(f"Отчет об агрегации не прошел проверку: {errors}")
+            self.view.show_message(
+                "Ошибка",
+                "Отчет об агрегации не прошел проверку:\n" + "\n".join(errors[:20])
+            )
+            return {"success": False, "error": "; ".join(errors)}
+        
+        report_ids = []
+        for index, report in enumerate(reports, start=1):
+            logger.info(f"Отправка отчета об агрегации {index} из {len(reports)}: "
+                        f"{len(report['aggregationUnits'])} единиц агрегации")
+            response = self.api_client.post_aggregation(report, prevalidated=True)
+            if is_connection_error(response):
+                # Этот и оставшиеся отчеты ставятся в очередь отправки
+                for queued_report in reports[index - 1:]:
+                    self.outbox.enqueue("aggregation", queued_report, ref_id=file_id)
+                self.load_outbox()
+                self.view.show_message(
+                    "Отчет об агрегации",
+                    f"СУЗ недоступна. Отправлено отчетов: {len(report_ids)} из {len(reports)}, "
+                    f"остальные поставлены в очередь и будут отправлены при восстановлении связи."
+                )
+                break
+            if not response.get('success', False) or 'reportId' not in response:
+                error = response_error(response)
+                logger.error(f"Ошибка при отправке отчета об агрегации {index} из {len(reports)}: {error}")
+                self.view.show_message(
+                    "Ошибка",
+                    f"Ошибка при отправке отчета об агрегации {index} из {len(reports)}: {error}\n"
+                    f"Отправлено отчетов: {len(report_ids)}"
+                )
+                break
+            report_ids.append(response['reportId'])
+        
+        if report_ids:
+            # Для проверки статуса в файле агрегации сохраняется reportId первого отчета
+            self.db.update_aggregation_file_aggregation_report_id(file_id, report_ids[0])
+            self.db.update_aggregation_file_aggregation_status(file_id, ReportStatus.SENT)
+            logger.info(f"Отправлены отчеты об агрегации для файла #{file_id}: {report_ids}")
+            self.load_aggregation_files()
+        
+        if len(report_ids) == len(reports):
+            self.view.show_message(
+                "Успех",
+                f"Отчет об агрегации успешно отправлен!\n"
+                f"Идентификаторы отчетов: {', '.join(report_ids)}"
+            )
+        return {"success": len(report_ids) == len(reports), "report_ids": report_ids}
+    
+    def get_aggregation_report_units(self, file_id: int):
+        """Получение сводки файла агрегации и его единиц агрегации для отчета об агрегации
+        
+        Args:
+            file_id (int): ID файла агрегации
+            
+        Returns:
+            tuple: Сводка файла (AggregationFileSummary или None) и список единиц (code, items_count)
+        """
+        summaries = self.db.get_aggregation_file_summaries(file_id)
+        if not summaries or not self.db.ensure_aggregation_items(file_id):
+            return None, []
+        return summaries[0], self.db.get_aggregation_unit_summaries(file_id)
+    
     # Методы для работы с типами использования кодов маркировки
     def load_usage_types(self):
         """Загрузка типов использования кодов маркировки из базы данных"""
@@ -2552,21 +2855,9 @@ class MainController(QObject):
                 self.view.show_message("Ошибка", "Отсутствует идентификатор отчета")
                 return
             
-            # Получаем необходимые параметры из API-клиента
-            extension = self.api_client.extension
-            omsid = self.api_client.omsid
-            
-            logger.info(f"Получены параметры API: extension={extension}, omsid={omsid}")
-            
-            # Формируем URL для запроса статуса отчета
-            url = f"/api/v2/{extension}/report/info?omsId={omsid}&reportId={report_id}"
-            logger.info(f"Сформирован URL для запроса: {url}")
-            
             # Выполняем запрос статуса отчета
-            success, response, status_code = self.api_client.request(
-                method="GET",
-                url=url,
-                description=f"Запрос статуса отчета о нанесении (reportId: {report_id})"
+            success, response, status_code = self.api_client.get_report_info(
+                report_id, f"Запрос статуса отчета о нанесении (reportId: {report_id})"
             )
             
             logger.info(f"Получен ответ от API: success={success}, status_code={status_code}")
@@ -2631,21 +2922,9 @@ class MainController(QObject):
                 self.view.show_message("Ошибка", "Отсутствует идентификатор отчета агрегации")
                 return
             
-            # Получаем необходимые параметры из API-клиента
-            extension = self.api_client.extension
-            omsid = self.api_client.omsid
-            
-            logger.info(f"Получены параметры API: extension={extension}, omsid={omsid}")
-            
-            # Формируем URL для запроса статуса отчета агрегации
-            url = f"/api/v2/{extension}/report/info?omsId={omsid}&reportId={aggregation_report_id}"
-            logger.info(f"Сформирован URL для запроса: {url}")
-            
             # Выполняем запрос статуса отчета агрегации
-            success, response, status_code = self.api_client.request(
-                method="GET",
-                url=url,
-                description=f"Запрос статуса отчета агрегации (reportId: {aggregation_report_id})"
+            success, response, status_code = self.api_client.get_report_info(
+                aggregation_report_id, f"Запрос статуса отчета агрегации (reportId: {aggregation_report_id})"
             )
             
             logger.info(f"Получен ответ от API: success={success}, status_code={status_code}")
@@ -2884,14 +3163,15 @@ class MainController(QObject):
                     "Нет активного подключения. Настройте подключение перед выполнением ping.")
                 return
             
-            # Отправляем ping-запрос и получаем ответ
-            response = self.api_client.get_ping()
+            # Отправляем ping-запрос и получаем ответ (проверка по запросу пользователя - без кэша)
+            response = self.api_client.get_ping(force=True)
             
             # Обрабатываем ответ
             if response and response.get('success', False):
                 logger.info(f"Ping успешно выполнен. Ответ: {response}")
                 self.view.show_message("Ping", "API доступен. Соединение установлено.")
                 self.view.update_api_status(True)
+                self.replay_outbox()
             else:
                 error_message = "Ошибка при выполнении ping"
                 if response and 'error' in response:
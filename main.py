@@ -1,3 +1,8 @@
+# Момент старта процесса для замера времени запуска: берется до импорта PyQt6,
+# окна и контроллера, чтобы время импортов входило в замер
+import time
+PROCESS_STARTED = time.perf_counter()
+
 import sys
 import logging
 from PyQt6.QtWidgets import QApplication, QMessageBox
@@ -7,12 +12,12 @@ from models.database import Database
 from models.api_client import APIClient
 from models.api_log import APILog
 from controllers.main_controller import MainController
+from utils.logging_setup import setup_logging
+from utils.startup import StartupTimer
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: записи выводятся в консоль и в ротируемый файл logs/ismet.log
+# из отдельного потока, чтобы запись журнала не задерживала интерфейс
+setup_logging(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Класс для обработки завершения приложения
@@ -32,6 +37,7 @@ class ApplicationManager(QObject):
             # Явное сохранение данных перед выходом
             if self.db:
                 self.db.commit()
+                self.db.save_code_filters()
                 logger.info("Данные успешно сохранены перед выходом")
             self.aboutToQuit.emit()
         except Exception as e:
@@ -41,13 +47,12 @@ def main():
     """Точка входа в приложение"""
     try:
         logger.info("Запуск приложения")
+        startup_timer = StartupTimer(PROCESS_STARTED)
+        startup_timer.mark("imports")
         
-        # Создание базы данных
-        db = Database()
-        
-        # Проверяем и восстанавливаем стандартные статусы заказов
-        if db.insert_default_order_statuses():
-            logger.info("Восстановлены отсутствующие стандартные статусы заказов")
+        # Создание базы данных (таблицы и справочники настраиваются только при смене версии схемы)
+        with startup_timer.stage("database"):
+            db = Database()
         
         # Создание приложения PyQt
         app = QApplication(sys.argv)
@@ -61,12 +66,16 @@ def main():
         
         # Создание API-клиента с передачей логгера для логирования
         api_client = APIClient(db=db, api_logger=api_logger)
+        api_client.load_rate_limits()
         
         # Создание главного окна
-        view = MainWindow()
+        with startup_timer.stage("main_window"):
+            view = MainWindow()
         
-        # Создание контроллера с передачей логгера API
-        controller = MainController(view, db, api_client, api_logger)
+        # Создание контроллера с передачей логгера API; загрузка данных
+        # и проверка API выполняются после показа окна
+        with startup_timer.stage("controller"):
+            controller = MainController(view, db, api_client, api_logger, startup_timer)
         
         # Устанавливаем ссылку на контроллер в главном окне
         view.controller = controller
@@ -76,8 +85,9 @@ def main():
         
         # Отображение главного окна
         view.show()
+        startup_timer.mark("window_shown")
         
-        logger.info("Приложение инициализировано")
+        logger.info(f"Приложение инициализировано, окно показано через {startup_timer.elapsed():.2f} с")
         
         # Запуск цикла обработки событий
         sys.exit(app.exec())
@@ -2,18 +2,35 @@ import requests
 import json
 from typing import Dict, Any, Optional, Tuple, List
 import logging
+import time
 from datetime import datetime
 from copy import deepcopy
 
+from utils.gs1 import identities
+from utils.logging_setup import log_summary
+from utils.profiling import timed
+from utils.rate_limiter import RateLimitedSession, RateLimiter, shared_rate_limiter, split_api_path
+from utils.response_cache import Fetch, ResponseCache, make_key
+
 logger = logging.getLogger(__name__)
 
+# Таймаут запросов через кэш ответов и проверки доступности СУЗ, секунды
+CACHED_GET_TIMEOUT = 30
+PING_TIMEOUT = 10
+
 class APIClient:
     """Класс для работы с API"""
-    def __init__(self, base_url: str = "http://localhost:8000", extension: str = "pharma", omsid: str = "", db=None, api_logger=None):
+    def __init__(self, base_url: str = "http://localhost:8000", extension: str = "pharma", omsid: str = "", db=None, api_logger=None,
+                 rate_limiter: Optional[RateLimiter] = None):
         self.base_url = base_url
         self.extension = extension
         self.omsid = omsid
-        self.session = requests.Session()
+        # Все запросы сессии проходят через ограничитель частоты, общий для всех клиентов
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.session = RateLimitedSession(self.rate_limiter)
+        # Кэш ответов на идемпотентные GET-запросы (версия, ping, статус заказов)
+        self.cache = ResponseCache()
+        self._cache_base_url = base_url
         self.db = db  # Ссылка на базу данных для логирования
         self.api_logger = api_logger
         self.is_api_available = False  # Статус доступности API
@@ -154,6 +171,81 @@ class APIClient:
             "POST:/api/v2/water/orders?omsId=": "Создание заказа на эмиссию КМ по omsId (вода)"
         }
     
+    def load_rate_limits(self) -> bool:
+        """Загрузка лимитов частоты запросов из настройки api_rate_limits
+
+        Настройка хранится в формате JSON: {"orders": [10, 10], "pharma": {"codes": [5, 5]}},
+        где для класса методов указываются запросов в секунду и размер корзины.
+
+        Returns:
+            bool: True, если лимиты загружены из настроек
+        """
+        if not self.db:
+            return False
+        try:
+            config = self.db.get_setting("api_rate_limits", "")
+            if not config:
+                return False
+            self.rate_limiter.configure_from_dict(json.loads(config))
+            logger.info(f"Загружены лимиты частоты запросов к API: {config}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке лимитов частоты запросов к API: {str(e)}")
+            return False
+
+    def apply_settings(self, db=None):
+        """Настройка клиента по активному подключению, учетным данным и расширению API из базы данных
+
+        Args:
+            db: Объект базы данных (по умолчанию self.db)
+
+        Returns:
+            Активное подключение или None, если оно не задано
+        """
+        db = db or self.db
+        connection = db.get_active_connection()
+        if connection:
+            self.base_url = connection.url
+            # Используем первые учетные данные активного подключения
+            try:
+                credentials_list = db.get_credentials_for_connection(connection.id)
+                if credentials_list:
+                    self.omsid = credentials_list[0].omsid
+            except Exception as e:
+                logger.warning(f"Не удалось получить учетные данные для подключения: {str(e)}")
+
+        # Получаем активное расширение API
+        try:
+            extension = db.get_active_extension()
+            if extension:
+                self.extension = extension.code
+        except Exception as e:
+            logger.warning(f"Не удалось получить активное расширение API: {str(e)}")
+
+        # Если OMSID еще не установлен, получаем из настроек или первых учетных данных
+        if not self.omsid:
+            try:
+                omsid = db.get_setting("omsid", "")
+                if not omsid:
+                    # Здесь мы берем любые учетные данные, не важно к какому подключению они привязаны
+                    credentials = db.get_credentials()
+                    if credentials:
+                        omsid = credentials[0].omsid
+                        # Сохраняем в настройки для будущего использования
+                        db.set_setting("omsid", omsid)
+                self.omsid = omsid
+            except Exception as e:
+                logger.warning(f"Не удалось получить OMSID: {str(e)}")
+                self.omsid = ""
+
+        # Ссылка на базу данных для логирования запросов
+        self.db = db
+        return connection
+
+    def get_rate_limit_metrics(self) -> List[Dict[str, Any]]:
+        """Метрики ограничителя частоты запросов (время ожидания, ответы 429) по классам методов"""
+        return self.rate_limiter.metrics()
+
     def get_headers(self) -> Dict[str, str]:
         """Получение заголовков для запросов к API"""
         client_token = ""
@@ -216,10 +308,7 @@ class APIClient:
                         description = f"Запрос {method} {relative_url}"
                 
                 # Логирование для отладки
-                logger.debug(f"URL: {url}, Относительный URL: {relative_url}")
-                logger.debug(f"Метод: {method}, Ключ метода: {method_key}")
-                logger.debug(f"Проверяемые ключи: {possible_keys}")
-                logger.debug(f"Итоговое описание: {description}")
+                logger.debug("Описание запроса %s %s (ключ %s): %s", method, relative_url, method_key, description)
                 
                 # Проверяем наличие таблицы api_logs перед логированием
                 cursor = self.db.conn.cursor()
@@ -410,31 +499,103 @@ class APIClient:
             print(f"Ошибка при импорте описаний из файла: {str(e)}")
             return False
     
-    def get_ping(self) -> Dict[str, Any]:
-        """Проверка доступности API"""
-        url = f"{self.base_url}/api/v2/{self.extension}/ping?omsId={self.omsid}"
-        headers = self.get_headers()
-        response = self.session.get(url, headers=headers)
-        self.log_request("GET", url, None, response)
-        return response.json()
-    
-    def get_version(self) -> Dict[str, Any]:
-        """Получение версии API"""
+    @timed()
+    def _cached_get(self, endpoint: str, url: str, allow_stale: bool = False,
+                    force: bool = False, timeout: float = CACHED_GET_TIMEOUT) -> Tuple[Dict[str, Any], int]:
+        """GET-запрос через кэш ответов
+
+        Args:
+            endpoint (str): Метод API (ключ времени жизни в кэше)
+            url (str): Полный URL запроса
+            allow_stale (bool): Допускается устаревший ответ с обновлением в фоне
+            force (bool): Выполнить запрос к серверу без обращения к кэшу
+            timeout (float): Таймаут запроса в секундах
+
+        Returns:
+            Tuple[Dict[str, Any], int]: Данные ответа и код ответа
+        """
+        if self.base_url != self._cache_base_url:
+            # Смена сервера: ответы другого сервера не используются
+            self.cache.clear()
+            self._cache_base_url = self.base_url
+
+        key = make_key(self.extension, self.omsid, endpoint)
+        return self.cache.get(key, self._get_fetch(url, timeout), allow_stale=allow_stale, force=force)
+
+    def _get_fetch(self, url: str, timeout: float = CACHED_GET_TIMEOUT) -> Fetch:
+        """Функция GET-запроса для кэша ответов: (данные, код ответа)
+
+        Ответ не в формате JSON (например, HTML-страница прокси при ошибке 502)
+        возвращается как ошибка и не сохраняется в кэше.
+        """
+        def fetch():
+            response = self.session.get(url, headers=self.get_headers(), timeout=timeout)
+            self.log_request("GET", url, None, response)
+            try:
+                return response.json(), response.status_code
+            except ValueError:
+                error = f"Ответ сервера не в формате JSON (код {response.status_code})"
+                logger.warning(f"{error}: {url}")
+                # Успешный код с ответом не в формате JSON тоже считается ошибкой
+                return {"error": error}, response.status_code if response.status_code >= 300 else 502
+        return fetch
+
+    def _ping_url(self) -> str:
+        """URL проверки доступности API"""
+        return f"{self.base_url}/api/v2/{self.extension}/ping?omsId={self.omsid}"
+
+    def _ping_fetch(self) -> Fetch:
+        """Функция запроса проверки доступности для кэша ответов"""
+        return self._get_fetch(self._ping_url(), PING_TIMEOUT)
+
+    def get_ping(self, force: bool = False, allow_stale: bool = False) -> Dict[str, Any]:
+        """Проверка доступности API
+
+        Args:
+            force (bool): Проверить доступность без обращения к кэшу
+            allow_stale (bool): Допускается устаревший ответ с обновлением в фоне
+        """
+        return self._cached_get("ping", self._ping_url(), allow_stale=allow_stale, force=force,
+                                timeout=PING_TIMEOUT)[0]
+
+    def ping(self, allow_stale: bool = True, force: bool = False) -> Dict[str, Any]:
+        """Проверка доступности API с признаком успеха (success) по коду ответа
+
+        По умолчанию допускает устаревший ответ из кэша, чтобы частые проверки
+        доступности не расходовали лимит запросов к СУЗ.
+
+        Args:
+            allow_stale (bool): Допускается устаревший ответ с обновлением в фоне
+            force (bool): Проверить доступность без обращения к кэшу
+        """
+        data, status_code = self._cached_get("ping", self._ping_url(), allow_stale=allow_stale, force=force,
+                                             timeout=PING_TIMEOUT)
+        return dict(data, success=200 <= status_code < 300)
+
+    def cached_api_status(self) -> Optional[bool]:
+        """Доступность API по ответу ping из кэша без ожидания сервера
+
+        Устаревший ответ обновляется в фоне.
+
+        Returns:
+            Optional[bool]: Доступность API или None, если ответа в кэше нет
+        """
+        cached = self.cache.get_cached(make_key(self.extension, self.omsid, "ping"), self._ping_fetch())
+        if cached is None:
+            return None
+        return 200 <= cached[1] < 300
+
+    def get_version(self, force: bool = False) -> Dict[str, Any]:
+        """Получение версии API (в течение сеанса берется из кэша)"""
         url = f"{self.base_url}/api/v2/{self.extension}/version"
-        headers = self.get_headers()
-        response = self.session.get(url, headers=headers)
-        self.log_request("GET", url, None, response)
-        return response.json()
-    
-    def get_orders(self) -> Dict[str, Any]:
+        return self._cached_get("version", url, force=force)[0]
+
+    def get_orders(self, force: bool = False) -> Dict[str, Any]:
         """Получение списка заказов"""
         url = f"{self.base_url}/api/v2/{self.extension}/orders?omsId={self.omsid}"
-        headers = self.get_headers()
-        response = self.session.get(url, headers=headers)
-        self.log_request("GET", url, None, response)
-        return response.json()
-    
-    def get_orders_status(self) -> Dict[str, Any]:
+        return self._cached_get("orders", url, force=force)[0]
+
+    def get_orders_status(self, force: bool = False) -> Dict[str, Any]:
         """Получение статуса заказов
         
         Этот метод используется для получения статуса заказов с использованием 
@@ -444,15 +605,29 @@ class APIClient:
         - Метод предназначен для восстановления АСУТП после полной потери данных
         - Использование в штатных процессах работы с СУЗ запрещено
         - Обращение к данному методу возможно не чаще 100 раз в секунду
+          (частота ограничивается корзиной orders ограничителя запросов)
+        - Повторный запрос в течение нескольких секунд возвращает ответ из кэша
+        
+        Args:
+            force (bool): Выполнить запрос к серверу без обращения к кэшу
         
         Returns:
             Dict[str, Any]: Словарь с данными о статусе заказов и идентификаторе СУЗ
         """
         url = f"{self.base_url}/api/v2/{self.extension}/orders?omsId={self.omsid}"
-        headers = self.get_headers()
-        response = self.session.get(url, headers=headers)
-        self.log_request("GET", url, None, response)
-        return response.json()
+        return self._cached_get("orders", url, force=force)[0]
+    
+    def invalidate_cache(self, endpoint: Optional[str] = None) -> int:
+        """Сброс кэшированных ответов текущего расширения и omsId
+
+        Args:
+            endpoint (str, optional): Метод API; если не указан, сбрасываются все методы
+        """
+        return self.cache.invalidate(self.extension, self.omsid, endpoint)
+
+    def get_cache_metrics(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов кэша ответов API"""
+        return self.cache.metrics()
     
     def get_codes(self) -> Dict[str, Any]:
         """Получение списка кодов"""
@@ -477,16 +652,35 @@ class APIClient:
         response = self.session.get(url, headers=headers)
         self.log_request("GET", url, None, response)
         return response.json()
-    
+
+    def get_report_info(self, report_id: str, description: Optional[str] = None) -> Tuple[bool, Dict[str, Any], int]:
+        """Получение статуса обработки отчета (о нанесении или об агрегации)
+
+        GET /api/v2/{extension}/report/info?omsId={omsId}&reportId={reportId}
+
+        Returns:
+            Tuple[bool, Dict[str, Any], int]: Кортеж (успех, данные ответа, код статуса)
+        """
+        url = f"/api/v2/{self.extension}/report/info?omsId={self.omsid}&reportId={report_id}"
+        return self.request(
+            method="GET",
+            url=url,
+            description=description or f"Запрос статуса отчета (reportId: {report_id})"
+        )
+
+    @timed()
     def post_orders(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Отправка заказов"""
         url = f"{self.base_url}/api/v2/{self.extension}/orders"
         headers = self.get_headers()
         response = self.session.post(url, json=data, headers=headers)
         self.log_request("POST", url, data, response)
+        self.invalidate_cache("orders")
         return response.json()
     
-    def post_aggregation(self, data: Dict[str, Any], custom_extension: str = None) -> Dict[str, Any]:
+    @timed()
+    def post_aggregation(self, data: Dict[str, Any], custom_extension: str = None,
+                         prevalidated: bool = False) -> Dict[str, Any]:
         """Отправка отчета об агрегации КМ
         
         Формирует и отправляет отчет об агрегации:
@@ -505,6 +699,10 @@ class APIClient:
                 ...
             ],
         }
+        
+        Отчеты, сформированные AggregationReportBuilder, передаются с prevalidated=True:
+        коды в них уже нормализованы, а емкость проверена, поэтому единицы агрегации
+        повторно не проверяются и не копируются.
         """
         # Проверяем наличие всех необходимых полей
         if not data or not isinstance(data, dict):
@@ -535,7 +733,7 @@ class APIClient:
             url = f"{self.base_url}/api/v2/{extension_prefix}aggregation"
             
         # Делаем копию данных, чтобы не изменять оригинал
-        request_data = deepcopy(data)
+        request_data = dict(data) if prevalidated else deepcopy(data)
         
         # Удаляем поля, которые не нужны для API
         if 'omsId' in request_data:
@@ -545,7 +743,8 @@ class APIClient:
             del request_data['file_id']
         
         # Проверяем и нормализуем aggregationUnits
-        for i, unit in enumerate(request_data['aggregationUnits']):
+        units_to_check = [] if prevalidated else request_data['aggregationUnits']
+        for i, unit in enumerate(units_to_check):
             # Проверяем наличие обязательных полей
             if 'unitSerialNumber' not in unit or not unit['unitSerialNumber']:
                 raise ValueError(f"Не указан серийный номер единицы (unitSerialNumber) для единицы агрегации #{i+1}")
@@ -604,6 +803,7 @@ class APIClient:
             
         return response_data
     
+    @timed()
     def post_utilisation(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Отправка данных об использовании (нанесении) КМ
         
@@ -702,22 +902,17 @@ class APIClient:
                 logger.warning(f"Автоматическая замена типа использования на {allowed_usage_types[0]}")
                 data_copy["usageType"] = allowed_usage_types[0]
             
-            # Логирование дополнительных полей
-            logger.info(f"Отчет о нанесении: {len(data_copy['sntins'])} кодов")
-            logger.info(f"Срок годности: {data_copy['expirationDate']}")
-            logger.info(f"Номер серии: {data_copy['seriesNumber']}")
-            logger.info(f"Тип использования: {data_copy['usageType']}")
-            
-            if data_copy['sntins'] and len(data_copy['sntins']) > 0:
-                logger.info(f"Пример кода: {data_copy['sntins'][0]}")
+            # Одна запись с параметрами отчета вместо записи на каждое поле
+            log_summary(logger, "Отчет о нанесении", len(data_copy['sntins']),
+                        expirationDate=data_copy['expirationDate'], seriesNumber=data_copy['seriesNumber'],
+                        usageType=data_copy['usageType'])
         elif "products" in data_copy:
-            logger.info(f"Отчет о нанесении: {len(data_copy['products'])} продуктов")
-            for product in data_copy['products']:
-                logger.info(f"- GTIN: {product.get('gtin', 'не указан')}, Количество: {product.get('quantity', 0)}")
+            log_summary(logger, "Отчет о нанесении по продуктам", len(data_copy['products']),
+                        quantity=sum(product.get('quantity', 0) for product in data_copy['products']))
         
         try:
-            # Логируем запрос для отладки
-            logger.debug(f"Отправляемые данные: {data_copy}")
+            # Тело запроса с кодами форматируется только при включенном уровне DEBUG
+            logger.debug("Отправляемые данные: %s", data_copy)
             
             # Отправляем запрос с обновленными данными (без omsId в теле) через метод request
             headers['Content-Type'] = 'application/json;charset=UTF-8'
@@ -730,9 +925,9 @@ class APIClient:
             )
             
             # Логируем ответ для отладки
-            logger.info(f"Получен ответ от сервера. Статус: {status_code}")
+            logger.info("Получен ответ от сервера. Статус: %s", status_code)
             if response_data:
-                logger.info(f"Тело ответа: {response_data}")
+                logger.debug("Тело ответа: %s", response_data)
                 
                 # Логирование ошибок валидации полей
                 if "fieldErrors" in response_data:
@@ -784,8 +979,9 @@ class APIClient:
                     'request': type('obj', (object,), {'headers': {}})
                 })
                 self.log_request("POST", url, data_copy, error_response, "Ошибка отправки отчета о нанесении")
-            return {"success": False, "error": str(e)}
+            return {"success": False, "error": str(e), "connection_error": True}
     
+    @timed()
     def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Создание заказа на эмиссию кодов маркировки
         
@@ -912,6 +1108,7 @@ class APIClient:
             self.log_request("POST", url, order_data, None)
             raise
 
+    @timed()
     def get_codes_from_order(self, order_id: str, gtin: str, quantity: int, last_block_id: Optional[str] = None) -> Dict[str, Any]:
         """Получить КМ из заказа
         
@@ -1019,6 +1216,7 @@ class APIClient:
             logger.error(error_message)
             raise
 
+    @timed()
     def request(self, method: str, url: str, data: Any = None, headers: Optional[Dict[str, str]] = None, 
                 params: Optional[Dict[str, str]] = None, timeout: int = 30, 
                 description: Optional[str] = None) -> Tuple[bool, Dict[str, Any], int]:
@@ -1090,6 +1288,11 @@ class APIClient:
             if self.db:
                 self.log_request(method, url, data, response, description)
             
+            # Изменяющий запрос делает кэшированные ответы того же метода устаревшими
+            if method.upper() != 'GET':
+                extension, endpoint = split_api_path(url)
+                self.cache.invalidate(extension, endpoint=endpoint.split('/')[0])
+            
             # Попытка получить данные JSON из ответа
             try:
                 response_data = response.json()
@@ -1104,7 +1307,8 @@ class APIClient:
         except requests.RequestException as e:
             # Обработка ошибок запроса
             error_message = str(e)
-            error_data = {"error": error_message}
+            # Признак ошибки соединения: такой запрос можно повторить позже (очередь отправки)
+            error_data = {"error": error_message, "connection_error": True}
             
             # Логирование ошибки
             logger.error(f"Ошибка API запроса: {error_message}")
@@ -1221,53 +1425,7 @@ class APIClient:
         if not codes:
             return []
             
-        normalized_codes = []
-        for code in codes:
-            if not code:
-                continue
-                
-            # Отладочное логирование для анализа строки
-            logger.info(f"Обработка кода: {code}")
-            logger.info(f"Длина кода: {len(code)}")
-            logger.info(f"Байтовое представление: {code.encode('utf-8')}")
-            logger.info(f"Unicode коды символов: {[ord(c) for c in code]}")
-            
-            # Получаем только часть строки до первого [GS]
-            # Вариант с символьным представлением [GS]
-            if '[GS]' in code:
-                normalized_code = code.split('[GS]')[0]
-                logger.info(f"Найден [GS] в текстовом виде")
-            # Вариант с Unicode символом GS (Group Separator)
-            elif '\u001d' in code:
-                normalized_code = code.split('\u001d')[0]
-                logger.info(f"Найден \u001d (Unicode GS)")
-            # Вариант с другим представлением GS в Unicode
-            elif '\x1d' in code:
-                normalized_code = code.split('\x1d')[0]
-                logger.info(f"Найден \x1d (hex GS)")
-            # Проверяем все возможные представления GS в Unicode
-            else:
-                # Преобразуем строку в байты для поиска всех возможных представлений GS
-                code_bytes = code.encode('utf-8')
-                gs_positions = []
-                
-                # Ищем все возможные представления GS
-                for i in range(len(code_bytes)):
-                    if code_bytes[i] == 0x1d:  # GS в hex
-                        gs_positions.append(i)
-                        logger.info(f"Найден GS в позиции {i} (байт {code_bytes[i]})")
-                
-                if gs_positions:
-                    # Берем позицию первого GS
-                    first_gs_pos = gs_positions[0]
-                    # Преобразуем обратно в строку до первого GS
-                    normalized_code = code_bytes[:first_gs_pos].decode('utf-8')
-                    logger.info(f"Нормализован код маркировки: оставлена часть до GS символа (bytes)")
-                else:
-                    normalized_code = code
-                    logger.info("GS символ не найден в коде")
-                
-            logger.info(f"Нормализованный код: {normalized_code}")
-            normalized_codes.append(normalized_code)
-            
+        started = time.perf_counter()
+        normalized_codes = identities(codes)
+        log_summary(logger, "Нормализация кодов маркировки", len(normalized_codes), started, level=logging.DEBUG)
         return normalized_codes
\ No newline at end of file
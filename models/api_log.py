@@ -98,6 +98,27 @@ class APILog:
             print(f"Ошибка при получении логов API-запросов: {str(e)}")
             return []
     
+    def search(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Поиск логов API-запросов по содержимому запроса, ответа и описанию
+        
+        Args:
+            query: Код маркировки (в любом представлении), reportId или слова для поиска
+            limit: Максимальное количество записей
+            
+        Returns:
+            List[Dict[str, Any]]: Найденные записи (новые первыми)
+        """
+        if self.db is None:
+            print("База данных не инициализирована для поиска логов")
+            return []
+        
+        try:
+            return self.db.search_api_logs(query, limit=limit)
+        except Exception as e:
+            print(f"Ошибка при поиске логов API-запросов: {str(e)}")
+            return []
+    
     def get_log_by_id(self, log_id: int) -> Optional[Dict[str, Any]]:
         """
         Получение записи лога API-запроса по ID
@@ -4,19 +4,54 @@ from typing import List, Dict, Any, Optional, Union, Tuple
 import time
 import logging
 import json
+import hashlib
+import re
+import threading
+from itertools import groupby
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime, Boolean
-from sqlalchemy.orm import declarative_base, Session, relationship
-from sqlalchemy.ext.declarative import declarative_base
-
-from models.models import Order, Connection, Credentials, Nomenclature, Extension, EmissionType, Country, OrderStatus, APIOrder, AggregationFile, UsageType
+from models.models import Order, Connection, Credentials, Nomenclature, Extension, EmissionType, Country, OrderStatus, APIOrder, AggregationFile, AggregationFileSummary, UsageType, CodeStatus
+from models.seed_data import (DEFAULT_COUNTRIES, DEFAULT_EMISSION_TYPES, DEFAULT_EXTENSIONS,
+                              DEFAULT_ORDER_STATUSES, DEFAULT_REPORT_STATUSES)
+from utils.code_filter import MIN_CAPACITY, BloomFilter
+from utils.gs1 import identity, parse, parse_codes, to_storage
+from utils.nomenclature_import import normalize_gtin
+from utils.profiling import timed
 import os
 import time
 
 # Инициализация логгера
 logger = logging.getLogger(__name__)
 
-Base = declarative_base()
+# Фильтры Блума для проверки дубликатов (utils.code_filter): таблица и условие отбора кодов
+CODE_FILTER_SOURCES = {
+    "codes": ("marking_codes", "1"),
+    "aggregated": ("aggregation_items", "level = 0"),
+}
+
+
+def fts_match_query(text: str, gtin_prefix: bool = False) -> str:
+    """Запрос MATCH для FTS5: каждый разделенный пробелами фрагмент ищется как фраза по префиксу,
+    все фрагменты должны встретиться (фрагменты без букв и цифр пропускаются)
+    
+    Args:
+        text (str): Строка поиска
+        gtin_prefix (bool): Число без ведущего нуля ищется и как начало GTIN из 14 цифр
+            (номер EAN-13, введенный без нуля)
+    """
+    terms = []
+    for term in text.split():
+        if not re.search(r"\w", term):
+            continue
+        phrase = '"{}"*'.format(term.replace('"', '""'))
+        if gtin_prefix and term.isdigit() and not term.startswith("0"):
+            phrase = f'({phrase} OR "0{term}"*)'
+        terms.append(phrase)
+    return " AND ".join(terms)
+
+
+# Версия схемы и справочных данных; увеличивается при каждом изменении таблиц,
+# миграций или значений по умолчанию, чтобы Database.bootstrap выполнился один раз
+SCHEMA_VERSION = 6
 
 class UserORM:
     """ORM класс для работы с пользователями"""
@@ -54,139 +89,52 @@ class APIOrderORM:
     """
 
 
-class OrderORM(Base):
-    """Модель заказа в SQLAlchemy"""
-    __tablename__ = 'orders'
-    
-    id = Column(Integer, primary_key=True)
-    order_number = Column(String, nullable=False)
-    timestamp = Column(String)
-    expected_complete = Column(String)
-    status = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
-
-class OrderProductORM(Base):
-    """Модель деталей заказа (товаров) в SQLAlchemy"""
-    __tablename__ = 'order_products'
-    
-    id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey('orders.id'))
-    gtin = Column(String, nullable=False)
-    quantity = Column(Integer, nullable=False)
-    order = relationship("OrderORM")
-
-class AggregationORM(Base):
-    """Модель агрегации в SQLAlchemy"""
-    __tablename__ = 'aggregations'
-    
-    id = Column(Integer, primary_key=True)
-    code = Column(String)
-    value = Column(Float)
-    created_at = Column(DateTime, default=datetime.now)
-
-class ConnectionORM(Base):
-    """Модель подключения в SQLAlchemy"""
-    __tablename__ = 'connections'
-    
-    id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
-    url = Column(String, nullable=False)
-    is_active = Column(Integer, default=0)  # 0 - неактивно, 1 - активно
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class CredentialsORM(Base):
-    """Модель учетных данных в SQLAlchemy"""
-    __tablename__ = 'credentials'
-    
-    id = Column(Integer, primary_key=True)
-    omsid = Column(String, nullable=False)
-    token = Column(String, nullable=False)
-    gln = Column(String, default='')
-    inn = Column(String, default='')
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class NomenclatureORM(Base):
-    """Модель номенклатуры в SQLAlchemy"""
-    __tablename__ = 'nomenclature'
-    
-    id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
-    gtin = Column(String, nullable=False)
-    product_group = Column(String, default="")
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class ExtensionORM(Base):
-    """Модель расширения API в SQLAlchemy"""
-    __tablename__ = 'extensions'
-    
-    id = Column(Integer, primary_key=True)
-    code = Column(String, nullable=False)
-    name = Column(String, nullable=False)
-    is_active = Column(Integer, default=0)  # 0 - неактивно, 1 - активно
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class EmissionTypeORM(Base):
-    """Модель типа эмиссии (способа выпуска товара) в SQLAlchemy"""
-    __tablename__ = 'emission_types'
-    
-    id = Column(Integer, primary_key=True)
-    code = Column(String, nullable=False)
-    name = Column(String, nullable=False)
-    product_group = Column(String)  # Для каких товарных групп доступен (None - для всех)
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class CountryORM(Base):
-    """Модель страны мира в SQLAlchemy"""
-    __tablename__ = 'countries'
-    
-    id = Column(Integer, primary_key=True)
-    code = Column(String, nullable=False, unique=True)
-    name = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class OrderStatusORM(Base):
-    """Модель статуса заказа в SQLAlchemy"""
-    __tablename__ = 'order_statuses'
-    
-    id = Column(Integer, primary_key=True)
-    code = Column(String, nullable=False, unique=True)
-    name = Column(String, nullable=False)
-    description = Column(String)
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-
-class AggregationFileORM(Base):
-    """Модель файла агрегации в SQLAlchemy"""
-    __tablename__ = 'aggregation_files'
-    
-    id = Column(Integer, primary_key=True)
-    filename = Column(String, nullable=False)
-    product = Column(String)  # Название продукции
-    marking_codes = Column(String)  # JSON-строка со списком кодов маркировки
-    level1_codes = Column(String)   # JSON-строка со списком кодов агрегации 1 уровня
-    level2_codes = Column(String)   # JSON-строка со списком кодов агрегации 2 уровня
-    comment = Column(String)
-    json_content = Column(String)   # Полное содержимое JSON-файла
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    report_id = Column(String)      # Идентификатор отчета нанесения
-    aggregation_report_id = Column(String)  # Идентификатор отчета агрегации
-
 class Database:
     """Класс для работы с базой данных"""
     def __init__(self, db_path: str = "database.db"):
         """Инициализация подключения к базе данных"""
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        # Соединения рабочих потоков (см. conn)
+        self._thread_local = threading.local()
+        self.conn = self._connect()
+        
+        # Индекс кодов в памяти (utils.code_pool.CodePool), обновляемый при изменении кодов
+        self.code_pool = None
+        
+        # Фильтры дубликатов кодов, загружаемые при первом использовании (CODE_FILTER_SOURCES)
+        self._code_filters: Dict[str, BloomFilter] = {}
+        
+        # Шаги миграции, завершившиеся ошибкой при последней настройке (см. bootstrap)
+        self._migration_errors: List[str] = []
+        
+        # Создание таблиц, миграции и справочные данные - только если версия схемы устарела
+        self.bootstrap()
+    
+    def get_schema_version(self) -> int:
+        """Версия схемы и справочных данных, записанная в базе данных (PRAGMA user_version)"""
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    @timed()
+    def bootstrap(self, force: bool = False) -> bool:
+        """Начальная настройка базы данных
         
-        # Создание таблиц, если они не существуют
+        Если версия в базе данных совпадает с SCHEMA_VERSION, выполняется один запрос
+        чтения версии. Иначе создаются таблицы, выполняются миграции, заполняются
+        справочники и записывается текущая версия. При изменении схемы или справочных
+        данных нужно увеличить SCHEMA_VERSION.
+        
+        Args:
+            force (bool): Выполнить настройку независимо от версии
+        
+        Returns:
+            bool: True, если настройка выполнялась
+        """
+        version = self.get_schema_version()
+        if version >= SCHEMA_VERSION and not force:
+            return False
+        
+        logger.info(f"Настройка базы данных: версия схемы {version}, требуется {SCHEMA_VERSION}")
+        self._migration_errors = []
         cursor = self.conn.cursor()
         
         # Создание таблицы для пользователей
@@ -202,6 +150,55 @@ class Database:
         self.insert_default_emission_types()
         self.insert_default_countries()
         self.insert_default_order_statuses()
+        self.insert_default_report_statuses()
+        
+        # Версия не записывается, если хотя бы один шаг миграции не выполнен:
+        # настройка повторится при следующем запуске
+        if self._migration_errors:
+            logger.error(f"Не выполнено шагов миграции: {len(self._migration_errors)}; версия схемы "
+                         f"остается {version}, миграция будет повторена при следующем запуске")
+            return True
+        
+        # PRAGMA не поддерживает параметры запроса; версия - целое число из кода
+        self.conn.execute(f"PRAGMA user_version = {int(SCHEMA_VERSION)}")
+        self.conn.commit()
+        logger.info(f"База данных настроена, версия схемы {SCHEMA_VERSION}")
+        return True
+    
+    def _migration_failed(self, message: str, error: Exception) -> None:
+        """Учет ошибки шага миграции: изменения шага откатываются, а bootstrap
+        не записывает версию схемы, чтобы шаг выполнился при следующем запуске"""
+        self.conn.rollback()
+        logger.error(f"{message}: {str(error)}")
+        self._migration_errors.append(message)
+    
+    def _seed(self, table: str, columns: Tuple[str, ...], rows: List[tuple], only_if_empty: bool = True) -> int:
+        """Заполнение справочника одним запросом executemany с INSERT OR IGNORE
+        
+        Args:
+            table (str): Имя таблицы
+            columns (Tuple[str, ...]): Заполняемые столбцы
+            rows (List[tuple]): Строки справочника
+            only_if_empty (bool): Заполнять только пустую таблицу (удаленные пользователем
+                значения не восстанавливаются)
+        
+        Returns:
+            int: Количество добавленных строк
+        """
+        cursor = self.conn.cursor()
+        if only_if_empty and cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+            return 0
+        before = self.conn.total_changes
+        placeholders = ", ".join("?" for _ in columns)
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            rows
+        )
+        self.conn.commit()
+        added = self.conn.total_changes - before
+        if added:
+            logger.info(f"В справочник {table} добавлено значений по умолчанию: {added}")
+        return added
     
     def create_tables(self):
         """Создание таблиц в базе данных если они не существуют"""
@@ -337,13 +334,74 @@ class Database:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 code TEXT NOT NULL,
                 gtin TEXT NOT NULL,
+                serial TEXT,
+                crypto_tail TEXT,
                 order_id TEXT NOT NULL,
                 used INTEGER DEFAULT 0,
                 exported INTEGER DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'RECEIVED',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Индекс по значению кода для поиска кодов, которые не удалось разобрать на GTIN и серийный номер
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_marking_codes_code ON marking_codes (code)")
+        
+        # Журнал переходов кодов маркировки между статусами (только добавление записей)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS code_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code_id INTEGER NOT NULL,
+                from_status TEXT,
+                to_status TEXT NOT NULL,
+                ref_type TEXT,
+                ref_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_events_code_id ON code_events (code_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_events_ref ON code_events (ref_type, ref_id)")
+        
+        # Части отчетов о нанесении: крупный отчет делится на части, каждая отправляется
+        # отдельным запросом и хранит свой reportId (для повторной отправки и продолжения после перезапуска)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS report_chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                chunk_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                sntins TEXT NOT NULL,
+                codes_count INTEGER DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'PENDING',
+                report_id TEXT,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_report_chunks_file_status ON report_chunks (file_id, status)")
+        
+        # Очередь отправки: запросы к СУЗ, не отправленные из-за ошибки соединения
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                ref_id TEXT,
+                status TEXT NOT NULL DEFAULT 'PENDING',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                response TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_outbox_status ON api_outbox (status, next_attempt_at)")
         
         # Создаем таблицу файлов агрегации
         cursor.execute('''\
@@ -360,11 +418,30 @@ class Database:
                 aggregation_report_id TEXT,
                 report_status TEXT,
                 aggregation_status TEXT,
+                marking_codes_count INTEGER DEFAULT 0,
+                level1_count INTEGER DEFAULT 0,
+                level2_count INTEGER DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Иерархия кодов файлов агрегации: код, уровень и родительская единица агрегации
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS aggregation_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_id INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                level INTEGER NOT NULL,
+                parent_code TEXT,
+                position INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_aggregation_items_level ON aggregation_items (file_id, level, position)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_aggregation_items_parent ON aggregation_items (file_id, parent_code, position)")
+        # Индекс по коду для проверки кодов, уже включенных в другие файлы агрегации
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_aggregation_items_code ON aggregation_items (code)")
+        
         # Создаем таблицу типов использования кодов маркировки
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS usage_types (
@@ -389,21 +466,27 @@ class Database:
             )
         ''')
         
-        # Заполняем таблицу статусов отчетов значениями по умолчанию
-        cursor.execute("SELECT COUNT(*) FROM report_statuses")
-        count = cursor.fetchone()[0]
+        # Таблица типов эмиссии (способов выпуска товара)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS emission_types (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                product_group TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
-        if count == 0:
-            # Вставляем статусы отчетов из документации API
-            cursor.execute('''
-                INSERT INTO report_statuses (code, name, description)
-                VALUES 
-                    ('PENDING', 'Отчет находится в ожидании', 'Отчет обрабатывается системой'),
-                    ('READY_TO_SEND', 'Отчет готов к отправке', 'Отчет подготовлен и готов к отправке'),
-                    ('REJECTED', 'Отчет отклонен', 'Отчет был отклонен системой'),
-                    ('SENT', 'Отчет отправлен', 'Отчет успешно отправлен')
-            ''')
-            logging.info("Добавлены статусы отчетов по умолчанию")
+        # Таблица товаров заказа
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS order_products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                order_id INTEGER REFERENCES orders(id),
+                gtin TEXT NOT NULL,
+                quantity INTEGER NOT NULL
+            )
+        ''')
         
         self.conn.commit()
         logger.info("Таблицы в базе данных созданы")
@@ -424,7 +507,13 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка product_group в таблицу nomenclature")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
+        
+        # GTIN, введенные вручную, приводятся к 14 цифрам, как при импорте справочника
+        try:
+            self._normalize_nomenclature_gtins(cursor)
+        except Exception as e:
+            self._migration_failed("Ошибка при приведении GTIN номенклатуры к 14 цифрам", e)
         
         # Проверяем и добавляем столбец gln в таблицу credentials
         cursor.execute("PRAGMA table_info(credentials)")
@@ -438,7 +527,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка gln в таблицу credentials")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         # Проверяем и добавляем столбец inn в таблицу credentials
         if "inn" not in column_names:
@@ -447,7 +536,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка inn в таблицу credentials")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         # Проверяем и добавляем столбцы report_id и aggregation_report_id в таблицу aggregation_files
         cursor.execute("PRAGMA table_info(aggregation_files)")
@@ -461,7 +550,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка report_id в таблицу aggregation_files")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         if "aggregation_report_id" not in column_names:
             try:
@@ -469,7 +558,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка aggregation_report_id в таблицу aggregation_files")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         # Проверяем и добавляем столбцы report_status и aggregation_status в таблицу aggregation_files
         if "report_status" not in column_names:
@@ -478,7 +567,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка report_status в таблицу aggregation_files")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         if "aggregation_status" not in column_names:
             try:
@@ -486,7 +575,19 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка aggregation_status в таблицу aggregation_files")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
+        
+        # Проверяем и добавляем столбцы с количеством кодов по уровням в таблицу aggregation_files
+        if "marking_codes_count" not in column_names:
+            try:
+                cursor.execute("ALTER TABLE aggregation_files ADD COLUMN marking_codes_count INTEGER DEFAULT 0")
+                cursor.execute("ALTER TABLE aggregation_files ADD COLUMN level1_count INTEGER DEFAULT 0")
+                cursor.execute("ALTER TABLE aggregation_files ADD COLUMN level2_count INTEGER DEFAULT 0")
+                self.backfill_aggregation_file_counts()
+                self.conn.commit()
+                logger.info("Добавлены колонки с количеством кодов в таблицу aggregation_files")
+            except Exception as e:
+                self._migration_failed("Ошибка при миграции базы данных", e)
                 
         # Проверяем и добавляем столбец timestamp в таблицу orders
         cursor.execute("PRAGMA table_info(orders)")
@@ -500,7 +601,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка timestamp в таблицу orders")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         
         # Проверяем и добавляем столбец expected_complete в таблицу orders
         if "expected_complete" not in column_names:
@@ -509,7 +610,7 @@ class Database:
                 self.conn.commit()
                 logger.info("Добавлена колонка expected_complete в таблицу orders")
             except Exception as e:
-                logger.error(f"Ошибка при миграции базы данных: {str(e)}")
+                self._migration_failed("Ошибка при миграции базы данных", e)
         else:
             # Проверяем тип колонки expected_complete и при необходимости мигрируем данные
             try:
@@ -550,7 +651,72 @@ class Database:
                 self.conn.commit()
                 logger.info("Миграция данных expected_complete завершена")
             except Exception as e:
-                logger.error(f"Ошибка при миграции данных expected_complete: {str(e)}")
+                self._migration_failed("Ошибка при миграции данных expected_complete", e)
+        
+        # Проверяем и добавляем столбец status в таблицу marking_codes
+        cursor.execute("PRAGMA table_info(marking_codes)")
+        columns = cursor.fetchall()
+        column_names = [column["name"] for column in columns]
+        
+        if "status" not in column_names:
+            try:
+                cursor.execute("ALTER TABLE marking_codes ADD COLUMN status TEXT NOT NULL DEFAULT 'RECEIVED'")
+                # Статус существующих кодов определяем по флагам used и exported
+                cursor.execute('''
+                    UPDATE marking_codes
+                    SET status = CASE
+                        WHEN used = 1 THEN 'AGGREGATED'
+                        WHEN exported = 1 THEN 'EXPORTED'
+                        ELSE 'RECEIVED'
+                    END
+                ''')
+                self.conn.commit()
+                logger.info("Добавлена колонка status в таблицу marking_codes")
+            except Exception as e:
+                self._migration_failed("Ошибка при миграции базы данных", e)
+        
+        # Разбор кодов на GTIN, серийный номер и криптохвост
+        if "serial" not in column_names:
+            try:
+                cursor.execute("ALTER TABLE marking_codes ADD COLUMN serial TEXT")
+                cursor.execute("ALTER TABLE marking_codes ADD COLUMN crypto_tail TEXT")
+                self.conn.commit()
+                logger.info("Добавлены колонки serial и crypto_tail в таблицу marking_codes")
+            except Exception as e:
+                self._migration_failed("Ошибка при добавлении колонок serial и crypto_tail", e)
+        try:
+            self._migrate_marking_code_fields(cursor)
+        except Exception as e:
+            self._migration_failed("Ошибка при разборе сохраненных кодов маркировки", e)
+        
+        # Покрывающий индекс для подсчета кодов по статусам без чтения таблицы
+        try:
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_marking_codes_order_gtin_status ON marking_codes (order_id, gtin, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_marking_codes_gtin_status ON marking_codes (gtin, status)")
+            self.conn.commit()
+        except Exception as e:
+            self._migration_failed("Ошибка при создании индексов marking_codes", e)
+        
+        # Один экземпляр кода (GTIN + серийный номер) хранится один раз
+        try:
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_marking_codes_gtin_serial ON marking_codes (gtin, serial)")
+            self.conn.commit()
+        except Exception as e:
+            self._migration_failed("Ошибка при создании индекса marking_codes (gtin, serial)", e)
+        
+        # Полнотекстовый поиск номенклатуры по названию и GTIN (префиксы от 2 символов)
+        try:
+            self._create_fts_index(cursor, "nomenclature", ("name", "gtin"), "prefix='2 3'")
+            self.conn.commit()
+        except Exception as e:
+            self._migration_failed("Ошибка при создании полнотекстового индекса номенклатуры", e)
+        
+        # Полнотекстовый поиск по содержимому запросов и ответов API (коды, reportId и т.п.)
+        try:
+            self._create_fts_index(cursor, "api_logs", ("request", "response", "description"))
+            self.conn.commit()
+        except Exception as e:
+            self._migration_failed("Ошибка при создании полнотекстового индекса логов API", e)
         
         # Проверяем существование таблицы статусов заказов
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='order_statuses'")
@@ -565,361 +731,74 @@ class Database:
                 )
             ''')
     
+    def _create_fts_index(self, cursor, table: str, columns: Tuple[str, ...], options: str = "") -> bool:
+        """Создание индекса FTS5 {table}_fts над колонками таблицы и триггеров его обновления
+        
+        Индекс хранит только токены (external content): текст читается из самой таблицы
+        по rowid = id. При первом создании индекс заполняется по существующим строкам.
+        
+        Args:
+            cursor: Курсор базы данных
+            table (str): Таблица с первичным ключом id
+            columns (Tuple[str, ...]): Индексируемые колонки
+            options (str): Дополнительные параметры FTS5 (например, "prefix='2 3'")
+            
+        Returns:
+            bool: False, если SQLite собран без FTS5
+        """
+        fts = f"{table}_fts"
+        names = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+        try:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                           f"{names}, content='{table}', content_rowid='id'{', ' + options if options else ''})")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Полнотекстовый индекс {fts} не создан (FTS5 недоступен): {str(e)}")
+            return False
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+            END
+        ''')
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+            logger.info(f"Создан полнотекстовый индекс {fts}")
+        return True
+    
     def insert_default_extensions(self):
         """Вставка значений расширений по умолчанию, если таблица пуста"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM extensions")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            extensions = [
-                ("shoes", "Обувные товары"),
-                ("tobacco", "Табачной изделия"),
-                ("alcohol", "Алкоголь"),
-                ("pharma", "Фармацевтика"),
-                ("milk", "Молочная продукция"),
-                ("lp", "Товары легкой промышленности"),
-                ("water", "Питевая вода")
-            ]
-            
-            # Сделаем pharma активным по умолчанию
-            for code, name in extensions:
-                is_active = 1 if code == "pharma" else 0
-                cursor.execute(
-                    "INSERT INTO extensions (code, name, is_active) VALUES (?, ?, ?)",
-                    (code, name, is_active)
-                )
-            
-            self.conn.commit()
-            logger.info("Значения расширений API по умолчанию добавлены")
+        return self._seed("extensions", ("code", "name", "is_active"), DEFAULT_EXTENSIONS) > 0
     
     def insert_default_emission_types(self):
         """Вставка значений типов эмиссии по умолчанию, если таблица пуста"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM emission_types")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            emission_types = [
-                ("PRODUCTION", "Производство в Казахстане", None),
-                ("IMPORT", "Ввезен в Казахстан (Импорт)", None),
-                ("REMAINS", "Маркировка остатков", "shoes"),
-                ("COMMISSION", "Принят на коммиссию от физ.лица", "shoes"),
-                ("REMARK", "Перемаркировка", None)
-            ]
-            
-            for code, name, product_group in emission_types:
-                cursor.execute("""
-                    INSERT INTO emission_types (code, name, product_group)
-                    VALUES (?, ?, ?)
-                """, (code, name, product_group))
-            
-            self.conn.commit()
-            logger.info("Значения типов эмиссии по умолчанию добавлены")
+        return self._seed("emission_types", ("code", "name", "product_group"), DEFAULT_EMISSION_TYPES) > 0
     
     def insert_default_countries(self):
         """Вставка значений стран мира по умолчанию, если таблица пуста"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM countries")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            countries = [
-                ("AU", "АВСТРАЛИЯ"),
-                ("AT", "АВСТРИЯ"),
-                ("AZ", "АЗЕРБАЙДЖАН"),
-                ("AX", "АЛАНДСКИЕ ОСТРОВА"),
-                ("AL", "АЛБАНИЯ"),
-                ("DZ", "АЛЖИР"),
-                ("AS", "АМЕРИКАНСКОЕ САМОА"),
-                ("AI", "АНГИЛЬЯ (БРИТ.)"),
-                ("AO", "АНГОЛА"),
-                ("AD", "АНДОРРА"),
-                ("AQ", "АНТАРКТИДА"),
-                ("AG", "АНТИГУА И БАРБУДА"),
-                ("AR", "АРГЕНТИНА"),
-                ("AM", "АРМЕНИЯ"),
-                ("AW", "АРУБА"),
-                ("AF", "АФГАНИСТАН"),
-                ("BS", "БАГАМЫ"),
-                ("BD", "БАНГЛАДЕШ"),
-                ("BB", "БАРБАДОС"),
-                ("BH", "БАХРЕЙН"),
-                ("BY", "БЕЛАРУСЬ"),
-                ("BZ", "БЕЛИЗ"),
-                ("BE", "БЕЛЬГИЯ"),
-                ("BJ", "БЕНИН"),
-                ("BM", "БЕРМУДЫ"),
-                ("BG", "БОЛГАРИЯ"),
-                ("BO", "БОЛИВИЯ"),
-                ("BQ", "БОНЭЙР, СИНТ-ЭСТАТИУС И САБА"),
-                ("BA", "БОСНИЯ И ГЕРЦЕГОВИНА"),
-                ("BW", "БОТСВАНА"),
-                ("BR", "БРАЗИЛИЯ"),
-                ("IO", "БРИТАНСКАЯ ТЕРРИТОРИЯ В ИНДИЙСКОМ ОКЕАНЕ"),
-                ("BN", "БРУНЕЙ-ДАРУССАЛАМ"),
-                ("BV", "БУВЕ"),
-                ("BF", "БУРКИНА-ФАСО"),
-                ("BI", "БУРУНДИ"),
-                ("BT", "БУТАН"),
-                ("VU", "ВАНУАТУ"),
-                ("GB", "ВЕЛИКОБРИТАНИЯ"),
-                ("HU", "ВЕНГРИЯ"),
-                ("VE", "ВЕНЕСУЭЛА"),
-                ("VG", "ВИРГИНСКИЕ ОСТРОВА (БРИТ.)"),
-                ("VI", "ВИРГИНСКИЕ ОСТРОВА, США"),
-                ("VN", "ВЬЕТНАМ"),
-                ("GA", "ГАБОН"),
-                ("HT", "ГАИТИ"),
-                ("GY", "ГАЙАНА"),
-                ("GM", "ГАМБИЯ"),
-                ("GH", "ГАНА"),
-                ("GP", "ГВАДЕЛУПА"),
-                ("GT", "ГВАТЕМАЛА"),
-                ("GN", "ГВИНЕЯ"),
-                ("GW", "ГВИНЕЯ-БИСАУ"),
-                ("DE", "ГЕРМАНИЯ"),
-                ("GG", "ГЕРНСИ"),
-                ("GI", "ГИБРАЛТАР (БРИТ.)"),
-                ("HN", "ГОНДУРАС"),
-                ("HK", "ГОНКОНГ"),
-                ("GD", "ГРЕНАДА"),
-                ("GL", "ГРЕНЛАНДИЯ"),
-                ("GR", "ГРЕЦИЯ"),
-                ("GE", "ГРУЗИЯ"),
-                ("GU", "ГУАМ (США)"),
-                ("DK", "ДАНИЯ"),
-                ("CD", "ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА КОНГО"),
-                ("JE", "ДЖЕРСИ"),
-                ("DJ", "ДЖИБУТИ"),
-                ("DM", "ДОМИНИКА"),
-                ("DO", "ДОМИНИКАHСКАЯ РЕСПУБЛИКА"),
-                ("EU", "ЕВРОПЕЙСКИЙ СОЮЗ"),
-                ("EG", "ЕГИПЕТ"),
-                ("ZM", "ЗАМБИЯ"),
-                ("EH", "ЗАПАДНАЯ САХАРА"),
-                ("ZW", "ЗИМБАБВЕ"),
-                ("IL", "ИЗРАИЛЬ"),
-                ("IN", "ИНДИЯ"),
-                ("ID", "ИНДОНЕЗИЯ"),
-                ("JO", "ИОРДАНИЯ"),
-                ("IQ", "ИРАК, РЕСПУБЛИКА ИРАК"),
-                ("IR", "ИРАН, ИСЛАМСКАЯ РЕСПУБЛИКА"),
-                ("IE", "ИРЛАНДИЯ"),
-                ("IS", "ИСЛАНДИЯ"),
-                ("ES", "ИСПАНИЯ"),
-                ("IT", "ИТАЛИЯ"),
-                ("YE", "ЙЕМЕН"),
-                ("CV", "КАБО-ВЕРДЕ"),
-                ("KZ", "КАЗАХСТАН"),
-                ("KH", "КАМБОДЖА"),
-                ("CM", "КАМЕРУН"),
-                ("CA", "КАНАДА"),
-                ("QA", "КАТАР"),
-                ("KE", "КЕНИЯ"),
-                ("CY", "КИПР"),
-                ("KI", "КИРИБАТИ"),
-                ("CN", "КИТАЙ"),
-                ("CC", "КОКОСОВЫЕ (КИЛИНГ) ОСТРОВА"),
-                ("CO", "КОЛУМБИЯ"),
-                ("KM", "КОМОРЫ"),
-                ("CG", "КОНГО"),
-                ("KP", "КОРЕЯ, НАРОДНО-ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА"),
-                ("CR", "КОСТА-РИКА"),
-                ("CI", "КОТ-Д'ИВУАР"),
-                ("CU", "КУБА"),
-                ("KW", "КУВЕЙТ"),
-                ("KG", "КЫРГЫЗСТАН"),
-                ("CW", "КЮРАСАО"),
-                ("LA", "ЛАОССАЯ НАРОДНО-ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА"),
-                ("LS", "ЛЕСОТО"),
-                ("LR", "ЛИБЕРИЯ"),
-                ("LB", "ЛИВАН"),
-                ("LY", "ЛИВИЯ"),
-                ("LT", "ЛИТВА"),
-                ("LI", "ЛИХТЕНШТЕЙН"),
-                ("LU", "ЛЮКСЕМБУРГ"),
-                ("MU", "МАВРИКИЙ"),
-                ("MR", "МАВРИТАНИЯ"),
-                ("MG", "МАДАГАСКАР"),
-                ("YT", "МАЙОТТА"),
-                ("MO", "МАКАО"),
-                ("MK", "МАКЕДОНИЯ"),
-                ("MW", "МАЛАВИ"),
-                ("MY", "МАЛАЙЗИЯ"),
-                ("ML", "МАЛИ"),
-                ("UM", "МАЛЫЕ ТИХООКЕАН.ОТДАЛЕН.ОСТ-ВА С.Ш."),
-                ("MV", "МАЛЬДИВЫ"),
-                ("MT", "МАЛЬТА"),
-                ("MA", "МАРОККО"),
-                ("MQ", "МАРТИНИКА"),
-                ("MH", "МАРШАЛЛОВЫ ОСТРОВА"),
-                ("MX", "МЕКСИКА"),
-                ("FM", "МИКРОНЕЗИЯ, ФЕДЕРАТИВНЫЕ ШТАТЫ"),
-                ("MZ", "МОЗАМБИК"),
-                ("MD", "МОЛДОВА, РЕСПУБЛИКА"),
-                ("MC", "МОНАКО"),
-                ("MN", "МОНГОЛИЯ"),
-                ("MS", "МОНТСЕРРАТ"),
-                ("MM", "МЬЯНМА"),
-                ("NA", "НАМИБИЯ"),
-                ("NR", "НАУРУ"),
-                ("NP", "НЕПАЛ"),
-                ("NE", "НИГЕР"),
-                ("NG", "НИГЕРИЯ"),
-                ("NL", "НИДЕРЛАНДЫ"),
-                ("NI", "НИКАРАГУА"),
-                ("NU", "НИУЭ"),
-                ("NZ", "НОВАЯ ЗЕЛАНДИЯ"),
-                ("NC", "НОВАЯ КАЛЕДОНИЯ"),
-                ("NO", "НОРВЕГИЯ"),
-                ("AE", "ОБЪЕДИНЕННЫЕ АРАБСКИЕ ЭМИРАТЫ"),
-                ("OM", "ОМАН"),
-                ("IM", "ОСТРОВ МЭН"),
-                ("NF", "ОСТРОВ НОРФОЛК"),
-                ("CX", "ОСТРОВ РОЖДЕСТВА"),
-                ("SH", "ОСТРОВ СВЯТОЙ ЕЛЕНЫ"),
-                ("HM", "ОСТРОВ ХЕРД И ОСТРОВА МАКДОНАЛЬД"),
-                ("KY", "ОСТРОВА КАЙМАН"),
-                ("CK", "ОСТРОВА КУКА"),
-                ("TC", "ОСТРОВА ТЕРКС И КАЙКОС"),
-                ("PK", "ПАКИСТАН"),
-                ("PW", "ПАЛАУ"),
-                ("PS", "ПАЛЕСТИНСКАЯ ТЕРРИТОРИЯ, ОККУПИРОВАННАЯ"),
-                ("PA", "ПАНАМА"),
-                ("VA", "ПАПСКИЙ ПРЕСТОЛ(ГОС.-ГОРОД ВАТИКАН)"),
-                ("PG", "ПАПУА-НОВАЯ ГВИНЕЯ"),
-                ("PY", "ПАРАГВАЙ"),
-                ("PE", "ПЕРУ"),
-                ("PN", "ПИТКЕРН"),
-                ("PL", "ПОЛЬША"),
-                ("PT", "ПОРТУГАЛИЯ"),
-                ("PR", "ПУЭРТО-РИКО"),
-                ("KR", "РЕСПУБЛИКА КОРЕЯ"),
-                ("LV", "РЕСПУБЛИКА ЛАТВИЯ"),
-                ("RE", "РЕЮНЬОН"),
-                ("RU", "РОССИЯ"),
-                ("RW", "РУАНДА"),
-                ("RO", "РУМЫНИЯ"),
-                ("SM", "САH-МАРИHО"),
-                ("WS", "САМОА"),
-                ("ST", "САН-ТОМЕ И ПРИНСИПИ"),
-                ("SA", "САУДОВСКАЯ АРАВИЯ"),
-                ("SZ", "СВАЗИЛЕНД"),
-                ("VC", "СЕHТ-ВИНСЕНТ И ГРЕНАДИНЫ"),
-                ("LC", "СЕHТ-ЛЮСИЯ"),
-                ("MP", "СЕВЕРНЫЕ МАРИАНСКИЕ ОСТРОВА"),
-                ("SC", "СЕЙШЕЛЫ"),
-                ("BL", "СЕН-БАРТЕЛЕМИ"),
-                ("SN", "СЕНЕГАЛ"),
-                ("MF", "СЕН-МАРТЕН"),
-                ("SX", "СЕН-МАРТЕН (нидерландская часть)"),
-                ("PM", "СЕН-ПЬЕР И МИКЕЛОН"),
-                ("KN", "СЕНТ-КИТС И НЕВИС"),
-                ("RS", "СЕРБИЯ"),
-                ("SG", "СИНГАПУР"),
-                ("SY", "СИРИЙСКАЯ АРАБСКАЯ РЕСПУБЛИКА"),
-                ("SK", "СЛОВАКИЯ"),
-                ("SI", "СЛОВЕНИЯ"),
-                ("US", "СОЕДИНЕННЫЕ ШТАТЫ АМЕРИКИ"),
-                ("SB", "СОЛОМОНОВЫ ОСТРОВА"),
-                ("SO", "СОМАЛИ"),
-                ("SD", "СУДАН"),
-                ("SR", "СУРИНАМ"),
-                ("SL", "СЬЕРРА-ЛЕОНЕ"),
-                ("TJ", "ТАДЖИКИСТАН"),
-                ("TH", "ТАИЛАНД"),
-                ("TW", "ТАЙВАНЬ (КИТАЙ)"),
-                ("TZ", "ТАНЗАНИЯ, ОБЪЕДИНЕННАЯ РЕСПУБЛИКА"),
-                ("TL", "ТИМОР-ЛЕСТЕ"),
-                ("TG", "ТОГО"),
-                ("TK", "ТОКЕЛАУ"),
-                ("TO", "ТОНГА"),
-                ("TT", "ТРИНИДАД И ТОБАГО"),
-                ("TV", "ТУВАЛУ"),
-                ("TN", "ТУНИС"),
-                ("TM", "ТУРКМЕНИСТАН"),
-                ("TR", "ТУРЦИЯ"),
-                ("UG", "УГАНДА"),
-                ("UZ", "УЗБЕКИСТАН"),
-                ("UA", "УКРАИНА"),
-                ("WF", "УОЛЛИС И ФУТУНА"),
-                ("UY", "УРУГВАЙ"),
-                ("FO", "ФАРЕРСКИЕ ОСТРОВА"),
-                ("FJ", "ФИДЖИ"),
-                ("PH", "ФИЛИППИНЫ"),
-                ("FI", "ФИНЛЯНДИЯ"),
-                ("FK", "ФОЛКЛЕНДСКИЕ ОСТРОВА (МАЛЬВИНСКИЕ)"),
-                ("FR", "ФРАНЦИЯ"),
-                ("GF", "ФРАНЦУЗСКАЯ ГВИАНА"),
-                ("PF", "ФРАНЦУЗСКАЯ ПОЛИНЕЗИЯ"),
-                ("TF", "ФРАНЦУЗСКИЕ ЮЖНЫЕ ТЕРРИТОРИИ"),
-                ("HR", "ХОРВАТИЯ"),
-                ("CF", "ЦЕНТРАЛЬНО-АФРИКАНСКАЯ РЕСПУБЛИКА"),
-                ("TD", "ЧАД"),
-                ("ME", "ЧЕРНОГОРИЯ"),
-                ("CZ", "ЧЕШСКАЯ РЕСПУБЛИКА"),
-                ("CL", "ЧИЛИ"),
-                ("CH", "ШВЕЙЦАРИЯ"),
-                ("SE", "ШВЕЦИЯ"),
-                ("SJ", "ШПИЦБЕРГЕН И ЯН МАЙЕН"),
-                ("LK", "ШРИ-ЛАНКА"),
-                ("EC", "ЭКВАДОР"),
-                ("GQ", "ЭКВАТОРИАЛЬНАЯ ГВИНЕЯ"),
-                ("SV", "ЭЛЬ-САЛЬВАДОР"),
-                ("ER", "ЭРИТРЕЯ"),
-                ("EE", "ЭСТОНИЯ"),
-                ("ET", "ЭФИОПИЯ"),
-                ("GS", "ЮЖН.ДЖОРДЖИЯ И ЮЖН.САНДВИЧ.ОСТРОВА"),
-                ("ZA", "ЮЖНАЯ АФРИКА"),
-                ("JM", "ЯМАЙКА"),
-                ("JP", "ЯПОНИЯ")
-            ]
-            
-            for code, name in countries:
-                cursor.execute("""
-                    INSERT INTO countries (code, name)
-                    VALUES (?, ?)
-                """, (code, name))
-            
-            self.conn.commit()
-            logger.info("Значения стран мира по умолчанию добавлены")
+        return self._seed("countries", ("code", "name"), DEFAULT_COUNTRIES) > 0
     
     def insert_default_order_statuses(self):
-        """Добавление стандартных статусов заказов"""
-        cursor = self.conn.cursor()
-        
-        # Стандартные статусы заказов
-        default_statuses = [
-            ("CREATED", "Заказ создан", "Заказ создан в системе"),
-            ("PENDING", "Заказ ожидает подтверждения", "Заказ ожидает подтверждения в системе маркировки"),
-            ("DECLINED", "Заказ не подтверждён", "Заказ не подтверждён в системе маркировки"),
-            ("APPROVED", "Заказ подтверждён", "Заказ подтверждён в системе маркировки"),
-            ("READY", "Заказ готов", "Заказ готов к использованию"),
-            ("CLOSED", "Заказ закрыт", "Заказ закрыт (обработан)")
-        ]
-        
-        # Проверяем, какие коды статусов уже существуют в базе
-        cursor.execute("SELECT code FROM order_statuses")
-        existing_codes = [row[0] for row in cursor.fetchall()]
-        
-        # Добавляем только отсутствующие статусы
-        added_count = 0
-        for code, name, description in default_statuses:
-            if code not in existing_codes:
-                cursor.execute(
-                    "INSERT INTO order_statuses (code, name, description) VALUES (?, ?, ?)",
-                    (code, name, description)
-                )
-                added_count += 1
-                logger.info(f"Добавлен стандартный статус заказа: {code} - {name}")
-        
-        if added_count > 0:
-            # Явно сохраняем изменения
-            self.conn.commit()
-            logger.info(f"Добавлено {added_count} стандартных статусов заказов")
-        
-        return added_count > 0
+        """Добавление отсутствующих стандартных статусов заказов"""
+        return self._seed("order_statuses", ("code", "name", "description"), DEFAULT_ORDER_STATUSES,
+                          only_if_empty=False) > 0
+    
+    def insert_default_report_statuses(self):
+        """Вставка статусов отчетов по умолчанию, если таблица пуста"""
+        return self._seed("report_statuses", ("code", "name", "description"), DEFAULT_REPORT_STATUSES) > 0
     
     # Методы для работы с заказами
     def add_order(self, order_number: str, timestamp: str = None, expected_complete: int = None, status: str = "Не определен") -> Order:
@@ -938,6 +817,16 @@ class Database:
         row = cursor.fetchone()
         return Order(row["id"], row["order_number"], row["timestamp"], row["expected_complete"], row["status"], row["created_at"])
     
+    def update_order(self, order_id: int, order_number: str, status: str, expected_complete: str = None) -> bool:
+        """Обновление номера и статуса заказа (например, после отправки заказа из очереди)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "UPDATE orders SET order_number = ?, status = ?, expected_complete = COALESCE(?, expected_complete) WHERE id = ?",
+            (order_number, status, expected_complete, order_id)
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+    
     def get_orders(self) -> List[Order]:
         """Получение списка заказов из базы данных"""
         cursor = self.conn.cursor()
@@ -966,7 +855,8 @@ class Database:
         cursor = self.conn.cursor()
         cursor.execute(
             "SELECT op.*, n.name as product_name FROM order_products op " +
-            "LEFT JOIN nomenclature n ON op.gtin = n.gtin " +
+            "LEFT JOIN nomenclature n ON n.gtin = CASE WHEN length(op.gtin) < 14 AND op.gtin NOT GLOB '*[^0-9]*' " +
+            "THEN substr('00000000000000' || op.gtin, -14) ELSE op.gtin END " +
             "WHERE op.order_id = ?",
             (order_id,)
         )
@@ -1173,7 +1063,8 @@ class Database:
     
     # Методы для работы с номенклатурой
     def add_nomenclature(self, name: str, gtin: str, product_group: str = "") -> Nomenclature:
-        """Добавление номенклатуры в базу данных"""
+        """Добавление номенклатуры в базу данных (GTIN приводится к 14 цифрам, как при импорте)"""
+        gtin = normalize_gtin(gtin) or gtin
         cursor = self.conn.cursor()
         cursor.execute(
             "INSERT INTO nomenclature (name, gtin, product_group) VALUES (?, ?, ?)",
@@ -1190,7 +1081,8 @@ class Database:
         return Nomenclature(row["id"], row["name"], row["gtin"], product_group_value)
     
     def update_nomenclature(self, nomenclature_id: int, name: str, gtin: str, product_group: str = "") -> Nomenclature:
-        """Обновление номенклатуры в базе данных"""
+        """Обновление номенклатуры в базе данных (GTIN приводится к 14 цифрам, как при импорте)"""
+        gtin = normalize_gtin(gtin) or gtin
         cursor = self.conn.cursor()
         cursor.execute(
             "UPDATE nomenclature SET name = ?, gtin = ?, product_group = ? WHERE id = ?",
@@ -1226,6 +1118,72 @@ class Database:
             result.append(Nomenclature(row["id"], row["name"], row["gtin"], product_group_value))
         return result
     
+    @timed()
+    def import_nomenclature(self, items: List[Tuple[str, str, str]]) -> Dict[str, int]:
+        """Пакетный импорт номенклатуры в одной транзакции
+        
+        Записи с уже существующим GTIN обновляются (название и товарная группа),
+        остальные добавляются. При повторе GTIN в наборе действует последняя запись.
+        
+        Args:
+            items (List[Tuple[str, str, str]]): Записи (название, GTIN, товарная группа)
+            
+        Returns:
+            Dict[str, int]: Количество добавленных (inserted) и обновленных (updated) записей
+        """
+        unique = {gtin: (name, gtin, product_group or "") for name, gtin, product_group in items}
+        try:
+            cursor = self.conn.cursor()
+            before = cursor.execute("SELECT COUNT(*) FROM nomenclature").fetchone()[0]
+            cursor.executemany('''
+                INSERT INTO nomenclature (name, gtin, product_group) VALUES (?, ?, ?)
+                ON CONFLICT (gtin) DO UPDATE SET
+                    name = excluded.name,
+                    product_group = excluded.product_group
+            ''', unique.values())
+            inserted = cursor.execute("SELECT COUNT(*) FROM nomenclature").fetchone()[0] - before
+            self.conn.commit()
+            return {"inserted": inserted, "updated": len(unique) - inserted}
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Ошибка при импорте номенклатуры: {str(e)}")
+            raise e
+    
+    @timed()
+    def search_nomenclature(self, query: str, limit: int = 500) -> List[Nomenclature]:
+        """Поиск номенклатуры по началу слов названия и по началу GTIN
+        
+        Args:
+            query (str): Строка поиска; все слова должны встретиться в записи
+            limit (int): Максимальное количество записей
+            
+        Returns:
+            List[Nomenclature]: Найденные записи, более релевантные первыми
+        """
+        # GTIN хранится в 14 цифрах: номер, введенный без ведущего нуля (EAN-13), тоже находится
+        match = fts_match_query(query, gtin_prefix=True)
+        if not match:
+            return []
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT n.* FROM nomenclature_fts f
+                JOIN nomenclature n ON n.id = f.rowid
+                WHERE nomenclature_fts MATCH ?
+                ORDER BY f.rank
+                LIMIT ?
+            ''', (match, limit))
+        except sqlite3.OperationalError as e:
+            # Без FTS5 - поиск подстроки по таблице
+            if "no such table" not in str(e):
+                raise
+            logger.debug("Поиск номенклатуры без полнотекстового индекса: %s", e)
+            pattern = f"%{query.strip()}%"
+            cursor.execute("SELECT * FROM nomenclature WHERE name LIKE ? OR gtin LIKE ? LIMIT ?",
+                           (pattern, pattern, limit))
+        return [Nomenclature(row["id"], row["name"], row["gtin"], row["product_group"] or "")
+                for row in cursor.fetchall()]
+    
     def get_nomenclature_by_id(self, nomenclature_id: int) -> Optional[Nomenclature]:
         """Получение номенклатуры по ID"""
         cursor = self.conn.cursor()
@@ -1288,6 +1246,7 @@ class Database:
         return default
     
     # Методы для работы с логами API
+    @timed()
     def add_api_log(self, method, url, request, response, status_code, success=True, description=None):
         """Добавление записи в лог API-запросов"""
         try:
@@ -1355,6 +1314,7 @@ class Database:
                 logger.error(f"Повторная ошибка при логировании API: {str(e2)}")
                 return {"id": -1}
     
+    @timed()
     def get_api_logs(self, limit=100, offset=0, success=None, method=None, url_pattern=None, date_from=None, date_to=None):
         """Получение списка логов API-запросов с фильтрацией"""
         cursor = self.conn.cursor()
@@ -1386,24 +1346,64 @@ class Database:
         params.extend([limit, offset])
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            log_entry = {
-                "id": row["id"],
-                "method": row["method"],
-                "url": row["url"],
-                "request": row["request"],
-                "response": row["response"],
-                "status_code": row["status_code"],
-                "success": bool(row["success"]),
-                "timestamp": row["timestamp"]
-            }
-            # Добавляем поле description, если оно есть
-            if "description" in row.keys():
-                log_entry["description"] = row["description"]
-            result.append(log_entry)
-        return result
+        return [self._api_log_entry(row) for row in cursor.fetchall()]
+    
+    def _api_log_entry(self, row) -> Dict[str, Any]:
+        """Запись лога API-запросов из строки таблицы api_logs"""
+        log_entry = {
+            "id": row["id"],
+            "method": row["method"],
+            "url": row["url"],
+            "request": row["request"],
+            "response": row["response"],
+            "status_code": row["status_code"],
+            "success": bool(row["success"]),
+            "timestamp": row["timestamp"]
+        }
+        # Добавляем поле description, если оно есть
+        if "description" in row.keys():
+            log_entry["description"] = row["description"]
+        return log_entry
+    
+    @timed()
+    def search_api_logs(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Поиск записей лога API-запросов по содержимому запроса, ответа и описанию
+        
+        Код маркировки ищется по идентификатору (GTIN и серийный номер) в любом
+        представлении, с криптохвостом или без; прочие фрагменты запроса - по началу слов.
+        
+        Args:
+            query (str): Код маркировки, reportId или слова для поиска
+            limit (int): Максимальное количество записей
+            
+        Returns:
+            List[Dict[str, Any]]: Найденные записи, новые первыми
+        """
+        code = parse(query.strip()) if query else None
+        match = fts_match_query(code.identity if code is not None else query or "")
+        if not match:
+            return []
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT l.* FROM api_logs_fts f
+                JOIN api_logs l ON l.id = f.rowid
+                WHERE api_logs_fts MATCH ?
+                ORDER BY f.rowid DESC
+                LIMIT ?
+            ''', (match, limit))
+        except sqlite3.OperationalError as e:
+            # Без FTS5 - поиск подстроки с полным просмотром таблицы
+            if "no such table" not in str(e):
+                raise
+            logger.debug("Поиск в логах API без полнотекстового индекса: %s", e)
+            pattern = f"%{code.identity if code is not None else query.strip()}%"
+            cursor.execute('''
+                SELECT * FROM api_logs
+                WHERE request LIKE ? OR response LIKE ? OR description LIKE ?
+                ORDER BY id DESC LIMIT ?
+            ''', (pattern, pattern, pattern, limit))
+        return [self._api_log_entry(row) for row in cursor.fetchall()]
     
     def get_api_log_by_id(self, log_id):
         """Получение записи лога API-запроса по ID"""
@@ -1717,6 +1717,7 @@ class Database:
             raise
     
     # Методы для работы с API заказами
+    @timed()
     def save_api_orders(self, api_orders: List[APIOrder]) -> List[APIOrder]:
         """Сохранение API заказов в базу данных
         
@@ -1836,6 +1837,7 @@ class Database:
             logger.error(f"Ошибка при сохранении API заказов: {str(e)}")
             raise
     
+    @timed()
     def get_api_orders(self) -> List[APIOrder]:
         """Получение списка API заказов из базы данных"""
         try:
@@ -1915,35 +1917,172 @@ class Database:
         self.conn.commit()
         return cursor.rowcount > 0
     
-    def migrate_api_order_structure(self):
-        """Миграция структуры API заказов из старой (с отдельной таблицей буферов) в новую (с буферами в JSON)"""
-        try:
-            cursor = self.conn.cursor()
-            
-            # Проверяем наличие колонок в таблице api_orders
-            cursor.execute("PRAGMA table_info(api_orders)")
-            columns = cursor.fetchall()
-            column_names = [column["name"] for column in columns]
-            
-            # Добавляем колонку buffers, если ее нет
-            if "buffers" not in column_names:
-                cursor.execute("ALTER TABLE api_orders ADD COLUMN buffers TEXT")
-                logger.info("Добавлена колонка buffers в таблицу api_orders")
-            
-            # Добавляем колонку order_status_description, если ее нет
-            if "order_status_description" not in column_names:
-                cursor.execute("ALTER TABLE api_orders ADD COLUMN order_status_description TEXT")
-                logger.info("Добавлена колонка order_status_description в таблицу api_orders")
-            
-            # Добавляем колонку updated_at, если ее нет
-            if "updated_at" not in column_names:
-                cursor.execute("ALTER TABLE api_orders ADD COLUMN updated_at TIMESTAMP")
-                logger.info("Добавлена колонка updated_at в таблицу api_orders")
-                
-            # Проверяем наличие таблицы api_order_buffers
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='api_order_buffers'")
-            if cursor.fetchone():
-                logger.info("Обнаружена устаревшая таблица api_order_buffers, выполняется миграция данных")
+    def _migrate_marking_code_fields(self, cursor, batch_size: int = 50000) -> None:
+        """Заполнение колонок gtin, serial и crypto_tail у кодов, сохраненных до их появления
+        
+        Коды приводятся к форме хранения (разделитель [GS]), GTIN берется из самого кода.
+        Повторные экземпляры кода (тот же GTIN и серийный номер) удаляются, чтобы можно было
+        создать уникальный индекс (gtin, serial) и выгрузка не выдавала код дважды
+        (см. _remove_duplicate_codes).
+        """
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS temp_parsed_codes (
+                id INTEGER PRIMARY KEY, code TEXT, gtin TEXT, serial TEXT, crypto_tail TEXT
+            )
+        ''')
+        cursor.execute("DELETE FROM temp_parsed_codes")
+        
+        read_cursor = self.conn.cursor()
+        read_cursor.execute("SELECT id, code, gtin FROM marking_codes WHERE serial IS NULL")
+        parsed_count = 0
+        gtin_mismatches = 0
+        while True:
+            rows = read_cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            parsed_rows = []
+            for row_id, code, gtin in rows:
+                parsed = parse(code)
+                if parsed is None:
+                    continue
+                if parsed.gtin != gtin:
+                    gtin_mismatches += 1
+                parsed_rows.append((row_id, parsed.storage, parsed.gtin, parsed.serial, parsed.crypto_tail))
+            cursor.executemany("INSERT INTO temp_parsed_codes (id, code, gtin, serial, crypto_tail) VALUES (?, ?, ?, ?, ?)",
+                               parsed_rows)
+            parsed_count += len(parsed_rows)
+        
+        if not parsed_count:
+            self.conn.commit()
+            return
+        # Дубликаты удаляются до заполнения serial: иначе обновление нарушит уникальный индекс
+        duplicates = self._remove_duplicate_codes(cursor)
+        cursor.execute('''
+            UPDATE marking_codes SET (code, gtin, serial, crypto_tail) = (
+                SELECT code, gtin, serial, crypto_tail FROM temp_parsed_codes WHERE temp_parsed_codes.id = marking_codes.id
+            )
+            WHERE id IN (SELECT id FROM temp_parsed_codes)
+        ''')
+        cursor.execute("DELETE FROM temp_parsed_codes")
+        self.conn.commit()
+        
+        logger.info(f"Разобрано кодов маркировки: {parsed_count}")
+        if gtin_mismatches:
+            logger.warning(f"GTIN в коде не совпадал с сохраненным GTIN у {gtin_mismatches} кодов, "
+                           f"сохранен GTIN из кода")
+        if duplicates:
+            logger.warning(f"Удалено повторно сохраненных кодов маркировки: {duplicates}")
+    
+    def _remove_duplicate_codes(self, cursor) -> int:
+        """Удаление повторных экземпляров кодов среди разобранных (temp_parsed_codes)
+        
+        Остается первый сохраненный экземпляр; его статус и флаги used/exported объединяются
+        со статусами удаленных (CodeStatus.merge), чтобы нанесенный или агрегированный код
+        не вернулся в выгрузку. Объединение записывается в журнал code_events
+        (ref_type duplicate, ref_id - ID удаленных экземпляров).
+        
+        Returns:
+            int: Количество удаленных кодов
+        """
+        cursor.execute('''
+            WITH candidates AS (
+                SELECT id, gtin, serial FROM temp_parsed_codes
+                UNION ALL
+                SELECT id, gtin, serial FROM marking_codes WHERE serial IS NOT NULL
+            )
+            SELECT c.gtin, c.serial, m.id, m.status, m.used, m.exported
+            FROM candidates c JOIN marking_codes m ON m.id = c.id
+            WHERE (c.gtin, c.serial) IN (
+                SELECT gtin, serial FROM candidates GROUP BY gtin, serial HAVING COUNT(*) > 1
+            )
+            ORDER BY c.gtin, c.serial, m.id
+        ''')
+        removed_ids = []
+        for _, group in groupby(cursor.fetchall(), key=lambda row: (row["gtin"], row["serial"])):
+            kept, *copies = group
+            status, used, exported = kept["status"], kept["used"], kept["exported"]
+            for copy in copies:
+                status = CodeStatus.merge(status, copy["status"])
+                used = max(used or 0, copy["used"] or 0)
+                exported = max(exported or 0, copy["exported"] or 0)
+            copy_ids = [copy["id"] for copy in copies]
+            cursor.execute("UPDATE marking_codes SET status = ?, used = ?, exported = ? WHERE id = ?",
+                           (status, used, exported, kept["id"]))
+            cursor.execute('''
+                INSERT INTO code_events (code_id, from_status, to_status, ref_type, ref_id)
+                VALUES (?, ?, ?, 'duplicate', ?)
+            ''', (kept["id"], kept["status"], status, ",".join(str(copy_id) for copy_id in copy_ids)))
+            removed_ids.extend(copy_ids)
+        
+        if removed_ids:
+            self._fill_temp_code_ids(cursor, removed_ids)
+            cursor.execute("DELETE FROM marking_codes WHERE id IN (SELECT id FROM temp_code_ids)")
+            cursor.execute("DELETE FROM temp_parsed_codes WHERE id IN (SELECT id FROM temp_code_ids)")
+        return len(removed_ids)
+    
+    def _normalize_nomenclature_gtins(self, cursor) -> None:
+        """Приведение GTIN номенклатуры к 14 цифрам (utils.nomenclature_import.normalize_gtin)
+        
+        Записи, GTIN которых после приведения совпадают, объединяются в одну: сохраняется
+        запись с уже приведенным GTIN (добавленная импортом), иначе - самая новая; пустая
+        товарная группа берется из объединяемых записей.
+        """
+        groups = {}
+        for row in cursor.execute("SELECT id, name, gtin, product_group FROM nomenclature ORDER BY id").fetchall():
+            groups.setdefault(normalize_gtin(row["gtin"]) or row["gtin"], []).append(row)
+        
+        updates = []
+        merged = []
+        for gtin, rows in groups.items():
+            # Запись с приведенным GTIN, затем самая новая
+            kept = max(rows, key=lambda row: (row["gtin"] == gtin, row["id"]))
+            others = [row for row in rows if row["id"] != kept["id"]]
+            product_group = kept["product_group"] or next(
+                (row["product_group"] for row in reversed(others) if row["product_group"]), kept["product_group"])
+            if others:
+                merged.extend(row["id"] for row in others)
+                logger.warning(f"Номенклатура с GTIN {gtin} объединена в запись {kept['name']} (ID {kept['id']}): "
+                               + ", ".join(f"{row['name']} (ID {row['id']}, GTIN {row['gtin']})" for row in others))
+            if gtin != kept["gtin"] or product_group != kept["product_group"]:
+                updates.append((gtin, product_group, kept["id"]))
+        
+        if not updates and not merged:
+            return
+        # Объединенные записи удаляются до обновления, чтобы приведенный GTIN не нарушил уникальность
+        cursor.executemany("DELETE FROM nomenclature WHERE id = ?", ((row_id,) for row_id in merged))
+        cursor.executemany("UPDATE nomenclature SET gtin = ?, product_group = ? WHERE id = ?", updates)
+        self.conn.commit()
+        logger.info(f"GTIN номенклатуры приведены к 14 цифрам: {len(updates)}, объединено повторов: {len(merged)}")
+    
+    def migrate_api_order_structure(self):
+        """Миграция структуры API заказов из старой (с отдельной таблицей буферов) в новую (с буферами в JSON)"""
+        try:
+            cursor = self.conn.cursor()
+            
+            # Проверяем наличие колонок в таблице api_orders
+            cursor.execute("PRAGMA table_info(api_orders)")
+            columns = cursor.fetchall()
+            column_names = [column["name"] for column in columns]
+            
+            # Добавляем колонку buffers, если ее нет
+            if "buffers" not in column_names:
+                cursor.execute("ALTER TABLE api_orders ADD COLUMN buffers TEXT")
+                logger.info("Добавлена колонка buffers в таблицу api_orders")
+            
+            # Добавляем колонку order_status_description, если ее нет
+            if "order_status_description" not in column_names:
+                cursor.execute("ALTER TABLE api_orders ADD COLUMN order_status_description TEXT")
+                logger.info("Добавлена колонка order_status_description в таблицу api_orders")
+            
+            # Добавляем колонку updated_at, если ее нет
+            if "updated_at" not in column_names:
+                cursor.execute("ALTER TABLE api_orders ADD COLUMN updated_at TIMESTAMP")
+                logger.info("Добавлена колонка updated_at в таблицу api_orders")
+                
+            # Проверяем наличие таблицы api_order_buffers
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='api_order_buffers'")
+            if cursor.fetchone():
+                logger.info("Обнаружена устаревшая таблица api_order_buffers, выполняется миграция данных")
                 
                 # Получаем все заказы
                 cursor.execute("SELECT id, order_id FROM api_orders")
@@ -1993,21 +2132,53 @@ class Database:
             self.conn.commit()
             
         except Exception as e:
-            logger.error(f"Ошибка при миграции структуры API заказов: {str(e)}")
+            self._migration_failed("Ошибка при миграции структуры API заказов", e)
             # Продолжаем выполнение, так как это не критическая ошибка
     
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие соединения с базой данных"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Соединение с базой данных для текущего потока
+        
+        Соединение sqlite3 нельзя использовать из нескольких потоков: транзакция общая
+        для соединения, и commit в рабочем потоке фиксировал бы незавершенные изменения
+        основного. Поэтому основной поток работает с соединением, открытым при создании
+        объекта, а рабочие потоки (отправка частей отчетов, очередь отправки, фоновые
+        запросы к API) при первом обращении открывают собственное соединение, которое
+        закрывается при завершении потока.
+        """
+        if threading.get_ident() == self._conn_thread:
+            return self._conn
+        conn = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._thread_local.conn = conn
+        return conn
+    
+    @conn.setter
+    def conn(self, value):
+        self._conn = value
+        self._conn_thread = threading.get_ident()
+    
     def __del__(self):
         """Закрытие соединения с базой данных при уничтожении объекта"""
-        if hasattr(self, 'conn') and self.conn:
+        # Объект может уничтожаться в другом потоке, поэтому закрываем соединение основного потока
+        conn = getattr(self, '_conn', None)
+        if conn:
             try:
                 # Явное сохранение всех изменений перед закрытием
-                self.conn.commit()
+                conn.commit()
                 logger.info("Изменения в базе данных сохранены перед закрытием")
             except Exception as e:
                 logger.error(f"Ошибка при сохранении изменений в базе данных: {str(e)}")
             finally:
                 # Закрытие соединения
-                self.conn.close()
+                conn.close()
                 logger.info("Соединение с базой данных закрыто")
     
     def commit(self):
@@ -2016,12 +2187,130 @@ class Database:
             self.conn.commit()
             logger.info("Изменения вручную сохранены в базу данных")
     
+    def _code_filter_path(self, name: str) -> Optional[str]:
+        """Файл фильтра дубликатов рядом с базой данных (для базы в памяти - None)"""
+        if not self.db_path or self.db_path == ":memory:":
+            return None
+        return f"{self.db_path}.{name}.bloom"
+    
+    def _sync_code_filter(self, name: str, bloom: BloomFilter) -> int:
+        """Добавление в фильтр строк таблицы, появившихся после bloom.last_id
+        
+        Returns:
+            int: Количество добавленных кодов
+        """
+        table, condition = CODE_FILTER_SOURCES[name]
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id, code FROM {table} WHERE {condition} AND id > ? ORDER BY id", (bloom.last_id,))
+        added = 0
+        while True:
+            rows = cursor.fetchmany(50000)
+            if not rows:
+                break
+            bloom.add_many(identity(code) for _, code in rows)
+            bloom.last_id = rows[-1][0]
+            added += len(rows)
+        return added
+    
+    def rebuild_code_filter(self, name: str) -> BloomFilter:
+        """Построение фильтра дубликатов заново по таблице
+        
+        Args:
+            name (str): Имя фильтра (ключ CODE_FILTER_SOURCES)
+        """
+        started = time.perf_counter()
+        table, condition = CODE_FILTER_SOURCES[name]
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {condition}").fetchone()[0]
+        # Запас вдвое, чтобы фильтр не перестраивался после каждого нового заказа
+        bloom = BloomFilter(capacity=max(MIN_CAPACITY, total * 2))
+        added = self._sync_code_filter(name, bloom)
+        self._code_filters[name] = bloom
+        logger.info(f"Фильтр дубликатов {name} построен: {added} кодов, {len(bloom.bits) / 1024:.0f} КБ, "
+                    f"{(time.perf_counter() - started) * 1000:.0f} мс")
+        return bloom
+    
+    def get_code_filter(self, name: str) -> BloomFilter:
+        """Фильтр дубликатов: загружается из файла и дополняется новыми строками или строится заново
+        
+        Args:
+            name (str): "codes" - коды маркировки, "aggregated" - коды в файлах агрегации
+        """
+        bloom = self._code_filters.get(name)
+        if bloom is None:
+            path = self._code_filter_path(name)
+            bloom = BloomFilter.load(path) if path else None
+            if bloom is None:
+                return self.rebuild_code_filter(name)
+            # Файл от другой (пересозданной) базы данных учитывает строки, которых в таблице нет
+            table, _ = CODE_FILTER_SOURCES[name]
+            max_id = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            if bloom.last_id > max_id:
+                logger.warning(f"Фильтр дубликатов {path} не соответствует базе данных и будет построен заново")
+                return self.rebuild_code_filter(name)
+            self._sync_code_filter(name, bloom)
+            self._code_filters[name] = bloom
+        if bloom.saturated:
+            bloom = self.rebuild_code_filter(name)
+        return bloom
+    
+    def _update_code_filter(self, name: str) -> None:
+        """Добавление новых строк в уже загруженный фильтр после записи в таблицу"""
+        bloom = self._code_filters.get(name)
+        if bloom is not None:
+            self._sync_code_filter(name, bloom)
+    
+    def save_code_filters(self) -> None:
+        """Сохранение загруженных фильтров дубликатов в файлы"""
+        for name, bloom in self._code_filters.items():
+            path = self._code_filter_path(name)
+            if not path:
+                continue
+            try:
+                bloom.save(path)
+            except OSError as e:
+                logger.error(f"Ошибка при сохранении фильтра дубликатов {path}: {str(e)}")
+    
+    def _existing_codes(self, cursor, rows) -> set:
+        """Точная проверка кодов, отмеченных фильтром: индексы строк, уже сохраненных в marking_codes
+        
+        Args:
+            rows (list): Пары (индекс, (code, gtin, serial, crypto_tail, order_id))
+        """
+        serials = {(row[1], row[2]): index for index, row in rows if row[2]}
+        codes = {row[0]: index for index, row in rows if not row[2]}
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_serials "
+                       "(gtin TEXT, serial TEXT, PRIMARY KEY (gtin, serial)) WITHOUT ROWID")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_keys (code_key TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp_code_serials")
+        cursor.execute("DELETE FROM temp_code_keys")
+        cursor.executemany("INSERT INTO temp_code_serials (gtin, serial) VALUES (?, ?)", serials)
+        cursor.executemany("INSERT INTO temp_code_keys (code_key) VALUES (?)", ((code,) for code in codes))
+        
+        existing = set()
+        cursor.execute('''
+            SELECT t.gtin, t.serial FROM temp_code_serials t
+            CROSS JOIN marking_codes m ON m.gtin = t.gtin AND m.serial = t.serial
+        ''')
+        existing.update(serials[tuple(row)] for row in cursor.fetchall())
+        cursor.execute('''
+            SELECT t.code_key FROM temp_code_keys t
+            CROSS JOIN marking_codes m ON m.code = t.code_key
+        ''')
+        existing.update(codes[row[0]] for row in cursor.fetchall())
+        return existing
+    
+    @timed()
     def save_marking_codes(self, codes, gtin, order_id):
         """Сохранение кодов маркировки в базу данных
         
+        Коды разбираются на GTIN, серийный номер и криптохвост и сохраняются в форме
+        хранения (разделитель [GS]). Пакет проверяется фильтром дубликатов; уже сохраненные
+        экземпляры (тот же GTIN и серийный номер) находятся точной проверкой только среди
+        отмеченных фильтром кодов и пропускаются.
+        
         Args:
             codes (List[str]): Список кодов маркировки
-            gtin (str): GTIN товара
+            gtin (str): GTIN товара (используется для кодов, которые не удалось разобрать)
             order_id (str): Идентификатор заказа
             
         Returns:
@@ -2031,21 +2320,55 @@ class Database:
             cursor = self.conn.cursor()
             
             # Подготавливаем данные для вставки
-            data = [(code, gtin, order_id) for code in codes]
-            
-            # Выполняем массовую вставку
+            data = []
+            gtin_mismatches = 0
+            for code, parsed in zip(codes, parse_codes(codes)):
+                if parsed is None:
+                    data.append((to_storage(code), gtin, None, None, order_id))
+                    continue
+                if gtin and parsed.gtin != gtin:
+                    gtin_mismatches += 1
+                data.append((parsed.storage, parsed.gtin, parsed.serial, parsed.crypto_tail, order_id))
+            if gtin_mismatches:
+                logger.warning(f"GTIN в коде не совпадает с GTIN {gtin} заказа {order_id} у {gtin_mismatches} кодов")
+            
+            # Отсев дубликатов: точная проверка только для кодов, отмеченных фильтром
+            bloom = self.get_code_filter("codes")
+            candidates = [(index, row) for index, row in enumerate(data)
+                          if identity(row[0]) in bloom]
+            if candidates:
+                duplicates = self._existing_codes(cursor, candidates)
+                if duplicates:
+                    logger.warning(f"Пропущено уже сохраненных кодов маркировки: {len(duplicates)} "
+                                   f"(например, {data[min(duplicates)][0]})")
+                    data = [row for index, row in enumerate(data) if index not in duplicates]
+            
+            # Выполняем массовую вставку (OR IGNORE - для повторов внутри пакета)
+            last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM marking_codes").fetchone()[0]
+            before = self.conn.total_changes
             cursor.executemany(
-                "INSERT INTO marking_codes (code, gtin, order_id) VALUES (?, ?, ?)",
+                "INSERT OR IGNORE INTO marking_codes (code, gtin, serial, crypto_tail, order_id) VALUES (?, ?, ?, ?, ?)",
                 data
             )
+            skipped = len(data) - (self.conn.total_changes - before)
+            if skipped:
+                logger.warning(f"Пропущено повторов кодов маркировки в пакете: {skipped}")
             
             self.conn.commit()
+            self._update_code_filter("codes")
+            
+            if self.code_pool is not None:
+                cursor.execute("SELECT id, gtin, serial, code, status FROM marking_codes WHERE id > ?", (last_id,))
+                self.code_pool.add_rows(cursor)
             return True
         except Exception as e:
+            self.conn.rollback()
             logger.error(f"Ошибка при сохранении кодов маркировки: {str(e)}")
             return False
     
-    def get_marking_codes(self, gtin=None, order_id=None, used=None, exported=None, limit=1000):
+    @timed()
+    def get_marking_codes(self, gtin=None, order_id=None, used=None, exported=None, limit=1000, status=None,
+                          serial=None):
         """Получение кодов маркировки из базы данных
         
         Args:
@@ -2054,6 +2377,8 @@ class Database:
             used (bool, optional): Фильтр по использованным кодам
             exported (bool, optional): Фильтр по экспортированным кодам
             limit (int, optional): Максимальное количество возвращаемых кодов
+            status (str, optional): Фильтр по статусу кода (CodeStatus)
+            serial (str, optional): Фильтр по серийному номеру
             
         Returns:
             List[Dict]: Список словарей с данными кодов маркировки
@@ -2062,9 +2387,18 @@ class Database:
             cursor = self.conn.cursor()
             
             # Строим запрос с условиями
-            query = "SELECT id, code, gtin, order_id, used, exported, created_at FROM marking_codes WHERE 1=1"
+            query = ("SELECT id, code, gtin, order_id, used, exported, created_at, status, serial, crypto_tail "
+                     "FROM marking_codes WHERE 1=1")
             params = []
             
+            if serial:
+                query += " AND serial = ?"
+                params.append(serial)
+            
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            
             if gtin:
                 query += " AND gtin = ?"
                 params.append(gtin)
@@ -2099,7 +2433,10 @@ class Database:
                     "order_id": row[3],
                     "used": bool(row[4]),
                     "exported": bool(row[5]),
-                    "created_at": row[6]
+                    "created_at": row[6],
+                    "status": row[7],
+                    "serial": row[8],
+                    "crypto_tail": row[9]
                 })
             
             return result
@@ -2107,6 +2444,212 @@ class Database:
             logger.error(f"Ошибка при получении кодов маркировки: {str(e)}")
             return []
     
+    def _fill_temp_code_ids(self, cursor, code_ids) -> None:
+        """Загрузка ID кодов во временную таблицу для множественных операций
+        
+        Временная таблица снимает ограничение SQLite на количество параметров запроса.
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp_code_ids")
+        cursor.executemany("INSERT OR IGNORE INTO temp_code_ids (id) VALUES (?)", ((code_id,) for code_id in code_ids))
+    
+    def _fill_temp_code_ids_by_barcodes(self, cursor, barcodes) -> None:
+        """Загрузка во временную таблицу temp_code_ids ID кодов, найденных по штрих-кодам
+        
+        Штрих-коды разбираются на GTIN и серийный номер и ищутся по уникальному индексу
+        (gtin, serial), поэтому код из файла агрегации без криптохвоста находится так же,
+        как полный код. Штрих-коды, которые не удалось разобрать, ищутся по значению кода
+        в форме хранения.
+        """
+        serials = []
+        keys = []
+        for barcode, parsed in zip(barcodes, parse_codes(barcodes)):
+            if parsed is not None:
+                serials.append((parsed.gtin, parsed.serial))
+            elif barcode:
+                keys.append((to_storage(barcode),))
+        
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_serials "
+                       "(gtin TEXT, serial TEXT, PRIMARY KEY (gtin, serial)) WITHOUT ROWID")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_keys (code_key TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp_code_serials")
+        cursor.execute("DELETE FROM temp_code_keys")
+        cursor.executemany("INSERT OR IGNORE INTO temp_code_serials (gtin, serial) VALUES (?, ?)", serials)
+        cursor.executemany("INSERT OR IGNORE INTO temp_code_keys (code_key) VALUES (?)", keys)
+        
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_code_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp_code_ids")
+        # CROSS JOIN фиксирует порядок: перебираются штрих-коды, коды ищутся по индексу
+        cursor.execute('''
+            INSERT OR IGNORE INTO temp_code_ids (id)
+            SELECT m.id FROM temp_code_serials t
+            CROSS JOIN marking_codes m ON m.gtin = t.gtin AND m.serial = t.serial
+        ''')
+        if keys:
+            cursor.execute('''
+                INSERT OR IGNORE INTO temp_code_ids (id)
+                SELECT m.id FROM temp_code_keys t
+                CROSS JOIN marking_codes m ON m.code = t.code_key
+            ''')
+    
+    def _transition_codes(self, cursor, where: str, to_status: str,
+                          ref_type: Optional[str] = None, ref_id: Optional[str] = None) -> int:
+        """Перевод выбранных кодов в новый статус с записью в журнал code_events
+        
+        Обновляются только коды, для которых переход допустим (CodeStatus.TRANSITIONS),
+        остальные остаются в прежнем статусе.
+        
+        Args:
+            cursor: Курсор базы данных
+            where (str): Условие выбора кодов (по временной таблице)
+            to_status (str): Новый статус кода
+            ref_type (str, optional): Тип связанного объекта (aggregation_file, utilisation_report, ...)
+            ref_id (str, optional): Идентификатор связанного объекта
+            
+        Returns:
+            int: Количество кодов, переведенных в новый статус
+        """
+        sources = CodeStatus.sources_for(to_status)
+        if not sources:
+            raise ValueError(f"Недопустимый статус кода: {to_status}")
+        
+        source_placeholders = ",".join(["?"] * len(sources))
+        condition = f"{where} AND status IN ({source_placeholders})"
+        
+        # Итоговый статус зависит от исходного (CodeStatus.RESULTS); при откате
+        # выгруженные ранее коды возвращаются в EXPORTED. Статусы - константы CodeStatus
+        default = ("CASE WHEN exported = 1 THEN 'EXPORTED' ELSE 'RECEIVED' END"
+                   if to_status == CodeStatus.RECEIVED else f"'{to_status}'")
+        results = [(source, CodeStatus.result_of(source, to_status)) for source in sources
+                   if CodeStatus.result_of(source, to_status) != to_status]
+        if results:
+            branches = " ".join(f"WHEN '{source}' THEN '{result}'" for source, result in results)
+            status_expr = f"CASE status {branches} ELSE {default} END"
+        else:
+            status_expr = default
+        status_params = []
+        used_statuses = ",".join(f"'{status}'" for status in CodeStatus.USED)
+        exported_expr = "1" if to_status == CodeStatus.EXPORTED else "exported"
+        
+        # Новые статусы изменяемых кодов для индекса в памяти
+        pool_updates = []
+        if self.code_pool is not None:
+            cursor.execute(f"SELECT gtin, serial, code, {status_expr} FROM marking_codes WHERE {condition}",
+                           status_params + sources)
+            pool_updates = cursor.fetchall()
+        
+        # Сначала пишем журнал (он читает прежний статус), затем обновляем коды
+        cursor.execute(f'''
+            INSERT INTO code_events (code_id, from_status, to_status, ref_type, ref_id)
+            SELECT id, status, {status_expr}, ?, ? FROM marking_codes
+            WHERE {condition}
+        ''', status_params + [ref_type, ref_id] + sources)
+        
+        cursor.execute(f'''
+            UPDATE marking_codes 
+            SET status = {status_expr},
+                used = CASE WHEN {status_expr} IN ({used_statuses}) THEN 1 ELSE 0 END,
+                exported = {exported_expr},
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {condition}
+        ''', status_params + status_params + sources)
+        count = cursor.rowcount
+        
+        # Коды, для которых переход недопустим, только учитываем в логе
+        cursor.execute(f"SELECT COUNT(*) FROM marking_codes WHERE {where}")
+        rejected = cursor.fetchone()[0] - count
+        if rejected > 0:
+            if to_status == CodeStatus.AGGREGATED:
+                logger.warning(f"Отклонена повторная агрегация {rejected} кодов маркировки "
+                               f"(коды уже агрегированы)")
+            else:
+                logger.warning(f"Переход в статус {to_status} недопустим для {rejected} кодов маркировки")
+        
+        self.conn.commit()
+        
+        for gtin, serial, code, status in pool_updates:
+            self.code_pool.set_status(gtin, serial, status, code)
+        return count
+    
+    @timed()
+    def transition_codes(self, code_ids, to_status: str,
+                         ref_type: Optional[str] = None, ref_id: Optional[str] = None) -> int:
+        """Перевод кодов маркировки в новый статус по списку ID
+        
+        Args:
+            code_ids (list): Список ID кодов маркировки
+            to_status (str): Новый статус (CodeStatus)
+            ref_type (str, optional): Тип связанного объекта
+            ref_id (str, optional): Идентификатор связанного объекта
+            
+        Returns:
+            int: Количество кодов, переведенных в новый статус
+        """
+        if not code_ids:
+            return 0
+        cursor = self.conn.cursor()
+        try:
+            self._fill_temp_code_ids(cursor, code_ids)
+            return self._transition_codes(cursor, "id IN (SELECT id FROM temp_code_ids)",
+                                          to_status, ref_type, ref_id)
+        except Exception:
+            # Не оставляем открытой транзакцию с заполненными временными таблицами
+            self.conn.rollback()
+            raise
+    
+    @timed()
+    def transition_codes_by_barcodes(self, barcodes, to_status: str,
+                                     ref_type: Optional[str] = None, ref_id: Optional[str] = None) -> int:
+        """Перевод кодов маркировки в новый статус по значениям штрих-кодов
+        
+        Args:
+            barcodes (list): Список штрих-кодов (с разделителем [GS] или \\x1d)
+            to_status (str): Новый статус (CodeStatus)
+            ref_type (str, optional): Тип связанного объекта
+            ref_id (str, optional): Идентификатор связанного объекта
+            
+        Returns:
+            int: Количество кодов, переведенных в новый статус
+        """
+        if not barcodes:
+            return 0
+        cursor = self.conn.cursor()
+        try:
+            self._fill_temp_code_ids_by_barcodes(cursor, barcodes)
+            return self._transition_codes(cursor, "id IN (SELECT id FROM temp_code_ids)",
+                                          to_status, ref_type, ref_id)
+        except Exception:
+            # Не оставляем открытой транзакцию с заполненными временными таблицами
+            self.conn.rollback()
+            raise
+    
+    @timed()
+    def delete_marking_codes(self, code_ids) -> int:
+        """Удаление кодов маркировки по списку ID
+        
+        Args:
+            code_ids (list): Список ID кодов маркировки
+            
+        Returns:
+            int: Количество удаленных кодов
+        """
+        if not code_ids:
+            return 0
+        cursor = self.conn.cursor()
+        self._fill_temp_code_ids(cursor, code_ids)
+        removed = []
+        if self.code_pool is not None:
+            cursor.execute("SELECT gtin, serial, code FROM marking_codes WHERE id IN (SELECT id FROM temp_code_ids)")
+            removed = cursor.fetchall()
+        cursor.execute("DELETE FROM marking_codes WHERE id IN (SELECT id FROM temp_code_ids)")
+        count = cursor.rowcount
+        self.conn.commit()
+        
+        for gtin, serial, code in removed:
+            self.code_pool.remove(gtin, serial, code)
+        return count
+    
+    @timed()
     def mark_codes_as_used(self, code_ids):
         """Отметить коды маркировки как использованные
         
@@ -2117,20 +2660,7 @@ class Database:
             int: Количество обновленных записей
         """
         try:
-            if not code_ids:
-                return 0
-                
-            cursor = self.conn.cursor()
-            placeholders = ','.join(['?' for _ in code_ids])
-            query = f'''
-                UPDATE marking_codes 
-                SET used = 1, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id IN ({placeholders})
-            '''
-            cursor.execute(query, code_ids)
-            self.conn.commit()
-            return cursor.rowcount
+            return self.transition_codes(code_ids, CodeStatus.AGGREGATED, "manual")
         except Exception as e:
             logger.error(f"Ошибка при отметке кодов как использованных: {str(e)}")
             return 0
@@ -2145,106 +2675,265 @@ class Database:
             int: Количество обновленных записей
         """
         try:
-            if not code_ids:
-                return 0
-                
-            cursor = self.conn.cursor()
-            placeholders = ','.join(['?' for _ in code_ids])
-            query = f'''
-                UPDATE marking_codes 
-                SET used = 0, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id IN ({placeholders})
-            '''
-            cursor.execute(query, code_ids)
-            self.conn.commit()
-            logger.info(f"Снята отметка 'использованные' с {cursor.rowcount} кодов маркировки")
-            return cursor.rowcount
+            count = self.transition_codes(code_ids, CodeStatus.RECEIVED, "manual")
+            logger.info(f"Снята отметка 'использованные' с {count} кодов маркировки")
+            return count
         except Exception as e:
             logger.error(f"Ошибка при снятии отметки 'использованные' с кодов: {str(e)}")
             return 0
     
-    def get_marking_code_ids_by_barcodes(self, barcodes):
-        """Получение ID кодов маркировки по значениям штрих-кодов
+    @timed()
+    def mark_codes_used_by_barcodes(self, barcodes, used: bool = True, file_id: Optional[int] = None) -> int:
+        """Установить или снять отметку 'использованные' по значениям штрих-кодов
+        
+        Коды загружаются во временную таблицу, обновление выполняется одним запросом
+        независимо от количества кодов. Использованные коды переводятся в статус
+        AGGREGATED, при снятии отметки - обратно в RECEIVED (EXPORTED для выгруженных).
+        При снятии отметки по файлу агрегации откатываются только коды, которые агрегировал
+        именно этот файл (см. _release_file_codes).
         
         Args:
-            barcodes (List[str]): Список штрих-кодов
+            barcodes (List[str]): Список штрих-кодов (с разделителем [GS] или \x1d)
+            used (bool): True - отметить использованными, False - снять отметку
+            file_id (int, optional): ID файла агрегации для журнала переходов
             
         Returns:
-            List[int]: Список ID кодов маркировки
+            int: Количество обновленных записей
         """
         try:
-            if not barcodes:
-                return []
-                
+            ref_id = str(file_id) if file_id is not None else None
+            if not used and file_id is not None:
+                count = self._release_file_codes(barcodes, ref_id)
+            else:
+                to_status = CodeStatus.AGGREGATED if used else CodeStatus.RECEIVED
+                count = self.transition_codes_by_barcodes(barcodes, to_status, "aggregation_file", ref_id)
+            logger.info(f"Обновлена отметка 'использованные' у {count} кодов маркировки по {len(barcodes)} штрих-кодам")
+            return count
+        except Exception as e:
+            logger.error(f"Ошибка при отметке кодов по штрих-кодам: {str(e)}")
+            return 0
+    
+    def _release_file_codes(self, barcodes, file_ref: str) -> int:
+        """Откат агрегации кодов удаляемого файла
+        
+        Код остается агрегированным, если последним его агрегировал другой файл или
+        отметка вручную (последняя запись code_events о переходе в агрегированный статус):
+        иначе удаление файла, агрегация которого была отклонена как повторная, вернуло бы
+        в оборот коды, входящие в другой файл.
+        
+        Args:
+            barcodes (list): Штрих-коды файла
+            file_ref (str): ID файла агрегации (ref_id в журнале)
+            
+        Returns:
+            int: Количество кодов, возвращенных в оборот
+        """
+        if not barcodes:
+            return 0
+        aggregated = (CodeStatus.AGGREGATED, CodeStatus.AGGREGATED_UTILISED)
+        cursor = self.conn.cursor()
+        try:
+            self._fill_temp_code_ids_by_barcodes(cursor, barcodes)
+            # Переход в агрегированный статус из неагрегированного - событие агрегации
+            # (переход AGGREGATED -> AGGREGATED_UTILISED - нанесение)
+            cursor.execute('''
+                DELETE FROM temp_code_ids WHERE id IN (
+                    SELECT e.code_id FROM code_events e
+                    WHERE e.id = (
+                        SELECT MAX(id) FROM code_events
+                        WHERE code_id = e.code_id AND to_status IN (?, ?)
+                          AND (from_status IS NULL OR from_status NOT IN (?, ?))
+                    )
+                    AND e.code_id IN (SELECT id FROM temp_code_ids)
+                    AND NOT (e.ref_type = 'aggregation_file' AND e.ref_id IS ?)
+                )
+            ''', aggregated + aggregated + (file_ref,))
+            kept = cursor.rowcount
+            if kept > 0:
+                logger.info(f"{kept} кодов удаляемого файла агрегации {file_ref} остаются агрегированными "
+                            f"другим файлом")
+            return self._transition_codes(cursor, "id IN (SELECT id FROM temp_code_ids)",
+                                          CodeStatus.RECEIVED, "aggregation_file", file_ref)
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    @timed()
+    def export_marking_codes(self, write_chunk, code_ids=None, order_id: Optional[str] = None,
+                             gtin: Optional[str] = None, statuses: Optional[List[str]] = None,
+                             mark_exported: bool = True, chunk_size: int = 5000) -> int:
+        """Потоковая выгрузка кодов маркировки порциями с отметкой об экспорте
+        
+        Коды читаются курсором порциями по chunk_size и передаются в write_chunk,
+        поэтому объем памяти не зависит от количества кодов. Отметка EXPORTED
+        выполняется в той же транзакции, что и чтение: при ошибке записи файла
+        статусы кодов не меняются.
+        
+        Args:
+            write_chunk: Функция, принимающая список строк (sqlite3.Row) с полями
+                id, code, gtin, order_id, created_at, status
+            code_ids (list, optional): Список ID кодов
+            order_id (str, optional): Фильтр по ID заказа
+            gtin (str, optional): Фильтр по GTIN
+            statuses (list, optional): Фильтр по статусам кода (CodeStatus)
+            mark_exported (bool): Перевести выгруженные коды в статус EXPORTED
+            chunk_size (int): Размер порции чтения
+            
+        Returns:
+            int: Количество выгруженных кодов
+        """
+        cursor = self.conn.cursor()
+        if not self.conn.in_transaction:
+            cursor.execute("BEGIN")
+        
+        try:
+            conditions = []
+            params = []
+            if code_ids is not None:
+                self._fill_temp_code_ids(cursor, code_ids)
+                conditions.append("id IN (SELECT id FROM temp_code_ids)")
+            if order_id:
+                conditions.append("order_id = ?")
+                params.append(order_id)
+            if gtin:
+                conditions.append("gtin = ?")
+                params.append(gtin)
+            if statuses is not None:
+                conditions.append(f"status IN ({','.join('?' * len(statuses))})" if statuses else "0")
+                params.extend(statuses)
+            where = " AND ".join(conditions) if conditions else "1=1"
+            
+            cursor.execute(
+                f"SELECT id, code, gtin, order_id, created_at, status FROM marking_codes WHERE {where} ORDER BY id",
+                params
+            )
+            
+            count = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                write_chunk(rows)
+                count += len(rows)
+            
+            if mark_exported and count:
+                # Условие с параметрами подставляется в SQL перехода, поэтому фиксируем выборку во временной таблице
+                if params:
+                    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS temp_export_ids (id INTEGER PRIMARY KEY)")
+                    cursor.execute("DELETE FROM temp_export_ids")
+                    cursor.execute(f"INSERT INTO temp_export_ids (id) SELECT id FROM marking_codes WHERE {where}", params)
+                    where = "id IN (SELECT id FROM temp_export_ids)"
+                self._transition_codes(cursor, where, CodeStatus.EXPORTED, "export")
+            else:
+                self.conn.commit()
+            
+            logger.info(f"Выгружено кодов маркировки: {count}")
+            return count
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Ошибка при выгрузке кодов маркировки: {str(e)}")
+            raise e
+    
+    def get_code_status_counts(self, order_id: Optional[str] = None, gtin: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Количество кодов маркировки по статусам в разрезе заказов и GTIN
+        
+        Запрос выполняется только по индексу (order_id, gtin, status) без чтения таблицы.
+        
+        Args:
+            order_id (str, optional): Фильтр по ID заказа
+            gtin (str, optional): Фильтр по GTIN
+            
+        Returns:
+            List[Dict[str, Any]]: Записи order_id, gtin, status, count
+        """
+        try:
+            query = "SELECT order_id, gtin, status, COUNT(*) FROM marking_codes WHERE 1=1"
+            params = []
+            if order_id:
+                query += " AND order_id = ?"
+                params.append(order_id)
+            if gtin:
+                query += " AND gtin = ?"
+                params.append(gtin)
+            query += " GROUP BY order_id, gtin, status"
+            
             cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            return [
+                {"order_id": row[0], "gtin": row[1], "status": row[2], "count": row[3]}
+                for row in cursor
+            ]
+        except Exception as e:
+            logger.error(f"Ошибка при подсчете кодов маркировки по статусам: {str(e)}")
+            return []
+    
+    def get_code_events(self, code_id: Optional[int] = None, ref_type: Optional[str] = None,
+                        ref_id: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Получение журнала переходов кодов маркировки между статусами
+        
+        Args:
+            code_id (int, optional): Фильтр по ID кода
+            ref_type (str, optional): Фильтр по типу связанного объекта
+            ref_id (str, optional): Фильтр по идентификатору связанного объекта
+            limit (int): Максимальное количество записей
             
-            # Логируем первые несколько штрих-кодов для диагностики
-            sample_barcodes = barcodes[:3]
-            logger.info(f"Примеры штрих-кодов для поиска: {sample_barcodes}")
+        Returns:
+            List[Dict[str, Any]]: Записи журнала, начиная с последних
+        """
+        try:
+            query = "SELECT id, code_id, from_status, to_status, ref_type, ref_id, created_at FROM code_events WHERE 1=1"
+            params = []
+            if code_id is not None:
+                query += " AND code_id = ?"
+                params.append(code_id)
+            if ref_type:
+                query += " AND ref_type = ?"
+                params.append(ref_type)
+            if ref_id:
+                query += " AND ref_id = ?"
+                params.append(ref_id)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
             
-            # Вместо прямого сравнения, используем оператор LIKE для каждого штрих-кода
-            # Это необходимо, потому что в базе коды могут храниться в разных форматах
-            code_ids = []
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении журнала переходов кодов: {str(e)}")
+            return []
+    
+    @timed()
+    def get_marking_code_ids_by_barcodes(self, barcodes):
+        """Получение ID кодов маркировки по значениям штрих-кодов
+        
+        Args:
+            barcodes (List[str]): Список штрих-кодов
             
-            # Для оптимизации запроса разобьем поиск на порции
-            batch_size = 100
-            for i in range(0, len(barcodes), batch_size):
-                batch = barcodes[i:i + batch_size]
-                
-                # Строим запрос с OR для каждого кода в порции
-                query_parts = []
-                params = []
-                
-                for barcode in batch:
-                    # Проверяем точное совпадение
-                    query_parts.append("code = ?")
-                    params.append(barcode)
-                    
-                    # Также ищем варианты с другими разделителями если есть [GS]
-                    if '[GS]' in barcode:
-                        # Вариант с \u001d
-                        variant = barcode.replace('[GS]', '\u001d')
-                        query_parts.append("code = ?")
-                        params.append(variant)
-                        
-                        # Вариант с ASCII-кодом GS (\x1d)
-                        variant = barcode.replace('[GS]', '\x1d')
-                        query_parts.append("code = ?")
-                        params.append(variant)
-                
-                # Формируем полный запрос
-                query = f"""
-                    SELECT id FROM marking_codes
-                    WHERE {" OR ".join(query_parts)}
-                """
-                
-                cursor.execute(query, params)
-                batch_result = [row['id'] for row in cursor.fetchall()]
-                code_ids.extend(batch_result)
+        Returns:
+            List[int]: Список ID кодов маркировки
+        """
+        # Заполнение временных таблиц открывает неявную транзакцию; чтение не должно
+        # оставлять ее открытой (чужую транзакцию вызывающего кода не завершаем)
+        owns_transaction = not self.conn.in_transaction
+        try:
+            if not barcodes:
+                return []
                 
-                logger.info(f"Найдено {len(batch_result)} кодов в порции {i//batch_size + 1}")
+            cursor = self.conn.cursor()
+            self._fill_temp_code_ids_by_barcodes(cursor, barcodes)
             
-            # Удаляем дубликаты
-            code_ids = list(set(code_ids))
+            # Поиск выполняется по индексу (gtin, serial) при заполнении временной таблицы
+            cursor.execute("SELECT id FROM temp_code_ids")
+            code_ids = [row[0] for row in cursor]
+            if owns_transaction:
+                self.conn.commit()
             
             logger.info(f"Всего найдено {len(code_ids)} уникальных кодов маркировки по {len(barcodes)} штрих-кодам")
-            
-            # Если не найдено ни одного кода, логируем дополнительную информацию
-            if not code_ids and barcodes:
-                # Проверим, есть ли вообще коды в таблице
-                cursor.execute("SELECT COUNT(*) as count FROM marking_codes")
-                total_codes = cursor.fetchone()['count']
-                logger.info(f"Всего кодов в таблице: {total_codes}")
-                
-                # Проверим формат хранения кодов в базе
-                if total_codes > 0:
-                    cursor.execute("SELECT code FROM marking_codes LIMIT 5")
-                    sample_db_codes = [row['code'] for row in cursor.fetchall()]
-                    logger.info(f"Примеры кодов из базы: {sample_db_codes}")
-            
             return code_ids
         except Exception as e:
+            if owns_transaction:
+                self.conn.rollback()
             logger.error(f"Ошибка при получении ID кодов маркировки по штрих-кодам: {str(e)}")
             logger.exception("Подробная информация об ошибке:")
             return []
@@ -2259,28 +2948,19 @@ class Database:
             bool: True, если отметка прошла успешно
         """
         try:
-            cursor = self.conn.cursor()
-            
-            # Формируем список параметров для запроса IN
-            placeholders = ",".join(["?"] * len(code_ids))
-            
-            # Выполняем обновление
-            cursor.execute(
-                f"UPDATE marking_codes SET exported = 1, updated_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
-                code_ids
-            )
-            
-            self.conn.commit()
+            self.transition_codes(code_ids, CodeStatus.EXPORTED, "export")
             return True
         except Exception as e:
             logger.error(f"Ошибка при отметке кодов как экспортированных: {str(e)}")
             return False
     
     # Методы для работы с файлами агрегации
+    @timed()
     def add_aggregation_file(self, filename: str, product: str, marking_codes: List[str], 
                            level1_codes: List[str], level2_codes: List[str], 
                            comment: str = "", json_content: str = "", 
-                           report_id: str = "", aggregation_report_id: str = "") -> AggregationFile:
+                           report_id: str = "", aggregation_report_id: str = "",
+                           json_path: str = "") -> AggregationFile:
         """Добавление файла агрегации в базу данных
         
         Args:
@@ -2293,6 +2973,8 @@ class Database:
             json_content (str, optional): Полное содержимое JSON-файла
             report_id (str, optional): Идентификатор отчета нанесения
             aggregation_report_id (str, optional): Идентификатор отчета агрегации
+            json_path (str, optional): Путь к исходному файлу; его содержимое копируется
+                в json_content частями (вместо json_content)
             
         Returns:
             AggregationFile: Объект файла агрегации
@@ -2311,15 +2993,21 @@ class Database:
             cursor.execute('''
                 INSERT INTO aggregation_files 
                 (filename, product, marking_codes, level1_codes, level2_codes, 
-                comment, json_content, created_at, report_id, aggregation_report_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                comment, json_content, created_at, report_id, aggregation_report_id,
+                marking_codes_count, level1_count, level2_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (filename, product, marking_codes_json, level1_codes_json, level2_codes_json, 
-                 comment, json_content, current_time, report_id, aggregation_report_id))
+                 comment, json_content, current_time, report_id, aggregation_report_id,
+                 len(marking_codes or []), len(level1_codes or []), len(level2_codes or [])))
             
             file_id = cursor.lastrowid
+            if json_path:
+                self._copy_json_file(cursor, file_id, json_path)
+            self._save_aggregation_items(cursor, file_id, marking_codes, level1_codes, level2_codes)
             
             # Сохраняем изменения
             self.conn.commit()
+            self._update_code_filter("aggregated")
             
             # Создаем и возвращаем объект
             return AggregationFile(
@@ -2336,9 +3024,323 @@ class Database:
             )
             
         except Exception as e:
+            self.conn.rollback()
             logger.error(f"Ошибка при добавлении файла агрегации: {str(e)}")
             raise e
     
+    @timed()
+    def add_aggregation_files(self, files: List[Dict[str, Any]]) -> List[int]:
+        """Пакетное добавление файлов агрегации в одной транзакции
+        
+        Args:
+            files (List[Dict[str, Any]]): Список файлов; ключи словаря совпадают
+                с аргументами add_aggregation_file (filename, product, marking_codes,
+                level1_codes, level2_codes, comment, json_content, json_path)
+            
+        Returns:
+            List[int]: ID добавленных файлов в порядке следования
+        """
+        if not files:
+            return []
+        
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [
+            (
+                file["filename"], file.get("product", ""),
+                json.dumps(file.get("marking_codes") or []),
+                json.dumps(file.get("level1_codes") or []),
+                json.dumps(file.get("level2_codes") or []),
+                file.get("comment", ""), file.get("json_content", ""), current_time,
+                len(file.get("marking_codes") or []),
+                len(file.get("level1_codes") or []),
+                len(file.get("level2_codes") or [])
+            )
+            for file in files
+        ]
+        
+        try:
+            # Все файлы пачки записываются в рамках одной транзакции
+            cursor = self.conn.cursor()
+            file_ids = []
+            for file, row in zip(files, rows):
+                cursor.execute('''
+                    INSERT INTO aggregation_files 
+                    (filename, product, marking_codes, level1_codes, level2_codes, 
+                    comment, json_content, created_at, report_id, aggregation_report_id,
+                    marking_codes_count, level1_count, level2_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, '', '', ?, ?, ?)
+                ''', row)
+                file_id = cursor.lastrowid
+                file_ids.append(file_id)
+                if file.get("json_path"):
+                    self._copy_json_file(cursor, file_id, file["json_path"])
+                self._save_aggregation_items(cursor, file_id, file.get("marking_codes"),
+                                             file.get("level1_codes"), file.get("level2_codes"))
+            self.conn.commit()
+            self._update_code_filter("aggregated")
+            
+            logger.info(f"Добавлено файлов агрегации: {len(file_ids)}")
+            return file_ids
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Ошибка при пакетном добавлении файлов агрегации: {str(e)}")
+            raise e
+    
+    def find_aggregated_codes(self, barcodes: List[str]) -> List[Tuple[str, int]]:
+        """Поиск кодов маркировки, уже включенных в сохраненные файлы агрегации
+        
+        Коды проверяются фильтром дубликатов; запрос к таблице aggregation_items
+        выполняется только для кодов, отмеченных фильтром. Код находится и тогда,
+        когда в файлах он записан с криптохвостом, а проверяемый код - без него.
+        
+        Args:
+            barcodes (List[str]): Коды маркировки
+            
+        Returns:
+            List[Tuple[str, int]]: Пары (код, ID файла агрегации) для найденных кодов
+        """
+        try:
+            bloom = self.get_code_filter("aggregated")
+            keys = [identity(barcode) for barcode in barcodes]
+            cursor = self.conn.cursor()
+            found = []
+            for index in bloom.screen(keys):
+                key = keys[index]
+                # Код без криптохвоста или с криптохвостом после разделителя [GS] (поиск по индексу)
+                cursor.execute('''
+                    SELECT file_id FROM aggregation_items
+                    WHERE level = 0 AND (code = ? OR (code >= ? AND code < ?))
+                    LIMIT 1
+                ''', (key, key + "[GS]", key + "[GT"))
+                row = cursor.fetchone()
+                if row:
+                    found.append((barcodes[index], row[0]))
+            return found
+        except Exception as e:
+            logger.error(f"Ошибка при поиске кодов в файлах агрегации: {str(e)}")
+            return []
+    
+    @timed()
+    def get_aggregation_file_summaries(self, file_id: Optional[int] = None) -> List[AggregationFileSummary]:
+        """Получение облегченного списка файлов агрегации для таблицы
+        
+        Списки кодов и содержимое JSON не загружаются: количество кодов по уровням
+        хранится в отдельных столбцах и заполняется при записи файла.
+        Полные данные файла доступны через get_aggregation_file_by_id.
+        
+        Returns:
+            List[AggregationFileSummary]: Список сводок по файлам агрегации
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    id, filename, product, marking_codes_count, level1_count, level2_count,
+                    comment, created_at, report_id, aggregation_report_id, report_status, aggregation_status
+                FROM aggregation_files 
+                WHERE ? IS NULL OR id = ?
+                ORDER BY id DESC
+            """, (file_id, file_id))
+            
+            # Идем по курсору построчно, не материализуя весь результат
+            files = [
+                AggregationFileSummary(
+                    id=row["id"],
+                    filename=row["filename"],
+                    product=row["product"],
+                    marking_codes_count=row["marking_codes_count"],
+                    level1_count=row["level1_count"],
+                    level2_count=row["level2_count"],
+                    comment=row["comment"],
+                    created_at=row["created_at"],
+                    report_id=row["report_id"],
+                    aggregation_report_id=row["aggregation_report_id"],
+                    report_status=row["report_status"],
+                    aggregation_status=row["aggregation_status"]
+                )
+                for row in cursor
+            ]
+            
+            logger.info(f"Всего получено файлов агрегации: {len(files)}")
+            return files
+            
+        except Exception as e:
+            logger.error(f"Ошибка при получении списка файлов агрегации: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _aggregation_item_rows(file_id: int, marking_codes, level1_codes, level2_codes):
+        """Строки иерархии кодов файла агрегации для таблицы aggregation_items
+        
+        Вложенность в файлах агрегации явно не указана: коды нижнего уровня идут по порядку
+        и равномерно распределяются между единицами следующего уровня (остаток - по одному
+        коду в первые единицы).
+        """
+        def distribute(children, parents, level):
+            children = children or []
+            if not parents:
+                for position, code in enumerate(children):
+                    yield (file_id, code, level, None, position)
+                return
+            per_unit, remainder = divmod(len(children), len(parents))
+            position = 0
+            for index, parent in enumerate(parents):
+                for _ in range(per_unit + (1 if index < remainder else 0)):
+                    yield (file_id, children[position], level, parent, position)
+                    position += 1
+        
+        yield from distribute(marking_codes, level1_codes, 0)
+        yield from distribute(level1_codes, level2_codes, 1)
+        yield from distribute(level2_codes, None, 2)
+    
+    def _copy_json_file(self, cursor, file_id: int, path: str, chunk_size: int = 1024 * 1024) -> None:
+        """Копирование исходного файла агрегации в aggregation_files.json_content частями
+        
+        Место под содержимое выделяется zeroblob, затем файл записывается через blob I/O
+        (в текущей транзакции), поэтому файл не загружается в память целиком. Значение
+        хранится как BLOB с исходными байтами; при чтении оно декодируется (_json_text).
+        """
+        blobopen = getattr(self.conn, "blobopen", None)
+        with open(path, "rb") as f:
+            if blobopen is None:
+                # Python до 3.11: blob I/O недоступен, файл записывается одним значением
+                cursor.execute("UPDATE aggregation_files SET json_content = ? WHERE id = ?",
+                               (f.read().decode("utf-8-sig"), file_id))
+                return
+            cursor.execute("UPDATE aggregation_files SET json_content = zeroblob(?) WHERE id = ?",
+                           (os.fstat(f.fileno()).st_size, file_id))
+            with blobopen("aggregation_files", "json_content", file_id) as blob:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    blob.write(chunk)
+    
+    @staticmethod
+    def _json_text(value) -> str:
+        """Текст json_content файла агрегации (скопированный файл хранится байтами, возможно с BOM)"""
+        if isinstance(value, bytes):
+            return value.decode("utf-8-sig")
+        return value or ""
+    
+    def _save_aggregation_items(self, cursor, file_id: int, marking_codes, level1_codes, level2_codes) -> None:
+        """Запись иерархии кодов файла агрегации (в текущей транзакции, без commit)"""
+        cursor.execute("DELETE FROM aggregation_items WHERE file_id = ?", (file_id,))
+        cursor.executemany(
+            "INSERT INTO aggregation_items (file_id, code, level, parent_code, position) VALUES (?, ?, ?, ?, ?)",
+            self._aggregation_item_rows(file_id, marking_codes, level1_codes, level2_codes)
+        )
+    
+    def ensure_aggregation_items(self, file_id: int) -> bool:
+        """Построение иерархии кодов для файла агрегации, сохраненного до появления таблицы aggregation_items
+        
+        Args:
+            file_id (int): ID файла агрегации
+        
+        Returns:
+            bool: True, если иерархия файла есть в базе данных
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT 1 FROM aggregation_items WHERE file_id = ? LIMIT 1", (file_id,))
+            if cursor.fetchone():
+                return True
+        
+            cursor.execute(
+                "SELECT marking_codes, level1_codes, level2_codes FROM aggregation_files WHERE id = ?",
+                (file_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return False
+        
+            lists = [json.loads(row[column]) if row[column] else []
+                     for column in ("marking_codes", "level1_codes", "level2_codes")]
+            self._save_aggregation_items(cursor, file_id, *lists)
+            self.conn.commit()
+            logger.info(f"Построена иерархия кодов для файла агрегации {file_id}")
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Ошибка при построении иерархии кодов файла агрегации: {str(e)}")
+            return False
+    
+    def get_aggregation_unit_summaries(self, file_id: int, level: int = 1) -> List[Dict[str, Any]]:
+        """Единицы агрегации файла с количеством вложенных кодов (группировка в SQL)
+        
+        Args:
+            file_id (int): ID файла агрегации
+            level (int): Уровень единиц агрегации
+        
+        Returns:
+            List[Dict[str, Any]]: Единицы в порядке следования в файле (code, items_count)
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT u.code AS code, COUNT(c.id) AS items_count
+                FROM aggregation_items u
+                LEFT JOIN aggregation_items c ON c.file_id = u.file_id AND c.parent_code = u.code
+                WHERE u.file_id = ? AND u.level = ?
+                GROUP BY u.id
+                ORDER BY u.position
+            ''', (file_id, level))
+            return [dict(row) for row in cursor]
+        except Exception as e:
+            logger.error(f"Ошибка при получении единиц агрегации файла: {str(e)}")
+            return []
+    
+    def iter_aggregation_unit_items(self, file_id: int, level: int = 1):
+        """Потоковое чтение единиц агрегации с вложенными кодами
+        
+        Args:
+            file_id (int): ID файла агрегации
+            level (int): Уровень единиц агрегации
+        
+        Returns:
+            Iterator: Строки (unit_code, code) по порядку единиц и кодов в файле;
+                для единицы без вложенных кодов code равен None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT u.code AS unit_code, c.code AS code
+            FROM aggregation_items u
+            LEFT JOIN aggregation_items c ON c.file_id = u.file_id AND c.parent_code = u.code
+            WHERE u.file_id = ? AND u.level = ?
+            ORDER BY u.position, c.position
+        ''', (file_id, level))
+        return cursor
+    
+    def backfill_aggregation_file_counts(self):
+        """Заполнение столбцов с количеством кодов для ранее сохраненных файлов агрегации"""
+        
+        def count_codes(codes_str):
+            # Старые записи могли хранить коды через запятую вместо JSON
+            if not codes_str:
+                return 0
+            try:
+                return len(json.loads(codes_str))
+            except json.JSONDecodeError:
+                return len(codes_str.split(','))
+        
+        read_cursor = self.conn.cursor()
+        read_cursor.execute("SELECT id, marking_codes, level1_codes, level2_codes FROM aggregation_files")
+        
+        counts = (
+            (count_codes(row["marking_codes"]), count_codes(row["level1_codes"]),
+             count_codes(row["level2_codes"]), row["id"])
+            for row in read_cursor
+        )
+        
+        # Сначала дочитываем выборку, затем обновляем все записи одним executemany
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            "UPDATE aggregation_files SET marking_codes_count = ?, level1_count = ?, level2_count = ? WHERE id = ?",
+            list(counts)
+        )
+    
+    @timed()
     def get_aggregation_files(self):
         """Получение списка файлов агрегации из базы данных
         
@@ -2416,7 +3418,7 @@ class Database:
                     level1_codes=level1_codes,
                     level2_codes=level2_codes,
                     comment=comment if comment else "",
-                    json_content=json_content if json_content else "",
+                    json_content=self._json_text(json_content),
                     report_id=report_id if report_id else "",
                     aggregation_report_id=aggregation_report_id if aggregation_report_id else "",
                     report_status=report_status if report_status else "",
@@ -2432,11 +3434,16 @@ class Database:
             logging.exception("Подробная информация об ошибке:")
             return []
     
-    def get_aggregation_file_by_id(self, file_id: int) -> Optional[AggregationFile]:
+    @timed()
+    def get_aggregation_file_by_id(self, file_id: int, with_content: bool = True,
+                                   parse_content: bool = True) -> Optional[AggregationFile]:
         """Получение файла агрегации по ID
         
         Args:
             file_id (int): ID файла агрегации
+            with_content (bool): Загружать исходный JSON файла (json_content); вызывающим,
+                которым нужны только списки кодов, документ не нужен
+            parse_content (bool): Разбирать исходный JSON в поле data
             
         Returns:
             Optional[AggregationFile]: Объект файла агрегации или None, если файл не найден
@@ -2475,10 +3482,11 @@ class Database:
                 self.conn.commit()
                 logging.info(f"Добавлен столбец {column} в таблицу aggregation_files")
             
-            # Выполняем запрос
+            # Выполняем запрос; без содержимого JSON документ не читается из базы данных
+            content_column = "json_content" if with_content else "NULL"
             cursor.execute(
-                """
-                SELECT id, filename, product, comment, json_content, 
+                f"""
+                SELECT id, filename, product, comment, {content_column},
                        marking_codes, level1_codes, level2_codes, created_at,
                        report_id, aggregation_report_id, report_status, aggregation_status
                 FROM aggregation_files
@@ -2514,11 +3522,11 @@ class Database:
                 logger.warning(f"Ошибка десериализации level2_codes для файла {row[1]} (ID={file_id})")
             
             # Получаем JSON-содержимое
-            json_content = row[4]
+            json_content = self._json_text(row[4])
             
             # Парсим JSON для извлечения дополнительных данных
             data = {}
-            if json_content:
+            if json_content and parse_content:
                 try:
                     data = json.loads(json_content)
                 except json.JSONDecodeError:
@@ -2573,9 +3581,11 @@ class Database:
                 DELETE FROM aggregation_files
                 WHERE id = ?
             ''', (file_id,))
+            deleted = cursor.rowcount
+            cursor.execute("DELETE FROM aggregation_items WHERE file_id = ?", (file_id,))
             
             self.conn.commit()
-            return cursor.rowcount > 0
+            return deleted > 0
             
         except Exception as e:
             logger.error(f"Ошибка при удалении файла агрегации: {str(e)}")
@@ -3093,6 +4103,276 @@ class Database:
             logging.error(f"Ошибка при обновлении report_id для файла агрегации: {str(e)}")
             return False
             
+    def save_report_chunks(self, file_id: int, payload: Dict[str, Any], chunks: List[List[str]]) -> List[Dict[str, Any]]:
+        """Сохранение частей отчета о нанесении перед отправкой
+        
+        Ключ части вычисляется по файлу, номеру части, параметрам отчета и кодам, поэтому
+        повторное сохранение того же отчета не создает дубликатов, а уже отправленные части
+        сохраняют свой reportId. Неотправленные части файла с другим составом удаляются.
+        
+        Args:
+            file_id (int): ID файла агрегации
+            payload (Dict[str, Any]): Параметры отчета без списка кодов (expirationDate, seriesNumber и т.д.)
+            chunks (List[List[str]]): Коды, разбитые на части
+            
+        Returns:
+            List[Dict[str, Any]]: Части отчета в порядке номеров
+        """
+        try:
+            payload_json = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+            rows = []
+            for index, codes in enumerate(chunks):
+                sntins_json = json.dumps(codes, ensure_ascii=False)
+                digest = hashlib.sha1(f"{payload_json}|{sntins_json}".encode("utf-8")).hexdigest()
+                rows.append((file_id, index, f"{file_id}:{index}:{digest}", payload_json, sntins_json, len(codes)))
+            
+            cursor = self.conn.cursor()
+            if not self.conn.in_transaction:
+                cursor.execute("BEGIN")
+            cursor.execute(
+                f"DELETE FROM report_chunks WHERE file_id = ? AND status != 'SENT' "
+                f"AND chunk_key NOT IN ({','.join('?' * len(rows))})",
+                [file_id] + [row[2] for row in rows]
+            )
+            cursor.executemany('''
+                INSERT OR IGNORE INTO report_chunks (file_id, chunk_index, chunk_key, payload, sntins, codes_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+            
+            keys = {row[2] for row in rows}
+            return [chunk for chunk in self.get_report_chunks(file_id) if chunk["chunk_key"] in keys]
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Ошибка при сохранении частей отчета о нанесении: {str(e)}")
+            return []
+    
+    def get_report_chunks(self, file_id: Optional[int] = None,
+                          statuses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получение частей отчетов о нанесении
+        
+        Args:
+            file_id (int, optional): Фильтр по ID файла агрегации
+            statuses (List[str], optional): Фильтр по статусам частей (PENDING, SENT, FAILED)
+            
+        Returns:
+            List[Dict[str, Any]]: Части отчетов с разобранными payload и sntins
+        """
+        try:
+            query = "SELECT * FROM report_chunks WHERE 1=1"
+            params = []
+            if file_id is not None:
+                query += " AND file_id = ?"
+                params.append(file_id)
+            if statuses:
+                query += f" AND status IN ({','.join('?' * len(statuses))})"
+                params.extend(statuses)
+            query += " ORDER BY file_id, chunk_index"
+            
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            chunks = []
+            for row in cursor.fetchall():
+                chunk = dict(row)
+                chunk["payload"] = json.loads(chunk["payload"])
+                chunk["sntins"] = json.loads(chunk["sntins"])
+                chunks.append(chunk)
+            return chunks
+        except Exception as e:
+            logger.error(f"Ошибка при получении частей отчетов о нанесении: {str(e)}")
+            return []
+    
+    def update_report_chunk(self, chunk_id: int, status: str, report_id: Optional[str] = None,
+                            error: Optional[str] = None) -> bool:
+        """Обновление результата отправки части отчета о нанесении
+        
+        Args:
+            chunk_id (int): ID части
+            status (str): Новый статус части (SENT или FAILED)
+            report_id (str, optional): Идентификатор отчета, полученный от СУЗ
+            error (str, optional): Текст ошибки отправки
+            
+        Returns:
+            bool: True, если обновление выполнено успешно, иначе False
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                UPDATE report_chunks
+                SET status = ?, report_id = COALESCE(?, report_id), last_error = ?,
+                    attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, report_id, error, chunk_id))
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении части отчета о нанесении: {str(e)}")
+            return False
+    
+    def get_files_with_unsent_report_chunks(self, statuses: Optional[List[str]] = None) -> List[int]:
+        """Получение ID файлов агрегации, у которых есть неотправленные части отчетов о нанесении
+        
+        Args:
+            statuses (List[str], optional): Учитываемые статусы частей (по умолчанию все, кроме SENT)
+        """
+        try:
+            statuses = statuses or ['PENDING', 'FAILED']
+            cursor = self.conn.cursor()
+            cursor.execute(
+                f"SELECT DISTINCT file_id FROM report_chunks WHERE status IN ({','.join('?' * len(statuses))}) "
+                f"ORDER BY file_id",
+                statuses
+            )
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении файлов с неотправленными частями отчетов: {str(e)}")
+            return []
+    
+    def enqueue_outbox_item(self, kind: str, payload: Dict[str, Any], ref_id: Optional[str] = None) -> int:
+        """Постановка запроса в очередь отправки
+        
+        Ключ идемпотентности вычисляется по типу, связанному объекту и содержимому запроса:
+        повторная постановка того же запроса (например, повторное нажатие кнопки) не создает
+        дубликат, а два разных заказа с одинаковым содержимым ставятся в очередь отдельно.
+        Запрос, уже принятый СУЗ, повторно в очередь не ставится.
+        
+        Args:
+            kind (str): Тип запроса (order, utilisation, aggregation)
+            payload (Dict[str, Any]): Данные запроса
+            ref_id (str, optional): Идентификатор связанного объекта (например, ID файла агрегации)
+            
+        Returns:
+            int: ID записи очереди; 0 при ошибке или если такой запрос уже отправлен
+        """
+        try:
+            payload_json = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+            key = hashlib.sha1(f"{kind}|{ref_id or ''}|{payload_json}".encode("utf-8")).hexdigest()
+            
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                INSERT OR IGNORE INTO api_outbox (kind, idempotency_key, payload, ref_id)
+                VALUES (?, ?, ?, ?)
+            ''', (kind, key, payload_json, ref_id))
+            inserted = cursor.rowcount > 0
+            self.conn.commit()
+            
+            cursor.execute("SELECT id, status FROM api_outbox WHERE idempotency_key = ?", (key,))
+            item_id, status = cursor.fetchone()
+            if inserted:
+                logger.info(f"Запрос {kind} поставлен в очередь отправки (ID {item_id})")
+            elif status == "SENT":
+                logger.warning(f"Запрос {kind} уже отправлен из очереди (ID {item_id}), повторно не ставится")
+                return 0
+            else:
+                logger.info(f"Запрос {kind} уже есть в очереди отправки (ID {item_id}, статус {status})")
+            return item_id
+        except Exception as e:
+            logger.error(f"Ошибка при постановке запроса в очередь отправки: {str(e)}")
+            return 0
+    
+    def get_outbox_items(self, statuses: Optional[List[str]] = None, due_before: Optional[float] = None,
+                         limit: int = 1000) -> List[Dict[str, Any]]:
+        """Получение записей очереди отправки
+        
+        Args:
+            statuses (List[str], optional): Фильтр по статусам (PENDING, SENT, FAILED)
+            due_before (float, optional): Только записи, время следующей попытки которых наступило
+            limit (int): Максимальное количество записей
+            
+        Returns:
+            List[Dict[str, Any]]: Записи очереди в порядке постановки с разобранным payload
+        """
+        try:
+            query = "SELECT * FROM api_outbox WHERE 1=1"
+            params = []
+            if statuses:
+                query += f" AND status IN ({','.join('?' * len(statuses))})"
+                params.extend(statuses)
+            if due_before is not None:
+                query += " AND next_attempt_at <= ?"
+                params.append(due_before)
+            query += " ORDER BY id LIMIT ?"
+            params.append(limit)
+            
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            items = []
+            for row in cursor.fetchall():
+                item = dict(row)
+                item["payload"] = json.loads(item["payload"])
+                items.append(item)
+            return items
+        except Exception as e:
+            logger.error(f"Ошибка при получении очереди отправки: {str(e)}")
+            return []
+    
+    def get_outbox_counts(self) -> Dict[str, int]:
+        """Количество записей очереди отправки по статусам"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT status, COUNT(*) FROM api_outbox GROUP BY status")
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Ошибка при подсчете записей очереди отправки: {str(e)}")
+            return {}
+    
+    def update_outbox_item(self, item_id: int, status: str, error: Optional[str] = None,
+                           response: Optional[Dict[str, Any]] = None,
+                           next_attempt_at: Optional[float] = None) -> bool:
+        """Обновление результата попытки отправки записи очереди
+        
+        Args:
+            item_id (int): ID записи
+            status (str): Новый статус (PENDING, SENT, FAILED)
+            error (str, optional): Текст ошибки
+            response (Dict[str, Any], optional): Ответ API
+            next_attempt_at (float, optional): Время следующей попытки (Unix time)
+            
+        Returns:
+            bool: True, если обновление выполнено успешно, иначе False
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                UPDATE api_outbox
+                SET status = ?, last_error = ?, response = COALESCE(?, response),
+                    next_attempt_at = COALESCE(?, next_attempt_at),
+                    attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, error, json.dumps(response, ensure_ascii=False) if response is not None else None,
+                  next_attempt_at, item_id))
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении записи очереди отправки: {str(e)}")
+            return False
+    
+    def requeue_outbox_item(self, item_id: int) -> bool:
+        """Возврат записи очереди в ожидание с немедленной попыткой отправки"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "UPDATE api_outbox SET status = 'PENDING', next_attempt_at = 0, updated_at = CURRENT_TIMESTAMP "
+                "WHERE id = ? AND status != 'SENT'",
+                (item_id,)
+            )
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Ошибка при возврате записи в очередь отправки: {str(e)}")
+            return False
+    
+    def delete_outbox_item(self, item_id: int) -> bool:
+        """Удаление записи из очереди отправки"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM api_outbox WHERE id = ?", (item_id,))
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Ошибка при удалении записи очереди отправки: {str(e)}")
+            return False
+    
     def update_aggregation_file_aggregation_report_id(self, file_id: int, aggregation_report_id: str) -> bool:
         """Обновляет идентификатор отчета агрегации для файла агрегации
         
@@ -117,6 +117,26 @@ class AggregationFile:
         self.report_status = report_status or ""
         self.aggregation_status = aggregation_status or ""
 
+class AggregationFileSummary:
+    """Облегченная модель файла агрегации для списка (без списков кодов и JSON)"""
+    def __init__(self, id: int, filename: str, product: str, marking_codes_count: int = 0,
+                 level1_count: int = 0, level2_count: int = 0, comment: str = "",
+                 created_at: datetime = None, report_id: str = None,
+                 aggregation_report_id: str = None, report_status: str = None,
+                 aggregation_status: str = None):
+        self.id = id
+        self.filename = filename
+        self.product = product
+        self.marking_codes_count = marking_codes_count or 0
+        self.level1_count = level1_count or 0
+        self.level2_count = level2_count or 0
+        self.comment = comment or ""
+        self.created_at = created_at
+        self.report_id = report_id or ""
+        self.aggregation_report_id = aggregation_report_id or ""
+        self.report_status = report_status or ""
+        self.aggregation_status = aggregation_status or ""
+
 class UsageType:
     """Класс для представления информации о типе использования кодов маркировки
     
@@ -149,4 +169,80 @@ class ReportStatus:
             cls.REJECTED: "Отчет отклонен",
             cls.SENT: "Отчет отправлен"
         }
-        return descriptions.get(status, f"Неизвестный статус ({status})") 
\ No newline at end of file
+        return descriptions.get(status, f"Неизвестный статус ({status})") 
+
+class CodeStatus:
+    """Справочник статусов жизненного цикла кода маркировки"""
+    RECEIVED = "RECEIVED"      # Код получен из СУЗ
+    EXPORTED = "EXPORTED"      # Код выгружен для печати
+    PRINTED = "PRINTED"        # Код напечатан
+    AGGREGATED = "AGGREGATED"  # Код включен в файл агрегации
+    UTILISED = "UTILISED"      # Код передан в отчете о нанесении
+    AGGREGATED_UTILISED = "AGGREGATED_UTILISED"  # Код агрегирован и передан в отчете о нанесении
+    
+    # Допустимые переходы между статусами (запрошенный статус для каждого исходного).
+    # Агрегация и нанесение - независимые факты: второй из них переводит код в конечный
+    # статус AGGREGATED_UTILISED (см. RESULTS), повторная агрегация отклоняется.
+    # Переход в RECEIVED - откат агрегации при удалении файла агрегации
+    # (выгруженные ранее коды при этом возвращаются в EXPORTED, нанесенные - в UTILISED).
+    TRANSITIONS = {
+        RECEIVED: {EXPORTED, PRINTED, AGGREGATED, UTILISED},
+        EXPORTED: {PRINTED, AGGREGATED, UTILISED},
+        PRINTED: {AGGREGATED, UTILISED},
+        AGGREGATED: {UTILISED, RECEIVED},
+        UTILISED: {AGGREGATED},
+        AGGREGATED_UTILISED: {RECEIVED},
+    }
+    
+    # Итоговый статус, если он отличается от запрошенного: (исходный, запрошенный) -> итоговый
+    RESULTS = {
+        (AGGREGATED, UTILISED): AGGREGATED_UTILISED,
+        (UTILISED, AGGREGATED): AGGREGATED_UTILISED,
+        (AGGREGATED_UTILISED, RECEIVED): UTILISED,
+    }
+    
+    # Статусы использованных кодов (агрегированы или нанесены)
+    USED = (AGGREGATED, UTILISED, AGGREGATED_UTILISED)
+    # Статусы, соответствующие фильтрам выгрузки "Только неиспользованные" и "Только неэкспортированные"
+    UNUSED = (RECEIVED, EXPORTED, PRINTED)
+    NOT_EXPORTED = (RECEIVED, AGGREGATED, UTILISED, AGGREGATED_UTILISED)
+    
+    @classmethod
+    def can_transition(cls, from_status, to_status):
+        """Проверяет, допустим ли переход между статусами"""
+        return to_status in cls.TRANSITIONS.get(from_status, set())
+    
+    @classmethod
+    def sources_for(cls, to_status):
+        """Возвращает список статусов, из которых допустим переход в указанный"""
+        return [status for status, targets in cls.TRANSITIONS.items() if to_status in targets]
+    
+    @classmethod
+    def result_of(cls, from_status, to_status):
+        """Итоговый статус кода при переходе из from_status в запрошенный to_status"""
+        return cls.RESULTS.get((from_status, to_status), to_status)
+    
+    @classmethod
+    def merge(cls, first, second):
+        """Статус, объединяющий статусы двух экземпляров одного кода (агрегация и нанесение
+        не теряются, из остальных выбирается более поздний по жизненному циклу)"""
+        used = {status for status in (first, second) if status in cls.USED}
+        if len(used) > 1 or cls.AGGREGATED_UTILISED in used:
+            return cls.AGGREGATED_UTILISED
+        if used:
+            return used.pop()
+        order = (cls.RECEIVED, cls.EXPORTED, cls.PRINTED)
+        return max(first, second, key=lambda status: order.index(status) if status in order else -1)
+    
+    @classmethod
+    def get_description(cls, status):
+        """Возвращает описание статуса кода на русском языке"""
+        descriptions = {
+            cls.RECEIVED: "Получен",
+            cls.EXPORTED: "Выгружен",
+            cls.PRINTED: "Напечатан",
+            cls.AGGREGATED: "Агрегирован",
+            cls.UTILISED: "Нанесен",
+            cls.AGGREGATED_UTILISED: "Агрегирован и нанесен"
+        }
+        return descriptions.get(status, f"Неизвестный статус ({status})")
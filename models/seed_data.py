@@ -0,0 +1,297 @@
+"""
+Справочные данные, которыми заполняется новая база данных.
+
+Данные применяются при начальной настройке базы данных (Database.bootstrap)
+одним запросом executemany на таблицу.
+"""
+
+# Виды продукции (расширения API): код, название, признак активности
+DEFAULT_EXTENSIONS = [
+    ("shoes", "Обувные товары", 0),
+    ("tobacco", "Табачной изделия", 0),
+    ("alcohol", "Алкоголь", 0),
+    ("pharma", "Фармацевтика", 1),
+    ("milk", "Молочная продукция", 0),
+    ("lp", "Товары легкой промышленности", 0),
+    ("water", "Питевая вода", 0),
+]
+
+# Типы эмиссии: код, название, товарная группа (None - для всех)
+DEFAULT_EMISSION_TYPES = [
+    ("PRODUCTION", "Производство в Казахстане", None),
+    ("IMPORT", "Ввезен в Казахстан (Импорт)", None),
+    ("REMAINS", "Маркировка остатков", "shoes"),
+    ("COMMISSION", "Принят на коммиссию от физ.лица", "shoes"),
+    ("REMARK", "Перемаркировка", None),
+]
+
+# Стандартные статусы заказов: код, название, описание
+DEFAULT_ORDER_STATUSES = [
+    ("CREATED", "Заказ создан", "Заказ создан в системе"),
+    ("PENDING", "Заказ ожидает подтверждения", "Заказ ожидает подтверждения в системе маркировки"),
+    ("DECLINED", "Заказ не подтверждён", "Заказ не подтверждён в системе маркировки"),
+    ("APPROVED", "Заказ подтверждён", "Заказ подтверждён в системе маркировки"),
+    ("READY", "Заказ готов", "Заказ готов к использованию"),
+    ("CLOSED", "Заказ закрыт", "Заказ закрыт (обработан)"),
+]
+
+# Статусы отчетов из документации API: код, название, описание
+DEFAULT_REPORT_STATUSES = [
+    ("PENDING", "Отчет находится в ожидании", "Отчет обрабатывается системой"),
+    ("READY_TO_SEND", "Отчет готов к отправке", "Отчет подготовлен и готов к отправке"),
+    ("REJECTED", "Отчет отклонен", "Отчет был отклонен системой"),
+    ("SENT", "Отчет отправлен", "Отчет успешно отправлен"),
+]
+
+# Страны мира: код, название
+DEFAULT_COUNTRIES = [
+    ("AU", "АВСТРАЛИЯ"),
+    ("AT", "АВСТРИЯ"),
+    ("AZ", "АЗЕРБАЙДЖАН"),
+    ("AX", "АЛАНДСКИЕ ОСТРОВА"),
+    ("AL", "АЛБАНИЯ"),
+    ("DZ", "АЛЖИР"),
+    ("AS", "АМЕРИКАНСКОЕ САМОА"),
+    ("AI", "АНГИЛЬЯ (БРИТ.)"),
+    ("AO", "АНГОЛА"),
+    ("AD", "АНДОРРА"),
+    ("AQ", "АНТАРКТИДА"),
+    ("AG", "АНТИГУА И БАРБУДА"),
+    ("AR", "АРГЕНТИНА"),
+    ("AM", "АРМЕНИЯ"),
+    ("AW", "АРУБА"),
+    ("AF", "АФГАНИСТАН"),
+    ("BS", "БАГАМЫ"),
+    ("BD", "БАНГЛАДЕШ"),
+    ("BB", "БАРБАДОС"),
+    ("BH", "БАХРЕЙН"),
+    ("BY", "БЕЛАРУСЬ"),
+    ("BZ", "БЕЛИЗ"),
+    ("BE", "БЕЛЬГИЯ"),
+    ("BJ", "БЕНИН"),
+    ("BM", "БЕРМУДЫ"),
+    ("BG", "БОЛГАРИЯ"),
+    ("BO", "БОЛИВИЯ"),
+    ("BQ", "БОНЭЙР, СИНТ-ЭСТАТИУС И САБА"),
+    ("BA", "БОСНИЯ И ГЕРЦЕГОВИНА"),
+    ("BW", "БОТСВАНА"),
+    ("BR", "БРАЗИЛИЯ"),
+    ("IO", "БРИТАНСКАЯ ТЕРРИТОРИЯ В ИНДИЙСКОМ ОКЕАНЕ"),
+    ("BN", "БРУНЕЙ-ДАРУССАЛАМ"),
+    ("BV", "БУВЕ"),
+    ("BF", "БУРКИНА-ФАСО"),
+    ("BI", "БУРУНДИ"),
+    ("BT", "БУТАН"),
+    ("VU", "ВАНУАТУ"),
+    ("GB", "ВЕЛИКОБРИТАНИЯ"),
+    ("HU", "ВЕНГРИЯ"),
+    ("VE", "ВЕНЕСУЭЛА"),
+    ("VG", "ВИРГИНСКИЕ ОСТРОВА (БРИТ.)"),
+    ("VI", "ВИРГИНСКИЕ ОСТРОВА, США"),
+    ("VN", "ВЬЕТНАМ"),
+    ("GA", "ГАБОН"),
+    ("HT", "ГАИТИ"),
+    ("GY", "ГАЙАНА"),
+    ("GM", "ГАМБИЯ"),
+    ("GH", "ГАНА"),
+    ("GP", "ГВАДЕЛУПА"),
+    ("GT", "ГВАТЕМАЛА"),
+    ("GN", "ГВИНЕЯ"),
+    ("GW", "ГВИНЕЯ-БИСАУ"),
+    ("DE", "ГЕРМАНИЯ"),
+    ("GG", "ГЕРНСИ"),
+    ("GI", "ГИБРАЛТАР (БРИТ.)"),
+    ("HN", "ГОНДУРАС"),
+    ("HK", "ГОНКОНГ"),
+    ("GD", "ГРЕНАДА"),
+    ("GL", "ГРЕНЛАНДИЯ"),
+    ("GR", "ГРЕЦИЯ"),
+    ("GE", "ГРУЗИЯ"),
+    ("GU", "ГУАМ (США)"),
+    ("DK", "ДАНИЯ"),
+    ("CD", "ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА КОНГО"),
+    ("JE", "ДЖЕРСИ"),
+    ("DJ", "ДЖИБУТИ"),
+    ("DM", "ДОМИНИКА"),
+    ("DO", "ДОМИНИКАHСКАЯ РЕСПУБЛИКА"),
+    ("EU", "ЕВРОПЕЙСКИЙ СОЮЗ"),
+    ("EG", "ЕГИПЕТ"),
+    ("ZM", "ЗАМБИЯ"),
+    ("EH", "ЗАПАДНАЯ САХАРА"),
+    ("ZW", "ЗИМБАБВЕ"),
+    ("IL", "ИЗРАИЛЬ"),
+    ("IN", "ИНДИЯ"),
+    ("ID", "ИНДОНЕЗИЯ"),
+    ("JO", "ИОРДАНИЯ"),
+    ("IQ", "ИРАК, РЕСПУБЛИКА ИРАК"),
+    ("IR", "ИРАН, ИСЛАМСКАЯ РЕСПУБЛИКА"),
+    ("IE", "ИРЛАНДИЯ"),
+    ("IS", "ИСЛАНДИЯ"),
+    ("ES", "ИСПАНИЯ"),
+    ("IT", "ИТАЛИЯ"),
+    ("YE", "ЙЕМЕН"),
+    ("CV", "КАБО-ВЕРДЕ"),
+    ("KZ", "КАЗАХСТАН"),
+    ("KH", "КАМБОДЖА"),
+    ("CM", "КАМЕРУН"),
+    ("CA", "КАНАДА"),
+    ("QA", "КАТАР"),
+    ("KE", "КЕНИЯ"),
+    ("CY", "КИПР"),
+    ("KI", "КИРИБАТИ"),
+    ("CN", "КИТАЙ"),
+    ("CC", "КОКОСОВЫЕ (КИЛИНГ) ОСТРОВА"),
+    ("CO", "КОЛУМБИЯ"),
+    ("KM", "КОМОРЫ"),
+    ("CG", "КОНГО"),
+    ("KP", "КОРЕЯ, НАРОДНО-ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА"),
+    ("CR", "КОСТА-РИКА"),
+    ("CI", "КОТ-Д'ИВУАР"),
+    ("CU", "КУБА"),
+    ("KW", "КУВЕЙТ"),
+    ("KG", "КЫРГЫЗСТАН"),
+    ("CW", "КЮРАСАО"),
+    ("LA", "ЛАОССАЯ НАРОДНО-ДЕМОКРАТИЧЕСКАЯ РЕСПУБЛИКА"),
+    ("LS", "ЛЕСОТО"),
+    ("LR", "ЛИБЕРИЯ"),
+    ("LB", "ЛИВАН"),
+    ("LY", "ЛИВИЯ"),
+    ("LT", "ЛИТВА"),
+    ("LI", "ЛИХТЕНШТЕЙН"),
+    ("LU", "ЛЮКСЕМБУРГ"),
+    ("MU", "МАВРИКИЙ"),
+    ("MR", "МАВРИТАНИЯ"),
+    ("MG", "МАДАГАСКАР"),
+    ("YT", "МАЙОТТА"),
+    ("MO", "МАКАО"),
+    ("MK", "МАКЕДОНИЯ"),
+    ("MW", "МАЛАВИ"),
+    ("MY", "МАЛАЙЗИЯ"),
+    ("ML", "МАЛИ"),
+    ("UM", "МАЛЫЕ ТИХООКЕАН.ОТДАЛЕН.ОСТ-ВА С.Ш."),
+    ("MV", "МАЛЬДИВЫ"),
+    ("MT", "МАЛЬТА"),
+    ("MA", "МАРОККО"),
+    ("MQ", "МАРТИНИКА"),
+    ("MH", "МАРШАЛЛОВЫ ОСТРОВА"),
+    ("MX", "МЕКСИКА"),
+    ("FM", "МИКРОНЕЗИЯ, ФЕДЕРАТИВНЫЕ ШТАТЫ"),
+    ("MZ", "МОЗАМБИК"),
+    ("MD", "МОЛДОВА, РЕСПУБЛИКА"),
+    ("MC", "МОНАКО"),
+    ("MN", "МОНГОЛИЯ"),
+    ("MS", "МОНТСЕРРАТ"),
+    ("MM", "МЬЯНМА"),
+    ("NA", "НАМИБИЯ"),
+    ("NR", "НАУРУ"),
+    ("NP", "НЕПАЛ"),
+    ("NE", "НИГЕР"),
+    ("NG", "НИГЕРИЯ"),
+    ("NL", "НИДЕРЛАНДЫ"),
+    ("NI", "НИКАРАГУА"),
+    ("NU", "НИУЭ"),
+    ("NZ", "НОВАЯ ЗЕЛАНДИЯ"),
+    ("NC", "НОВАЯ КАЛЕДОНИЯ"),
+    ("NO", "НОРВЕГИЯ"),
+    ("AE", "ОБЪЕДИНЕННЫЕ АРАБСКИЕ ЭМИРАТЫ"),
+    ("OM", "ОМАН"),
+    ("IM", "ОСТРОВ МЭН"),
+    ("NF", "ОСТРОВ НОРФОЛК"),
+    ("CX", "ОСТРОВ РОЖДЕСТВА"),
+    ("SH", "ОСТРОВ СВЯТОЙ ЕЛЕНЫ"),
+    ("HM", "ОСТРОВ ХЕРД И ОСТРОВА МАКДОНАЛЬД"),
+    ("KY", "ОСТРОВА КАЙМАН"),
+    ("CK", "ОСТРОВА КУКА"),
+    ("TC", "ОСТРОВА ТЕРКС И КАЙКОС"),
+    ("PK", "ПАКИСТАН"),
+    ("PW", "ПАЛАУ"),
+    ("PS", "ПАЛЕСТИНСКАЯ ТЕРРИТОРИЯ, ОККУПИРОВАННАЯ"),
+    ("PA", "ПАНАМА"),
+    ("VA", "ПАПСКИЙ ПРЕСТОЛ(ГОС.-ГОРОД ВАТИКАН)"),
+    ("PG", "ПАПУА-НОВАЯ ГВИНЕЯ"),
+    ("PY", "ПАРАГВАЙ"),
+    ("PE", "ПЕРУ"),
+    ("PN", "ПИТКЕРН"),
+    ("PL", "ПОЛЬША"),
+    ("PT", "ПОРТУГАЛИЯ"),
+    ("PR", "ПУЭРТО-РИКО"),
+    ("KR", "РЕСПУБЛИКА КОРЕЯ"),
+    ("LV", "РЕСПУБЛИКА ЛАТВИЯ"),
+    ("RE", "РЕЮНЬОН"),
+    ("RU", "РОССИЯ"),
+    ("RW", "РУАНДА"),
+    ("RO", "РУМЫНИЯ"),
+    ("SM", "САH-МАРИHО"),
+    ("WS", "САМОА"),
+    ("ST", "САН-ТОМЕ И ПРИНСИПИ"),
+    ("SA", "САУДОВСКАЯ АРАВИЯ"),
+    ("SZ", "СВАЗИЛЕНД"),
+    ("VC", "СЕHТ-ВИНСЕНТ И ГРЕНАДИНЫ"),
+    ("LC", "СЕHТ-ЛЮСИЯ"),
+    ("MP", "СЕВЕРНЫЕ МАРИАНСКИЕ ОСТРОВА"),
+    ("SC", "СЕЙШЕЛЫ"),
+    ("BL", "СЕН-БАРТЕЛЕМИ"),
+    ("SN", "СЕНЕГАЛ"),
+    ("MF", "СЕН-МАРТЕН"),
+    ("SX", "СЕН-МАРТЕН (нидерландская часть)"),
+    ("PM", "СЕН-ПЬЕР И МИКЕЛОН"),
+    ("KN", "СЕНТ-КИТС И НЕВИС"),
+    ("RS", "СЕРБИЯ"),
+    ("SG", "СИНГАПУР"),
+    ("SY", "СИРИЙСКАЯ АРАБСКАЯ РЕСПУБЛИКА"),
+    ("SK", "СЛОВАКИЯ"),
+    ("SI", "СЛОВЕНИЯ"),
+    ("US", "СОЕДИНЕННЫЕ ШТАТЫ АМЕРИКИ"),
+    ("SB", "СОЛОМОНОВЫ ОСТРОВА"),
+    ("SO", "СОМАЛИ"),
+    ("SD", "СУДАН"),
+    ("SR", "СУРИНАМ"),
+    ("SL", "СЬЕРРА-ЛЕОНЕ"),
+    ("TJ", "ТАДЖИКИСТАН"),
+    ("TH", "ТАИЛАНД"),
+    ("TW", "ТАЙВАНЬ (КИТАЙ)"),
+    ("TZ", "ТАНЗАНИЯ, ОБЪЕДИНЕННАЯ РЕСПУБЛИКА"),
+    ("TL", "ТИМОР-ЛЕСТЕ"),
+    ("TG", "ТОГО"),
+    ("TK", "ТОКЕЛАУ"),
+    ("TO", "ТОНГА"),
+    ("TT", "ТРИНИДАД И ТОБАГО"),
+    ("TV", "ТУВАЛУ"),
+    ("TN", "ТУНИС"),
+    ("TM", "ТУРКМЕНИСТАН"),
+    ("TR", "ТУРЦИЯ"),
+    ("UG", "УГАНДА"),
+    ("UZ", "УЗБЕКИСТАН"),
+    ("UA", "УКРАИНА"),
+    ("WF", "УОЛЛИС И ФУТУНА"),
+    ("UY", "УРУГВАЙ"),
+    ("FO", "ФАРЕРСКИЕ ОСТРОВА"),
+    ("FJ", "ФИДЖИ"),
+    ("PH", "ФИЛИППИНЫ"),
+    ("FI", "ФИНЛЯНДИЯ"),
+    ("FK", "ФОЛКЛЕНДСКИЕ ОСТРОВА (МАЛЬВИНСКИЕ)"),
+    ("FR", "ФРАНЦИЯ"),
+    ("GF", "ФРАНЦУЗСКАЯ ГВИАНА"),
+    ("PF", "ФРАНЦУЗСКАЯ ПОЛИНЕЗИЯ"),
+    ("TF", "ФРАНЦУЗСКИЕ ЮЖНЫЕ ТЕРРИТОРИИ"),
+    ("HR", "ХОРВАТИЯ"),
+    ("CF", "ЦЕНТРАЛЬНО-АФРИКАНСКАЯ РЕСПУБЛИКА"),
+    ("TD", "ЧАД"),
+    ("ME", "ЧЕРНОГОРИЯ"),
+    ("CZ", "ЧЕШСКАЯ РЕСПУБЛИКА"),
+    ("CL", "ЧИЛИ"),
+    ("CH", "ШВЕЙЦАРИЯ"),
+    ("SE", "ШВЕЦИЯ"),
+    ("SJ", "ШПИЦБЕРГЕН И ЯН МАЙЕН"),
+    ("LK", "ШРИ-ЛАНКА"),
+    ("EC", "ЭКВАДОР"),
+    ("GQ", "ЭКВАТОРИАЛЬНАЯ ГВИНЕЯ"),
+    ("SV", "ЭЛЬ-САЛЬВАДОР"),
+    ("ER", "ЭРИТРЕЯ"),
+    ("EE", "ЭСТОНИЯ"),
+    ("ET", "ЭФИОПИЯ"),
+    ("GS", "ЮЖН.ДЖОРДЖИЯ И ЮЖН.САНДВИЧ.ОСТРОВА"),
+    ("ZA", "ЮЖНАЯ АФРИКА"),
+    ("JM", "ЯМАЙКА"),
+    ("JP", "ЯПОНИЯ"),
+]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Аудит времени импорта модулей при запуске приложения.
+
+Запускает интерпретатор с ключом -X importtime, импортирует указанный модуль
+(по умолчанию main - точка входа приложения) и выводит самые дорогие модули
+по накопленному времени импорта, а также итог по пакетам верхнего уровня.
+
+Пример:
+    python scripts/bench_imports.py --top 30
+    python scripts/bench_imports.py --module models.database
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module):
+    """Импорт модуля в отдельном процессе с -X importtime
+
+    Returns:
+        tuple: (список (модуль, собственное время мкс, накопленное время мкс), код возврата, текст ошибки)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    records = []
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Строка заголовка таблицы
+            continue
+        # Имя модуля отделено одним пробелом, дальнейший отступ обозначает вложенность
+        records.append((parts[2][1:].rstrip(), int(parts[0]), int(parts[1])))
+    return records, result.returncode, "\n".join(errors)
+
+
+def main():
+    """Точка входа в скрипт"""
+    parser = argparse.ArgumentParser(description="Аудит времени импорта модулей")
+    parser.add_argument("--module", default="main", help="Импортируемый модуль (по умолчанию main)")
+    parser.add_argument("--top", type=int, default=25, help="Количество выводимых модулей")
+    args = parser.parse_args()
+
+    records, returncode, errors = measure_imports(args.module)
+    if returncode != 0:
+        print(f"Импорт {args.module} завершился с ошибкой (код {returncode}):")
+        print(errors)
+    if not records:
+        return
+
+    # Накопленное время модуля верхнего уровня (без отступа) и есть время его импорта
+    total = sum(cumulative for name, _, cumulative in records if not name.startswith(" "))
+    print(f"Импорт {args.module}: {total / 1000:.1f} мс, модулей: {len(records)}")
+
+    print(f"\nСамые дорогие модули по накопленному времени (первые {args.top}):")
+    print(f"{'накоплено, мс':>14} {'свое, мс':>10}  модуль")
+    for name, self_us, cumulative_us in sorted(records, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>10.1f}  {name}")
+
+    packages = defaultdict(int)
+    for name, self_us, _ in records:
+        packages[name.strip().split(".")[0]] += self_us
+    print("\nСобственное время импорта по пакетам:")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>10.1f} мс  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Замер времени открытия базы данных при запуске приложения.
+
+Сравнивает первый запуск (создание таблиц, миграции, справочники) и повторный
+запуск на уже настроенной базе данных, а также считает SQL-запросы, выполненные
+при повторном открытии.
+
+Пример:
+    python scripts/bench_startup.py --runs 20
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def open_database(db_path):
+    """Открытие базы данных с подсчетом выполненных SQL-запросов
+
+    Returns:
+        tuple: (время в секундах, список выполненных запросов)
+    """
+    statements = []
+    original_connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = original_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    sqlite3.connect = traced_connect
+    try:
+        started = time.perf_counter()
+        db = Database(db_path)
+        elapsed = time.perf_counter() - started
+    finally:
+        sqlite3.connect = original_connect
+    db.conn.set_trace_callback(None)
+    db.conn.close()
+    db.conn = None
+    return elapsed, statements
+
+
+def main():
+    """Точка входа в скрипт"""
+    parser = argparse.ArgumentParser(description="Замер времени открытия базы данных")
+    parser.add_argument("--runs", type=int, default=10, help="Количество повторных открытий")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+
+        cold, cold_statements = open_database(db_path)
+        print(f"Первый запуск (настройка базы данных): {cold * 1000:.1f} мс, запросов: {len(cold_statements)}")
+
+        timings = []
+        warm_statements = []
+        for _ in range(args.runs):
+            elapsed, warm_statements = open_database(db_path)
+            timings.append(elapsed)
+
+        print(f"Повторный запуск ({args.runs} раз): медиана {statistics.median(timings) * 1000:.2f} мс, "
+              f"максимум {max(timings) * 1000:.2f} мс, запросов: {len(warm_statements)}")
+        for statement in warm_statements:
+            print(f"    {statement}")
+
+
+if __name__ == "__main__":
+    main()
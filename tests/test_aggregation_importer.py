@@ -0,0 +1,78 @@
+"""Тесты пакетного импорта файлов агрегации (utils.aggregation_importer) и папки обмена (cli)"""
+import os
+
+import pytest
+
+from benchmarks.datasets import GTIN, aggregation_file_json, make_boxes, make_codes
+from cli import DropFolderWatcher, HeadlessClient
+from utils.aggregation_importer import AggregationBatchImporter
+
+CODES = make_codes(30)
+
+
+def write_file(folder, name, codes):
+    path = os.path.join(folder, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(aggregation_file_json("Тестовая продукция", make_boxes(codes)))
+    return path
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = HeadlessClient(str(tmp_path / "importer.db"))
+    client.db.save_marking_codes(CODES, GTIN, "order")
+    return client
+
+
+def test_duplicates_within_batch_flagged(client, tmp_path):
+    paths = [
+        write_file(str(tmp_path), "a.json", CODES[:10]),
+        write_file(str(tmp_path), "b.json", CODES[5:15]),
+        write_file(str(tmp_path), "c.json", CODES[20:30]),
+    ]
+    result = AggregationBatchImporter(client.db, max_workers=1).run(paths)
+
+    assert result["imported"] == 3
+    # Порядок разбора не задан: повторным считается тот из файлов a/b, что записан вторым
+    assert [count for _, count in result["duplicates"]] == [5]
+    assert result["duplicates"][0][0] in ("a.json", "b.json")
+    assert len(result["duplicate_file_ids"]) == 1
+    assert set(result["duplicate_file_ids"]) < set(result["file_ids"])
+
+
+def test_duplicates_of_imported_files_flagged(client, tmp_path):
+    AggregationBatchImporter(client.db, max_workers=1).run([write_file(str(tmp_path), "a.json", CODES[:10])])
+    result = AggregationBatchImporter(client.db, max_workers=1).run([write_file(str(tmp_path), "b.json", CODES[:3])])
+
+    assert result["duplicates"] == [("b.json", 3)]
+    assert result["duplicate_file_ids"] == result["file_ids"]
+
+
+def test_watcher_skips_utilisation_for_duplicate_files(client, tmp_path, monkeypatch):
+    folder = tmp_path / "drop"
+    folder.mkdir()
+    write_file(str(folder), "a.json", CODES[:10])
+    write_file(str(folder), "b.json", CODES[:10])
+
+    sent = []
+    monkeypatch.setattr(client, "send_utilisation", lambda file_id, **kwargs: sent.append(file_id) or {})
+    watcher = DropFolderWatcher(client, str(folder), settle_time=0,
+                                utilisation={"usage_type": "VERIFIED", "expiration_date": "2030-12-31"})
+    cycle = watcher.run_once()
+
+    assert cycle["import"]["imported"] == 2
+    assert len(sent) == 1
+    assert sent[0] not in cycle["import"]["duplicate_file_ids"]
+
+
+def test_file_codes_loaded_without_document(client, tmp_path):
+    result = AggregationBatchImporter(client.db, max_workers=1).run([write_file(str(tmp_path), "a.json", CODES[:10])])
+    file_id = result["file_ids"][0]
+
+    light = client.db.get_aggregation_file_by_id(file_id, with_content=False)
+    assert light.marking_codes == CODES[:10]
+    assert light.json_content == "" and light.data == {}
+
+    raw = client.db.get_aggregation_file_by_id(file_id, parse_content=False)
+    assert raw.json_content and raw.data == {}
+    assert client.db.get_aggregation_file_by_id(file_id).data["NameProduct"] == "Тестовая продукция"
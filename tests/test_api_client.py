@@ -0,0 +1,62 @@
+"""Тесты проверки доступности СУЗ через кэш ответов (models.api_client)"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from models.api_client import APIClient
+from models.api_log import APILog
+from models.database import Database
+
+
+class BadGatewayHandler(BaseHTTPRequestHandler):
+    """Прокси, отвечающий HTML-страницей с кодом 502"""
+
+    def do_GET(self):
+        body = "<html><body>502 Bad Gateway</body></html>".encode("utf-8")
+        self.send_response(502)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "client.db"))
+    db.add_credentials("oms", "token", "", "", None)
+    return db
+
+
+@pytest.fixture
+def bad_gateway():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), BadGatewayHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_client(db, base_url):
+    return APIClient(base_url=base_url, extension="pharma", omsid="oms", db=db, api_logger=APILog(db=db))
+
+
+def test_cached_api_status(db, mock_suz):
+    client = make_client(db, mock_suz.url)
+    assert client.cached_api_status() is None
+    assert client.ping()["success"]
+    assert client.cached_api_status() is True
+    assert mock_suz.metrics()["requests"] == {"GET ping": 1}
+
+
+def test_html_error_reported_as_unavailable(db, bad_gateway):
+    client = make_client(db, bad_gateway)
+    response = client.ping(force=True)
+    assert response["success"] is False
+    assert "502" in response["error"]
+    # Ответ с ошибкой не сохраняется в кэше
+    assert client.cached_api_status() is None
@@ -0,0 +1,49 @@
+"""Тесты полнотекстового поиска по логу API-запросов (Database.search_api_logs)"""
+import pytest
+
+from models.database import Database
+
+GS = "\x1d"
+GTIN = "04601234567890"
+IDENTITY = f"01{GTIN}21ABC123"
+PRINTER = f"{IDENTITY}{GS}91EE10{GS}92tail"
+STORAGE = PRINTER.replace(GS, "[GS]")
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "logs.db"))
+    # Коды в запросе сериализуются json.dumps: разделитель записывается как \u001d
+    db.add_api_log("POST", "/api/v2/pharma/utilisation", {"sntins": [PRINTER]},
+                   {"reportId": "report-7f3a"}, 200, description="Отчет о нанесении")
+    db.add_api_log("GET", "/api/v2/pharma/codes", {}, {"codes": [f"01{GTIN}21XYZ999{GS}91EE10"]}, 200,
+                   description="Получение кодов")
+    db.add_api_log("POST", "/api/v2/pharma/aggregation", f'{{"sntins": ["{STORAGE}"]}}', {}, 400,
+                   success=False, description="Отчет об агрегации")
+    return db
+
+
+def found(db, query):
+    return [entry["description"] for entry in db.search_api_logs(query)]
+
+
+@pytest.mark.parametrize("query", [PRINTER, STORAGE, IDENTITY, f"  {IDENTITY}  "])
+def test_code_found_in_any_representation(db, query):
+    # Новые записи первыми
+    assert found(db, query) == ["Отчет об агрегации", "Отчет о нанесении"]
+
+
+def test_other_code_not_found(db):
+    assert found(db, f"01{GTIN}21ABC124") == []
+    assert found(db, f"01{GTIN}21XYZ999") == ["Получение кодов"]
+
+
+def test_words_and_report_id(db):
+    assert found(db, "report-7f3a") == ["Отчет о нанесении"]
+    assert found(db, "отчет нанес") == ["Отчет о нанесении"]
+    assert found(db, "") == [] and found(db, "[]") == []
+
+
+def test_search_without_fts_index(db):
+    db.conn.execute("DROP TABLE api_logs_fts")
+    assert found(db, STORAGE) == ["Отчет об агрегации", "Отчет о нанесении"]
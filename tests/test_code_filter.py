@@ -0,0 +1,73 @@
+"""Тесты фильтра дубликатов кодов (utils.code_filter) и его хранения рядом с базой данных"""
+import os
+
+from models.database import Database
+from utils.code_filter import BloomFilter
+from utils.gs1 import identity
+
+GTIN = "04601234567890"
+CODES = [f"01{GTIN}21{serial:013d}[GS]91EE10[GS]92tail{serial}" for serial in range(1, 21)]
+
+
+def test_membership_and_screen():
+    bloom = BloomFilter(capacity=1000)
+    bloom.add_many(["a", "b"])
+    assert "a" in bloom and "b" in bloom
+    assert bloom.screen(["x", "a", "y", "b"]) == [1, 3]
+    assert bloom.count == 2 and not bloom.saturated
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "codes.bloom")
+    bloom = BloomFilter(capacity=1000, error_rate=0.001)
+    bloom.add_many(CODES)
+    bloom.last_id = 42
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert (loaded.size, loaded.hashes, loaded.count, loaded.last_id) == (bloom.size, bloom.hashes, 20, 42)
+    assert loaded.error_rate == bloom.error_rate
+    assert all(code in loaded for code in CODES)
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_missing_or_damaged_file(tmp_path):
+    path = str(tmp_path / "codes.bloom")
+    assert BloomFilter.load(path) is None
+    BloomFilter(capacity=1000).save(path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    assert BloomFilter.load(path) is None
+
+
+def test_watermark_adds_only_new_rows(tmp_path):
+    path = str(tmp_path / "filter.db")
+    db = Database(path)
+    db.save_marking_codes(CODES[:10], GTIN, "order")
+    bloom = db.get_code_filter("codes")
+    db.save_code_filters()
+    saved_last_id = bloom.last_id
+
+    # Коды, сохраненные после записи фильтра, добавляются при следующей загрузке
+    other = Database(path)
+    other.conn.executemany("INSERT INTO marking_codes (code, gtin, order_id) VALUES (?, ?, 'order')",
+                           [(code, GTIN) for code in CODES[10:]])
+    other.conn.commit()
+    loaded = Database(path).get_code_filter("codes")
+    assert loaded.last_id > saved_last_id
+    assert loaded.count == 20
+    assert all(identity(code) in loaded for code in CODES)
+
+
+def test_filter_of_recreated_database_rebuilt(tmp_path):
+    path = str(tmp_path / "filter.db")
+    db = Database(path)
+    db.save_marking_codes(CODES, GTIN, "order")
+    db.get_code_filter("codes")
+    db.save_code_filters()
+
+    # Фильтр учитывает строки, которых в новой базе данных нет
+    db.conn.execute("DELETE FROM marking_codes")
+    db.conn.commit()
+    loaded = Database(path).get_code_filter("codes")
+    assert loaded.last_id == 0 and loaded.count == 0
@@ -0,0 +1,58 @@
+"""Тесты индекса кодов маркировки в памяти (utils.code_pool)"""
+from models.database import Database
+from models.models import CodeStatus
+from utils.code_pool import CodePool
+
+GS = "\x1d"
+GTIN = "04601234567890"
+CODES = [f"01{GTIN}21{serial:013d}[GS]91EE10[GS]92tail{serial}" for serial in range(1, 6)]
+
+
+def test_lookup_in_any_representation():
+    pool = CodePool()
+    pool.add(7, GTIN, "0000000000001", CodeStatus.EXPORTED)
+
+    for barcode in (CODES[0], CODES[0].replace("[GS]", GS), f"01{GTIN}210000000000001"):
+        entry = pool.lookup(barcode)
+        assert (entry.code_id, entry.status) == (7, CodeStatus.EXPORTED)
+    assert CODES[1] not in pool
+
+
+def test_status_change_and_removal():
+    pool = CodePool()
+    pool.add(1, GTIN, "0000000000001")
+    pool.set_status(GTIN, "0000000000001", CodeStatus.AGGREGATED)
+    assert pool.lookup(CODES[0]).status == CodeStatus.AGGREGATED
+
+    pool.remove(GTIN, "0000000000001")
+    assert pool.lookup(CODES[0]) is None
+    assert len(pool) == 0
+    # Удаленный код не возвращается изменением статуса
+    pool.set_status(GTIN, "0000000000001", CodeStatus.RECEIVED)
+    assert pool.lookup(CODES[0]) is None
+
+
+def test_grows_past_initial_capacity():
+    pool = CodePool(capacity=16)
+    count = pool.add_rows((index, GTIN, f"{index:013d}", None, CodeStatus.RECEIVED) for index in range(5000))
+    assert count == len(pool) == 5000
+    assert [entry.code_id for entry in pool.lookup_many(f"01{GTIN}21{index:013d}" for index in (0, 2500, 4999))] == [
+        0, 2500, 4999]
+
+
+def test_attached_pool_follows_database(tmp_path):
+    db = Database(str(tmp_path / "pool.db"))
+    db.save_marking_codes(CODES[:2], GTIN, "order")
+    pool = CodePool()
+    assert pool.attach(db) == 2
+
+    db.save_marking_codes(CODES[2:], GTIN, "order")
+    assert len(pool) == 5
+
+    db.mark_codes_used_by_barcodes(CODES[:2], file_id=1)
+    assert [entry.status for entry in pool.lookup_many(CODES[:3])] == [
+        CodeStatus.AGGREGATED, CodeStatus.AGGREGATED, CodeStatus.RECEIVED]
+
+    db.delete_marking_codes([pool.lookup(CODES[4]).code_id])
+    assert CODES[4] not in pool
+    assert len(pool) == 4
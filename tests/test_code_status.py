@@ -0,0 +1,46 @@
+"""Тесты статусов кодов маркировки при агрегации (models.database)"""
+import pytest
+
+from models.database import Database
+from models.models import CodeStatus
+
+GS = "\x1d"
+GTIN = "04601234567890"
+CODES = [f"01{GTIN}21{serial:013d}{GS}91EE10{GS}92tail{serial}" for serial in range(1, 6)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "codes.db"))
+    db.save_marking_codes(CODES, GTIN, "order")
+    return db
+
+
+def statuses(db):
+    return [row["status"] for row in db.conn.execute("SELECT status FROM marking_codes ORDER BY id")]
+
+
+def test_repeated_aggregation_rejected(db):
+    assert db.mark_codes_used_by_barcodes(CODES, file_id=1) == 5
+    assert db.mark_codes_used_by_barcodes(CODES[:2], file_id=2) == 0
+    assert statuses(db) == [CodeStatus.AGGREGATED] * 5
+
+
+def test_deleting_rejected_file_keeps_codes_of_other_file(db):
+    db.mark_codes_used_by_barcodes(CODES, file_id=1)
+    db.mark_codes_used_by_barcodes(CODES[:2], file_id=2)
+    # Файл 2 удален: его коды по-прежнему агрегированы файлом 1
+    assert db.mark_codes_used_by_barcodes(CODES[:2], used=False, file_id=2) == 0
+    assert statuses(db) == [CodeStatus.AGGREGATED] * 5
+    # Файл 1 удален: коды возвращаются в оборот
+    assert db.mark_codes_used_by_barcodes(CODES, used=False, file_id=1) == 5
+    assert statuses(db) == [CodeStatus.RECEIVED] * 5
+
+
+def test_utilised_code_keeps_aggregating_file(db):
+    db.mark_codes_used_by_barcodes(CODES[:1], file_id=1)
+    db.transition_codes_by_barcodes(CODES[:1], CodeStatus.UTILISED, "utilisation_report", "report")
+    assert statuses(db)[0] == CodeStatus.AGGREGATED_UTILISED
+    # Нанесение не считается агрегацией: файл 1 по-прежнему владеет кодом
+    assert db.mark_codes_used_by_barcodes(CODES[:1], used=False, file_id=1) == 1
+    assert statuses(db)[0] == CodeStatus.UTILISED
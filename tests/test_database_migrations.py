@@ -0,0 +1,93 @@
+"""Тесты миграций базы данных (models.database)"""
+import pytest
+
+from models.database import SCHEMA_VERSION, Database
+from models.models import CodeStatus
+
+GS = "\x1d"
+CODE = f"0104601234567890211111111111111{GS}91EE10{GS}92aaa"
+OTHER_CODE = f"0104601234567890212222222222222{GS}91EE10{GS}92bbb"
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """База со старыми кодами без разбора на GTIN и серийный номер (в том числе с дубликатами)"""
+    path = str(tmp_path / "legacy.db")
+    db = Database(path)
+    db.conn.executemany(
+        "INSERT INTO marking_codes (code, gtin, order_id, used, exported, status) VALUES (?, ?, 'order', ?, ?, ?)",
+        [
+            (CODE, "04601234567890", 0, 0, CodeStatus.RECEIVED),
+            (CODE.replace(GS, "[GS]"), "04601234567890", 0, 1, CodeStatus.EXPORTED),
+            (CODE, "04601234567890", 1, 0, CodeStatus.UTILISED),
+            (OTHER_CODE, "04601234567890", 0, 0, CodeStatus.RECEIVED),
+        ]
+    )
+    db.conn.execute("PRAGMA user_version = 0")
+    db.conn.commit()
+    db.conn.close()
+    db.conn = None
+    # Повторное открытие выполняет миграции
+    return Database(path)
+
+
+def test_duplicate_codes_removed(legacy_db):
+    rows = legacy_db.conn.execute("SELECT id, serial, status, used, exported FROM marking_codes ORDER BY id").fetchall()
+    assert [(row["id"], row["serial"]) for row in rows] == [(1, "1111111111111"), (4, "2222222222222")]
+    # Статус оставшегося экземпляра объединяет статусы удаленных
+    assert (rows[0]["status"], rows[0]["used"], rows[0]["exported"]) == (CodeStatus.UTILISED, 1, 1)
+
+
+def test_duplicate_merge_logged(legacy_db):
+    events = legacy_db.conn.execute(
+        "SELECT code_id, from_status, to_status, ref_id FROM code_events WHERE ref_type = 'duplicate'"
+    ).fetchall()
+    assert [tuple(event) for event in events] == [(1, CodeStatus.RECEIVED, CodeStatus.UTILISED, "2,3")]
+
+
+def test_export_received_skips_duplicates(legacy_db):
+    exported = []
+    legacy_db.export_marking_codes(lambda rows: exported.extend(row["id"] for row in rows),
+                                   statuses=[CodeStatus.RECEIVED], mark_exported=False)
+    assert exported == [4]
+
+
+def test_nomenclature_gtins_normalized(tmp_path):
+    path = str(tmp_path / "nomenclature.db")
+    db = Database(path)
+    db.conn.executemany("INSERT INTO nomenclature (name, gtin, product_group) VALUES (?, ?, '')",
+                        [("Введен вручную", "4601234567890"), ("Импортирован", "04601234567890"),
+                         ("Другой", "4601234567891")])
+    db.conn.execute("UPDATE nomenclature SET product_group = 'pharma' WHERE name = 'Введен вручную'")
+    db.conn.execute("PRAGMA user_version = 5")
+    db.conn.commit()
+    db.conn.close()
+    db.conn = None
+
+    db = Database(path)
+    # Повторы объединены в импортированную запись, товарная группа сохранена
+    assert sorted((item.name, item.gtin, item.product_group) for item in db.get_nomenclature()) == [
+        ("Другой", "04601234567891", ""), ("Импортирован", "04601234567890", "pharma")]
+    # Ручной ввод и импорт дают один и тот же GTIN
+    assert db.add_nomenclature("Новый", "4601234567892").gtin == "04601234567892"
+    assert db.import_nomenclature([("Новый", "04601234567892", "")]) == {"inserted": 0, "updated": 1}
+    assert sorted(item.name for item in db.search_nomenclature("460123456789")) == ["Другой", "Импортирован", "Новый"]
+
+
+def test_failed_migration_retried(tmp_path, monkeypatch):
+    path = str(tmp_path / "retry.db")
+    db = Database(path)
+    db.conn.execute("PRAGMA user_version = 0")
+    db.conn.commit()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("сбой миграции")
+
+    monkeypatch.setattr(Database, "_create_fts_index", fail)
+    db.bootstrap()
+    # Шаг не выполнен - версия не записана
+    assert db.get_schema_version() == 0
+
+    monkeypatch.undo()
+    assert db.bootstrap()
+    assert db.get_schema_version() == SCHEMA_VERSION
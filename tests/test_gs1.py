@@ -0,0 +1,47 @@
+"""Тесты разбора и нормализации кодов маркировки (utils.gs1)"""
+from utils.gs1 import (GS, GS1Code, identities, identity, parse, parse_codes, printer_forms,
+                       split_crypto_tail, storage_keys, to_printer, to_storage)
+
+GTIN = "04601234567890"
+STORAGE = f"01{GTIN}21ABC123[GS]91EE10[GS]92tail"
+PRINTER = f"01{GTIN}21ABC123{GS}91EE10{GS}92tail"
+
+
+def test_representations_normalized():
+    for code in (STORAGE, PRINTER, f"01{GTIN}21ABC123\\u001d91EE10\\u001d92tail",
+                 f"01{GTIN}21ABC123␝91EE10␝92tail", f"]d2{GS}{PRINTER}\r\n"):
+        assert to_printer(code) == PRINTER
+        assert to_storage(code) == STORAGE
+
+
+def test_other_control_characters_kept_in_storage():
+    assert to_storage(f"01{GTIN}21A\x0291EE10") == f"01{GTIN}21A[2]91EE10"
+
+
+def test_identity_and_crypto_tail():
+    assert identity(STORAGE) == f"01{GTIN}21ABC123"
+    assert identity(f"01{GTIN}21ABC123") == f"01{GTIN}21ABC123"
+    assert split_crypto_tail(PRINTER) == (f"01{GTIN}21ABC123", "91EE10[GS]92tail")
+    assert split_crypto_tail(f"01{GTIN}21ABC123") == (f"01{GTIN}21ABC123", "")
+
+
+def test_parse():
+    code = parse(STORAGE)
+    assert code == GS1Code(GTIN, "ABC123", "91EE10[GS]92tail")
+    assert code.storage == STORAGE
+    assert code.printer == PRINTER
+    assert parse(f"01{GTIN}21ABC123") == GS1Code(GTIN, "ABC123", "")
+    assert parse("00123456789012345678") is None
+
+
+def test_parse_with_serial_length():
+    # Криптохвост без разделителя: серийный номер определяется по длине
+    assert parse(f"01{GTIN}21ABC12391EE10", serial_length=6) == GS1Code(GTIN, "ABC123", "91EE10")
+
+
+def test_batch_functions_match_single():
+    codes = [STORAGE, PRINTER, f"01{GTIN}21XYZ", "мусор"]
+    assert parse_codes(codes) == [parse(code) for code in codes]
+    assert storage_keys(codes) == [to_storage(code) for code in codes]
+    assert printer_forms(iter(codes)) == [to_printer(code) for code in codes]
+    assert identities(codes + [""]) == [identity(code) for code in codes]
@@ -0,0 +1,57 @@
+"""Тесты имитации СУЗ (utils.mock_suz)"""
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from utils.mock_suz import MockSUZConfig, MockSUZServer
+
+
+def request(server, method, path, body=None, token="token"):
+    """Запрос к имитации СУЗ: (код ответа, данные)"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["clientToken"] = token
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    try:
+        with urlopen(Request(server.url + path, data=data, headers=headers, method=method), timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def issue_codes(server):
+    """Заказ на 5 кодов и получение их одним блоком"""
+    _, order = request(server, "POST", "/api/v2/pharma/orders?omsId=oms",
+                       {"products": [{"gtin": "04600000000000", "quantity": 5}]})
+    _, block = request(server, "GET", f"/api/v2/pharma/codes?omsId=oms&orderId={order['orderId']}"
+                                      f"&gtin=04600000000000&quantity=5")
+    return order["orderId"], block["codes"]
+
+
+def test_ping(mock_suz):
+    status_code, data = request(mock_suz, "GET", "/api/v2/pharma/ping?omsId=oms")
+    assert status_code == 200
+    assert data["omsId"] == "oms"
+    assert mock_suz.metrics()["requests"] == {"GET ping": 1}
+
+
+def test_token_required(mock_suz):
+    status_code, _ = request(mock_suz, "GET", "/api/v2/pharma/ping?omsId=oms", token=None)
+    assert status_code == 401
+
+
+def test_error_rate(mock_suz):
+    mock_suz.config.error_rate = 1.0
+    status_code, _ = request(mock_suz, "GET", "/api/v2/pharma/version")
+    assert status_code == 500
+
+
+def test_codes_reproducible_with_seed():
+    results = []
+    for _ in range(2):
+        with MockSUZServer(MockSUZConfig(seed=42, error_rate=0.5)) as server:
+            statuses = [request(server, "GET", "/api/v2/pharma/version")[0] for _ in range(10)]
+            server.config.error_rate = 0.0
+            results.append((statuses, issue_codes(server)))
+    assert results[0] == results[1]
+    assert len(results[0][1][1]) == 5
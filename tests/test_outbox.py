@@ -0,0 +1,95 @@
+"""Тесты очереди отправки (utils.outbox)"""
+import socket
+import time
+
+import pytest
+
+from models.api_client import APIClient
+from models.api_log import APILog
+from models.database import Database
+from utils.outbox import OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT, OutboxDispatcher
+
+ORDER = {"products": [{"gtin": "04601234567890", "quantity": 10, "serialNumberType": "OPERATOR", "templateId": 5}],
+         "factoryId": "4601234900003", "releaseMethodType": "PRODUCTION", "factoryCountry": "RU"}
+UTILISATION = {"sntins": ["0104601234567890210000000000001"], "expirationDate": "2030-12-31",
+               "seriesNumber": "001", "usageType": "VERIFIED"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "outbox.db"))
+    db.add_credentials("oms", "token", "", "", None)
+    return db
+
+
+def make_dispatcher(db, base_url):
+    client = APIClient(base_url=base_url, extension="pharma", omsid="oms", db=db, api_logger=APILog(db=db))
+    return OutboxDispatcher(client, db, base_delay=30.0)
+
+
+def closed_port_url():
+    """Адрес, по которому соединение отклоняется"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def statuses(db):
+    return {item["id"]: item["status"] for item in db.get_outbox_items()}
+
+
+def test_identical_orders_queued_separately(db):
+    first = db.enqueue_outbox_item("order", ORDER, "1")
+    second = db.enqueue_outbox_item("order", ORDER, "2")
+    assert first and second and first != second
+    assert [item["ref_id"] for item in db.get_outbox_items([OUTBOX_PENDING])] == ["1", "2"]
+
+
+def test_repeated_enqueue_is_idempotent(db):
+    item_id = db.enqueue_outbox_item("order", ORDER, "1")
+    assert db.enqueue_outbox_item("order", ORDER, "1") == item_id
+    db.update_outbox_item(item_id, OUTBOX_SENT, response={"orderId": "oms-order"})
+    # Запрос, уже принятый СУЗ, повторно не ставится
+    assert db.enqueue_outbox_item("order", ORDER, "1") == 0
+
+
+def test_dispatch_sends_due_items(db, mock_suz):
+    dispatcher = make_dispatcher(db, mock_suz.url)
+    item_id = dispatcher.enqueue("utilisation", UTILISATION)
+    sent = []
+
+    assert dispatcher.dispatch(on_sent=lambda item, response: sent.append(response["reportId"])) == {
+        "sent": 1, "failed": 0, "postponed": 0}
+    assert statuses(db) == {item_id: OUTBOX_SENT}
+    assert len(sent) == 1 and sent[0]
+    assert mock_suz.metrics()["requests"] == {"POST utilisation": 1}
+    assert dispatcher.pending_count() == 0
+
+
+def test_dispatch_rejected_item_failed(db, mock_suz):
+    dispatcher = make_dispatcher(db, mock_suz.url)
+    rejected = dispatcher.enqueue("utilisation", dict(UTILISATION, sntins=[]))
+    accepted = dispatcher.enqueue("order", ORDER, ref_id=1)
+
+    # Отклоненная запись не останавливает отправку остальных
+    assert dispatcher.dispatch() == {"sent": 1, "failed": 1, "postponed": 0}
+    assert statuses(db) == {rejected: OUTBOX_FAILED, accepted: OUTBOX_SENT}
+
+
+def test_dispatch_postponed_on_connection_error(db):
+    dispatcher = make_dispatcher(db, closed_port_url())
+    first = dispatcher.enqueue("order", ORDER, ref_id=1)
+    second = dispatcher.enqueue("order", ORDER, ref_id=2)
+
+    # После ошибки соединения остальные записи не отправляются
+    started = time.time()
+    assert dispatcher.dispatch() == {"sent": 0, "failed": 0, "postponed": 1}
+    items = {item["id"]: item for item in db.get_outbox_items()}
+    assert items[first]["status"] == items[second]["status"] == OUTBOX_PENDING
+    assert items[first]["attempts"] == 1 and items[second]["attempts"] == 0
+    assert items[first]["next_attempt_at"] >= started + 30
+    assert items[first]["last_error"]
+
+    # Отложенная запись не отправляется до наступления времени повтора
+    assert db.get_outbox_items([OUTBOX_PENDING], due_before=time.time()) == [items[second]]
@@ -0,0 +1,94 @@
+"""Тесты ограничения частоты запросов (utils.rate_limiter)"""
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from utils.rate_limiter import (DEFAULT_RETRY_AFTER, ENDPOINT_CODES, ENDPOINT_INFO, ENDPOINT_ORDERS,
+                                ENDPOINT_UTILISATION, RateLimitedSession, RateLimiter, TokenBucket,
+                                classify_url, parse_retry_after)
+
+
+def test_classify_url():
+    assert classify_url("http://suz/api/v2/pharma/codes?omsId=1") == ("pharma", ENDPOINT_CODES)
+    assert classify_url("/api/v2/milk/order/status") == ("milk", ENDPOINT_ORDERS)
+    assert classify_url("/api/v2/pharma/aggregation") == ("pharma", ENDPOINT_UTILISATION)
+    assert classify_url("/api/v2/pharma/ping") == ("pharma", ENDPOINT_INFO)
+    assert classify_url("/version") == ("", ENDPOINT_INFO)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("завтра") is None
+    moment = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(moment) <= 30
+
+
+def test_burst_then_wait():
+    bucket = TokenBucket(rate=50.0, capacity=2)
+    assert bucket.acquire() < 0.01
+    assert bucket.acquire() < 0.01
+    # Корзина пуста: следующий токен через 1/50 с
+    assert bucket.acquire() >= 0.01
+    assert bucket.metrics()["delayed"] == 1
+
+
+def test_throttle_halves_rate_and_recovers():
+    bucket = TokenBucket(rate=10.0, capacity=10, min_rate_factor=0.1, recovery_factor=0.5)
+    bucket.throttle(0.05)
+    assert bucket.rate == 5.0
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.05
+
+    for _ in range(5):
+        bucket.throttle(0)
+    assert bucket.rate == pytest.approx(1.0)
+    bucket.recover()
+    assert bucket.rate == pytest.approx(6.0)
+    bucket.recover()
+    assert bucket.rate == 10.0
+    assert bucket.metrics()["throttled"] == 6
+
+
+def test_feedback_pause():
+    limiter = RateLimiter()
+    assert limiter.feedback("/api/v2/pharma/codes", 429, {"Retry-After": "0"}) == 0.0
+    assert limiter.feedback("/api/v2/pharma/codes", 429) == DEFAULT_RETRY_AFTER
+    assert limiter.bucket("pharma", ENDPOINT_CODES).rate == 2.5
+    # Корзины других видов продукции и классов методов не затронуты
+    assert limiter.bucket("milk", ENDPOINT_CODES).rate == 10.0
+    assert limiter.bucket("pharma", ENDPOINT_ORDERS).rate == 10.0
+
+
+def test_configure_override():
+    limiter = RateLimiter()
+    limiter.configure_from_dict({"codes": [20, 20], "pharma": {"codes": [2, 2]}})
+    assert limiter.bucket("pharma", ENDPOINT_CODES).configured_rate == 2.0
+    assert limiter.bucket("milk", ENDPOINT_CODES).configured_rate == 20.0
+
+
+def test_session_retries_after_429(mock_suz):
+    mock_suz.config.throttle_rate = 1.0
+    mock_suz.config.retry_after = 0
+    # После 429 корзина пуста: при высокой скорости ожидание повтора короткое
+    limiter = RateLimiter({ENDPOINT_INFO: (100.0, 100)})
+    session = RateLimitedSession(limiter, max_retries=2)
+
+    response = session.request("GET", f"{mock_suz.url}/api/v2/pharma/ping?omsId=oms",
+                               headers={"clientToken": "token"}, timeout=10)
+    assert response.status_code == 429
+    assert mock_suz.metrics()["requests"] == {"GET ping": 3}
+    assert limiter.bucket("pharma", ENDPOINT_INFO).throttled == 3
+
+    # После снятия ограничения запрос проходит, скорость восстанавливается
+    mock_suz.config.throttle_rate = 0.0
+    bucket = limiter.bucket("pharma", ENDPOINT_INFO)
+    throttled_rate = bucket.rate
+    response = session.request("GET", f"{mock_suz.url}/api/v2/pharma/ping?omsId=oms",
+                               headers={"clientToken": "token"}, timeout=10)
+    assert response.status_code == 200
+    assert bucket.rate > throttled_rate
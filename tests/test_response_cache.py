@@ -0,0 +1,118 @@
+"""Тесты кэша ответов API (utils.response_cache)"""
+import threading
+import time
+
+import pytest
+
+from utils import response_cache
+from utils.response_cache import ResponseCache, make_key
+
+
+class Clock:
+    """Управляемые часы вместо модуля time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Server:
+    """Функция запроса с подсчетом вызовов"""
+
+    def __init__(self, status_code=200):
+        self.calls = 0
+        self.status_code = status_code
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.done.set()
+        return {"call": self.calls}, self.status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_key_ignores_parameter_order():
+    assert make_key("pharma", "oms", "orders", {"b": 1, "a": 2}) == make_key("pharma", "oms", "orders", {"a": 2, "b": "1"})
+
+
+def test_fresh_response_served_from_cache(clock):
+    cache = ResponseCache(ttls={"ping": 10})
+    server = Server()
+    key = make_key("pharma", "oms", "ping")
+
+    assert cache.get(key, server) == ({"call": 1}, 200)
+    clock.now += 9
+    assert cache.get(key, server) == ({"call": 1}, 200)
+    assert cache.get(key, server, force=True) == ({"call": 2}, 200)
+    assert server.calls == 2
+    assert cache.metrics()["hits"] == 1
+
+
+def test_expired_response_fetched_again(clock):
+    cache = ResponseCache(ttls={"ping": 10}, stale_ttls={"ping": 100})
+    server = Server()
+    key = make_key("pharma", "oms", "ping")
+    cache.get(key, server)
+
+    clock.now += 11
+    # Без allow_stale устаревший ответ не выдается
+    assert cache.get(key, server) == ({"call": 2}, 200)
+
+
+def test_stale_while_revalidate(clock):
+    cache = ResponseCache(ttls={"ping": 10}, stale_ttls={"ping": 100})
+    server = Server()
+    key = make_key("pharma", "oms", "ping")
+    cache.get(key, server)
+    server.done.clear()
+
+    clock.now += 50
+    assert cache.get(key, server, allow_stale=True) == ({"call": 1}, 200)
+    assert server.done.wait(5)
+    # Ответ сохраняется фоновым потоком после возврата из функции запроса
+    for _ in range(100):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert cache.get(key, server) == ({"call": 2}, 200)
+    assert cache.metrics()["stale_hits"] == 1 and cache.metrics()["revalidations"] == 1
+
+    # За пределами окна устаревший ответ не выдается
+    clock.now += 200
+    assert cache.get_cached(key) is None
+
+
+def test_errors_and_uncached_endpoints_not_stored(clock):
+    cache = ResponseCache(ttls={"ping": 10})
+    failing = Server(status_code=502)
+    key = make_key("pharma", "oms", "ping")
+    cache.get(key, failing)
+    cache.get(key, failing)
+    assert failing.calls == 2
+
+    server = Server()
+    other = make_key("pharma", "oms", "utilisation")
+    cache.get(other, server)
+    cache.get(other, server)
+    assert server.calls == 2
+
+
+def test_invalidate(clock):
+    cache = ResponseCache()
+    server = Server()
+    for extension in ("pharma", "milk"):
+        cache.get(make_key(extension, "oms", "orders"), server)
+        cache.get(make_key(extension, "oms", "version"), server)
+
+    assert cache.invalidate(extension="pharma", endpoint="orders") == 1
+    assert cache.get_cached(make_key("pharma", "oms", "orders")) is None
+    assert cache.get_cached(make_key("milk", "oms", "orders")) is not None
+    assert cache.clear() == 3
@@ -0,0 +1,57 @@
+"""Тесты отправки отчетов о нанесении частями (utils.utilisation_submitter)"""
+import pytest
+
+from models.api_client import APIClient
+from models.api_log import APILog
+from models.database import Database
+from models.models import CodeStatus
+from utils.utilisation_submitter import CHUNK_FAILED, CHUNK_SENT, UtilisationReportSubmitter, split_codes
+
+GTIN = "04601234567890"
+CODES = [f"01{GTIN}21{serial:013d}[GS]91EE10[GS]92tail{serial}" for serial in range(1, 7)]
+REPORT = {"sntins": [code.replace("[GS]", "\x1d") for code in CODES], "expirationDate": "2030-12-31",
+          "seriesNumber": "001", "usageType": "VERIFIED", "omsId": "oms"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "submitter.db"))
+    db.add_credentials("oms", "token", "", "", None)
+    db.save_marking_codes(CODES, GTIN, "order")
+    return db
+
+
+def test_split_codes():
+    assert split_codes(list("abcde"), 2) == [["a", "b"], ["c", "d"], ["e"]]
+    assert split_codes([], 2) == []
+
+
+def test_resume_sends_only_failed_chunks(db, mock_suz):
+    client = APIClient(base_url=mock_suz.url, extension="pharma", omsid="oms", db=db, api_logger=APILog(db=db))
+    post_utilisation = client.post_utilisation
+
+    def fail_after_first(data):
+        # После первой части СУЗ отвечает ошибкой 500
+        response = post_utilisation(data)
+        mock_suz.config.error_rate = 1.0
+        return response
+
+    client.post_utilisation = fail_after_first
+    submitter = UtilisationReportSubmitter(client, db, chunk_size=2, max_workers=1)
+    result = submitter.submit(1, REPORT)
+    assert (result["total"], result["sent"], result["failed"]) == (3, 1, 2)
+    assert [chunk["status"] for chunk in db.get_report_chunks(1)].count(CHUNK_FAILED) == 2
+
+    # Досылка после восстановления СУЗ: отправленная часть не повторяется
+    mock_suz.config.error_rate = 0.0
+    client.post_utilisation = post_utilisation
+    resumed = submitter.submit(1)
+    assert (resumed["total"], resumed["sent"], resumed["failed"]) == (3, 3, 0)
+    assert resumed["report_ids"][0] == result["report_ids"][0]
+    assert len(set(resumed["report_ids"])) == 3
+    assert all(chunk["status"] == CHUNK_SENT for chunk in db.get_report_chunks(1))
+    assert mock_suz.metrics()["requests"] == {"POST utilisation": 5}
+
+    statuses = [row["status"] for row in db.conn.execute("SELECT status FROM marking_codes ORDER BY id")]
+    assert statuses == [CodeStatus.UTILISED] * 6
+    assert db.get_files_with_unsent_report_chunks() == []
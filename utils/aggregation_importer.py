@@ -0,0 +1,173 @@
+"""
+Пакетный импорт файлов агрегации из папки или по маске.
+
+Файлы разбираются параллельно в пуле процессов, а запись в базу данных выполняет
+один писатель в вызывающем потоке (соединение sqlite3 привязано к потоку): файлы
+добавляются пачками в одной транзакции, коды каждого файла отмечаются одним запросом.
+Перед записью коды файлов проверяются на включение в ранее импортированные файлы
+(Database.find_aggregated_codes) и в файлы той же пачки; такие файлы импортируются
+с предупреждением, а их ID возвращаются отдельно (duplicate_file_ids), чтобы отчеты
+о нанесении по ним не отправлялись повторно.
+"""
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.aggregation_reader import AggregationFileContent, read_aggregation_file
+from utils.gs1 import identity
+
+logger = logging.getLogger(__name__)
+
+
+def collect_aggregation_files(source: str) -> List[str]:
+    """Получение списка файлов агрегации по пути к папке, файлу или маске
+
+    Args:
+        source (str): Папка (берутся все *.json), путь к файлу или glob-маска
+
+    Returns:
+        List[str]: Отсортированный список путей к файлам
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "*.json")
+    else:
+        pattern = source
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def _parse_file(file_path: str) -> Tuple[str, Optional[AggregationFileContent], Optional[str]]:
+    """Разбор одного файла в процессе пула; ошибки возвращаются, а не выбрасываются"""
+    try:
+        return file_path, read_aggregation_file(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+class AggregationBatchImporter:
+    """Пакетный импорт файлов агрегации с параллельным разбором и единственным писателем"""
+
+    def __init__(self, db, max_workers: Optional[int] = None, batch_size: int = 50):
+        """
+        Args:
+            db: Объект базы данных
+            max_workers: Количество процессов разбора (по умолчанию - по числу ядер)
+            batch_size: Количество файлов, записываемых в одной транзакции
+        """
+        self.db = db
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def run(self, files: List[str], comment: str = "",
+            progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict:
+        """Импорт списка файлов
+
+        Args:
+            files (List[str]): Пути к файлам агрегации
+            comment (str): Комментарий, сохраняемый для каждого файла
+            progress_callback: Функция (обработано, всего, имя файла), вызывается после каждого файла
+
+        Returns:
+            Dict: Итоги импорта - total, imported, marked_codes, file_ids (ID сохраненных файлов),
+                duplicates (список пар (файл, количество кодов, уже включенных в другие файлы)),
+                duplicate_file_ids (ID сохраненных файлов с такими кодами; входят и в file_ids)
+                и errors (список пар (файл, ошибка))
+        """
+        result = {"total": len(files), "imported": 0, "marked_codes": 0, "file_ids": [],
+                  "duplicates": [], "duplicate_file_ids": [], "errors": []}
+        if not files:
+            return result
+
+        pending: List[AggregationFileContent] = []
+        pending_names: List[str] = []
+        processed = 0
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(_parse_file, file_path) for file_path in files]
+
+            for future in as_completed(futures):
+                file_path, content, error = future.result()
+                filename = os.path.basename(file_path)
+                processed += 1
+
+                if error:
+                    logger.error(f"Ошибка при разборе файла агрегации {filename}: {error}")
+                    result["errors"].append((filename, error))
+                else:
+                    pending.append(content)
+                    pending_names.append(filename)
+                    if len(pending) >= self.batch_size:
+                        self._flush(pending, pending_names, comment, result)
+
+                if progress_callback:
+                    progress_callback(processed, len(files), filename)
+
+        self._flush(pending, pending_names, comment, result)
+
+        logger.info(
+            f"Пакетный импорт файлов агрегации завершен: импортировано {result['imported']} "
+            f"из {result['total']}, ошибок {len(result['errors'])}, "
+            f"отмечено кодов {result['marked_codes']}"
+        )
+        return result
+
+    def _flush(self, pending: List[AggregationFileContent], pending_names: List[str],
+               comment: str, result: Dict):
+        """Запись накопленной пачки файлов и отметка их кодов как использованных"""
+        if not pending:
+            return
+
+        # Коды, уже включенные в ранее импортированные файлы или в предыдущие файлы пачки
+        # (записи пачки еще не сохранены и find_aggregated_codes их не видит)
+        duplicate_flags = []
+        batch_codes = set()
+        for filename, content in zip(pending_names, pending):
+            duplicates = self.db.find_aggregated_codes(content.marking_codes)
+            keys = {identity(code) for code in content.marking_codes}
+            found = {identity(code) for code, _ in duplicates}
+            in_batch = (keys & batch_codes) - found
+            batch_codes.update(keys)
+            count = len(found) + len(in_batch)
+            duplicate_flags.append(count > 0)
+            if count:
+                example = duplicates[0] if duplicates else (next(iter(in_batch)), None)
+                where = f"в файле ID {example[1]}" if example[1] is not None else "в другом файле этой пачки"
+                logger.warning(f"Файл агрегации {filename}: {count} кодов уже включены в другие файлы "
+                               f"(например, {example[0]} {where})")
+                result["duplicates"].append((filename, count))
+
+        try:
+            file_ids = self.db.add_aggregation_files([
+                {
+                    "filename": filename,
+                    "product": content.product,
+                    "marking_codes": content.marking_codes,
+                    "level1_codes": content.level1_codes,
+                    "level2_codes": content.level2_codes,
+                    "comment": comment,
+                    "json_content": content.json_content,
+                    "json_path": content.source_path,
+                }
+                for filename, content in zip(pending_names, pending)
+            ])
+            result["imported"] += len(pending)
+            result["file_ids"].extend(file_ids)
+            result["duplicate_file_ids"].extend(
+                file_id for file_id, duplicate in zip(file_ids, duplicate_flags) if duplicate
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при записи пачки файлов агрегации: {str(e)}")
+            result["errors"].extend((filename, str(e)) for filename in pending_names)
+            pending.clear()
+            pending_names.clear()
+            return
+
+        # Коды каждого файла отмечаются одним запросом с привязкой к ID файла в журнале переходов
+        for file_id, content in zip(file_ids, pending):
+            if content.all_codes:
+                result["marked_codes"] += self.db.mark_codes_used_by_barcodes(
+                    content.all_codes, used=True, file_id=file_id
+                )
+        pending.clear()
+        pending_names.clear()
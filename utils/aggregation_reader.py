@@ -0,0 +1,249 @@
+"""
+Потоковое чтение файлов агрегации.
+
+Файл разбирается за один проход по событиям JSON-парсера (ijson, если он установлен,
+иначе обход уже разобранного документа в том же формате событий). Название продукции,
+коды маркировки и коды агрегации извлекаются и нормализуются по ходу разбора,
+без построения дерева документа и без повторной сериализации через json.dumps.
+
+С ijson файл читается из открытого файла частями, и в памяти остаются только
+извлеченные коды. Исходный текст файла в память не загружается: в результате
+сохраняется путь к файлу (source_path), и Database копирует файл в базу частями.
+"""
+import codecs
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ijson
+except ImportError:  # ijson не установлен - используем стандартный json
+    ijson = None
+
+from utils.gs1 import to_storage
+
+logger = logging.getLogger(__name__)
+
+# Поля верхнего уровня с названием продукции в порядке приоритета
+PRODUCT_FIELDS = ['NameProduct', 'nameProduct', 'productName', 'name', 'product', 'Product']
+
+# Имена полей, в которых название продукции ищется на любой глубине
+DEEP_PRODUCT_FIELDS = ['nameproduct', 'productname', 'name', 'product']
+
+# Способы поиска кодов (битовые флаги), в порядке применения:
+# элементы списка items, объекты первого уровня вложенности, объекты на любой глубине
+FOUND_IN_ITEMS = 1
+FOUND_SHALLOW = 2
+FOUND_DEEP = 4
+
+SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+
+def normalize_barcode(barcode: str) -> str:
+    """Нормализует формат штрих-кода: любое представление разделителя GS заменяется на [GS]
+
+    Args:
+        barcode (str): Исходный штрих-код
+
+    Returns:
+        str: Штрих-код в форме хранения (см. utils.gs1)
+    """
+    return to_storage(barcode)
+
+
+@dataclass
+class AggregationFileContent:
+    """Результат разбора файла агрегации"""
+    product: str = ""
+    marking_codes: List[str] = field(default_factory=list)  # уровень 0
+    level1_codes: List[str] = field(default_factory=list)   # уровень 1
+    level2_codes: List[str] = field(default_factory=list)   # уровень 2
+    all_codes: Set[str] = field(default_factory=set)        # все коды для отметки использованных
+    json_content: str = ""                                  # исходный текст (для уже загруженного документа)
+    source_path: str = ""                                   # путь к исходному файлу (текст читается при записи в базу)
+
+
+def _iter_events(obj: Any) -> Iterator[Tuple[str, Any]]:
+    """Генерирует события разбора для уже загруженного JSON-объекта (аналог ijson.basic_parse)"""
+    if isinstance(obj, dict):
+        yield 'start_map', None
+        for key, value in obj.items():
+            yield 'map_key', key
+            yield from _iter_events(value)
+        yield 'end_map', None
+    elif isinstance(obj, list):
+        yield 'start_array', None
+        for item in obj:
+            yield from _iter_events(item)
+        yield 'end_array', None
+    elif isinstance(obj, str):
+        yield 'string', obj
+    elif isinstance(obj, bool):
+        yield 'boolean', obj
+    elif obj is None:
+        yield 'null', None
+    else:
+        yield 'number', obj
+
+
+class _Frame:
+    """Состояние открытого объекта или массива при потоковом разборе"""
+    __slots__ = ('is_map', 'key', 'parent_key', 'depth', 'in_items', 'barcode', 'level')
+
+    def __init__(self, is_map: bool, parent_key: Optional[str], depth: int, in_items: bool):
+        self.is_map = is_map
+        self.key = None
+        self.parent_key = parent_key
+        self.depth = depth
+        self.in_items = in_items
+        self.barcode = None
+        self.level = None
+
+
+def parse_aggregation_events(events) -> AggregationFileContent:
+    """Извлечение продукции и кодов из потока событий JSON за один проход
+
+    Коды выбираются так же, как при разборе загруженного документа: сначала элементы
+    списка items (level по умолчанию 0), затем объекты первого уровня вложенности
+    с полями Barcode и level, затем такие объекты на любой глубине.
+
+    Args:
+        events: Итератор пар (событие, значение) в формате ijson.basic_parse
+
+    Returns:
+        AggregationFileContent: Результат разбора (без json_content)
+    """
+    stack: List[_Frame] = []
+    # Кандидаты на название продукции: поля верхнего уровня и первое найденное в глубине
+    top_product: Dict[str, str] = {}
+    deep_product = None
+    # Найденные коды: (код, уровень, флаги способов поиска)
+    entries: List[Tuple[str, Any, int]] = []
+
+    for event, value in events:
+        top = stack[-1] if stack else None
+
+        if event == 'map_key':
+            top.key = value
+        elif event in SCALAR_EVENTS:
+            if top is None or not top.is_map:
+                continue
+            key = top.key
+            if key == 'Barcode':
+                top.barcode = value
+            elif key == 'level':
+                top.level = value
+            elif isinstance(value, str) and value:
+                if top.depth == 0 and key in PRODUCT_FIELDS:
+                    top_product.setdefault(key, value)
+                if deep_product is None:
+                    key_lower = key.lower()
+                    if ('product' in key_lower and 'name' in key_lower) or key_lower in DEEP_PRODUCT_FIELDS:
+                        deep_product = value
+        elif event == 'start_map' or event == 'start_array':
+            if top is None:
+                stack.append(_Frame(event == 'start_map', None, 0, False))
+                continue
+            # Ключ, под которым лежит контейнер (для элементов массива - ключ массива)
+            parent_key = top.key if top.is_map else top.parent_key
+            in_items = (event == 'start_map' and not top.is_map
+                        and top.depth == 1 and top.parent_key == 'items')
+            stack.append(_Frame(event == 'start_map', parent_key, top.depth + 1, in_items))
+        elif event == 'end_map':
+            frame = stack.pop()
+            if not frame.barcode or not isinstance(frame.barcode, str):
+                continue
+            flags = 0
+            level = frame.level
+            if frame.in_items:
+                flags |= FOUND_IN_ITEMS
+                if level is None:
+                    level = 0
+            if frame.level is not None:
+                flags |= FOUND_DEEP
+                # Объект верхнего уровня или элемент списка верхнего уровня
+                if frame.depth == 1 or (frame.depth == 2 and stack and not stack[-1].is_map):
+                    flags |= FOUND_SHALLOW
+            if flags:
+                entries.append((normalize_barcode(frame.barcode), level, flags))
+        elif event == 'end_array':
+            stack.pop()
+
+    result = AggregationFileContent()
+
+    # Название продукции: поля верхнего уровня по приоритету, затем поиск в глубине
+    for product_field in PRODUCT_FIELDS:
+        if product_field in top_product:
+            result.product = top_product[product_field]
+            break
+    else:
+        result.product = deep_product or ""
+
+    # Применяем способы поиска по очереди до первого, давшего коды уровней 0-2
+    levels = {0: result.marking_codes, 1: result.level1_codes, 2: result.level2_codes}
+    for method in (FOUND_IN_ITEMS, FOUND_SHALLOW, FOUND_DEEP):
+        for code, level, flags in entries:
+            if flags & method:
+                result.all_codes.add(code)
+                if level in levels:
+                    levels[level].append(code)
+        if result.marking_codes or result.level1_codes or result.level2_codes:
+            break
+        result.all_codes.clear()
+    else:
+        result.all_codes.update(code for code, _, _ in entries)
+
+    return result
+
+
+def parse_aggregation_data(data: Dict) -> AggregationFileContent:
+    """Разбор уже загруженного JSON-документа файла агрегации
+
+    Args:
+        data (Dict): Данные из JSON-файла
+
+    Returns:
+        AggregationFileContent: Результат разбора (без json_content)
+    """
+    return parse_aggregation_events(_iter_events(data))
+
+
+def read_aggregation_file(file_path: str) -> AggregationFileContent:
+    """Чтение и разбор файла агрегации за один проход
+
+    Файл не загружается в память целиком (при наличии ijson); путь к нему
+    сохраняется в source_path, чтобы записать исходный текст в базу как есть.
+
+    Args:
+        file_path (str): Путь к JSON-файлу агрегации
+
+    Returns:
+        AggregationFileContent: Результат разбора
+
+    Raises:
+        ValueError: Если файл не является корректным JSON
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            # BOM в начале файла ijson не пропускает
+            if f.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+                f.seek(0)
+            if ijson is not None:
+                result = parse_aggregation_events(ijson.basic_parse(f, use_float=True))
+            else:
+                # Без ijson документ загружается целиком
+                result = parse_aggregation_events(_iter_events(json.load(f)))
+    except OSError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Ошибка при разборе JSON-файла: {str(e)}") from e
+
+    result.source_path = file_path
+
+    logger.info(
+        f"Файл агрегации {file_path} разобран: уровень 0 - {len(result.marking_codes)}, "
+        f"уровень 1 - {len(result.level1_codes)}, уровень 2 - {len(result.level2_codes)}, "
+        f"уникальных кодов - {len(result.all_codes)}"
+    )
+    return result
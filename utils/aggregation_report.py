@@ -0,0 +1,102 @@
+"""
+Формирование отчетов об агрегации из иерархии кодов в базе данных.
+
+Единицы агрегации и вложенные коды читаются одним упорядоченным запросом к таблице
+aggregation_items и группируются по единицам по ходу чтения. Емкость и количество
+кодов проверяются в том же проходе, а отчет, превышающий допустимый размер,
+делится на несколько отчетов с теми же реквизитами.
+"""
+import logging
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.gs1 import identities
+
+logger = logging.getLogger(__name__)
+
+# Ограничения размера одного отчета об агрегации
+MAX_UNITS_PER_REPORT = 1000
+MAX_CODES_PER_REPORT = 30000
+
+
+class AggregationReportBuilder:
+    """Построение отчетов об агрегации по файлу агрегации"""
+
+    def __init__(self, db, max_units_per_report: int = MAX_UNITS_PER_REPORT,
+                 max_codes_per_report: int = MAX_CODES_PER_REPORT):
+        """
+        Args:
+            db: Объект базы данных
+            max_units_per_report: Максимальное количество единиц агрегации в одном отчете
+            max_codes_per_report: Максимальное количество кодов маркировки в одном отчете
+        """
+        self.db = db
+        self.max_units_per_report = max_units_per_report
+        self.max_codes_per_report = max_codes_per_report
+
+    def build(self, file_id: int, header: Dict[str, Any], unit_codes: Optional[List[str]] = None,
+              capacities: Optional[Dict[str, int]] = None,
+              aggregation_type: str = "AGGREGATION") -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Формирование отчетов об агрегации единиц первого уровня
+
+        Args:
+            file_id (int): ID файла агрегации
+            header (Dict[str, Any]): Реквизиты отчета (participantId, productionLineId,
+                productionOrderId, omsId)
+            unit_codes (List[str], optional): Коды единиц, включаемых в отчет (по умолчанию все)
+            capacities (Dict[str, int], optional): Емкость упаковки по коду единицы
+                (по умолчанию равна количеству вложенных кодов)
+            aggregation_type (str): Тип агрегации
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[str]]: Отчеты для отправки и ошибки проверки;
+                при наличии ошибок отчеты отправлять нельзя
+        """
+        if not self.db.ensure_aggregation_items(file_id):
+            return [], [f"Файл агрегации с ID {file_id} не найден"]
+
+        selected = set(unit_codes) if unit_codes is not None else None
+        capacities = capacities or {}
+        reports: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        units: List[Dict[str, Any]] = []
+        codes_in_report = 0
+
+        for unit_code, rows in groupby(self.db.iter_aggregation_unit_items(file_id),
+                                       key=lambda row: row["unit_code"]):
+            if selected is not None and unit_code not in selected:
+                continue
+
+            # В отчет передается идентификатор кода без криптохвоста
+            sntins = identities(row["code"] for row in rows)
+            capacity = capacities.get(unit_code, len(sntins))
+            if not sntins:
+                errors.append(f"Единица агрегации {unit_code} не содержит кодов маркировки")
+                continue
+            if len(sntins) > capacity:
+                errors.append(f"Единица агрегации {unit_code}: кодов {len(sntins)} больше емкости упаковки {capacity}")
+                continue
+
+            if units and (len(units) >= self.max_units_per_report
+                          or codes_in_report + len(sntins) > self.max_codes_per_report):
+                reports.append(dict(header, aggregationUnits=units))
+                units = []
+                codes_in_report = 0
+
+            units.append({
+                "unitSerialNumber": unit_code,
+                "aggregationType": aggregation_type,
+                "aggregationUnitCapacity": capacity,
+                "aggregatedItemsCount": len(sntins),
+                "sntins": sntins
+            })
+            codes_in_report += len(sntins)
+
+        if units:
+            reports.append(dict(header, aggregationUnits=units))
+        if not reports and not errors:
+            errors.append("Не выбраны единицы агрегации для отчета")
+
+        logger.info(f"Сформировано отчетов об агрегации для файла {file_id}: {len(reports)}, "
+                    f"ошибок проверки: {len(errors)}")
+        return reports, errors
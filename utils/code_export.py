@@ -0,0 +1,96 @@
+"""
+Выгрузка кодов маркировки в файлы для принтеров.
+
+Поддерживаемые форматы:
+    gs1  - один код в строке с реальным разделителем GS (\\x1d), для печати DataMatrix
+    gs   - один код в строке с разделителем в виде текста [GS]
+    csv  - таблица с разделителем ';' и [GS] в кодах, код разбит на идентификатор (01+21) и криптохвост
+    txt  - один код в строке в том виде, в котором он хранится в базе
+
+Строки пишутся в файл порциями по мере чтения из базы данных.
+"""
+import csv
+import logging
+from typing import Dict, Iterable
+
+from utils.gs1 import split_crypto_tail, to_printer, to_storage
+
+logger = logging.getLogger(__name__)
+
+# Формы кода для принтера (разделитель \x1d) и с разделителем в виде текста [GS]
+to_gs1 = to_printer
+to_gs_text = to_storage
+
+# Описание форматов для диалогов выбора файла
+EXPORT_FORMATS: Dict[str, str] = {
+    "gs1": "GS1 для принтера (*.txt)",
+    "gs": "Коды с [GS] (*.txt)",
+    "csv": "CSV с криптохвостом (*.csv)",
+    "txt": "Текстовый файл (*.txt)",
+}
+
+
+def export_format_for_path(path: str) -> str:
+    """Формат выгрузки по расширению файла: .csv - csv, остальные - gs1"""
+    return "csv" if path.lower().endswith(".csv") else "gs1"
+
+
+def write_codes(rows: Iterable, f, export_format: str, csv_writer=None) -> None:
+    """Запись порции кодов в открытый файл в указанном формате
+
+    Args:
+        rows: Порция строк с полями id, code, gtin, order_id, created_at
+        f: Открытый на запись текстовый файл
+        export_format (str): Формат выгрузки (ключ EXPORT_FORMATS)
+        csv_writer: csv.writer для формата csv
+    """
+    if export_format == "csv":
+        for row in rows:
+            identity, tail = split_crypto_tail(row["code"])
+            # В CSV разделитель пишется текстом: символ \x1d ломает построчное чтение файла
+            csv_writer.writerow([row["id"], to_gs_text(row["code"]), identity, tail,
+                                 row["gtin"], row["order_id"], row["created_at"]])
+    elif export_format == "gs1":
+        f.writelines(to_gs1(row["code"]) + "\n" for row in rows)
+    elif export_format == "gs":
+        f.writelines(to_gs_text(row["code"]) + "\n" for row in rows)
+    else:
+        f.writelines(row["code"] + "\n" for row in rows)
+
+
+def export_codes_to_file(db, export_path: str, export_format: str = "gs1", code_ids=None,
+                         order_id=None, gtin=None, statuses=None, mark_exported: bool = True,
+                         chunk_size: int = 5000) -> int:
+    """Потоковая выгрузка кодов маркировки из базы данных в файл
+
+    Args:
+        db: Объект базы данных
+        export_path (str): Путь к файлу
+        export_format (str): Формат выгрузки (ключ EXPORT_FORMATS)
+        code_ids (list, optional): Список ID кодов
+        order_id (str, optional): Фильтр по ID заказа
+        gtin (str, optional): Фильтр по GTIN
+        statuses (list, optional): Фильтр по статусам кода
+        mark_exported (bool): Отметить выгруженные коды как экспортированные
+        chunk_size (int): Размер порции чтения из базы
+
+    Returns:
+        int: Количество выгруженных кодов
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат выгрузки: {export_format}")
+
+    with open(export_path, "w", newline="", encoding="utf-8") as f:
+        csv_writer = None
+        if export_format == "csv":
+            csv_writer = csv.writer(f, delimiter=";")
+            csv_writer.writerow(["ID", "Код", "Идентификатор", "Криптохвост", "GTIN", "Заказ", "Дата создания"])
+
+        count = db.export_marking_codes(
+            lambda rows: write_codes(rows, f, export_format, csv_writer),
+            code_ids=code_ids, order_id=order_id, gtin=gtin, statuses=statuses,
+            mark_exported=mark_exported, chunk_size=chunk_size
+        )
+
+    logger.info(f"Выгружено {count} кодов маркировки в файл {export_path} (формат {export_format})")
+    return count
@@ -0,0 +1,122 @@
+"""
+Фильтр Блума по известным кодам маркировки для быстрой проверки дубликатов.
+
+Фильтр отвечает "кода точно нет" или "код, возможно, есть" (с вероятностью ложного
+срабатывания error_rate). Пакет кодов сначала проверяется фильтром, и только
+положительные ответы проверяются точным запросом к базе данных.
+
+Ключ кода - идентификатор без криптохвоста (utils.gs1.identity), поэтому код из файла
+агрегации без криптохвоста совпадает с полным кодом из заказа. Позиции битов
+вычисляются по blake2b (хеш не зависит от процесса), и фильтр сохраняется в файл
+рядом с базой данных вместе с наибольшим учтенным ID строки таблицы: при загрузке
+добавляются только строки, появившиеся после сохранения. Удаленные из таблицы коды
+остаются в фильтре и дают только лишние точные проверки.
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_blake2b = hashlib.blake2b
+_from_bytes = int.from_bytes
+
+_MAGIC = b"ISMBLOOM"
+_HEADER = struct.Struct("<8sQQQQ")  # magic, размер в битах, число хешей, количество ключей, ID последней строки
+DEFAULT_ERROR_RATE = 0.01
+MIN_CAPACITY = 100000
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray с двойным хешированием"""
+
+    def __init__(self, capacity: int = MIN_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        """
+        Args:
+            capacity: Расчетное количество ключей
+            error_rate: Допустимая вероятность ложного срабатывания при capacity ключах
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.last_id = 0
+
+    def _hash(self, key: str):
+        """Два независимых хеша ключа для двойного хеширования (h1 + i * h2)"""
+        digest = _blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return _from_bytes(digest[:8], "little"), _from_bytes(digest[8:], "little") | 1
+
+    def add(self, key: str):
+        """Добавление ключа"""
+        bits = self.bits
+        size = self.size
+        h1, h2 = self._hash(key)
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def add_many(self, keys: Iterable[str]):
+        """Добавление набора ключей"""
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        # Проверка прекращается на первом нулевом бите: для новых ключей обычно на первом-втором хеше
+        bits = self.bits
+        size = self.size
+        h1, h2 = self._hash(key)
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def screen(self, keys: List[str]) -> List[int]:
+        """Индексы ключей, которые, возможно, уже есть в фильтре"""
+        return [index for index, key in enumerate(keys) if key in self]
+
+    @property
+    def saturated(self) -> bool:
+        """Количество ключей превысило расчетное: вероятность ложного срабатывания растет"""
+        return self.count > self.capacity
+
+    def save(self, path: str):
+        """Сохранение в файл (через временный файл, чтобы не оставить поврежденный)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.size, self.hashes, self.count, self.last_id))
+            f.write(struct.pack("<QQ", self.capacity, int(self.error_rate * 1e9)))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BloomFilter"]:
+        """Загрузка из файла; None, если файла нет или он поврежден"""
+        try:
+            with open(path, "rb") as f:
+                magic, size, hashes, count, last_id = _HEADER.unpack(f.read(_HEADER.size))
+                capacity, error_rate = struct.unpack("<QQ", f.read(16))
+                bits = bytearray(f.read())
+        except (OSError, struct.error) as e:
+            if os.path.exists(path):
+                logger.warning(f"Не удалось прочитать фильтр кодов {path}: {str(e)}")
+            return None
+        if magic != _MAGIC or len(bits) != (size + 7) // 8:
+            logger.warning(f"Файл фильтра кодов {path} поврежден и будет построен заново")
+            return None
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.error_rate = error_rate / 1e9
+        bloom.size = size
+        bloom.hashes = hashes
+        bloom.bits = bits
+        bloom.count = count
+        bloom.last_id = last_id
+        return bloom
@@ -0,0 +1,217 @@
+"""
+Компактный индекс кодов маркировки в памяти для станций сканирования.
+
+Проверка отсканированного кода (есть ли он в базе и в каком статусе) выполняется
+без обращения к базе данных. Индекс - хеш-таблица с открытой адресацией на массивах
+array: 64-битный хеш экземпляра (GTIN + серийный номер), ID кода и номер статуса.
+При заполнении не более чем наполовину это около 34 байт на код.
+
+Индекс загружается из таблицы marking_codes (CodePool.load) и подключается к базе
+данных (CodePool.attach): после этого Database.save_marking_codes, переходы статусов
+и удаление кодов обновляют его. Хеш строки в Python зависит от процесса, поэтому
+индекс не сохраняется на диск, а строится при запуске.
+"""
+import logging
+import threading
+import time
+from array import array
+from typing import Iterable, List, Optional
+
+from models.models import CodeStatus
+from utils.gs1 import parse, to_storage
+
+logger = logging.getLogger(__name__)
+
+# Номера статусов в индексе; REMOVED - удаленный код (запись остается в таблице)
+STATUSES = (CodeStatus.RECEIVED, CodeStatus.EXPORTED, CodeStatus.PRINTED,
+            CodeStatus.AGGREGATED, CodeStatus.UTILISED, CodeStatus.AGGREGATED_UTILISED)
+_STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+REMOVED = 255
+
+_EMPTY = 0
+_MIN_CAPACITY = 1024
+
+
+class CodeEntry:
+    """Результат проверки кода: ID в таблице marking_codes и статус"""
+    __slots__ = ("code_id", "status")
+
+    def __init__(self, code_id: int, status: str):
+        self.code_id = code_id
+        self.status = status
+
+    def __repr__(self) -> str:
+        return f"CodeEntry(code_id={self.code_id}, status={self.status!r})"
+
+
+def code_key(gtin: Optional[str], serial: Optional[str], code: Optional[str] = None) -> int:
+    """64-битный ключ экземпляра; для кодов без серийного номера - ключ значения кода"""
+    key = hash(f"{gtin}\x00{serial}") if serial else hash(f"\x00{code}")
+    return key if key != _EMPTY else 1
+
+
+def barcode_key(barcode: str) -> int:
+    """Ключ отсканированного штрих-кода (в любом представлении, с криптохвостом или без)"""
+    parsed = parse(barcode)
+    if parsed is None:
+        return code_key(None, None, to_storage(barcode))
+    return code_key(parsed.gtin, parsed.serial)
+
+
+class CodePool:
+    """Индекс кодов маркировки в памяти"""
+
+    def __init__(self, capacity: int = _MIN_CAPACITY):
+        """
+        Args:
+            capacity: Начальное количество ячеек (округляется до степени двойки)
+        """
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """Создание пустых массивов на capacity ячеек"""
+        size = _MIN_CAPACITY
+        while size < capacity:
+            size *= 2
+        self._mask = size - 1
+        self._keys = array('q', bytes(8 * size))
+        self._ids = array('q', bytes(8 * size))
+        self._statuses = array('B', bytes(size))
+        self._used = 0
+
+    def _find(self, key: int) -> int:
+        """Ячейка ключа или первая пустая ячейка на пути поиска (линейное пробирование)"""
+        keys = self._keys
+        mask = self._mask
+        slot = key & mask
+        while True:
+            current = keys[slot]
+            if current == key or current == _EMPTY:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _put(self, key: int, code_id: int, status_index: int):
+        """Добавление или замена записи без проверки заполнения"""
+        slot = self._find(key)
+        if self._keys[slot] == _EMPTY:
+            self._keys[slot] = key
+            self._used += 1
+        self._ids[slot] = code_id
+        self._statuses[slot] = status_index
+
+    def _grow(self):
+        """Увеличение таблицы вдвое при заполнении больше чем наполовину"""
+        if self._used * 2 < len(self._keys):
+            return
+        keys, ids, statuses = self._keys, self._ids, self._statuses
+        self._allocate(len(keys) * 2)
+        for slot, key in enumerate(keys):
+            if key != _EMPTY:
+                self._put(key, ids[slot], statuses[slot])
+
+    def add(self, code_id: int, gtin: Optional[str], serial: Optional[str], status: str = CodeStatus.RECEIVED,
+            code: Optional[str] = None):
+        """Добавление кода или обновление его записи"""
+        with self._lock:
+            self._grow()
+            self._put(code_key(gtin, serial, code), code_id, _STATUS_INDEX.get(status, 0))
+
+    def add_rows(self, rows: Iterable) -> int:
+        """Добавление строк (id, gtin, serial, code, status)
+
+        Returns:
+            int: Количество добавленных строк
+        """
+        count = 0
+        with self._lock:
+            for code_id, gtin, serial, code, status in rows:
+                self._grow()
+                self._put(code_key(gtin, serial, code), code_id, _STATUS_INDEX.get(status, 0))
+                count += 1
+        return count
+
+    def set_status(self, gtin: Optional[str], serial: Optional[str], status: str, code: Optional[str] = None):
+        """Изменение статуса кода, уже имеющегося в индексе"""
+        key = code_key(gtin, serial, code)
+        with self._lock:
+            slot = self._find(key)
+            if self._keys[slot] == key and self._statuses[slot] != REMOVED:
+                self._statuses[slot] = _STATUS_INDEX.get(status, 0)
+
+    def remove(self, gtin: Optional[str], serial: Optional[str], code: Optional[str] = None):
+        """Отметка кода удаленным (ячейка остается занятой, чтобы не разрывать цепочки поиска)"""
+        key = code_key(gtin, serial, code)
+        with self._lock:
+            slot = self._find(key)
+            if self._keys[slot] == key:
+                self._statuses[slot] = REMOVED
+
+    def lookup(self, barcode: str) -> Optional[CodeEntry]:
+        """Проверка отсканированного кода
+
+        Returns:
+            Optional[CodeEntry]: ID и статус кода или None, если кода нет в базе
+        """
+        key = barcode_key(barcode)
+        # Поиск под блокировкой: _grow заменяет массивы и маску во время добавления кодов
+        with self._lock:
+            return self._entry(key)
+
+    def lookup_many(self, barcodes: Iterable[str]) -> List[Optional[CodeEntry]]:
+        """Проверка набора отсканированных кодов"""
+        keys = [barcode_key(barcode) for barcode in barcodes]
+        with self._lock:
+            return [self._entry(key) for key in keys]
+
+    def _entry(self, key: int) -> Optional[CodeEntry]:
+        """Запись по ключу (вызывается под блокировкой)"""
+        slot = self._find(key)
+        if self._keys[slot] != key or self._statuses[slot] == REMOVED:
+            return None
+        return CodeEntry(self._ids[slot], STATUSES[self._statuses[slot]])
+
+    def __contains__(self, barcode: str) -> bool:
+        return self.lookup(barcode) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            removed = sum(1 for slot, key in enumerate(self._keys)
+                          if key != _EMPTY and self._statuses[slot] == REMOVED)
+            return self._used - removed
+
+    def memory_bytes(self) -> int:
+        """Размер массивов индекса в байтах"""
+        return sum(buffer.itemsize * len(buffer) for buffer in (self._keys, self._ids, self._statuses))
+
+    def load(self, db, batch_size: int = 50000) -> int:
+        """Загрузка всех кодов из таблицы marking_codes (прежнее содержимое индекса удаляется)
+
+        Returns:
+            int: Количество загруженных кодов
+        """
+        started = time.perf_counter()
+        cursor = db.conn.cursor()
+        total = cursor.execute("SELECT COUNT(*) FROM marking_codes").fetchone()[0]
+        with self._lock:
+            self._allocate(total * 2)
+        cursor.execute("SELECT id, gtin, serial, code, status FROM marking_codes")
+        count = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            count += self.add_rows(rows)
+        logger.info(f"Индекс кодов маркировки загружен: {count} кодов, "
+                    f"{self.memory_bytes() / 1024 / 1024:.1f} МБ, {(time.perf_counter() - started) * 1000:.0f} мс")
+        return count
+
+    def attach(self, db) -> int:
+        """Загрузка индекса и подключение его к базе данных для обновления при изменении кодов
+
+        Returns:
+            int: Количество загруженных кодов
+        """
+        count = self.load(db)
+        db.code_pool = self
+        return count
@@ -0,0 +1,160 @@
+"""
+Разбор и нормализация кодов маркировки GS1 DataMatrix.
+
+Код маркировки состоит из идентификаторов применения (AI):
+    01  GTIN (14 цифр)
+    21  серийный номер (до 20 символов, завершается разделителем GS)
+    91, 92, 93  криптохвост (ключ проверки и код проверки)
+
+Разделитель GS встречается в нескольких представлениях: управляющий символ \\x1d,
+текст [GS] (так коды хранятся в базе данных и в файлах агрегации), литерал \\u001d
+в файлах с двойным экранированием и символ ␝ (U+241D) у некоторых сканеров. Сканер
+также может добавить префикс символики (]d2) и FNC1 в начале кода.
+
+Формы кода:
+    печатная (printer)  - разделитель \\x1d, для принтера и отчетов СУЗ
+    хранения (storage)  - разделитель [GS], ключ кода в базе данных
+    идентификатор       - 01 GTIN + 21 серийный номер без криптохвоста
+
+Многосимвольные представления заменяются str.replace, односимвольные - заранее
+построенными таблицами str.translate (только если такие символы есть в коде);
+пакетные функции принимают любые итерируемые наборы кодов и возвращают списки.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+GS = '\x1d'
+GS_TEXT = '[GS]'
+GS_ESCAPED = '\\u001d'
+
+# Префиксы символики, которые сканер добавляет перед данными DataMatrix, QR и GS1-128
+SYMBOLOGY_PREFIXES = (']d2', ']Q3', ']C1')
+
+# Печатная форма: символ ␝ - разделитель, переводы строк удаляются
+_PRINTER_TABLE = str.maketrans({'␝': GS, '\r': None, '\n': None})
+
+# Форма хранения: разделитель - текст [GS], прочие управляющие символы - [код символа]
+_STORAGE_TABLE = str.maketrans({
+    code: (GS_TEXT if code == 0x1d else f'[{code}]') for code in range(32)
+})
+
+
+class GS1Code(NamedTuple):
+    """Разобранный код маркировки"""
+    gtin: str
+    serial: str
+    crypto_tail: str  # AI 91/92/93 с разделителями [GS]; пустая строка, если криптохвоста нет
+
+    @property
+    def identity(self) -> str:
+        """Идентификатор экземпляра: 01 GTIN + 21 серийный номер"""
+        return f"01{self.gtin}21{self.serial}"
+
+    @property
+    def storage(self) -> str:
+        """Код в форме хранения"""
+        return f"{self.identity}{GS_TEXT}{self.crypto_tail}" if self.crypto_tail else self.identity
+
+    @property
+    def printer(self) -> str:
+        """Код в печатной форме"""
+        return self.storage.replace(GS_TEXT, GS)
+
+
+@lru_cache(maxsize=None)
+def _code_pattern(serial_length: Optional[int]):
+    """Шаблон разбора печатной формы; длина серийного номера задается для кодов без разделителя"""
+    serial = f"[^{GS}]{{{serial_length}}}" if serial_length else f"[^{GS}]{{1,20}}"
+    separator = f"{GS}?" if serial_length else GS
+    return re.compile(f"01(\\d{{14}})21({serial})(?:{separator}(.+))?", re.DOTALL)
+
+
+def to_printer(code: str) -> str:
+    """Печатная форма кода (разделитель \\x1d) из любого представления"""
+    if '[' in code:
+        code = code.replace(GS_TEXT, GS)
+    if '\\' in code:
+        code = code.replace(GS_ESCAPED, GS)
+    # Таблица применяется только к кодам с редкими символами: посимвольная замена
+    # медленнее проверок, выполняемых в C
+    if '␝' in code or '\n' in code or '\r' in code:
+        code = code.translate(_PRINTER_TABLE)
+    if code.startswith(SYMBOLOGY_PREFIXES):
+        code = code[3:]
+    if code.startswith(GS):
+        code = code.lstrip(GS)
+    return code
+
+
+def _printer_to_storage(code: str) -> str:
+    """Форма хранения из печатной формы"""
+    if GS in code:
+        code = code.replace(GS, GS_TEXT)
+    if not code.isprintable():
+        code = code.translate(_STORAGE_TABLE)
+    return code
+
+
+def to_storage(code: str) -> str:
+    """Форма хранения кода (разделитель [GS]) из любого представления"""
+    return _printer_to_storage(to_printer(code))
+
+
+def identity(code: str) -> str:
+    """Часть кода до первого разделителя GS (01 GTIN + 21 серийный номер)"""
+    return to_printer(code).partition(GS)[0]
+
+
+def split_crypto_tail(code: str) -> Tuple[str, str]:
+    """Разделение кода на идентификатор и криптохвост (с разделителями [GS])"""
+    head, _, tail = to_printer(code).partition(GS)
+    return head, _printer_to_storage(tail)
+
+
+def parse(code: str, serial_length: Optional[int] = None) -> Optional[GS1Code]:
+    """Разбор кода на GTIN, серийный номер и криптохвост
+
+    Args:
+        code: Код в любом представлении
+        serial_length: Длина серийного номера для кодов, в которых криптохвост
+            не отделен разделителем (зависит от товарной группы)
+
+    Returns:
+        Optional[GS1Code]: Разобранный код или None, если код не начинается с 01 GTIN + 21
+    """
+    match = _code_pattern(serial_length).fullmatch(to_printer(code))
+    if match is None:
+        return None
+    gtin, serial, tail = match.groups()
+    return GS1Code(gtin, serial, _printer_to_storage(tail) if tail else "")
+
+
+def parse_codes(codes: Iterable[str], serial_length: Optional[int] = None) -> List[Optional[GS1Code]]:
+    """Пакетный разбор кодов (None для кодов, не являющихся кодами экземпляра)"""
+    fullmatch = _code_pattern(serial_length).fullmatch
+    result = []
+    append = result.append
+    for code in codes:
+        match = fullmatch(to_printer(code))
+        if match is None:
+            append(None)
+            continue
+        gtin, serial, tail = match.groups()
+        append(GS1Code(gtin, serial, _printer_to_storage(tail) if tail else ""))
+    return result
+
+
+def storage_keys(codes: Iterable[str]) -> List[str]:
+    """Пакетное приведение кодов к форме хранения"""
+    return [_printer_to_storage(to_printer(code)) for code in codes]
+
+
+def printer_forms(codes: Iterable[str]) -> List[str]:
+    """Пакетное приведение кодов к печатной форме"""
+    return list(map(to_printer, codes))
+
+
+def identities(codes: Iterable[str]) -> List[str]:
+    """Пакетное получение идентификаторов кодов (без криптохвоста)"""
+    return [to_printer(code).partition(GS)[0] for code in codes if code]
@@ -0,0 +1,127 @@
+"""
+Настройка журнала приложения.
+
+Записи передаются обработчикам через очередь (QueueHandler): запись в файл и вывод
+в консоль выполняются в отдельном потоке QueueListener и не задерживают поток,
+вызвавший логирование. Файл журнала ротируется по размеру.
+
+Операции над большим количеством кодов пишут одну итоговую запись (log_summary)
+с количеством и длительностью вместо записи на каждый код; поля итоговой записи
+передаются в extra и выводятся форматировщиком JsonFormatter как отдельные ключи.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from typing import Any, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_LOG_FILE = os.path.join("logs", "ismet.log")
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Атрибуты LogRecord, не относящиеся к полям, переданным в extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записи в одну строку JSON с полями, переданными в extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: int = logging.INFO, log_file: Optional[str] = DEFAULT_LOG_FILE,
+                  console: bool = True, stream=None, json_file: bool = False,
+                  max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT) -> None:
+    """Настройка корневого логгера: очередь записей и обработчики в отдельном потоке
+
+    Args:
+        level: Уровень журнала
+        log_file: Файл журнала с ротацией по размеру; None - без записи в файл
+        console: Выводить записи в консоль
+        stream: Поток для вывода в консоль (по умолчанию sys.stderr)
+        json_file: Писать в файл записи в формате JSON (по одной на строку)
+        max_bytes: Размер файла журнала, после которого он ротируется
+        backup_count: Количество хранимых старых файлов журнала
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler(stream or sys.stderr)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(console_handler)
+    if log_file:
+        try:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            file_handler.setFormatter(JsonFormatter() if json_file else logging.Formatter(LOG_FORMAT))
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"Не удалось открыть файл журнала {log_file}: {str(e)}", file=sys.stderr)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Остановка потока записи журнала с выводом оставшихся в очереди записей"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def log_summary(logger: logging.Logger, operation: str, count: int, started: Optional[float] = None,
+                level: int = logging.INFO, **fields: Any) -> None:
+    """Итоговая запись об операции над набором элементов
+
+    Args:
+        logger: Логгер модуля
+        operation: Название операции
+        count: Количество обработанных элементов
+        started: Время начала операции (time.perf_counter()); если указано, в запись добавляется длительность
+        level: Уровень записи
+        **fields: Дополнительные поля записи (выводятся как "ключ=значение")
+    """
+    if not logger.isEnabledFor(level):
+        return
+    extra = {"operation": operation, "count": count}
+    if started is not None:
+        extra["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    extra.update(fields)
+    details = ", ".join(f"{key}={value}" for key, value in extra.items() if key not in ("operation", "count"))
+    logger.log(level, "%s: %d шт.%s", operation, count, f" ({details})" if details else "", extra=extra)
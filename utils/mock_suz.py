@@ -0,0 +1,472 @@
+"""
+Имитация СУЗ для нагрузочного тестирования и замеров без доступа к серверу.
+
+Реализует методы, которые использует APIClient, для любого вида продукции (extension):
+    GET  /api/v2/{extension}/ping               проверка доступности
+    GET  /api/v2/{extension}/version            версия СУЗ и API
+    POST /api/v2/{extension}/orders             заказ на эмиссию
+    GET  /api/v2/{extension}/orders             список заказов
+    GET  /api/v2/{extension}/orders/status      статус заказов
+    GET  /api/v2/{extension}/codes              коды из заказа блоками (lastBlockId)
+    POST /api/v2/{extension}/utilisation        отчет о нанесении
+    POST /api/v2/{extension}/aggregation        отчет об агрегации
+    GET  /api/v2/{extension}/report/info        статус обработки отчета
+
+Задержка ответа, доля ответов с ошибкой 500, ограничение частоты с ответом 429
+и объем выдаваемых кодов задаются в MockSUZConfig и могут меняться во время работы.
+
+Запуск отдельным процессом:
+    python -m utils.mock_suz --port 8000 --latency 0.05 --error-rate 0.01 --rate-limit codes=10
+
+Фикстура pytest mock_suz подключается ключом -p utils.mock_suz или импортом в conftest.py.
+"""
+import argparse
+import json
+import logging
+import random
+import string
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from utils.rate_limiter import classify_url, split_api_path
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = "2.0.0.54"
+OMS_VERSION = "3.1.8.0"
+
+# Максимальное количество кодов в одном отчете о нанесении
+MAX_UTILISATION_CODES = 30000
+
+# Алфавит серийных номеров и криптохвостов
+SERIAL_ALPHABET = string.ascii_letters + string.digits
+
+GS = "\x1d"
+
+
+class MockSUZConfig:
+    """Параметры поведения имитации СУЗ"""
+
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, rate_limits: Optional[Dict[str, float]] = None,
+                 retry_after: float = 1.0, block_size: int = 1000, max_order_quantity: int = 150000,
+                 report_processing_time: float = 0.0, require_token: bool = True, seed: Optional[int] = None):
+        """
+        Args:
+            latency: Задержка каждого ответа в секундах
+            latency_jitter: Случайная добавка к задержке от 0 до указанного значения в секундах
+            error_rate: Доля ответов с ошибкой 500 (от 0 до 1)
+            throttle_rate: Доля ответов 429 независимо от частоты запросов (от 0 до 1)
+            rate_limits: Запросов в секунду по классу метода (orders, codes, utilisation, info),
+                при превышении возвращается 429 с заголовком Retry-After
+            retry_after: Значение заголовка Retry-After в секундах
+            block_size: Максимальное количество кодов в одном блоке ответа codes
+            max_order_quantity: Максимальное количество кодов по одному GTIN заказа
+            report_processing_time: Время, через которое отчет переходит из PENDING в SENT, в секундах
+            require_token: Отклонять запросы без заголовка clientToken (401)
+            seed: Начальное значение генератора случайных чисел (для воспроизводимых замеров)
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limits = dict(rate_limits or {})
+        self.retry_after = retry_after
+        self.block_size = block_size
+        self.max_order_quantity = max_order_quantity
+        self.report_processing_time = report_processing_time
+        self.require_token = require_token
+        self.seed = seed
+
+
+class MockSUZState:
+    """Заказы, выданные блоки кодов, отчеты и счетчики запросов имитации СУЗ"""
+
+    def __init__(self, config: MockSUZConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.reports: Dict[str, Dict[str, Any]] = {}
+        self.windows: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self.requests: Dict[str, int] = {}
+        self.responses: Dict[int, int] = {}
+        self.codes_issued = 0
+
+    def count(self, endpoint: str, status_code: int):
+        """Учет запроса в счетчиках"""
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.responses[status_code] = self.responses.get(status_code, 0) + 1
+
+    def chance(self, rate: float) -> bool:
+        """Случайное событие с вероятностью rate
+
+        Генератор общий для потоков сервера, поэтому обращения к нему выполняются
+        под блокировкой: иначе последовательность при заданном seed не воспроизводится.
+        """
+        with self.lock:
+            return self.random.random() < rate
+
+    def jitter(self, limit: float) -> float:
+        """Случайная добавка к задержке ответа от 0 до limit"""
+        with self.lock:
+            return self.random.uniform(0, limit)
+
+    def new_id(self) -> str:
+        """Случайный UUID заказа, блока или отчета (вызывается под блокировкой)"""
+        return str(uuid.UUID(int=self.random.getrandbits(128)))
+
+    def is_throttled(self, extension: str, endpoint_class: str) -> bool:
+        """Превышен ли лимит запросов в секунду для класса метода"""
+        limit = self.config.rate_limits.get(endpoint_class)
+        if self.config.throttle_rate and self.chance(self.config.throttle_rate):
+            return True
+        if not limit:
+            return False
+        second = int(time.monotonic())
+        key = (extension, endpoint_class)
+        with self.lock:
+            window, used = self.windows.get(key, (second, 0))
+            if window != second:
+                window, used = second, 0
+            if used >= limit:
+                return True
+            self.windows[key] = (window, used + 1)
+        return False
+
+    def generate_code(self, gtin: str) -> str:
+        """Код маркировки: 01 GTIN, 21 серийный номер, 91 ключ проверки, 92 криптохвост
+        (вызывается под блокировкой)"""
+        serial = "".join(self.random.choices(SERIAL_ALPHABET, k=13))
+        tail = "".join(self.random.choices(SERIAL_ALPHABET, k=44))
+        return f"01{gtin}21{serial}{GS}91EE10{GS}92{tail}"
+
+    def create_order(self, omsid: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Регистрация заказа на эмиссию"""
+        buffers = {}
+        for product in data.get("products", []):
+            gtin = str(product.get("gtin", ""))
+            buffers[gtin] = {
+                "total": min(int(product.get("quantity", 0)), self.config.max_order_quantity),
+                "issued": 0,
+                "blocks": [],
+            }
+        with self.lock:
+            order_id = self.new_id()
+            self.orders[order_id] = {"omsId": omsid, "buffers": buffers, "created_at": time.time()}
+        return {"omsId": omsid, "orderId": order_id,
+                "expectedCompleteTimestamp": int((time.time() + 1) * 1000)}
+
+    def order_infos(self) -> List[Dict[str, Any]]:
+        """Состояние заказов и буферов кодов"""
+        with self.lock:
+            return [
+                {
+                    "orderId": order_id,
+                    "orderStatus": "ACTIVE",
+                    "createdTimestamp": int(order["created_at"] * 1000),
+                    "buffers": [
+                        {
+                            "orderId": order_id,
+                            "gtin": gtin,
+                            "bufferStatus": "ACTIVE" if buffer["issued"] < buffer["total"] else "EXHAUSTED",
+                            "totalCodes": buffer["total"],
+                            "leftInBuffer": buffer["total"] - buffer["issued"],
+                            "unavailableCodes": 0,
+                            "poolsExhausted": buffer["issued"] >= buffer["total"],
+                            "omsId": order["omsId"],
+                        }
+                        for gtin, buffer in order["buffers"].items()
+                    ],
+                }
+                for order_id, order in self.orders.items()
+            ]
+
+    def get_codes(self, order_id: str, gtin: str, quantity: int,
+                  last_block_id: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """Выдача блока кодов из заказа
+
+        Новый блок выдается без lastBlockId или с идентификатором последнего выданного блока.
+        Идентификатор более раннего блока означает, что клиент не получил следующий блок,
+        и этот следующий блок выдается повторно.
+        """
+        with self.lock:
+            order = self.orders.get(order_id)
+            buffer = order["buffers"].get(gtin) if order else None
+            if buffer is None:
+                return 404, {"globalErrors": [f"Заказ {order_id} с GTIN {gtin} не найден"]}
+
+            blocks = buffer["blocks"]
+            block_ids = [block["blockId"] for block in blocks]
+            if last_block_id and last_block_id != "0" and last_block_id in block_ids[:-1]:
+                block = blocks[block_ids.index(last_block_id) + 1]
+                return 200, {"omsId": order["omsId"], "codes": block["codes"], "blockId": block["blockId"]}
+            if last_block_id and last_block_id != "0" and last_block_id not in block_ids:
+                return 400, {"globalErrors": [f"Блок {last_block_id} не найден"]}
+
+            available = buffer["total"] - buffer["issued"]
+            if available <= 0:
+                return 400, {"globalErrors": ["Коды заказа выданы полностью"]}
+            count = min(quantity, available, self.config.block_size)
+            buffer["issued"] += count
+            self.codes_issued += count
+            omsid = order["omsId"]
+            # Генерация кодов выполняется под блокировкой, чтобы генератор оставался воспроизводимым
+            codes = [self.generate_code(gtin) for _ in range(count)]
+            block = {"blockId": self.new_id(), "codes": codes}
+            blocks.append(block)
+        return 200, {"omsId": omsid, "codes": codes, "blockId": block["blockId"]}
+
+    def add_report(self, omsid: str, kind: str, size: int) -> Dict[str, Any]:
+        """Регистрация отчета о нанесении или об агрегации"""
+        with self.lock:
+            report_id = self.new_id()
+            self.reports[report_id] = {"omsId": omsid, "kind": kind, "size": size, "created_at": time.monotonic()}
+        return {"omsId": omsid, "reportId": report_id}
+
+    def report_info(self, report_id: str) -> Tuple[int, Dict[str, Any]]:
+        """Статус обработки отчета"""
+        with self.lock:
+            report = self.reports.get(report_id)
+        if report is None:
+            return 404, {"globalErrors": [f"Отчет {report_id} не найден"]}
+        processed = time.monotonic() - report["created_at"] >= self.config.report_processing_time
+        return 200, {"omsId": report["omsId"], "reportId": report_id,
+                     "reportStatus": "SENT" if processed else "PENDING"}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Счетчики запросов по методам и ответов по кодам"""
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "responses": dict(self.responses),
+                "orders": len(self.orders),
+                "reports": len(self.reports),
+                "codes_issued": self.codes_issued,
+            }
+
+
+class MockSUZHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов имитации СУЗ"""
+
+    server_version = "MockSUZ/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def read_body(self) -> Any:
+        """Тело запроса в формате JSON"""
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def send_json(self, status_code: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        """Отправка ответа в формате JSON"""
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_api(self, method: str):
+        """Разбор запроса, имитация задержки, ошибок и ограничения частоты"""
+        state: MockSUZState = self.server.state
+        config = state.config
+        extension, endpoint = split_api_path(self.path)
+        _, endpoint_class = classify_url(self.path)
+        params = {name: values[0] for name, values in parse_qs(urlsplit(self.path).query).items()}
+        body = self.read_body() if method == "POST" else {}
+
+        if config.latency or config.latency_jitter:
+            time.sleep(config.latency + state.jitter(config.latency_jitter))
+
+        if not extension:
+            status_code, data, headers = 404, {"globalErrors": [f"Неизвестный метод: {self.path}"]}, None
+        elif config.require_token and not self.headers.get("clientToken"):
+            status_code, data, headers = 401, {"globalErrors": ["Отсутствует clientToken"]}, None
+        elif state.is_throttled(extension, endpoint_class):
+            status_code, data = 429, {"globalErrors": ["Превышено допустимое количество запросов"]}
+            headers = {"Retry-After": f"{config.retry_after:g}"}
+        elif config.error_rate and state.chance(config.error_rate):
+            status_code, data, headers = 500, {"globalErrors": ["Внутренняя ошибка СУЗ (имитация)"]}, None
+        else:
+            status_code, data = self.dispatch(method, endpoint, params, body)
+            headers = None
+
+        state.count(f"{method} {endpoint}", status_code)
+        self.send_json(status_code, data, headers)
+
+    def dispatch(self, method: str, endpoint: str, params: Dict[str, str],
+                 body: Any) -> Tuple[int, Dict[str, Any]]:
+        """Ответ метода API"""
+        state: MockSUZState = self.server.state
+        omsid = params.get("omsId", "")
+
+        if method == "GET" and endpoint == "ping":
+            return 200, {"omsId": omsid, "apiVersion": API_VERSION, "omsVersion": OMS_VERSION}
+        if method == "GET" and endpoint == "version":
+            return 200, {"apiVersion": API_VERSION, "omsVersion": OMS_VERSION}
+        if method == "POST" and endpoint == "orders":
+            if not body.get("products"):
+                return 400, {"fieldErrors": [{"fieldName": "products", "fieldError": "Не указаны товары"}]}
+            return 200, state.create_order(omsid, body)
+        if method == "GET" and endpoint in ("orders", "orders/status"):
+            return 200, {"omsId": omsid, "orderInfos": state.order_infos()}
+        if method == "GET" and endpoint == "codes":
+            try:
+                quantity = int(params.get("quantity", "0"))
+            except ValueError:
+                quantity = 0
+            if quantity <= 0:
+                return 400, {"fieldErrors": [{"fieldName": "quantity", "fieldError": "Неверное количество"}]}
+            return state.get_codes(params.get("orderId", ""), params.get("gtin", ""), quantity,
+                                   params.get("lastBlockId"))
+        if method == "POST" and endpoint == "utilisation":
+            sntins = body.get("sntins", [])
+            if not sntins:
+                return 400, {"fieldErrors": [{"fieldName": "sntins", "fieldError": "Не указаны коды"}]}
+            if len(sntins) > MAX_UTILISATION_CODES:
+                return 400, {"fieldErrors": [{"fieldName": "sntins",
+                                              "fieldError": f"Не более {MAX_UTILISATION_CODES} кодов"}]}
+            return 200, state.add_report(omsid, "utilisation", len(sntins))
+        if method == "POST" and endpoint == "aggregation":
+            units = body.get("aggregationUnits", [])
+            if not units:
+                return 400, {"fieldErrors": [{"fieldName": "aggregationUnits",
+                                              "fieldError": "Не указаны единицы агрегации"}]}
+            return 200, state.add_report(omsid, "aggregation", len(units))
+        if method == "GET" and endpoint == "report/info":
+            return state.report_info(params.get("reportId", ""))
+        return 404, {"globalErrors": [f"Неизвестный метод: {method} {endpoint}"]}
+
+
+class MockSUZServer:
+    """HTTP-сервер имитации СУЗ в фоновом потоке"""
+
+    def __init__(self, config: Optional[MockSUZConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            config: Параметры поведения (по умолчанию без задержек и ошибок)
+            host: Адрес сервера
+            port: Порт сервера (0 - любой свободный)
+        """
+        self.config = config or MockSUZConfig()
+        self.state = MockSUZState(self.config)
+        self.httpd = ThreadingHTTPServer((host, port), MockSUZHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера для APIClient.base_url"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockSUZServer":
+        """Запуск сервера в фоновом потоке"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-suz", daemon=True)
+        self.thread.start()
+        logger.info(f"Имитация СУЗ запущена: {self.url}")
+        return self
+
+    def stop(self):
+        """Остановка сервера"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+        logger.info("Имитация СУЗ остановлена")
+
+    def reset(self):
+        """Сброс заказов, отчетов и счетчиков"""
+        self.state = MockSUZState(self.config)
+        self.httpd.state = self.state
+
+    def metrics(self) -> Dict[str, Any]:
+        """Счетчики запросов по методам и ответов по кодам"""
+        return self.state.metrics()
+
+    def __enter__(self) -> "MockSUZServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+try:
+    import pytest
+except ImportError:
+    # pytest нужен только для фикстуры
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture
+    def mock_suz():
+        """Фикстура pytest: запущенная имитация СУЗ; параметры меняются через mock_suz.config"""
+        with MockSUZServer() as server:
+            yield server
+
+
+def parse_rate_limits(values: List[str]) -> Dict[str, float]:
+    """Лимиты вида класс=запросов_в_секунду из аргументов командной строки"""
+    limits = {}
+    for value in values or []:
+        endpoint_class, _, rate = value.partition("=")
+        limits[endpoint_class.strip()] = float(rate)
+    return limits
+
+
+def main():
+    """Точка входа в скрипт"""
+    parser = argparse.ArgumentParser(description="Имитация СУЗ для нагрузочного тестирования")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес сервера")
+    parser.add_argument("--port", type=int, default=8000, help="Порт сервера")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500 (0..1)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429 (0..1)")
+    parser.add_argument("--rate-limit", action="append", default=[],
+                        help="Лимит класса методов, например codes=10 (можно указать несколько раз)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Заголовок Retry-After в секундах")
+    parser.add_argument("--block-size", type=int, default=1000, help="Кодов в одном блоке ответа codes")
+    parser.add_argument("--report-time", type=float, default=0.0,
+                        help="Время обработки отчета (PENDING -> SENT) в секундах")
+    parser.add_argument("--no-token", action="store_true", help="Не требовать заголовок clientToken")
+    parser.add_argument("--seed", type=int, default=None, help="Начальное значение генератора случайных чисел")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = MockSUZConfig(
+        latency=args.latency, latency_jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, rate_limits=parse_rate_limits(args.rate_limit),
+        retry_after=args.retry_after, block_size=args.block_size,
+        report_processing_time=args.report_time, require_token=not args.no_token, seed=args.seed
+    )
+    server = MockSUZServer(config, args.host, args.port).start()
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Счетчики имитации СУЗ: {server.metrics()}")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
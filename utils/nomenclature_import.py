@@ -0,0 +1,153 @@
+"""
+Чтение справочника номенклатуры из файлов CSV, XLSX и JSON для пакетного импорта.
+
+Колонки определяются по заголовку (name/наименование, gtin, product_group/товарная
+группа); если заголовка нет, колонки берутся по порядку: название, GTIN, товарная
+группа. GTIN приводится к 14 цифрам (как в коде маркировки после AI 01), строки без
+названия или с неверным GTIN пропускаются и возвращаются в списке ошибок.
+
+Для XLSX нужен пакет openpyxl; он не входит в обязательные зависимости, без него
+файл можно сохранить в CSV.
+"""
+import csv
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Варианты заголовков колонок (в нижнем регистре)
+COLUMN_ALIASES = {
+    "name": ("name", "наименование", "название", "товар", "продукция"),
+    "gtin": ("gtin", "гтин", "код товара"),
+    "product_group": ("product_group", "productgroup", "товарная группа", "группа", "описание", "description"),
+}
+COLUMNS = ("name", "gtin", "product_group")
+FILE_FILTER = "Номенклатура (*.csv *.xlsx *.json);;CSV (*.csv);;Excel (*.xlsx);;JSON (*.json)"
+
+
+class NomenclatureItem(NamedTuple):
+    """Строка справочника для импорта"""
+    name: str
+    gtin: str
+    product_group: str
+
+
+def normalize_gtin(value) -> Optional[str]:
+    """GTIN из 8, 12, 13 или 14 цифр, дополненный нулями до 14; None - если значение не GTIN"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Excel хранит GTIN без кавычек как число
+        value = int(value)
+    gtin = str(value).strip()
+    if not gtin.isdigit() or len(gtin) not in (8, 12, 13, 14):
+        return None
+    return gtin.zfill(14)
+
+
+def _column_map(header: Sequence) -> Optional[Dict[str, int]]:
+    """Номера колонок по заголовку; None, если в строке нет заголовка GTIN"""
+    labels = [str(cell).strip().lower() if cell is not None else "" for cell in header]
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for index, label in enumerate(labels):
+            if label in aliases:
+                columns[column] = index
+                break
+    return columns if "gtin" in columns else None
+
+
+def parse_rows(rows: Iterable[Sequence]) -> Tuple[List[NomenclatureItem], List[Tuple[int, str]]]:
+    """Разбор строк таблицы (первая строка - заголовок, если в ней есть колонка GTIN)
+
+    Returns:
+        Tuple: Строки справочника и ошибки - пары (номер строки, описание)
+    """
+    items = []
+    errors = []
+    columns = None
+    for number, row in enumerate(rows, start=1):
+        if not row or all(cell in (None, "") for cell in row):
+            continue
+        if number == 1:
+            columns = _column_map(row)
+            if columns is not None:
+                continue
+        if columns is None:
+            columns = {column: index for index, column in enumerate(COLUMNS)}
+
+        def cell(column):
+            index = columns.get(column)
+            value = row[index] if index is not None and index < len(row) else None
+            return "" if value is None else str(value).strip()
+
+        name = cell("name")
+        gtin = normalize_gtin(row[columns["gtin"]] if columns["gtin"] < len(row) else None)
+        if not name:
+            errors.append((number, "не указано название"))
+        elif gtin is None:
+            errors.append((number, f"неверный GTIN: {cell('gtin')}"))
+        else:
+            items.append(NomenclatureItem(name, gtin, cell("product_group")))
+    return items, errors
+
+
+def _read_csv(file_path: str) -> List[List[str]]:
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        return list(csv.reader(f, dialect))
+
+
+def _read_xlsx(file_path: str) -> List[tuple]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Для импорта XLSX требуется пакет openpyxl (pip install openpyxl); "
+                         "можно сохранить файл в формате CSV")
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return list(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _read_json(file_path: str) -> List[list]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("items") or data.get("nomenclature") or []
+    if not isinstance(data, list):
+        raise ValueError("JSON должен содержать список объектов номенклатуры")
+    rows = [list(COLUMNS)]
+    for entry in data:
+        if isinstance(entry, dict):
+            entry = {str(key).strip().lower(): value for key, value in entry.items()}
+            rows.append([
+                next((entry[alias] for alias in COLUMN_ALIASES[column] if alias in entry), None)
+                for column in COLUMNS
+            ])
+        else:
+            rows.append(list(entry))
+    return rows
+
+
+def read_nomenclature_file(file_path: str) -> Tuple[List[NomenclatureItem], List[Tuple[int, str]]]:
+    """Чтение файла номенклатуры по расширению (.csv, .xlsx, .json)
+
+    Returns:
+        Tuple: Строки справочника и ошибки - пары (номер строки, описание)
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv" or extension == ".txt":
+        rows = _read_csv(file_path)
+    elif extension in (".xlsx", ".xlsm"):
+        rows = _read_xlsx(file_path)
+    elif extension == ".json":
+        rows = _read_json(file_path)
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла номенклатуры: {extension}")
+    return parse_rows(rows)
@@ -0,0 +1,174 @@
+"""
+Очередь отправки запросов к СУЗ.
+
+Заказы на эмиссию, отчеты о нанесении и об агрегации, не отправленные из-за ошибки
+соединения, сохраняются в таблицу api_outbox с ключом идемпотентности и повторяются
+с нарастающей задержкой, когда СУЗ снова доступна. Ошибки проверки данных не
+повторяются: запись получает статус FAILED и ждет решения оператора.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from models.models import CodeStatus, ReportStatus
+from utils.utilisation_submitter import response_error
+
+logger = logging.getLogger(__name__)
+
+# Статусы записей очереди
+OUTBOX_PENDING = "PENDING"
+OUTBOX_SENT = "SENT"
+OUTBOX_FAILED = "FAILED"
+
+# Типы запросов с описанием для интерфейса
+OUTBOX_KINDS = {
+    "order": "Заказ на эмиссию",
+    "utilisation": "Отчет о нанесении",
+    "aggregation": "Отчет об агрегации",
+}
+
+
+def is_connection_error(response: Any) -> bool:
+    """Признак ответа, полученного при ошибке соединения (запрос можно повторить)"""
+    return isinstance(response, dict) and bool(response.get('connection_error'))
+
+
+def is_accepted(kind: str, response: Any) -> bool:
+    """Признак успешного приема запроса СУЗ"""
+    if not isinstance(response, dict):
+        return False
+    if kind == "order":
+        return bool(response.get('success') or response.get('orderId'))
+    return bool(response.get('success') and response.get('reportId'))
+
+
+def apply_sent_result(db, item: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """Запись в базу данных результата запроса, принятого СУЗ при отправке из очереди
+
+    Args:
+        db: Объект базы данных
+        item (Dict[str, Any]): Запись очереди отправки
+        response (Dict[str, Any]): Ответ API
+    """
+    kind = item["kind"]
+    ref_id = item.get("ref_id")
+    if kind == "order":
+        if ref_id:
+            db.update_order(int(ref_id), str(response.get("orderId", "Не указан")), "Принят")
+        logger.info(f"Заказ на эмиссию из очереди принят СУЗ, ID заказа: {response.get('orderId')}")
+    elif kind == "utilisation":
+        report_id = response["reportId"]
+        db.transition_codes_by_barcodes(
+            item["payload"].get("sntins", []), CodeStatus.UTILISED, "utilisation_report", report_id
+        )
+        if ref_id:
+            db.update_aggregation_file_report_id(int(ref_id), report_id)
+    elif kind == "aggregation" and ref_id:
+        db.update_aggregation_file_aggregation_report_id(int(ref_id), response["reportId"])
+        db.update_aggregation_file_aggregation_status(int(ref_id), ReportStatus.SENT)
+
+
+class OutboxDispatcher:
+    """Постановка запросов в очередь отправки и их повторная отправка"""
+
+    def __init__(self, api_client, db, base_delay: float = 30.0, max_delay: float = 1800.0,
+                 batch_size: int = 20):
+        """
+        Args:
+            api_client: API-клиент СУЗ
+            db: Объект базы данных
+            base_delay: Задержка перед второй попыткой в секундах (далее удваивается)
+            max_delay: Максимальная задержка между попытками в секундах
+            batch_size: Максимальное количество записей, отправляемых за один проход
+        """
+        self.api_client = api_client
+        self.db = db
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], ref_id: Optional[Any] = None) -> int:
+        """Постановка запроса в очередь
+
+        Args:
+            kind (str): Тип запроса (ключ OUTBOX_KINDS)
+            payload (Dict[str, Any]): Данные запроса в том виде, в котором они передаются в APIClient
+            ref_id: Идентификатор связанного объекта (ID заказа или файла агрегации)
+
+        Returns:
+            int: ID записи очереди; 0 при ошибке или если такой запрос уже отправлен
+        """
+        if kind not in OUTBOX_KINDS:
+            raise ValueError(f"Неизвестный тип запроса для очереди отправки: {kind}")
+        return self.db.enqueue_outbox_item(kind, payload, str(ref_id) if ref_id is not None else None)
+
+    def pending_count(self) -> int:
+        """Количество записей, ожидающих отправки"""
+        return self.db.get_outbox_counts().get(OUTBOX_PENDING, 0)
+
+    def next_delay(self, attempts: int) -> float:
+        """Задержка перед следующей попыткой после указанного числа неудачных попыток"""
+        return min(self.base_delay * (2 ** attempts), self.max_delay)
+
+    def dispatch(self, on_sent: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None) -> Dict[str, int]:
+        """Отправка записей очереди, время повтора которых наступило
+
+        При ошибке соединения отправка прекращается до следующего прохода: остальные
+        записи не отправятся, пока СУЗ недоступна.
+
+        Args:
+            on_sent: Функция (запись, ответ API), вызывается после успешной отправки записи
+
+        Returns:
+            Dict[str, int]: Количество отправленных (sent), отклоненных (failed)
+                и отложенных (postponed) записей
+        """
+        result = {"sent": 0, "failed": 0, "postponed": 0}
+        items = self.db.get_outbox_items([OUTBOX_PENDING], due_before=time.time(), limit=self.batch_size)
+
+        for item in items:
+            try:
+                response = self._send(item)
+            except requests.RequestException as e:
+                response = {"success": False, "error": str(e), "connection_error": True}
+            except Exception as e:
+                response = {"success": False, "error": str(e)}
+
+            if is_accepted(item["kind"], response):
+                self.db.update_outbox_item(item["id"], OUTBOX_SENT, response=response)
+                result["sent"] += 1
+                logger.info(f"Запрос {item['kind']} из очереди отправки (ID {item['id']}) принят СУЗ")
+                if on_sent:
+                    on_sent(item, response)
+            elif is_connection_error(response):
+                delay = self.next_delay(item["attempts"])
+                self.db.update_outbox_item(item["id"], OUTBOX_PENDING, error=response.get('error'),
+                                           next_attempt_at=time.time() + delay)
+                result["postponed"] += 1
+                logger.warning(f"СУЗ недоступна, повтор отправки очереди через {delay:.0f} с")
+                break
+            else:
+                self.db.update_outbox_item(item["id"], OUTBOX_FAILED, error=response_error(response),
+                                           response=response)
+                result["failed"] += 1
+                logger.error(f"Запрос {item['kind']} из очереди отправки (ID {item['id']}) отклонен: "
+                             f"{response_error(response)}")
+
+        if items:
+            logger.info(f"Обработка очереди отправки: отправлено {result['sent']}, "
+                        f"отклонено {result['failed']}, отложено {result['postponed']}")
+        return result
+
+    def _send(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Отправка одной записи очереди через соответствующий метод APIClient"""
+        kind = item["kind"]
+        payload = item["payload"]
+        if kind == "order":
+            return self.api_client.create_order(payload)
+        if kind == "utilisation":
+            return self.api_client.post_utilisation(payload)
+        if kind == "aggregation":
+            return self.api_client.post_aggregation(payload)
+        raise ValueError(f"Неизвестный тип запроса для очереди отправки: {kind}")
@@ -0,0 +1,224 @@
+"""
+Замер времени операций и профилирование отдельной операции по запросу.
+
+Точки входа APIClient, Database и MainController помечены декоратором timed:
+время каждого вызова учитывается в сводке по операциям, а вызовы дольше порога
+попадают в список медленных операций и в лог. Вызов, запрошенный для профилирования,
+выполняется под cProfile (или pyinstrument, если он установлен и выбран); результат
+сохраняется в папку profiles, после чего профилирование отключается.
+
+Настройки (Database.set_setting):
+    perf_tracing            "1" - замерять операции (по умолчанию), "0" - не замерять
+    perf_slow_ms            порог медленной операции в миллисекундах
+    perf_profile_operation  операция, следующий вызов которой профилируется
+    perf_profiler           cprofile или pyinstrument
+"""
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 500
+DEFAULT_PROFILE_DIR = "profiles"
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class PerformanceMonitor:
+    """Сводка времени операций, список медленных вызовов и профилирование по запросу"""
+
+    def __init__(self, slow_threshold_ms: float = DEFAULT_SLOW_MS, max_slow: int = 200,
+                 profile_dir: str = DEFAULT_PROFILE_DIR):
+        """
+        Args:
+            slow_threshold_ms: Порог медленной операции в миллисекундах
+            max_slow: Количество хранимых медленных вызовов
+            profile_dir: Папка для результатов профилирования
+        """
+        self.enabled = True
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.profile_dir = profile_dir
+        self.profile_operation = ""
+        self.profiler = "cprofile"
+        self.operations: set = set()
+        self.slow = deque(maxlen=max_slow)
+        self.profiles = deque(maxlen=20)
+        self._stats: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._profiling = False
+        self._db = None
+
+    def configure(self, enabled: Optional[bool] = None, slow_threshold_ms: Optional[float] = None,
+                  profile_operation: Optional[str] = None, profiler: Optional[str] = None):
+        """Изменение параметров; не указанные параметры не меняются"""
+        if enabled is not None:
+            self.enabled = enabled
+        if slow_threshold_ms is not None:
+            self.slow_threshold = max(0.0, float(slow_threshold_ms)) / 1000
+        if profile_operation is not None:
+            self.profile_operation = profile_operation
+        if profiler is not None:
+            self.profiler = profiler if profiler in PROFILERS else "cprofile"
+
+    def load_settings(self, db) -> None:
+        """Загрузка параметров из настроек приложения"""
+        self._db = db
+        try:
+            self.configure(
+                enabled=db.get_setting("perf_tracing", "1") != "0",
+                slow_threshold_ms=float(db.get_setting("perf_slow_ms", str(DEFAULT_SLOW_MS)) or DEFAULT_SLOW_MS),
+                profile_operation=db.get_setting("perf_profile_operation", ""),
+                profiler=db.get_setting("perf_profiler", "cprofile"),
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке настроек замера производительности: {str(e)}")
+
+    @contextmanager
+    def measure(self, name: str):
+        """Замер времени блока кода (и профилирование, если запрошено для этой операции)"""
+        if self.profile_operation == name and not self._profiling:
+            with self._profile(name):
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    self.record(name, time.perf_counter() - started)
+            return
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, duration: float):
+        """Учет вызова операции"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+            if duration < self.slow_threshold:
+                return
+            self.slow.append({
+                "name": name,
+                "duration": duration,
+                "finished_at": time.time(),
+                "thread": threading.current_thread().name,
+            })
+        logger.warning(f"Медленная операция {name}: {duration * 1000:.0f} мс")
+
+    @contextmanager
+    def _profile(self, name: str):
+        """Профилирование одного вызова и сохранение результата"""
+        self._profiling = True
+        self.profile_operation = ""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base_path = os.path.join(self.profile_dir, f"{name.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+        profiler = None
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                profiler = Profiler()
+            except ImportError:
+                logger.warning("pyinstrument не установлен, используется cProfile")
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    path = f"{base_path}.html"
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(profiler.output_html())
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    path = f"{base_path}.prof"
+                    profiler.dump_stats(path)
+                    summary = io.StringIO()
+                    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+                    with open(f"{base_path}.txt", "w", encoding="utf-8") as f:
+                        f.write(summary.getvalue())
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.profiles.append({"name": name, "path": path, "duration": duration, "finished_at": time.time()})
+            logger.info(f"Профиль операции {name} ({duration * 1000:.0f} мс) сохранен в {path}")
+        finally:
+            self._profiling = False
+            # Профилирование разовое: сбрасываем запрос и в настройках
+            if self._db is not None:
+                try:
+                    self._db.set_setting("perf_profile_operation", "")
+                except Exception as e:
+                    logger.error(f"Ошибка при сбросе настройки профилирования: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сводка по операциям, медленные вызовы (новые первыми) и сохраненные профили"""
+        with self._lock:
+            stats = [
+                {"name": name, "count": count, "total": total, "avg": total / count, "max": maximum}
+                for name, (count, total, maximum) in self._stats.items()
+            ]
+            slow = list(reversed(self.slow))
+            profiles = list(reversed(self.profiles))
+        stats.sort(key=lambda item: item["total"], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "profile_operation": self.profile_operation,
+            "profiler": self.profiler,
+            "stats": stats,
+            "slow": slow,
+            "profiles": profiles,
+        }
+
+    def reset(self):
+        """Сброс сводки и списка медленных вызовов"""
+        with self._lock:
+            self._stats.clear()
+            self.slow.clear()
+
+
+# Монитор, общий для всего приложения
+monitor = PerformanceMonitor()
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Декоратор замера времени вызова функции
+
+    Args:
+        name: Имя операции (по умолчанию Класс.метод)
+    """
+    def decorator(func):
+        operation = name or func.__qualname__
+        monitor.operations.add(operation)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not monitor.enabled and monitor.profile_operation != operation:
+                return func(*args, **kwargs)
+            with monitor.measure(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
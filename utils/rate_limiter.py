@@ -0,0 +1,349 @@
+"""
+Ограничение частоты запросов к СУЗ на стороне клиента.
+
+СУЗ ограничивает количество вызовов API. Запросы распределяются по корзинам токенов
+(token bucket) отдельно для каждого вида продукции (extension) и класса метода:
+    orders      - заказы на эмиссию и их статус
+    codes       - получение кодов маркировки из заказа
+    utilisation - отчеты о нанесении и об агрегации
+    info        - проверка доступности, версия, отчеты и прочие методы
+
+Ожидающие запросы обслуживаются в порядке поступления. Ответ 429 приостанавливает
+корзину на время из заголовка Retry-After и снижает ее скорость, которая затем
+постепенно восстанавливается на успешных ответах.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Классы методов API
+ENDPOINT_ORDERS = "orders"
+ENDPOINT_CODES = "codes"
+ENDPOINT_UTILISATION = "utilisation"
+ENDPOINT_INFO = "info"
+
+# Класс метода по первому сегменту пути после /api/v2/{extension}/
+ENDPOINT_CLASSES = {
+    "orders": ENDPOINT_ORDERS,
+    "order": ENDPOINT_ORDERS,
+    "codes": ENDPOINT_CODES,
+    "buffer": ENDPOINT_CODES,
+    "utilisation": ENDPOINT_UTILISATION,
+    "aggregation": ENDPOINT_UTILISATION,
+}
+
+# Лимиты по умолчанию: (запросов в секунду, размер корзины)
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    ENDPOINT_ORDERS: (10.0, 10),
+    ENDPOINT_CODES: (10.0, 10),
+    ENDPOINT_UTILISATION: (5.0, 5),
+    ENDPOINT_INFO: (5.0, 5),
+}
+
+# Пауза после ответа 429 без заголовка Retry-After, в секундах
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def split_api_path(url: str) -> Tuple[str, str]:
+    """Вид продукции и метод API по URL запроса
+
+    Args:
+        url (str): Полный URL или путь запроса, например /api/v2/pharma/codes?omsId=...
+
+    Returns:
+        Tuple[str, str]: (extension, путь метода без параметров, например "report/info");
+            для URL вне /api/v2/ extension пустой
+    """
+    parts = [part for part in urlsplit(url).path.split('/') if part]
+    if len(parts) >= 3 and parts[0] == "api" and parts[1].startswith("v"):
+        return parts[2], "/".join(parts[3:])
+    return "", "/".join(parts)
+
+
+def classify_url(url: str) -> Tuple[str, str]:
+    """Вид продукции и класс метода API по URL запроса
+
+    Args:
+        url (str): Полный URL или путь запроса
+
+    Returns:
+        Tuple[str, str]: (extension, класс метода); для URL вне /api/v2/ extension пустой
+    """
+    extension, endpoint = split_api_path(url)
+    if not extension:
+        return "", ENDPOINT_INFO
+    return extension, ENDPOINT_CLASSES.get(endpoint.split('/')[0], ENDPOINT_INFO)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Время ожидания в секундах из заголовка Retry-After (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Корзина токенов с очередью ожидающих запросов в порядке поступления"""
+
+    def __init__(self, rate: float, capacity: int, min_rate_factor: float = 0.1,
+                 recovery_factor: float = 0.05):
+        """
+        Args:
+            rate: Настроенная скорость пополнения, токенов в секунду
+            capacity: Размер корзины (допустимый всплеск запросов)
+            min_rate_factor: Минимальная доля настроенной скорости после замедления по 429
+            recovery_factor: Доля настроенной скорости, возвращаемая каждым успешным ответом
+        """
+        self.configured_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self.min_rate_factor = min_rate_factor
+        self.recovery_factor = recovery_factor
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+        # Метрики
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        """Пополнение корзины за время, прошедшее с прошлого обновления"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Получение токена с ожиданием своей очереди
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if ticket == self._serving:
+                    if now < self.paused_until:
+                        timeout = self.paused_until - now
+                    elif self.tokens >= 1:
+                        break
+                    else:
+                        timeout = (1 - self.tokens) / self.rate
+                else:
+                    timeout = None
+                self._condition.wait(timeout)
+
+            self.tokens -= 1
+            self._serving += 1
+            waited = time.monotonic() - started
+            self.requests += 1
+            if waited > 0.001:
+                self.delayed += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+            self._condition.notify_all()
+        return waited
+
+    def throttle(self, retry_after: Optional[float]):
+        """Реакция на ответ 429: пауза и снижение скорости вдвое"""
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None
+                                                              else DEFAULT_RETRY_AFTER))
+            self.rate = max(self.configured_rate * self.min_rate_factor, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self._condition.notify_all()
+
+    def recover(self):
+        """Постепенное восстановление скорости после успешного ответа"""
+        if self.rate >= self.configured_rate:
+            return
+        with self._condition:
+            self._refill(time.monotonic())
+            self.rate = min(self.configured_rate, self.rate + self.configured_rate * self.recovery_factor)
+
+    def configure(self, rate: float, capacity: int):
+        """Изменение лимитов корзины"""
+        with self._condition:
+            self._refill(time.monotonic())
+            self.configured_rate = float(rate)
+            self.rate = float(rate)
+            self.capacity = max(1, int(capacity))
+            self.tokens = min(self.tokens, self.capacity)
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики корзины"""
+        with self._condition:
+            return {
+                "rate": self.rate,
+                "configured_rate": self.configured_rate,
+                "capacity": self.capacity,
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "waiting": self._next_ticket - self._serving,
+                "total_wait": self.total_wait,
+                "avg_wait": self.total_wait / self.delayed if self.delayed else 0.0,
+                "max_wait": self.max_wait,
+                "throttled": self.throttled,
+            }
+
+
+class RateLimiter:
+    """Набор корзин токенов по видам продукции и классам методов API"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        """
+        Args:
+            limits: Лимиты по классам методов {класс: (запросов в секунду, размер корзины)},
+                дополняют DEFAULT_LIMITS
+        """
+        self.limits: Dict[str, Tuple[float, int]] = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.overrides: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, endpoint_class: str, rate: float, capacity: int, extension: Optional[str] = None):
+        """Настройка лимита класса методов для всех видов продукции или для одного
+
+        Args:
+            endpoint_class (str): Класс метода (orders, codes, utilisation, info)
+            rate (float): Запросов в секунду
+            capacity (int): Размер корзины
+            extension (str, optional): Вид продукции; если не указан, лимит применяется ко всем
+        """
+        with self._lock:
+            if extension:
+                self.overrides[(extension, endpoint_class)] = (rate, capacity)
+                keys = [(extension, endpoint_class)]
+            else:
+                self.limits[endpoint_class] = (rate, capacity)
+                keys = [key for key in self.buckets
+                        if key[1] == endpoint_class and key not in self.overrides]
+            for key in keys:
+                if key in self.buckets:
+                    self.buckets[key].configure(rate, capacity)
+
+    def configure_from_dict(self, config: Dict[str, Any]):
+        """Настройка лимитов из словаря (например, из настроек приложения)
+
+        Формат: {"orders": [10, 10], "pharma": {"codes": [5, 5]}} - ключ класса метода
+        задает лимит для всех видов продукции, ключ вида продукции - только для него.
+        """
+        for key, value in config.items():
+            if isinstance(value, dict):
+                for endpoint_class, limit in value.items():
+                    self.configure(endpoint_class, float(limit[0]), int(limit[1]), extension=key)
+            else:
+                self.configure(key, float(value[0]), int(value[1]))
+
+    def bucket(self, extension: str, endpoint_class: str) -> TokenBucket:
+        """Корзина для вида продукции и класса метода (создается при первом обращении)"""
+        key = (extension, endpoint_class)
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                rate, capacity = self.overrides.get(
+                    key, self.limits.get(endpoint_class, DEFAULT_LIMITS[ENDPOINT_INFO]))
+                bucket = TokenBucket(rate, capacity)
+                self.buckets[key] = bucket
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """Ожидание разрешения на запрос по URL
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        extension, endpoint_class = classify_url(url)
+        waited = self.bucket(extension, endpoint_class).acquire()
+        if waited >= 1.0:
+            logger.info(f"Запрос {extension}/{endpoint_class} ожидал лимита СУЗ {waited:.2f} с")
+        return waited
+
+    def feedback(self, url: str, status_code: int, headers: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """Учет ответа сервера: замедление по 429 и восстановление скорости по успешным ответам
+
+        Returns:
+            Optional[float]: Пауза в секундах, если сервер ограничил запросы, иначе None
+        """
+        extension, endpoint_class = classify_url(url)
+        bucket = self.bucket(extension, endpoint_class)
+        if status_code == 429:
+            retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+            bucket.throttle(retry_after)
+            delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+            logger.warning(f"СУЗ ограничила частоту запросов {extension}/{endpoint_class}, "
+                           f"пауза {delay:.1f} с, скорость снижена до {bucket.rate:.2f} запросов/с")
+            return delay
+        if 200 <= status_code < 300:
+            bucket.recover()
+        return None
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """Метрики всех корзин с указанием вида продукции и класса метода"""
+        with self._lock:
+            items = list(self.buckets.items())
+        return [dict(bucket.metrics(), extension=extension, endpoint_class=endpoint_class)
+                for (extension, endpoint_class), bucket in sorted(items)]
+
+
+class RateLimitedSession(requests.Session):
+    """Сессия requests, выполняющая каждый запрос через ограничитель частоты
+
+    Ответ 429 повторяется после паузы не более max_retries раз, вызывающий код
+    получает последний ответ сервера.
+    """
+
+    def __init__(self, limiter: RateLimiter, max_retries: int = 2):
+        super().__init__()
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def request(self, method, url, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.limiter.acquire(url)
+            response = super().request(method, url, *args, **kwargs)
+            delay = self.limiter.feedback(url, response.status_code, response.headers)
+            if delay is None or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            response.close()
+            logger.info(f"Повтор запроса {method} {url} после ответа 429 (попытка {attempt})")
+
+
+# Ограничитель, общий для всех экземпляров APIClient
+shared_rate_limiter = RateLimiter()
@@ -0,0 +1,185 @@
+"""
+Кэш ответов на идемпотентные GET-запросы к СУЗ.
+
+Ответ хранится по ключу (extension, omsId, метод, параметры) в течение времени
+жизни, заданного для метода: версия СУЗ в течение сеанса не меняется, проверка
+доступности и статус заказов устаревают за секунды. Методы без заданного времени
+жизни не кэшируются. Кэшируются только успешные ответы (2xx).
+
+Устаревший ответ может быть выдан в пределах дополнительного окна (stale-while-revalidate),
+при этом запрос к СУЗ выполняется в фоновом потоке. Функция запроса вызывается в этом
+потоке целиком, поэтому чтение заголовков и логирование запроса идут через собственное
+соединение потока с базой данных (Database.conn), не затрагивая транзакцию основного
+потока. После POST-запросов записи соответствующего метода сбрасываются.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Время жизни ответа по методу API, в секундах
+DEFAULT_TTLS: Dict[str, float] = {
+    "version": 24 * 3600,
+    "ping": 15,
+    "orders": 10,
+}
+
+# Дополнительное время, в течение которого допускается выдача устаревшего ответа
+DEFAULT_STALE_TTLS: Dict[str, float] = {
+    "ping": 300,
+    "orders": 60,
+}
+
+CacheKey = Tuple[str, str, str, Tuple[Tuple[str, Hashable], ...]]
+Fetch = Callable[[], Tuple[Any, int]]
+
+
+def make_key(extension: str, omsid: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> CacheKey:
+    """Ключ кэша (extension, omsId, метод, отсортированные параметры)"""
+    return (extension or "", omsid or "", endpoint,
+            tuple(sorted((str(name), str(value)) for name, value in (params or {}).items())))
+
+
+class ResponseCache:
+    """Кэш ответов API с временем жизни по методам и счетчиками попаданий"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None,
+                 stale_ttls: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            ttls: Время жизни ответа по методу, дополняет DEFAULT_TTLS
+            stale_ttls: Окно выдачи устаревшего ответа по методу, дополняет DEFAULT_STALE_TTLS
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.stale_ttls = dict(DEFAULT_STALE_TTLS)
+        self.stale_ttls.update(stale_ttls or {})
+
+        self._entries: Dict[CacheKey, Tuple[Any, int, float]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # Метрики
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+
+    def get(self, key: CacheKey, fetch: Fetch, allow_stale: bool = False,
+            force: bool = False) -> Tuple[Any, int]:
+        """Ответ из кэша или от сервера
+
+        Args:
+            key: Ключ кэша (make_key)
+            fetch: Функция запроса к серверу, возвращает (данные, код ответа)
+            allow_stale (bool): Допускается устаревший ответ с обновлением в фоне
+            force (bool): Выполнить запрос к серверу без обращения к кэшу
+
+        Returns:
+            Tuple[Any, int]: Данные ответа и код ответа
+        """
+        if not force:
+            cached = self._lookup(key, allow_stale, fetch)
+            if cached is not None:
+                return cached
+        with self._lock:
+            self.misses += 1
+        return self._fetch(key, fetch)
+
+    def get_cached(self, key: CacheKey, fetch: Optional[Fetch] = None) -> Optional[Tuple[Any, int]]:
+        """Ответ из кэша без ожидания сервера
+
+        Устаревший ответ в пределах окна выдается, а при переданной функции fetch
+        обновляется в фоне.
+
+        Returns:
+            Optional[Tuple[Any, int]]: Данные и код ответа или None, если ответа в кэше нет
+        """
+        return self._lookup(key, True, fetch)
+
+    def _lookup(self, key: CacheKey, allow_stale: bool, fetch: Optional[Fetch]) -> Optional[Tuple[Any, int]]:
+        """Поиск ответа в кэше с учетом времени жизни"""
+        endpoint = key[2]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, status_code, stored_at = entry
+            age = time.monotonic() - stored_at
+            ttl = self.ttls.get(endpoint, 0)
+            if age < ttl:
+                self.hits += 1
+                return data, status_code
+            if not allow_stale or age >= ttl + self.stale_ttls.get(endpoint, 0):
+                return None
+            self.stale_hits += 1
+        if fetch is not None:
+            self._revalidate(key, fetch)
+        return data, status_code
+
+    def _fetch(self, key: CacheKey, fetch: Fetch) -> Tuple[Any, int]:
+        """Запрос к серверу и сохранение успешного ответа"""
+        data, status_code = fetch()
+        if 200 <= status_code < 300 and self.ttls.get(key[2], 0) > 0:
+            with self._lock:
+                self._entries[key] = (data, status_code, time.monotonic())
+        return data, status_code
+
+    def _revalidate(self, key: CacheKey, fetch: Fetch):
+        """Обновление записи в фоновом потоке (не больше одного запроса на ключ)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.revalidations += 1
+
+        def worker():
+            try:
+                self._fetch(key, fetch)
+            except Exception as e:
+                logger.info(f"Не удалось обновить кэшированный ответ {key[2]}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, name=f"cache-{key[2]}", daemon=True).start()
+
+    def invalidate(self, extension: Optional[str] = None, omsid: Optional[str] = None,
+                   endpoint: Optional[str] = None) -> int:
+        """Сброс записей, подходящих под все указанные условия
+
+        Returns:
+            int: Количество сброшенных записей
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (extension is None or key[0] == extension)
+                    and (omsid is None or key[1] == omsid)
+                    and (endpoint is None or key[2] == endpoint)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+        if keys:
+            logger.debug(f"Сброшено записей кэша ответов API: {len(keys)}")
+        return len(keys)
+
+    def clear(self) -> int:
+        """Сброс всех записей"""
+        return self.invalidate()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов кэша"""
+        with self._lock:
+            requests_count = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "invalidations": self.invalidations,
+                "hit_ratio": (self.hits + self.stale_hits) / requests_count if requests_count else 0.0,
+            }
@@ -0,0 +1,93 @@
+"""
+Замер времени этапов запуска приложения.
+
+Этапы запуска (создание базы данных, окна, контроллера, отложенная загрузка данных)
+замеряются от старта процесса. Итоги пишутся в лог и сохраняются в настройку
+startup_timings, чтобы сравнивать время запуска между версиями.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Замер длительности этапов запуска"""
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Args:
+            started: Момент старта по time.perf_counter() (по умолчанию - момент создания);
+                точка входа передает время, взятое до импорта тяжелых модулей
+        """
+        self.started = started if started is not None else time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self.marks: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замер длительности этапа
+
+        Args:
+            name (str): Название этапа
+        """
+        stage_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.stages.append({
+                "name": name,
+                "duration": finished - stage_started,
+                "finished_at": finished - self.started,
+            })
+
+    def mark(self, name: str) -> float:
+        """Отметка момента запуска (например, показа окна)
+
+        Returns:
+            float: Время от старта в секундах
+        """
+        elapsed = time.perf_counter() - self.started
+        self.marks[name] = elapsed
+        return elapsed
+
+    def elapsed(self) -> float:
+        """Время от старта в секундах"""
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Итоги замера в виде словаря"""
+        return {
+            "stages": [dict(stage) for stage in self.stages],
+            "marks": dict(self.marks),
+            "total": self.elapsed(),
+        }
+
+    def summary(self) -> str:
+        """Итоги замера одной строкой для лога"""
+        stages = ", ".join(f"{stage['name']} {stage['duration'] * 1000:.0f} мс" for stage in self.stages)
+        marks = ", ".join(f"{name} {value * 1000:.0f} мс" for name, value in self.marks.items())
+        return f"Этапы запуска: {stages}; отметки: {marks}"
+
+    def save(self, db, key: str = "startup_timings") -> bool:
+        """Сохранение итогов в настройки приложения"""
+        try:
+            db.set_setting(key, json.dumps(self.as_dict(), ensure_ascii=False))
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении времени запуска: {str(e)}")
+            return False
+
+
+def load_startup_timings(db, key: str = "startup_timings") -> Optional[Dict[str, Any]]:
+    """Итоги замера последнего запуска из настроек приложения"""
+    try:
+        value = db.get_setting(key, "")
+        return json.loads(value) if value else None
+    except Exception as e:
+        logger.error(f"Ошибка при чтении времени запуска: {str(e)}")
+        return None
@@ -0,0 +1,184 @@
+"""
+Отправка отчетов о нанесении по частям.
+
+Список кодов (sntins) делится на части не больше допустимого API размера. Части
+сохраняются в таблицу report_chunks до отправки и отправляются параллельно
+ограниченным числом потоков; запросы рабочих потоков логируются через их собственные
+соединения с базой данных (Database.conn). Результат каждой части (reportId или ошибка)
+записывается в вызывающем потоке. Отправленные части повторно не отправляются, поэтому отправку
+можно повторить после ошибки или продолжить после перезапуска приложения.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from models.models import CodeStatus
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество кодов в одном отчете о нанесении
+MAX_CODES_PER_REPORT = 30000
+
+# Статусы частей отчета
+CHUNK_PENDING = "PENDING"
+CHUNK_SENT = "SENT"
+CHUNK_FAILED = "FAILED"
+
+
+def split_codes(codes: List[str], chunk_size: int = MAX_CODES_PER_REPORT) -> List[List[str]]:
+    """Разбиение списка кодов на части не больше chunk_size"""
+    return [codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size)]
+
+
+def response_error(response: Dict[str, Any]) -> str:
+    """Текст ошибки из ответа API на отчет о нанесении"""
+    if 'fieldErrors' in response:
+        return ", ".join(f"{error.get('fieldName')}: {error.get('fieldError')}"
+                         for error in response['fieldErrors'])
+    if 'globalErrors' in response:
+        return ", ".join(str(error) for error in response['globalErrors'])
+    error = response.get('error')
+    if isinstance(error, dict):
+        return error.get('message', "Неизвестная ошибка")
+    if error:
+        return str(error)
+    return "Ответ не содержит reportId"
+
+
+class UtilisationReportSubmitter:
+    """Отправка отчета о нанесении частями с ограниченным параллелизмом"""
+
+    def __init__(self, api_client, db, chunk_size: int = MAX_CODES_PER_REPORT,
+                 max_workers: int = 4, max_attempts: int = 3, retry_delay: float = 2.0):
+        """
+        Args:
+            api_client: API-клиент СУЗ
+            db: Объект базы данных
+            chunk_size: Максимальное количество кодов в одной части
+            max_workers: Количество одновременно отправляемых частей
+            max_attempts: Количество попыток отправки части при ошибке соединения
+            retry_delay: Начальная задержка между попытками в секундах (удваивается)
+        """
+        self.api_client = api_client
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def prepare(self, file_id: int, report_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Разбиение отчета на части и сохранение их в базе данных
+
+        Args:
+            file_id (int): ID файла агрегации
+            report_data (Dict[str, Any]): Данные отчета в формате API (sntins и параметры)
+
+        Returns:
+            List[Dict[str, Any]]: Сохраненные части отчета
+        """
+        payload = {key: value for key, value in report_data.items()
+                   if key not in ('sntins', 'file_id')}
+        chunks = split_codes(list(report_data.get('sntins', [])), self.chunk_size)
+        saved = self.db.save_report_chunks(file_id, payload, chunks)
+        logger.info(f"Отчет о нанесении для файла {file_id} разбит на {len(saved)} частей "
+                    f"по {self.chunk_size} кодов")
+        return saved
+
+    def submit(self, file_id: int, report_data: Optional[Dict[str, Any]] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Отправка неотправленных частей отчета по файлу агрегации
+
+        Args:
+            file_id (int): ID файла агрегации
+            report_data (Dict[str, Any], optional): Данные нового отчета; если не указаны,
+                продолжается отправка ранее сохраненных частей
+            progress_callback: Функция (обработано, всего), вызывается после каждой части
+
+        Returns:
+            Dict[str, Any]: Итоги - total, sent, failed, report_ids (по всем частям файла)
+                и errors (список пар (номер части, ошибка))
+        """
+        if report_data is not None:
+            chunks = self.prepare(file_id, report_data)
+        else:
+            chunks = self.db.get_report_chunks(file_id)
+
+        result = {"total": len(chunks), "sent": 0, "failed": 0, "report_ids": [], "errors": []}
+        pending = [chunk for chunk in chunks if chunk["status"] != CHUNK_SENT]
+        processed = len(chunks) - len(pending)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._send_chunk, chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    response = {"success": False, "error": str(e)}
+                self._store_result(chunk, response)
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, len(chunks))
+
+        for chunk in self.db.get_report_chunks(file_id):
+            if chunk["status"] == CHUNK_SENT:
+                result["sent"] += 1
+                result["report_ids"].append(chunk["report_id"])
+            else:
+                result["failed"] += 1
+                result["errors"].append((chunk["chunk_index"] + 1, chunk["last_error"]))
+
+        logger.info(f"Отправка отчета о нанесении для файла {file_id}: отправлено частей "
+                    f"{result['sent']} из {result['total']}, с ошибками {result['failed']}")
+        return result
+
+    def resume_all(self, statuses: Optional[List[str]] = None) -> Dict[int, Dict[str, Any]]:
+        """Продолжение отправки неотправленных частей по всем файлам агрегации
+
+        Args:
+            statuses: Статусы частей, по которым выбираются файлы (по умолчанию PENDING и FAILED)
+
+        Returns:
+            Dict[int, Dict[str, Any]]: Итоги отправки по ID файлов
+        """
+        return {file_id: self.submit(file_id)
+                for file_id in self.db.get_files_with_unsent_report_chunks(statuses)}
+
+    def _send_chunk(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Отправка одной части в рабочем потоке с повтором при ошибке соединения"""
+        data = dict(chunk["payload"])
+        data["sntins"] = chunk["sntins"]
+        delay = self.retry_delay
+        response: Dict[str, Any] = {}
+        for attempt in range(1, self.max_attempts + 1):
+            response = self.api_client.post_utilisation(data)
+            if response.get('success') and response.get('reportId'):
+                return response
+            # Повторяем только ошибки соединения: ошибки валидации повтор не исправит
+            if not response.get('connection_error') or attempt == self.max_attempts:
+                break
+            logger.warning(f"Часть {chunk['chunk_index'] + 1} отчета о нанесении не отправлена "
+                           f"(попытка {attempt}): {response_error(response)}")
+            time.sleep(delay)
+            delay *= 2
+        return response
+
+    def _store_result(self, chunk: Dict[str, Any], response: Dict[str, Any]):
+        """Запись результата отправки части и перевод ее кодов в статус UTILISED"""
+        if response.get('success') and response.get('reportId'):
+            report_id = response['reportId']
+            self.db.update_report_chunk(chunk["id"], CHUNK_SENT, report_id=report_id)
+            self.db.transition_codes_by_barcodes(
+                chunk["sntins"], CodeStatus.UTILISED, "utilisation_report", report_id
+            )
+            logger.info(f"Часть {chunk['chunk_index'] + 1} отчета о нанесении отправлена, "
+                        f"reportId: {report_id}")
+        else:
+            error = response_error(response)
+            # Часть, не отправленная из-за ошибки соединения, остается в ожидании
+            # и досылается очередью отправки при восстановлении связи с СУЗ
+            status = CHUNK_PENDING if response.get('connection_error') else CHUNK_FAILED
+            self.db.update_report_chunk(chunk["id"], status, error=error)
+            logger.error(f"Ошибка при отправке части {chunk['chunk_index'] + 1} "
+                         f"отчета о нанесении: {error}")
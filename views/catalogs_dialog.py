@@ -0,0 +1,558 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget,
+                             QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QInputDialog,
+                             QMessageBox, QDialogButtonBox)
+from PyQt6.QtCore import QTimer
+
+from views.dialogs import NomenclatureDialog
+from models.models import Extension, Nomenclature
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CatalogsDialog(QDialog):
+    """Диалог для работы со справочниками"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Справочники")
+        self.resize(800, 600)
+        
+        # Получаем ссылку на главное окно
+        self.main_window = parent
+        
+        # Подключаем сигналы главного окна к слотам обновления таблиц
+        self.main_window.add_nomenclature_signal.connect(self.reload_nomenclature)
+        self.main_window.edit_nomenclature_signal.connect(self.reload_nomenclature)
+        self.main_window.delete_nomenclature_signal.connect(self.reload_nomenclature)
+        self.main_window.set_active_extension_signal.connect(self.reload_extensions)
+        self.main_window.load_countries_signal.connect(self.reload_countries)
+        self.main_window.load_order_statuses_signal.connect(self.reload_order_statuses)
+        self.main_window.add_order_status_signal.connect(self.reload_order_statuses)
+        self.main_window.edit_order_status_signal.connect(self.reload_order_statuses)
+        self.main_window.delete_order_status_signal.connect(self.reload_order_statuses)
+        
+        layout = QVBoxLayout(self)
+        
+        # Создаем виджет с вкладками
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs)
+        
+        # Создаем вкладки
+        self.create_nomenclature_tab()
+        self.create_extensions_tab()
+        self.create_countries_tab()
+        self.create_order_statuses_tab()
+        self.create_usage_types_tab()  # Новая вкладка для типов использования
+        
+        # Добавляем вкладки в виджет
+        self.tabs.addTab(self.nomenclature_tab, "Номенклатура")
+        self.tabs.addTab(self.extensions_tab, "Виды продукции")
+        self.tabs.addTab(self.countries_tab, "Страны")
+        self.tabs.addTab(self.order_statuses_tab, "Статусы заказов")
+        self.tabs.addTab(self.usage_types_tab, "Типы использования")  # Добавляем новую вкладку
+        
+        # Кнопки
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        
+        # Подключаем обработчик изменения активной вкладки
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+    
+    def showEvent(self, event):
+        """Обработчик события показа диалога"""
+        # Обновляем данные всех таблиц при показе диалога
+        self.reload_nomenclature()
+        self.reload_extensions()
+        self.reload_countries()
+        self.reload_order_statuses()
+        self.reload_usage_types()  # Загружаем типы использования
+        super().showEvent(event)
+    
+    def on_tab_changed(self, index):
+        """Обработчик изменения активной вкладки"""
+        # Обновляем данные таблицы при переключении на нее
+        if index == 0:  # Номенклатура
+            self.reload_nomenclature()
+        elif index == 1:  # Расширения
+            self.reload_extensions()
+        elif index == 2:  # Страны
+            self.reload_countries()
+        elif index == 3:  # Статусы заказов
+            self.reload_order_statuses()
+        elif index == 4:  # Типы использования
+            self.reload_usage_types()
+
+    def create_nomenclature_tab(self):
+        """Создание вкладки номенклатуры"""
+        self.nomenclature_tab = QWidget()
+        layout = QVBoxLayout(self.nomenclature_tab)
+        
+        # Создаем копию таблицы номенклатуры и подключаем данные
+        self.nomenclature_table = QTableWidget()
+        self.nomenclature_table.setColumnCount(4)
+        self.nomenclature_table.setHorizontalHeaderLabels(["ID", "Название", "GTIN", "Описание"])
+        layout.addWidget(self.nomenclature_table)
+        
+        # Создаем кнопки для управления номенклатурой
+        buttons_layout = QHBoxLayout()
+        
+        add_button = QPushButton("Добавить")
+        add_button.clicked.connect(self.on_add_nomenclature_clicked)
+        buttons_layout.addWidget(add_button)
+        
+        edit_button = QPushButton("Изменить")
+        edit_button.clicked.connect(self.on_edit_nomenclature_clicked)
+        buttons_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton("Удалить")
+        delete_button.clicked.connect(self.on_delete_nomenclature_clicked)
+        buttons_layout.addWidget(delete_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def create_extensions_tab(self):
+        """Создание вкладки расширений API"""
+        self.extensions_tab = QWidget()
+        layout = QVBoxLayout(self.extensions_tab)
+        
+        # Таблица расширений API
+        self.extensions_table = QTableWidget()
+        self.extensions_table.setColumnCount(4)
+        self.extensions_table.setHorizontalHeaderLabels(["ID", "Название", "Код", "Активный"])
+        layout.addWidget(self.extensions_table)
+        
+        # Кнопки управления расширениями API
+        buttons_layout = QHBoxLayout()
+        
+        set_active_button = QPushButton("Установить активным")
+        set_active_button.clicked.connect(self.on_set_active_extension)
+        buttons_layout.addWidget(set_active_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def on_set_active_extension(self):
+        """Обработчик нажатия кнопки установки активного расширения"""
+        row = self.extensions_table.currentRow()
+        if row >= 0:
+            extension_id = int(self.extensions_table.item(row, 0).text())
+            self.main_window.set_active_extension_signal.emit(extension_id)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите вид продукции для активации")
+    
+    def reload_extensions(self, *args):
+        """Обновить таблицу расширений в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.extensions_table
+        self.extensions_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.extensions_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.extensions_table.resizeColumnsToContents()
+    
+    def create_countries_tab(self):
+        """Создание вкладки стран"""
+        self.countries_tab = QWidget()
+        layout = QVBoxLayout(self.countries_tab)
+        
+        # Таблица стран
+        self.countries_table = QTableWidget()
+        self.countries_table.setColumnCount(3)
+        self.countries_table.setHorizontalHeaderLabels(["ID", "Код", "Название"])
+        layout.addWidget(self.countries_table)
+        
+        # В этой вкладке обычно нет кнопок управления, так как
+        # список стран обычно загружается из API и не редактируется пользователем
+    
+    def create_order_statuses_tab(self):
+        """Создание вкладки статусов заказов"""
+        self.order_statuses_tab = QWidget()
+        layout = QVBoxLayout(self.order_statuses_tab)
+        
+        # Таблица статусов заказов
+        self.order_statuses_table = QTableWidget()
+        self.order_statuses_table.setColumnCount(4)
+        self.order_statuses_table.setHorizontalHeaderLabels(["ID", "Код", "Название", "Описание"])
+        layout.addWidget(self.order_statuses_table)
+        
+        # Кнопки управления статусами
+        buttons_layout = QHBoxLayout()
+        
+        refresh_button = QPushButton("Обновить")
+        refresh_button.clicked.connect(lambda: self.main_window.load_order_statuses_signal.emit())
+        buttons_layout.addWidget(refresh_button)
+        
+        add_button = QPushButton("Добавить")
+        add_button.clicked.connect(self.on_add_order_status_clicked)
+        buttons_layout.addWidget(add_button)
+        
+        edit_button = QPushButton("Изменить")
+        edit_button.clicked.connect(self.on_edit_order_status_clicked)
+        buttons_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton("Удалить")
+        delete_button.clicked.connect(self.on_delete_order_status_clicked)
+        buttons_layout.addWidget(delete_button)
+        
+        layout.addLayout(buttons_layout)
+        
+    def reload_countries(self, *args):
+        """Обновить таблицу стран в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.countries_table
+        self.countries_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.countries_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.countries_table.resizeColumnsToContents()
+    
+    def reload_nomenclature(self, *args):
+        """Обновить таблицу номенклатуры в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.nomenclature_table
+        self.nomenclature_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.nomenclature_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.nomenclature_table.resizeColumnsToContents()
+    
+    def reload_order_statuses(self, *args):
+        """Обновить таблицу статусов заказов в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.order_statuses_table
+        self.order_statuses_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.order_statuses_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.order_statuses_table.resizeColumnsToContents()
+
+    def on_add_nomenclature_clicked(self):
+        """Обработчик нажатия кнопки добавления номенклатуры в диалоге Справочники"""
+        # Получаем список расширений API
+        extensions = []
+        source_table = self.main_window.extensions_table
+        for row in range(source_table.rowCount()):
+            extension_id = int(source_table.item(row, 0).text())
+            extension_name = source_table.item(row, 1).text()
+            extension_code = source_table.item(row, 2).text()
+            is_active = source_table.item(row, 3).text() == "Да"
+            extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
+        
+        dialog = NomenclatureDialog(self, extensions=extensions)
+        if dialog.exec():
+            data = dialog.get_data()
+            self.main_window.add_nomenclature_signal.emit(data['name'], data['gtin'], data['product_group'])
+    
+    def on_edit_nomenclature_clicked(self):
+        """Обработчик нажатия кнопки редактирования номенклатуры в диалоге Справочники"""
+        row = self.nomenclature_table.currentRow()
+        if row >= 0:
+            nomenclature_id = int(self.nomenclature_table.item(row, 0).text())
+            name = self.nomenclature_table.item(row, 1).text()
+            gtin = self.nomenclature_table.item(row, 2).text()
+            product_group = self.nomenclature_table.item(row, 3).text() if self.nomenclature_table.item(row, 3) else ""
+            
+            # Создаем объект номенклатуры
+            nomenclature = Nomenclature(nomenclature_id, name, gtin, product_group)
+            
+            # Получаем список расширений API перед открытием диалога
+            extensions = []
+            source_table = self.main_window.extensions_table
+            for row in range(source_table.rowCount()):
+                extension_id = int(source_table.item(row, 0).text())
+                extension_name = source_table.item(row, 1).text()
+                extension_code = source_table.item(row, 2).text()
+                is_active = source_table.item(row, 3).text() == "Да"
+                extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
+            
+            # Открываем диалог редактирования
+            dialog = NomenclatureDialog(self, nomenclature=nomenclature, extensions=extensions)
+            if dialog.exec():
+                data = dialog.get_data()
+                self.main_window.edit_nomenclature_signal.emit(nomenclature_id, data['name'], data['gtin'], data['product_group'])
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите номенклатуру для редактирования")
+    
+    def on_delete_nomenclature_clicked(self):
+        """Обработчик нажатия кнопки удаления номенклатуры в диалоге Справочники"""
+        row = self.nomenclature_table.currentRow()
+        if row >= 0:
+            nomenclature_id = int(self.nomenclature_table.item(row, 0).text())
+            self.main_window.delete_nomenclature_signal.emit(nomenclature_id)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите номенклатуру для удаления")
+    
+    def on_add_order_status_clicked(self):
+        """Обработчик нажатия кнопки добавления статуса заказа"""
+        from PyQt6.QtWidgets import QInputDialog, QLineEdit
+        
+        # Запрашиваем код статуса
+        code, ok = QInputDialog.getText(
+            self, "Добавление статуса заказа", "Введите код статуса:", QLineEdit.EchoMode.Normal
+        )
+        
+        if ok and code:
+            # Запрашиваем название статуса
+            name, ok = QInputDialog.getText(
+                self, "Добавление статуса заказа", "Введите название статуса:", QLineEdit.EchoMode.Normal
+            )
+            
+            if ok and name:
+                # Запрашиваем описание статуса
+                description, ok = QInputDialog.getText(
+                    self, "Добавление статуса заказа", "Введите описание статуса:", QLineEdit.EchoMode.Normal
+                )
+                
+                if ok:
+                    # Вызываем сигнал добавления статуса
+                    self.main_window.add_order_status_signal.emit(code, name, description)
+    
+    def on_edit_order_status_clicked(self):
+        """Обработчик нажатия кнопки редактирования статуса заказа"""
+        from PyQt6.QtWidgets import QInputDialog, QLineEdit
+        
+        row = self.order_statuses_table.currentRow()
+        if row >= 0:
+            status_id = int(self.order_statuses_table.item(row, 0).text())
+            code = self.order_statuses_table.item(row, 1).text()
+            name = self.order_statuses_table.item(row, 2).text()
+            description = self.order_statuses_table.item(row, 3).text() if self.order_statuses_table.item(row, 3) else ""
+            
+            # Запрашиваем новый код статуса
+            new_code, ok = QInputDialog.getText(
+                self, "Редактирование статуса заказа", "Введите код статуса:", QLineEdit.EchoMode.Normal, code
+            )
+            
+            if ok and new_code:
+                # Запрашиваем новое название статуса
+                new_name, ok = QInputDialog.getText(
+                    self, "Редактирование статуса заказа", "Введите название статуса:", QLineEdit.EchoMode.Normal, name
+                )
+                
+                if ok and new_name:
+                    # Запрашиваем новое описание статуса
+                    new_description, ok = QInputDialog.getText(
+                        self, "Редактирование статуса заказа", "Введите описание статуса:", QLineEdit.EchoMode.Normal, description
+                    )
+                    
+                    if ok:
+                        # Вызываем сигнал редактирования статуса из главного окна
+                        self.main_window.edit_order_status_signal.emit(status_id, new_code, new_name, new_description)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите статус заказа для редактирования")
+    
+    def on_delete_order_status_clicked(self):
+        """Обработчик нажатия кнопки удаления статуса заказа"""
+        row = self.order_statuses_table.currentRow()
+        if row >= 0:
+            status_id = int(self.order_statuses_table.item(row, 0).text())
+            
+            # Запрашиваем подтверждение
+            reply = QMessageBox.question(
+                self, "Подтверждение удаления", 
+                "Вы уверены, что хотите удалить этот статус заказа?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            
+            if reply == QMessageBox.StandardButton.Yes:
+                # Вызываем сигнал удаления статуса из главного окна
+                self.main_window.delete_order_status_signal.emit(status_id)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите статус заказа для удаления")
+
+    def create_usage_types_tab(self):
+        """Создание вкладки типов использования кодов маркировки"""
+        self.usage_types_tab = QWidget()
+        layout = QVBoxLayout(self.usage_types_tab)
+        
+        # Таблица типов использования
+        self.usage_types_table = QTableWidget()
+        self.usage_types_table.setColumnCount(4)
+        self.usage_types_table.setHorizontalHeaderLabels(["ID", "Код", "Название", "Описание"])
+        layout.addWidget(self.usage_types_table)
+        
+        # Кнопки управления
+        buttons_layout = QHBoxLayout()
+        
+        refresh_button = QPushButton("Обновить")
+        refresh_button.clicked.connect(self.reload_usage_types)
+        buttons_layout.addWidget(refresh_button)
+        
+        add_button = QPushButton("Добавить")
+        add_button.clicked.connect(self.on_add_usage_type_clicked)
+        buttons_layout.addWidget(add_button)
+        
+        edit_button = QPushButton("Изменить")
+        edit_button.clicked.connect(self.on_edit_usage_type_clicked)
+        buttons_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton("Удалить")
+        delete_button.clicked.connect(self.on_delete_usage_type_clicked)
+        buttons_layout.addWidget(delete_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def reload_usage_types(self, *args):
+        """Обновить таблицу типов использования кодов маркировки"""
+        try:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.info("Загрузка типов использования кодов маркировки")
+            
+            # Получаем данные из базы через контроллер главного окна
+            if not hasattr(self.main_window, 'controller') or not self.main_window.controller:
+                logger.error("Отсутствует контроллер")
+                return
+            
+            # Получаем типы использования через метод контроллера
+            usage_types = self.main_window.controller.load_usage_types()
+            
+            # Очищаем таблицу
+            self.usage_types_table.setRowCount(0)
+            
+            # Заполняем таблицу данными
+            for i, usage_type in enumerate(usage_types):
+                self.usage_types_table.insertRow(i)
+                
+                # ID
+                id_item = QTableWidgetItem(str(usage_type.id))
+                self.usage_types_table.setItem(i, 0, id_item)
+                
+                # Код
+                code_item = QTableWidgetItem(usage_type.code)
+                self.usage_types_table.setItem(i, 1, code_item)
+                
+                # Название
+                name_item = QTableWidgetItem(usage_type.name)
+                self.usage_types_table.setItem(i, 2, name_item)
+                
+                # Описание
+                description_item = QTableWidgetItem(usage_type.description or "")
+                self.usage_types_table.setItem(i, 3, description_item)
+            
+            # Подгоняем ширину колонок
+            self.usage_types_table.resizeColumnsToContents()
+            
+            logger.info(f"Загружено {len(usage_types)} типов использования")
+            
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке типов использования: {str(e)}")
+            logger.exception("Подробная трассировка ошибки:")
+    
+    def on_add_usage_type_clicked(self):
+        """Обработчик нажатия кнопки добавления типа использования"""
+        from PyQt6.QtWidgets import QInputDialog, QLineEdit
+        import logging
+        
+        logger = logging.getLogger(__name__)
+        logger.info("Попытка добавления типа использования")
+        
+        try:
+            # Запрашиваем код типа использования
+            code, ok = QInputDialog.getText(
+                self, "Добавление типа использования", "Введите код типа использования:", QLineEdit.EchoMode.Normal
+            )
+            
+            if ok and code:
+                # Запрашиваем название типа использования
+                name, ok = QInputDialog.getText(
+                    self, "Добавление типа использования", "Введите название типа использования:", QLineEdit.EchoMode.Normal
+                )
+                
+                if ok and name:
+                    # Запрашиваем описание типа использования
+                    description, ok = QInputDialog.getText(
+                        self, "Добавление типа использования", "Введите описание типа использования:", QLineEdit.EchoMode.Normal
+                    )
+                    
+                    if ok:
+                        # Проверка ввода
+                        if not code.strip():
+                            logger.error("Код типа использования не может быть пустым")
+                            QMessageBox.critical(self, "Ошибка", "Код типа использования не может быть пустым")
+                            return
+                        
+                        if not name.strip():
+                            logger.error("Название типа использования не может быть пустым")
+                            QMessageBox.critical(self, "Ошибка", "Название типа использования не может быть пустым")
+                            return
+                        
+                        # Добавляем тип использования через сигнал главного окна
+                        logger.info(f"Отправка сигнала add_usage_type_signal: код={code}, название={name}")
+                        self.main_window.add_usage_type_signal.emit(code, name, description or "")
+                        
+                        # Обновляем таблицу через некоторое время, чтобы дать время контроллеру обработать запрос
+                        QTimer.singleShot(500, self.reload_usage_types)
+        except Exception as e:
+            logger.exception(f"Исключение при добавлении типа использования: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить тип использования: {str(e)}")
+    
+    def on_edit_usage_type_clicked(self):
+        """Обработчик нажатия кнопки редактирования типа использования"""
+        from PyQt6.QtWidgets import QInputDialog, QLineEdit
+        
+        row = self.usage_types_table.currentRow()
+        if row >= 0:
+            usage_type_id = int(self.usage_types_table.item(row, 0).text())
+            code = self.usage_types_table.item(row, 1).text()
+            name = self.usage_types_table.item(row, 2).text()
+            description = self.usage_types_table.item(row, 3).text() if self.usage_types_table.item(row, 3) else ""
+            
+            # Запрашиваем новый код типа использования
+            new_code, ok = QInputDialog.getText(
+                self, "Редактирование типа использования", "Введите код типа использования:", QLineEdit.EchoMode.Normal, code
+            )
+            
+            if ok and new_code:
+                # Запрашиваем новое название типа использования
+                new_name, ok = QInputDialog.getText(
+                    self, "Редактирование типа использования", "Введите название типа использования:", QLineEdit.EchoMode.Normal, name
+                )
+                
+                if ok and new_name:
+                    # Запрашиваем новое описание типа использования
+                    new_description, ok = QInputDialog.getText(
+                        self, "Редактирование типа использования", "Введите описание типа использования:", QLineEdit.EchoMode.Normal, description
+                    )
+                    
+                    if ok:
+                        try:
+                            # Обновляем тип использования через контроллер
+                            if self.main_window.controller:
+                                self.main_window.controller.update_usage_type(usage_type_id, new_code, new_name, new_description)
+                                # Обновляем таблицу
+                                self.reload_usage_types()
+                        except Exception as e:
+                            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить тип использования: {str(e)}")
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите тип использования для редактирования")
+    
+    def on_delete_usage_type_clicked(self):
+        """Обработчик нажатия кнопки удаления типа использования"""
+        row = self.usage_types_table.currentRow()
+        if row >= 0:
+            usage_type_id = int(self.usage_types_table.item(row, 0).text())
+            
+            # Запрашиваем подтверждение
+            reply = QMessageBox.question(
+                self, "Подтверждение удаления", 
+                "Вы уверены, что хотите удалить этот тип использования?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            
+            if reply == QMessageBox.StandardButton.Yes:
+                try:
+                    # Удаляем тип использования через контроллер
+                    if self.main_window.controller:
+                        self.main_window.controller.delete_usage_type(usage_type_id)
+                        # Обновляем таблицу
+                        self.reload_usage_types()
+                except Exception as e:
+                    QMessageBox.critical(self, "Ошибка", f"Не удалось удалить тип использования: {str(e)}")
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите тип использования для удаления")
@@ -7,6 +7,8 @@ from PyQt6.QtGui import QIcon, QPixmap
 import re
 import os
 
+from utils.code_export import to_gs1
+
 class BaseDialog(QDialog):
     """Базовый класс для диалоговых окон"""
     def __init__(self, parent=None):
@@ -423,19 +425,9 @@ class DisplayCodesDialog(QDialog):
             return
         
         try:
-            # Восстанавливаем реальные символы GS1 перед записью в файл
-            processed_codes = []
-            for code in self.codes:
-                # Проверяем наличие текстового представления символа GS1
-                if '[GS]' in code:
-                    # Заменяем текстовое представление на фактический символ GS1 (ASCII 29, \u001d)
-                    processed_code = code.replace('[GS]', '\u001d')
-                else:
-                    processed_code = code
-                processed_codes.append(processed_code)
-            
+            # Восстанавливаем реальные символы GS1 и пишем коды построчно, без промежуточного списка
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("\n".join(processed_codes))
+                f.write("\n".join(to_gs1(code) for code in self.codes))
             QMessageBox.information(self, "Информация", f"Коды успешно экспортированы в файл: {filepath}")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {str(e)}")
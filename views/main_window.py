@@ -1,17 +1,20 @@
 from PyQt6.QtWidgets import (QMainWindow, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout,
-                         QTableWidget, QTableWidgetItem, QComboBox, QFormLayout,
+                         QTableWidget, QTableWidgetItem, QComboBox,
                          QLineEdit, QPushButton, QLabel, QMessageBox, QHeaderView,
-                         QCheckBox, QGroupBox, QSpinBox, QDateEdit, QFileDialog, QMenu,
-                         QDialog, QDialogButtonBox, QSplitter, QTextEdit, QInputDialog)
-from PyQt6.QtCore import Qt, QDate, pyqtSignal, QPoint, QDateTime, QTimer
+                         QCheckBox, QFileDialog, QMenu,
+                         QDialog, QSplitter, QTextEdit, QInputDialog,
+                         QProgressDialog, QApplication)
+from PyQt6.QtCore import Qt, pyqtSignal, QPoint, QDateTime, QTimer
 from PyQt6.QtGui import QAction, QCursor, QColor, QIntValidator
 
-from views.dialogs import EmissionOrderDialog, DisplayCodesDialog
-from .dialogs import ConnectionDialog, CredentialsDialog, NomenclatureDialog, GetKMDialog, BaseDialog
+# Диалоги (views.dialogs, views.catalogs_dialog, views.settings_dialog, views.report_dialogs)
+# импортируются при первом открытии, чтобы не замедлять запуск приложения
 import logging
 import datetime
 import json
-from models.models import Extension, Nomenclature, EmissionType, Country
+from models.models import Extension, Nomenclature, EmissionType, Country, CodeStatus
+from utils.code_export import EXPORT_FORMATS
+from utils.outbox import OUTBOX_KINDS
 from typing import List
 import os
 import sys
@@ -62,6 +65,7 @@ class MainWindow(QMainWindow):
     edit_nomenclature_signal = pyqtSignal(int, str, str, str)  # id, name, gtin, product_group
     delete_nomenclature_signal = pyqtSignal(int)
     search_nomenclature_signal = pyqtSignal(str)  # search_query
+    import_nomenclature_signal = pyqtSignal(str)  # file_path
     
     # Сигналы для работы с расширениями API
     set_active_extension_signal = pyqtSignal(int)
@@ -71,6 +75,7 @@ class MainWindow(QMainWindow):
     
     # Сигналы для работы с логами API
     load_api_logs_signal = pyqtSignal()
+    search_api_logs_signal = pyqtSignal(str)  # query
     get_api_log_details_signal = pyqtSignal(int, object, object)  # id, callback_request, callback_response
     export_api_descriptions_signal = pyqtSignal()  # Сигнал для экспорта описаний API в файл
     
@@ -104,17 +109,35 @@ class MainWindow(QMainWindow):
     add_marking_codes_signal = pyqtSignal(list, str, str)  # codes, gtin, order_id
     delete_marking_codes_signal = pyqtSignal(list)  # code_ids
     export_marking_codes_signal = pyqtSignal(list, str)  # code_ids, export_path
+    export_marking_codes_by_filter_signal = pyqtSignal(dict, str, str)  # filters, export_path, export_format
     
     # Сигналы для работы с файлами агрегации
     load_aggregation_files_signal = pyqtSignal()  # Сигнал для загрузки файлов агрегации
     add_aggregation_file_signal = pyqtSignal(str, dict, str)  # filename, data, comment
+    import_aggregation_file_signal = pyqtSignal(str, str)  # file_path, comment
+    import_aggregation_folder_signal = pyqtSignal(str, str)  # folder_path, comment
     delete_aggregation_file_signal = pyqtSignal(int)  # file_id
     export_aggregation_file_signal = pyqtSignal(int, str)  # file_id, export_path
     send_utilisation_report_signal = pyqtSignal(dict)  # data
+    resume_utilisation_reports_signal = pyqtSignal()  # Дослать неотправленные части отчетов о нанесении
+    
+    # Сигналы для очереди отправки
+    load_outbox_signal = pyqtSignal()
+    replay_outbox_signal = pyqtSignal()
+    retry_outbox_item_signal = pyqtSignal(int)  # item_id
+    delete_outbox_item_signal = pyqtSignal(int)  # item_id
+    
+    # Первое открытие вкладки (данные вкладки загружаются при первом открытии)
+    tab_activated_signal = pyqtSignal(str)  # tab_name
     check_report_status_signal = pyqtSignal(int, str)  # file_id, report_id
     check_aggregation_status_signal = pyqtSignal(int, str)  # file_id, aggregation_report_id
     send_aggregation_report_signal = pyqtSignal(dict)  # data - сигнал для отправки отчета об агрегации
     
+    # Сигналы для панели производительности
+    load_performance_signal = pyqtSignal()
+    save_performance_settings_signal = pyqtSignal(dict)  # perf_tracing, perf_slow_ms, perf_profile_operation, perf_profiler
+    clear_performance_signal = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Управление заказами")
@@ -142,6 +165,8 @@ class MainWindow(QMainWindow):
         self.create_order_statuses_tab()
         self.create_marking_codes_tab()
         self.create_aggregation_files_tab()  # Добавляем новую вкладку
+        self.create_outbox_tab()
+        self.create_performance_tab()
         
         # Добавляем вкладки в виджет (только те, которые должны быть видны)
         self.tabs.addTab(self.orders_tab, "Заказы")
@@ -149,6 +174,20 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.api_logs_tab, "Логи API")
         self.tabs.addTab(self.marking_codes_tab, "Коды маркировки")
         self.tabs.addTab(self.aggregation_files_tab, "Файлы агрегации")  # Добавляем новую вкладку
+        self.tabs.addTab(self.outbox_tab, "Очередь отправки")
+        self.tabs.addTab(self.performance_tab, "Производительность")
+        
+        # Имена вкладок для отложенной загрузки данных и множество уже открытых вкладок
+        self.tab_names = {
+            self.orders_tab: "orders",
+            self.api_orders_tab: "api_orders",
+            self.api_logs_tab: "api_logs",
+            self.marking_codes_tab: "marking_codes",
+            self.aggregation_files_tab: "aggregation_files",
+            self.outbox_tab: "outbox",
+            self.performance_tab: "performance",
+        }
+        self.loaded_tabs = set()
         
         # Создаем панель кнопок для вызова модальных окон
         toolbar = self.addToolBar("Панель инструментов")
@@ -168,6 +207,12 @@ class MainWindow(QMainWindow):
     
     def on_tab_changed(self, index):
         """Обработчик изменения активной вкладки в главном окне"""
+        # При первом открытии вкладки контроллер загружает ее данные
+        tab_name = self.tab_names.get(self.tabs.widget(index))
+        if tab_name and tab_name not in self.loaded_tabs:
+            self.loaded_tabs.add(tab_name)
+            self.tab_activated_signal.emit(tab_name)
+        
         # Обновляем данные в зависимости от выбранной вкладки
         if index == 0:  # Заказы
             pass  # Обновление происходит через сигналы
@@ -180,6 +225,14 @@ class MainWindow(QMainWindow):
         elif index == 4:  # Файлы агрегации
             self.load_aggregation_files_signal.emit()
     
+    def activate_current_tab(self):
+        """Загрузка данных текущей вкладки (вызывается после показа окна)"""
+        self.on_tab_changed(self.tabs.currentIndex())
+    
+    def is_tab_loaded(self, tab_name):
+        """Признак того, что вкладка уже открывалась и ее данные загружены"""
+        return tab_name in self.loaded_tabs
+    
     def create_status_bar(self):
         """Создание строки статуса с индикатором доступности API"""
         status_bar = self.statusBar()
@@ -267,6 +320,19 @@ class MainWindow(QMainWindow):
         # Добавляем слой с фильтрами в основной слой
         layout.addLayout(filters_layout)
         
+        # Поиск по содержимому запросов и ответов (код маркировки, reportId и т.п.)
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Поиск в запросах и ответах:"))
+        self.api_logs_search_edit = QLineEdit()
+        self.api_logs_search_edit.setPlaceholderText("Код маркировки, reportId, orderId...")
+        self.api_logs_search_edit.setClearButtonEnabled(True)
+        self.api_logs_search_edit.returnPressed.connect(self.on_search_api_logs)
+        search_layout.addWidget(self.api_logs_search_edit)
+        search_button = QPushButton("Найти")
+        search_button.clicked.connect(self.on_search_api_logs)
+        search_layout.addWidget(search_button)
+        layout.addLayout(search_layout)
+        
         # Создаем два виджета - для таблицы логов и просмотра деталей
         splitter = QSplitter(Qt.Orientation.Vertical)
         logs_widget = QWidget()
@@ -317,11 +383,16 @@ class MainWindow(QMainWindow):
         # Храним полный список логов для фильтрации
         self.all_api_logs = []
     
+    def on_search_api_logs(self):
+        """Обработчик поиска по содержимому логов API; пустой запрос возвращает последние записи"""
+        self.search_api_logs_signal.emit(self.api_logs_search_edit.text().strip())
+    
     def on_refresh_api_logs(self):
         """Обработчик нажатия кнопки обновления логов API"""
-        # Сбрасываем фильтры перед обновлением
+        # Сбрасываем фильтры и строку поиска перед обновлением
         self.http_method_filter.setCurrentIndex(0)
         self.api_method_filter.setCurrentIndex(0)
+        self.api_logs_search_edit.clear()
         
         # Загружаем логи API
         self.load_api_logs_signal.emit()
@@ -821,6 +892,7 @@ class MainWindow(QMainWindow):
     
     def on_add_connection_clicked(self):
         """Обработчик нажатия кнопки добавления подключения"""
+        from views.dialogs import ConnectionDialog
         dialog = ConnectionDialog(self)
         if dialog.exec():
             data = dialog.get_data()
@@ -834,6 +906,7 @@ class MainWindow(QMainWindow):
             name = self.connections_table.item(row, 1).text()
             url = self.connections_table.item(row, 2).text()
             
+            from views.dialogs import ConnectionDialog
             dialog = ConnectionDialog(self)
             # Заполняем поля текущими значениями
             dialog.name_input.setText(name)
@@ -865,6 +938,7 @@ class MainWindow(QMainWindow):
     
     def on_add_credentials_clicked(self):
         """Обработчик нажатия кнопки добавления учетных данных"""
+        from views.dialogs import CredentialsDialog
         dialog = CredentialsDialog(self)
         if dialog.exec():
             data = dialog.get_data()
@@ -896,6 +970,7 @@ class MainWindow(QMainWindow):
             inn = self.credentials_table.item(row, 4).text() if self.credentials_table.item(row, 4) else ""
             
             # Открываем диалог редактирования
+            from views.dialogs import CredentialsDialog
             dialog = CredentialsDialog(self, {"omsid": omsid, "token": token, "gln": gln, "inn": inn})
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 data = dialog.get_data()
@@ -942,6 +1017,7 @@ class MainWindow(QMainWindow):
             is_active = source_table.item(row, 3).text() == "Да"
             extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
         
+        from views.dialogs import NomenclatureDialog
         dialog = NomenclatureDialog(self, extensions=extensions)
         if dialog.exec():
             data = dialog.get_data()
@@ -970,6 +1046,7 @@ class MainWindow(QMainWindow):
                 extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
             
             # Открываем диалог редактирования
+            from views.dialogs import NomenclatureDialog
             dialog = NomenclatureDialog(self, nomenclature=nomenclature, extensions=extensions)
             if dialog.exec():
                 data = dialog.get_data()
@@ -1345,11 +1422,13 @@ class MainWindow(QMainWindow):
 
     def show_catalogs_dialog(self):
         """Показать диалог справочников"""
+        from views.catalogs_dialog import CatalogsDialog
         dialog = CatalogsDialog(self)
         dialog.exec()
     
     def show_settings_dialog(self):
         """Показать диалог настроек"""
+        from views.settings_dialog import SettingsDialog
         dialog = SettingsDialog(self)
         dialog.exec()
 
@@ -1418,6 +1497,23 @@ class MainWindow(QMainWindow):
         self.nomenclature_tab = QWidget()
         layout = QVBoxLayout(self.nomenclature_tab)
         
+        # Поиск запускается после паузы в наборе, а не на каждое нажатие клавиши
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Поиск:"))
+        self.nomenclature_search_edit = QLineEdit()
+        self.nomenclature_search_edit.setPlaceholderText("Название или GTIN")
+        self.nomenclature_search_edit.setClearButtonEnabled(True)
+        search_layout.addWidget(self.nomenclature_search_edit)
+        layout.addLayout(search_layout)
+        
+        self.nomenclature_search_timer = QTimer(self)
+        self.nomenclature_search_timer.setSingleShot(True)
+        self.nomenclature_search_timer.setInterval(300)
+        self.nomenclature_search_timer.timeout.connect(
+            lambda: self.search_nomenclature_signal.emit(self.nomenclature_search_edit.text().strip())
+        )
+        self.nomenclature_search_edit.textChanged.connect(lambda _: self.nomenclature_search_timer.start())
+        
         # Создаем копию таблицы номенклатуры и подключаем данные
         self.nomenclature_table = QTableWidget()
         self.nomenclature_table.setColumnCount(4)
@@ -1439,8 +1535,20 @@ class MainWindow(QMainWindow):
         delete_button.clicked.connect(self.on_delete_nomenclature_clicked)
         buttons_layout.addWidget(delete_button)
         
+        import_button = QPushButton("Импорт из файла")
+        import_button.clicked.connect(self.on_import_nomenclature_clicked)
+        buttons_layout.addWidget(import_button)
+        
         layout.addLayout(buttons_layout)
     
+    def on_import_nomenclature_clicked(self):
+        """Обработчик нажатия кнопки импорта номенклатуры из CSV, XLSX или JSON"""
+        from utils.nomenclature_import import FILE_FILTER
+        
+        file_path, _ = QFileDialog.getOpenFileName(self, "Выберите файл номенклатуры", "", FILE_FILTER)
+        if file_path:
+            self.import_nomenclature_signal.emit(file_path)
+    
     def on_add_order_status_clicked(self):
         """Обработчик нажатия кнопки добавления статуса заказа"""
         from PyQt6.QtWidgets import QInputDialog, QLineEdit
@@ -1869,11 +1977,15 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(filters_layout)
         
+        # Количество кодов в пуле по статусам
+        self.code_status_counts_label = QLabel("")
+        layout.addWidget(self.code_status_counts_label)
+        
         # Таблица кодов маркировки
         self.marking_codes_table = QTableWidget()
-        self.marking_codes_table.setColumnCount(7)
+        self.marking_codes_table.setColumnCount(8)
         self.marking_codes_table.setHorizontalHeaderLabels([
-            "ID", "Код маркировки", "GTIN", "ID заказа", "Использован", "Экспортирован", "Создан"
+            "ID", "Код маркировки", "GTIN", "ID заказа", "Использован", "Экспортирован", "Создан", "Статус"
         ])
         layout.addWidget(self.marking_codes_table)
         
@@ -1888,6 +2000,10 @@ class MainWindow(QMainWindow):
         export_button.clicked.connect(self.on_export_marking_codes)
         buttons_layout.addWidget(export_button)
         
+        export_filter_button = QPushButton("Экспорт по фильтру")
+        export_filter_button.clicked.connect(self.on_export_marking_codes_by_filter)
+        buttons_layout.addWidget(export_filter_button)
+        
         mark_used_button = QPushButton("Отметить как использованные")
         mark_used_button.clicked.connect(self.on_mark_codes_as_used)
         buttons_layout.addWidget(mark_used_button)
@@ -1948,6 +2064,33 @@ class MainWindow(QMainWindow):
             if result:
                 self.mark_codes_as_exported_signal.emit(code_ids)
     
+    def on_export_marking_codes_by_filter(self):
+        """Обработчик нажатия кнопки экспорта всех кодов по текущему фильтру (GTIN, заказ)"""
+        gtin = self.gtin_filter.text().strip() or None
+        order_id = self.order_id_filter.text().strip() or None
+        
+        # Каждый флажок ограничивает выгрузку своим набором статусов, оба вместе - пересечением
+        statuses = None
+        if self.used_filter.isChecked():
+            statuses = set(CodeStatus.UNUSED)
+        if self.exported_filter.isChecked():
+            statuses = set(CodeStatus.NOT_EXPORTED) if statuses is None else statuses & set(CodeStatus.NOT_EXPORTED)
+        
+        default_filename = f"codes_{order_id or 'all'}_{gtin or 'all'}.txt"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Экспорт кодов маркировки", default_filename, ";;".join(EXPORT_FORMATS.values())
+        )
+        
+        if file_path:
+            export_format = next(
+                (code for code, name in EXPORT_FORMATS.items() if name == selected_filter),
+                "gs1"
+            )
+            self.export_marking_codes_by_filter_signal.emit(
+                {"gtin": gtin, "order_id": order_id,
+                 "statuses": sorted(statuses) if statuses is not None else None}, file_path, export_format
+            )
+    
     def on_mark_codes_as_used(self):
         """Обработчик нажатия кнопки отметки кодов как использованных"""
         # Получаем выбранные строки
@@ -2021,6 +2164,10 @@ class MainWindow(QMainWindow):
             
             # Создан
             self.marking_codes_table.setItem(i, 6, QTableWidgetItem(code_data["created_at"]))
+            
+            # Статус
+            status = code_data.get("status") or ""
+            self.marking_codes_table.setItem(i, 7, QTableWidgetItem(CodeStatus.get_description(status) if status else ""))
         
         # Подгоняем размеры колонок
         self.marking_codes_table.resizeColumnsToContents()
@@ -2031,6 +2178,269 @@ class MainWindow(QMainWindow):
         else:
             self.tabs.setTabText(self.tabs.indexOf(self.marking_codes_tab), "Коды маркировки")
 
+    def update_code_status_counts(self, counts):
+        """Обновление сводки по количеству кодов маркировки в каждом статусе
+        
+        Args:
+            counts (List[Dict]): Записи order_id, gtin, status, count
+        """
+        totals = {}
+        for row in counts:
+            totals[row["status"]] = totals.get(row["status"], 0) + row["count"]
+        
+        if totals:
+            parts = [f"{CodeStatus.get_description(status)}: {count}" for status, count in sorted(totals.items())]
+            self.code_status_counts_label.setText("Коды в пуле - " + ", ".join(parts))
+        else:
+            self.code_status_counts_label.setText("")
+
+    def create_outbox_tab(self):
+        """Создание вкладки очереди отправки запросов к СУЗ"""
+        self.outbox_tab = QWidget()
+        layout = QVBoxLayout(self.outbox_tab)
+        
+        layout.addWidget(QLabel(
+            "Запросы, не отправленные из-за ошибки соединения. Отправляются автоматически, "
+            "когда СУЗ снова доступна."
+        ))
+        
+        # Таблица записей очереди
+        self.outbox_table = QTableWidget()
+        self.outbox_table.setColumnCount(8)
+        self.outbox_table.setHorizontalHeaderLabels([
+            "ID", "Тип", "Статус", "Попыток", "Следующая попытка", "Ошибка", "Создан", "Обновлен"
+        ])
+        self.outbox_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.outbox_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.outbox_table)
+        
+        # Кнопки управления очередью
+        button_layout = QHBoxLayout()
+        
+        replay_button = QPushButton("Отправить сейчас")
+        replay_button.clicked.connect(self.replay_outbox_signal.emit)
+        button_layout.addWidget(replay_button)
+        
+        retry_button = QPushButton("Повторить выбранный")
+        retry_button.clicked.connect(self.on_retry_outbox_item)
+        button_layout.addWidget(retry_button)
+        
+        delete_button = QPushButton("Удалить выбранный")
+        delete_button.clicked.connect(self.on_delete_outbox_item)
+        button_layout.addWidget(delete_button)
+        
+        refresh_button = QPushButton("Обновить")
+        refresh_button.clicked.connect(self.load_outbox_signal.emit)
+        button_layout.addWidget(refresh_button)
+        
+        layout.addLayout(button_layout)
+    
+    def update_outbox_table(self, items):
+        """Обновление таблицы очереди отправки
+        
+        Args:
+            items (List[dict]): Записи очереди отправки
+        """
+        self.outbox_table.setRowCount(len(items))
+        status_names = {"PENDING": "Ожидает", "SENT": "Отправлен", "FAILED": "Отклонен"}
+        status_colors = {"PENDING": QColor(255, 255, 200), "SENT": QColor(200, 255, 200), "FAILED": QColor(255, 200, 200)}
+        
+        for row, item in enumerate(items):
+            next_attempt = ""
+            if item["status"] == "PENDING" and item["next_attempt_at"]:
+                next_attempt = datetime.datetime.fromtimestamp(item["next_attempt_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            
+            values = [
+                str(item["id"]),
+                OUTBOX_KINDS.get(item["kind"], item["kind"]),
+                status_names.get(item["status"], item["status"]),
+                str(item["attempts"]),
+                next_attempt,
+                item["last_error"] or "",
+                str(item["created_at"] or ""),
+                str(item["updated_at"] or ""),
+            ]
+            for column, value in enumerate(values):
+                self.outbox_table.setItem(row, column, QTableWidgetItem(value))
+            if item["status"] in status_colors:
+                self.outbox_table.item(row, 2).setBackground(status_colors[item["status"]])
+        
+        # Количество ожидающих запросов в заголовке вкладки
+        pending = sum(1 for item in items if item["status"] == "PENDING")
+        tab_index = self.tabs.indexOf(self.outbox_tab)
+        if tab_index >= 0:
+            self.tabs.setTabText(tab_index, f"Очередь отправки ({pending})" if pending else "Очередь отправки")
+    
+    def _selected_outbox_item_id(self):
+        """ID выбранной записи очереди отправки или None"""
+        selected = self.outbox_table.selectedItems()
+        if not selected:
+            QMessageBox.warning(self, "Предупреждение", "Выберите запись очереди отправки")
+            return None
+        return int(self.outbox_table.item(selected[0].row(), 0).text())
+    
+    def on_retry_outbox_item(self):
+        """Обработчик нажатия на кнопку 'Повторить выбранный'"""
+        item_id = self._selected_outbox_item_id()
+        if item_id is not None:
+            self.retry_outbox_item_signal.emit(item_id)
+    
+    def on_delete_outbox_item(self):
+        """Обработчик нажатия на кнопку 'Удалить выбранный'"""
+        item_id = self._selected_outbox_item_id()
+        if item_id is None:
+            return
+        if QMessageBox.question(
+            self,
+            "Подтверждение",
+            "Удалить запись из очереди? Запрос не будет отправлен в СУЗ.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        ) == QMessageBox.StandardButton.Yes:
+            self.delete_outbox_item_signal.emit(item_id)
+    
+    def create_performance_tab(self):
+        """Создание вкладки замера времени операций и профилирования"""
+        self.performance_tab = QWidget()
+        layout = QVBoxLayout(self.performance_tab)
+        
+        # Параметры замера
+        settings_layout = QHBoxLayout()
+        
+        self.perf_tracing_checkbox = QCheckBox("Замерять время операций")
+        settings_layout.addWidget(self.perf_tracing_checkbox)
+        
+        settings_layout.addWidget(QLabel("Порог медленной операции, мс:"))
+        self.perf_slow_ms_edit = QLineEdit()
+        self.perf_slow_ms_edit.setValidator(QIntValidator(0, 3600000))
+        self.perf_slow_ms_edit.setMaximumWidth(80)
+        settings_layout.addWidget(self.perf_slow_ms_edit)
+        
+        settings_layout.addWidget(QLabel("Профилировать следующий вызов:"))
+        self.perf_operation_combo = QComboBox()
+        self.perf_operation_combo.setMinimumWidth(300)
+        settings_layout.addWidget(self.perf_operation_combo)
+        
+        self.perf_profiler_combo = QComboBox()
+        self.perf_profiler_combo.addItem("cProfile", "cprofile")
+        self.perf_profiler_combo.addItem("pyinstrument", "pyinstrument")
+        settings_layout.addWidget(self.perf_profiler_combo)
+        
+        apply_button = QPushButton("Применить")
+        apply_button.clicked.connect(self.on_save_performance_settings)
+        settings_layout.addWidget(apply_button)
+        
+        settings_layout.addStretch()
+        layout.addLayout(settings_layout)
+        
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        
+        # Медленные операции (новые первыми)
+        slow_widget = QWidget()
+        slow_layout = QVBoxLayout(slow_widget)
+        slow_layout.setContentsMargins(0, 0, 0, 0)
+        slow_layout.addWidget(QLabel("Медленные операции:"))
+        self.perf_slow_table = QTableWidget()
+        self.perf_slow_table.setColumnCount(4)
+        self.perf_slow_table.setHorizontalHeaderLabels(["Время", "Операция", "Длительность, мс", "Поток"])
+        self.perf_slow_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.perf_slow_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        slow_layout.addWidget(self.perf_slow_table)
+        splitter.addWidget(slow_widget)
+        
+        # Сводка по операциям
+        stats_widget = QWidget()
+        stats_layout = QVBoxLayout(stats_widget)
+        stats_layout.setContentsMargins(0, 0, 0, 0)
+        stats_layout.addWidget(QLabel("Сводка по операциям:"))
+        self.perf_stats_table = QTableWidget()
+        self.perf_stats_table.setColumnCount(5)
+        self.perf_stats_table.setHorizontalHeaderLabels([
+            "Операция", "Вызовов", "Среднее, мс", "Максимум, мс", "Всего, мс"
+        ])
+        self.perf_stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.perf_stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        stats_layout.addWidget(self.perf_stats_table)
+        splitter.addWidget(stats_widget)
+        
+        layout.addWidget(splitter)
+        
+        # Сохраненные профили
+        self.perf_profiles_label = QLabel()
+        self.perf_profiles_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.perf_profiles_label)
+        
+        button_layout = QHBoxLayout()
+        
+        refresh_button = QPushButton("Обновить")
+        refresh_button.clicked.connect(self.load_performance_signal.emit)
+        button_layout.addWidget(refresh_button)
+        
+        clear_button = QPushButton("Очистить")
+        clear_button.clicked.connect(self.clear_performance_signal.emit)
+        button_layout.addWidget(clear_button)
+        
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+    
+    def update_performance_panel(self, data):
+        """Обновление вкладки производительности
+        
+        Args:
+            data (dict): Сводка PerformanceMonitor.snapshot() и список операций (operations)
+        """
+        self.perf_tracing_checkbox.setChecked(data["enabled"])
+        self.perf_slow_ms_edit.setText(str(int(data["slow_threshold_ms"])))
+        
+        profiler_index = self.perf_profiler_combo.findData(data["profiler"])
+        if profiler_index >= 0:
+            self.perf_profiler_combo.setCurrentIndex(profiler_index)
+        
+        self.perf_operation_combo.clear()
+        self.perf_operation_combo.addItem("Не профилировать", "")
+        for operation in data["operations"]:
+            self.perf_operation_combo.addItem(operation, operation)
+        operation_index = self.perf_operation_combo.findData(data["profile_operation"])
+        self.perf_operation_combo.setCurrentIndex(max(operation_index, 0))
+        
+        self.perf_slow_table.setRowCount(len(data["slow"]))
+        for row, item in enumerate(data["slow"]):
+            values = [
+                datetime.datetime.fromtimestamp(item["finished_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                item["name"],
+                f"{item['duration'] * 1000:.0f}",
+                item["thread"],
+            ]
+            for column, value in enumerate(values):
+                self.perf_slow_table.setItem(row, column, QTableWidgetItem(value))
+        
+        self.perf_stats_table.setRowCount(len(data["stats"]))
+        for row, item in enumerate(data["stats"]):
+            values = [
+                item["name"],
+                str(item["count"]),
+                f"{item['avg'] * 1000:.1f}",
+                f"{item['max'] * 1000:.1f}",
+                f"{item['total'] * 1000:.0f}",
+            ]
+            for column, value in enumerate(values):
+                self.perf_stats_table.setItem(row, column, QTableWidgetItem(value))
+        
+        if data["profiles"]:
+            self.perf_profiles_label.setText("Сохраненные профили:\n" + "\n".join(
+                f"{item['name']} ({item['duration'] * 1000:.0f} мс): {item['path']}" for item in data["profiles"]
+            ))
+        else:
+            self.perf_profiles_label.setText("Профили не сохранялись")
+    
+    def on_save_performance_settings(self):
+        """Обработчик нажатия на кнопку 'Применить' на вкладке производительности"""
+        self.save_performance_settings_signal.emit({
+            "perf_tracing": "1" if self.perf_tracing_checkbox.isChecked() else "0",
+            "perf_slow_ms": self.perf_slow_ms_edit.text() or "0",
+            "perf_profile_operation": self.perf_operation_combo.currentData() or "",
+            "perf_profiler": self.perf_profiler_combo.currentData(),
+        })
+    
     def create_aggregation_files_tab(self):
         """Создание вкладки для работы с файлами агрегации"""
         self.aggregation_files_tab = QWidget()
@@ -2059,6 +2469,11 @@ class MainWindow(QMainWindow):
         load_file_button.clicked.connect(self.on_load_aggregation_file)
         button_layout.addWidget(load_file_button)
         
+        # Кнопка для пакетной загрузки файлов из папки
+        load_folder_button = QPushButton("Загрузить папку")
+        load_folder_button.clicked.connect(self.on_load_aggregation_folder)
+        button_layout.addWidget(load_folder_button)
+        
         # Кнопка для отправки отчета о нанесении
         send_utilisation_report_button = QPushButton("Отчет о нанесении")
         send_utilisation_report_button.clicked.connect(self.on_send_utilisation_report)
@@ -2074,6 +2489,11 @@ class MainWindow(QMainWindow):
         check_aggregation_status_button.clicked.connect(self.on_check_aggregation_status)
         button_layout.addWidget(check_aggregation_status_button)
         
+        # Кнопка для повторной отправки неотправленных частей отчетов о нанесении
+        resume_utilisation_button = QPushButton("Дослать отчеты о нанесении")
+        resume_utilisation_button.clicked.connect(self.resume_utilisation_reports_signal.emit)
+        button_layout.addWidget(resume_utilisation_button)
+        
         # Кнопка для отправки отчета об агрегации
         send_aggregation_report_button = QPushButton("Отчет об агрегации")
         send_aggregation_report_button.clicked.connect(self.on_send_aggregation_report)
@@ -2167,6 +2587,7 @@ class MainWindow(QMainWindow):
         
         # Создаем диалог для предварительного просмотра и редактирования отчета
         # Передаем контроллер явно в качестве дополнительного параметра
+        from views.report_dialogs import UtilisationReportDialog
         dialog = UtilisationReportDialog(file_id, self, self.controller)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             # Получаем данные отчета из диалога
@@ -2191,6 +2612,7 @@ class MainWindow(QMainWindow):
         file_id = int(self.aggregation_files_table.item(row, 0).data(Qt.ItemDataRole.UserRole))
         
         # Создаем диалог для отправки отчета об агрегации
+        from views.report_dialogs import AggregationReportDialog
         dialog = AggregationReportDialog(file_id, self, self.controller)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             # Получаем данные отчета из диалога
@@ -2274,40 +2696,51 @@ class MainWindow(QMainWindow):
             )
             
             if ok:  # Пользователь нажал OK
-                try:
-                    # Получаем имя файла из пути
-                    filename = os.path.basename(file_path)
-                    
-                    # Читаем данные из JSON-файла
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        json_text = file.read()
-                    data = json.loads(json_text)
-                    
-                    # Логирование для отладки
-                    logging.info(f"Загружен файл: {filename}")
-                    logging.info(f"Содержимое файла: {json_text[:100]}...")  # Логируем первые 100 символов
-                    
-                    # Отправляем сигнал на добавление файла
-                    self.add_aggregation_file_signal.emit(filename, data, comment)
-                    
-                except json.JSONDecodeError as e:
-                    QMessageBox.critical(
-                        self,
-                        "Ошибка",
-                        f"Ошибка при разборе JSON-файла: {str(e)}"
-                    )
-                except Exception as e:
-                    QMessageBox.critical(
-                        self,
-                        "Ошибка",
-                        f"Ошибка при чтении файла: {str(e)}"
-                    )
+                # Файл читается и разбирается контроллером потоково, без загрузки документа в окне
+                logging.info(f"Загружен файл: {os.path.basename(file_path)}")
+                self.import_aggregation_file_signal.emit(file_path, comment)
+
+    def on_load_aggregation_folder(self):
+        """Обработчик нажатия на кнопку 'Загрузить папку'"""
+        folder_path = QFileDialog.getExistingDirectory(self, "Выберите папку с файлами агрегации")
+        
+        if folder_path:
+            comment, ok = QInputDialog.getText(
+                self,
+                "Комментарий",
+                "Введите комментарий к файлам:"
+            )
+            
+            if ok:
+                self.import_aggregation_folder_signal.emit(folder_path, comment)
+
+    def update_import_progress(self, current, total, filename):
+        """Отображение хода пакетного импорта файлов агрегации
+        
+        Args:
+            current (int): Количество обработанных файлов
+            total (int): Общее количество файлов
+            filename (str): Имя последнего обработанного файла
+        """
+        if getattr(self, "import_progress_dialog", None) is None:
+            self.import_progress_dialog = QProgressDialog("Импорт файлов агрегации...", None, 0, total, self)
+            self.import_progress_dialog.setWindowTitle("Импорт файлов агрегации")
+            self.import_progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+            self.import_progress_dialog.setMinimumDuration(0)
+        
+        self.import_progress_dialog.setLabelText(f"Обработано {current} из {total}: {filename}")
+        self.import_progress_dialog.setValue(current)
+        QApplication.processEvents()
+        
+        if current >= total:
+            self.import_progress_dialog.close()
+            self.import_progress_dialog = None
 
     def update_aggregation_files_table(self, files):
         """Обновление таблицы файлов агрегации
         
         Args:
-            files (List[AggregationFile]): Список объектов файлов агрегации
+            files (List[AggregationFileSummary]): Список сводок по файлам агрегации
         """
         # Логирование для отладки
         logging.info(f"Обновление таблицы файлов агрегации. Получено {len(files)} файлов.")
@@ -2328,16 +2761,13 @@ class MainWindow(QMainWindow):
             self.aggregation_files_table.setItem(row, 1, QTableWidgetItem(file.product or ""))
             
             # Количество кодов маркировки
-            marking_codes_count = len(file.marking_codes) if file.marking_codes else 0
-            self.aggregation_files_table.setItem(row, 2, QTableWidgetItem(str(marking_codes_count)))
+            self.aggregation_files_table.setItem(row, 2, QTableWidgetItem(str(file.marking_codes_count)))
             
             # Количество кодов агрегации 1 уровня
-            level1_codes_count = len(file.level1_codes) if file.level1_codes else 0
-            self.aggregation_files_table.setItem(row, 3, QTableWidgetItem(str(level1_codes_count)))
+            self.aggregation_files_table.setItem(row, 3, QTableWidgetItem(str(file.level1_count)))
             
             # Количество кодов агрегации 2 уровня
-            level2_codes_count = len(file.level2_codes) if file.level2_codes else 0
-            self.aggregation_files_table.setItem(row, 4, QTableWidgetItem(str(level2_codes_count)))
+            self.aggregation_files_table.setItem(row, 4, QTableWidgetItem(str(file.level2_count)))
             
             # Код отчета нанесения
             report_id = file.report_id or ""
@@ -2411,1677 +2841,3 @@ class MainWindow(QMainWindow):
         }
         
         return status_map.get(status, status)
-
-class CatalogsDialog(QDialog):
-    """Диалог для работы со справочниками"""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Справочники")
-        self.resize(800, 600)
-        
-        # Получаем ссылку на главное окно
-        self.main_window = parent
-        
-        # Подключаем сигналы главного окна к слотам обновления таблиц
-        self.main_window.add_nomenclature_signal.connect(self.reload_nomenclature)
-        self.main_window.edit_nomenclature_signal.connect(self.reload_nomenclature)
-        self.main_window.delete_nomenclature_signal.connect(self.reload_nomenclature)
-        self.main_window.set_active_extension_signal.connect(self.reload_extensions)
-        self.main_window.load_countries_signal.connect(self.reload_countries)
-        self.main_window.load_order_statuses_signal.connect(self.reload_order_statuses)
-        self.main_window.add_order_status_signal.connect(self.reload_order_statuses)
-        self.main_window.edit_order_status_signal.connect(self.reload_order_statuses)
-        self.main_window.delete_order_status_signal.connect(self.reload_order_statuses)
-        
-        layout = QVBoxLayout(self)
-        
-        # Создаем виджет с вкладками
-        self.tabs = QTabWidget()
-        layout.addWidget(self.tabs)
-        
-        # Создаем вкладки
-        self.create_nomenclature_tab()
-        self.create_extensions_tab()
-        self.create_countries_tab()
-        self.create_order_statuses_tab()
-        self.create_usage_types_tab()  # Новая вкладка для типов использования
-        
-        # Добавляем вкладки в виджет
-        self.tabs.addTab(self.nomenclature_tab, "Номенклатура")
-        self.tabs.addTab(self.extensions_tab, "Виды продукции")
-        self.tabs.addTab(self.countries_tab, "Страны")
-        self.tabs.addTab(self.order_statuses_tab, "Статусы заказов")
-        self.tabs.addTab(self.usage_types_tab, "Типы использования")  # Добавляем новую вкладку
-        
-        # Кнопки
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
-        
-        # Подключаем обработчик изменения активной вкладки
-        self.tabs.currentChanged.connect(self.on_tab_changed)
-    
-    def showEvent(self, event):
-        """Обработчик события показа диалога"""
-        # Обновляем данные всех таблиц при показе диалога
-        self.reload_nomenclature()
-        self.reload_extensions()
-        self.reload_countries()
-        self.reload_order_statuses()
-        self.reload_usage_types()  # Загружаем типы использования
-        super().showEvent(event)
-    
-    def on_tab_changed(self, index):
-        """Обработчик изменения активной вкладки"""
-        # Обновляем данные таблицы при переключении на нее
-        if index == 0:  # Номенклатура
-            self.reload_nomenclature()
-        elif index == 1:  # Расширения
-            self.reload_extensions()
-        elif index == 2:  # Страны
-            self.reload_countries()
-        elif index == 3:  # Статусы заказов
-            self.reload_order_statuses()
-        elif index == 4:  # Типы использования
-            self.reload_usage_types()
-
-    def create_nomenclature_tab(self):
-        """Создание вкладки номенклатуры"""
-        self.nomenclature_tab = QWidget()
-        layout = QVBoxLayout(self.nomenclature_tab)
-        
-        # Создаем копию таблицы номенклатуры и подключаем данные
-        self.nomenclature_table = QTableWidget()
-        self.nomenclature_table.setColumnCount(4)
-        self.nomenclature_table.setHorizontalHeaderLabels(["ID", "Название", "GTIN", "Описание"])
-        layout.addWidget(self.nomenclature_table)
-        
-        # Создаем кнопки для управления номенклатурой
-        buttons_layout = QHBoxLayout()
-        
-        add_button = QPushButton("Добавить")
-        add_button.clicked.connect(self.on_add_nomenclature_clicked)
-        buttons_layout.addWidget(add_button)
-        
-        edit_button = QPushButton("Изменить")
-        edit_button.clicked.connect(self.on_edit_nomenclature_clicked)
-        buttons_layout.addWidget(edit_button)
-        
-        delete_button = QPushButton("Удалить")
-        delete_button.clicked.connect(self.on_delete_nomenclature_clicked)
-        buttons_layout.addWidget(delete_button)
-        
-        layout.addLayout(buttons_layout)
-    
-    def create_extensions_tab(self):
-        """Создание вкладки расширений API"""
-        self.extensions_tab = QWidget()
-        layout = QVBoxLayout(self.extensions_tab)
-        
-        # Таблица расширений API
-        self.extensions_table = QTableWidget()
-        self.extensions_table.setColumnCount(4)
-        self.extensions_table.setHorizontalHeaderLabels(["ID", "Название", "Код", "Активный"])
-        layout.addWidget(self.extensions_table)
-        
-        # Кнопки управления расширениями API
-        buttons_layout = QHBoxLayout()
-        
-        set_active_button = QPushButton("Установить активным")
-        set_active_button.clicked.connect(self.on_set_active_extension)
-        buttons_layout.addWidget(set_active_button)
-        
-        layout.addLayout(buttons_layout)
-    
-    def on_set_active_extension(self):
-        """Обработчик нажатия кнопки установки активного расширения"""
-        row = self.extensions_table.currentRow()
-        if row >= 0:
-            extension_id = int(self.extensions_table.item(row, 0).text())
-            self.main_window.set_active_extension_signal.emit(extension_id)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите вид продукции для активации")
-    
-    def reload_extensions(self, *args):
-        """Обновить таблицу расширений в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.extensions_table
-        self.extensions_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.extensions_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.extensions_table.resizeColumnsToContents()
-    
-    def create_countries_tab(self):
-        """Создание вкладки стран"""
-        self.countries_tab = QWidget()
-        layout = QVBoxLayout(self.countries_tab)
-        
-        # Таблица стран
-        self.countries_table = QTableWidget()
-        self.countries_table.setColumnCount(3)
-        self.countries_table.setHorizontalHeaderLabels(["ID", "Код", "Название"])
-        layout.addWidget(self.countries_table)
-        
-        # В этой вкладке обычно нет кнопок управления, так как
-        # список стран обычно загружается из API и не редактируется пользователем
-    
-    def create_order_statuses_tab(self):
-        """Создание вкладки статусов заказов"""
-        self.order_statuses_tab = QWidget()
-        layout = QVBoxLayout(self.order_statuses_tab)
-        
-        # Таблица статусов заказов
-        self.order_statuses_table = QTableWidget()
-        self.order_statuses_table.setColumnCount(4)
-        self.order_statuses_table.setHorizontalHeaderLabels(["ID", "Код", "Название", "Описание"])
-        layout.addWidget(self.order_statuses_table)
-        
-        # Кнопки управления статусами
-        buttons_layout = QHBoxLayout()
-        
-        refresh_button = QPushButton("Обновить")
-        refresh_button.clicked.connect(lambda: self.main_window.load_order_statuses_signal.emit())
-        buttons_layout.addWidget(refresh_button)
-        
-        add_button = QPushButton("Добавить")
-        add_button.clicked.connect(self.on_add_order_status_clicked)
-        buttons_layout.addWidget(add_button)
-        
-        edit_button = QPushButton("Изменить")
-        edit_button.clicked.connect(self.on_edit_order_status_clicked)
-        buttons_layout.addWidget(edit_button)
-        
-        delete_button = QPushButton("Удалить")
-        delete_button.clicked.connect(self.on_delete_order_status_clicked)
-        buttons_layout.addWidget(delete_button)
-        
-        layout.addLayout(buttons_layout)
-        
-    def reload_countries(self, *args):
-        """Обновить таблицу стран в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.countries_table
-        self.countries_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.countries_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.countries_table.resizeColumnsToContents()
-    
-    def reload_nomenclature(self, *args):
-        """Обновить таблицу номенклатуры в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.nomenclature_table
-        self.nomenclature_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.nomenclature_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.nomenclature_table.resizeColumnsToContents()
-    
-    def reload_order_statuses(self, *args):
-        """Обновить таблицу статусов заказов в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.order_statuses_table
-        self.order_statuses_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.order_statuses_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.order_statuses_table.resizeColumnsToContents()
-
-    def on_add_nomenclature_clicked(self):
-        """Обработчик нажатия кнопки добавления номенклатуры в диалоге Справочники"""
-        # Получаем список расширений API
-        extensions = []
-        source_table = self.main_window.extensions_table
-        for row in range(source_table.rowCount()):
-            extension_id = int(source_table.item(row, 0).text())
-            extension_name = source_table.item(row, 1).text()
-            extension_code = source_table.item(row, 2).text()
-            is_active = source_table.item(row, 3).text() == "Да"
-            extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
-        
-        dialog = NomenclatureDialog(self, extensions=extensions)
-        if dialog.exec():
-            data = dialog.get_data()
-            self.main_window.add_nomenclature_signal.emit(data['name'], data['gtin'], data['product_group'])
-    
-    def on_edit_nomenclature_clicked(self):
-        """Обработчик нажатия кнопки редактирования номенклатуры в диалоге Справочники"""
-        row = self.nomenclature_table.currentRow()
-        if row >= 0:
-            nomenclature_id = int(self.nomenclature_table.item(row, 0).text())
-            name = self.nomenclature_table.item(row, 1).text()
-            gtin = self.nomenclature_table.item(row, 2).text()
-            product_group = self.nomenclature_table.item(row, 3).text() if self.nomenclature_table.item(row, 3) else ""
-            
-            # Создаем объект номенклатуры
-            nomenclature = Nomenclature(nomenclature_id, name, gtin, product_group)
-            
-            # Получаем список расширений API перед открытием диалога
-            extensions = []
-            source_table = self.main_window.extensions_table
-            for row in range(source_table.rowCount()):
-                extension_id = int(source_table.item(row, 0).text())
-                extension_name = source_table.item(row, 1).text()
-                extension_code = source_table.item(row, 2).text()
-                is_active = source_table.item(row, 3).text() == "Да"
-                extensions.append(Extension(extension_id, extension_code, extension_name, is_active))
-            
-            # Открываем диалог редактирования
-            dialog = NomenclatureDialog(self, nomenclature=nomenclature, extensions=extensions)
-            if dialog.exec():
-                data = dialog.get_data()
-                self.main_window.edit_nomenclature_signal.emit(nomenclature_id, data['name'], data['gtin'], data['product_group'])
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите номенклатуру для редактирования")
-    
-    def on_delete_nomenclature_clicked(self):
-        """Обработчик нажатия кнопки удаления номенклатуры в диалоге Справочники"""
-        row = self.nomenclature_table.currentRow()
-        if row >= 0:
-            nomenclature_id = int(self.nomenclature_table.item(row, 0).text())
-            self.main_window.delete_nomenclature_signal.emit(nomenclature_id)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите номенклатуру для удаления")
-    
-    def on_add_order_status_clicked(self):
-        """Обработчик нажатия кнопки добавления статуса заказа"""
-        from PyQt6.QtWidgets import QInputDialog, QLineEdit
-        
-        # Запрашиваем код статуса
-        code, ok = QInputDialog.getText(
-            self, "Добавление статуса заказа", "Введите код статуса:", QLineEdit.EchoMode.Normal
-        )
-        
-        if ok and code:
-            # Запрашиваем название статуса
-            name, ok = QInputDialog.getText(
-                self, "Добавление статуса заказа", "Введите название статуса:", QLineEdit.EchoMode.Normal
-            )
-            
-            if ok and name:
-                # Запрашиваем описание статуса
-                description, ok = QInputDialog.getText(
-                    self, "Добавление статуса заказа", "Введите описание статуса:", QLineEdit.EchoMode.Normal
-                )
-                
-                if ok:
-                    # Вызываем сигнал добавления статуса
-                    self.main_window.add_order_status_signal.emit(code, name, description)
-    
-    def on_edit_order_status_clicked(self):
-        """Обработчик нажатия кнопки редактирования статуса заказа"""
-        from PyQt6.QtWidgets import QInputDialog, QLineEdit
-        
-        row = self.order_statuses_table.currentRow()
-        if row >= 0:
-            status_id = int(self.order_statuses_table.item(row, 0).text())
-            code = self.order_statuses_table.item(row, 1).text()
-            name = self.order_statuses_table.item(row, 2).text()
-            description = self.order_statuses_table.item(row, 3).text() if self.order_statuses_table.item(row, 3) else ""
-            
-            # Запрашиваем новый код статуса
-            new_code, ok = QInputDialog.getText(
-                self, "Редактирование статуса заказа", "Введите код статуса:", QLineEdit.EchoMode.Normal, code
-            )
-            
-            if ok and new_code:
-                # Запрашиваем новое название статуса
-                new_name, ok = QInputDialog.getText(
-                    self, "Редактирование статуса заказа", "Введите название статуса:", QLineEdit.EchoMode.Normal, name
-                )
-                
-                if ok and new_name:
-                    # Запрашиваем новое описание статуса
-                    new_description, ok = QInputDialog.getText(
-                        self, "Редактирование статуса заказа", "Введите описание статуса:", QLineEdit.EchoMode.Normal, description
-                    )
-                    
-                    if ok:
-                        # Вызываем сигнал редактирования статуса из главного окна
-                        self.main_window.edit_order_status_signal.emit(status_id, new_code, new_name, new_description)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите статус заказа для редактирования")
-    
-    def on_delete_order_status_clicked(self):
-        """Обработчик нажатия кнопки удаления статуса заказа"""
-        row = self.order_statuses_table.currentRow()
-        if row >= 0:
-            status_id = int(self.order_statuses_table.item(row, 0).text())
-            
-            # Запрашиваем подтверждение
-            reply = QMessageBox.question(
-                self, "Подтверждение удаления", 
-                "Вы уверены, что хотите удалить этот статус заказа?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                QMessageBox.StandardButton.No
-            )
-            
-            if reply == QMessageBox.StandardButton.Yes:
-                # Вызываем сигнал удаления статуса из главного окна
-                self.main_window.delete_order_status_signal.emit(status_id)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите статус заказа для удаления")
-
-    def create_usage_types_tab(self):
-        """Создание вкладки типов использования кодов маркировки"""
-        self.usage_types_tab = QWidget()
-        layout = QVBoxLayout(self.usage_types_tab)
-        
-        # Таблица типов использования
-        self.usage_types_table = QTableWidget()
-        self.usage_types_table.setColumnCount(4)
-        self.usage_types_table.setHorizontalHeaderLabels(["ID", "Код", "Название", "Описание"])
-        layout.addWidget(self.usage_types_table)
-        
-        # Кнопки управления
-        buttons_layout = QHBoxLayout()
-        
-        refresh_button = QPushButton("Обновить")
-        refresh_button.clicked.connect(self.reload_usage_types)
-        buttons_layout.addWidget(refresh_button)
-        
-        add_button = QPushButton("Добавить")
-        add_button.clicked.connect(self.on_add_usage_type_clicked)
-        buttons_layout.addWidget(add_button)
-        
-        edit_button = QPushButton("Изменить")
-        edit_button.clicked.connect(self.on_edit_usage_type_clicked)
-        buttons_layout.addWidget(edit_button)
-        
-        delete_button = QPushButton("Удалить")
-        delete_button.clicked.connect(self.on_delete_usage_type_clicked)
-        buttons_layout.addWidget(delete_button)
-        
-        layout.addLayout(buttons_layout)
-    
-    def reload_usage_types(self, *args):
-        """Обновить таблицу типов использования кодов маркировки"""
-        try:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.info("Загрузка типов использования кодов маркировки")
-            
-            # Получаем данные из базы через контроллер главного окна
-            if not hasattr(self.main_window, 'controller') or not self.main_window.controller:
-                logger.error("Отсутствует контроллер")
-                return
-            
-            # Получаем типы использования через метод контроллера
-            usage_types = self.main_window.controller.load_usage_types()
-            
-            # Очищаем таблицу
-            self.usage_types_table.setRowCount(0)
-            
-            # Заполняем таблицу данными
-            for i, usage_type in enumerate(usage_types):
-                self.usage_types_table.insertRow(i)
-                
-                # ID
-                id_item = QTableWidgetItem(str(usage_type.id))
-                self.usage_types_table.setItem(i, 0, id_item)
-                
-                # Код
-                code_item = QTableWidgetItem(usage_type.code)
-                self.usage_types_table.setItem(i, 1, code_item)
-                
-                # Название
-                name_item = QTableWidgetItem(usage_type.name)
-                self.usage_types_table.setItem(i, 2, name_item)
-                
-                # Описание
-                description_item = QTableWidgetItem(usage_type.description or "")
-                self.usage_types_table.setItem(i, 3, description_item)
-            
-            # Подгоняем ширину колонок
-            self.usage_types_table.resizeColumnsToContents()
-            
-            logger.info(f"Загружено {len(usage_types)} типов использования")
-            
-        except Exception as e:
-            logger.error(f"Ошибка при загрузке типов использования: {str(e)}")
-            logger.exception("Подробная трассировка ошибки:")
-    
-    def on_add_usage_type_clicked(self):
-        """Обработчик нажатия кнопки добавления типа использования"""
-        from PyQt6.QtWidgets import QInputDialog, QLineEdit
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        logger.info("Попытка добавления типа использования")
-        
-        try:
-            # Запрашиваем код типа использования
-            code, ok = QInputDialog.getText(
-                self, "Добавление типа использования", "Введите код типа использования:", QLineEdit.EchoMode.Normal
-            )
-            
-            if ok and code:
-                # Запрашиваем название типа использования
-                name, ok = QInputDialog.getText(
-                    self, "Добавление типа использования", "Введите название типа использования:", QLineEdit.EchoMode.Normal
-                )
-                
-                if ok and name:
-                    # Запрашиваем описание типа использования
-                    description, ok = QInputDialog.getText(
-                        self, "Добавление типа использования", "Введите описание типа использования:", QLineEdit.EchoMode.Normal
-                    )
-                    
-                    if ok:
-                        # Проверка ввода
-                        if not code.strip():
-                            logger.error("Код типа использования не может быть пустым")
-                            QMessageBox.critical(self, "Ошибка", "Код типа использования не может быть пустым")
-                            return
-                        
-                        if not name.strip():
-                            logger.error("Название типа использования не может быть пустым")
-                            QMessageBox.critical(self, "Ошибка", "Название типа использования не может быть пустым")
-                            return
-                        
-                        # Добавляем тип использования через сигнал главного окна
-                        logger.info(f"Отправка сигнала add_usage_type_signal: код={code}, название={name}")
-                        self.main_window.add_usage_type_signal.emit(code, name, description or "")
-                        
-                        # Обновляем таблицу через некоторое время, чтобы дать время контроллеру обработать запрос
-                        QTimer.singleShot(500, self.reload_usage_types)
-        except Exception as e:
-            logger.exception(f"Исключение при добавлении типа использования: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить тип использования: {str(e)}")
-    
-    def on_edit_usage_type_clicked(self):
-        """Обработчик нажатия кнопки редактирования типа использования"""
-        from PyQt6.QtWidgets import QInputDialog, QLineEdit
-        
-        row = self.usage_types_table.currentRow()
-        if row >= 0:
-            usage_type_id = int(self.usage_types_table.item(row, 0).text())
-            code = self.usage_types_table.item(row, 1).text()
-            name = self.usage_types_table.item(row, 2).text()
-            description = self.usage_types_table.item(row, 3).text() if self.usage_types_table.item(row, 3) else ""
-            
-            # Запрашиваем новый код типа использования
-            new_code, ok = QInputDialog.getText(
-                self, "Редактирование типа использования", "Введите код типа использования:", QLineEdit.EchoMode.Normal, code
-            )
-            
-            if ok and new_code:
-                # Запрашиваем новое название типа использования
-                new_name, ok = QInputDialog.getText(
-                    self, "Редактирование типа использования", "Введите название типа использования:", QLineEdit.EchoMode.Normal, name
-                )
-                
-                if ok and new_name:
-                    # Запрашиваем новое описание типа использования
-                    new_description, ok = QInputDialog.getText(
-                        self, "Редактирование типа использования", "Введите описание типа использования:", QLineEdit.EchoMode.Normal, description
-                    )
-                    
-                    if ok:
-                        try:
-                            # Обновляем тип использования через контроллер
-                            if self.main_window.controller:
-                                self.main_window.controller.update_usage_type(usage_type_id, new_code, new_name, new_description)
-                                # Обновляем таблицу
-                                self.reload_usage_types()
-                        except Exception as e:
-                            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить тип использования: {str(e)}")
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите тип использования для редактирования")
-    
-    def on_delete_usage_type_clicked(self):
-        """Обработчик нажатия кнопки удаления типа использования"""
-        row = self.usage_types_table.currentRow()
-        if row >= 0:
-            usage_type_id = int(self.usage_types_table.item(row, 0).text())
-            
-            # Запрашиваем подтверждение
-            reply = QMessageBox.question(
-                self, "Подтверждение удаления", 
-                "Вы уверены, что хотите удалить этот тип использования?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                QMessageBox.StandardButton.No
-            )
-            
-            if reply == QMessageBox.StandardButton.Yes:
-                try:
-                    # Удаляем тип использования через контроллер
-                    if self.main_window.controller:
-                        self.main_window.controller.delete_usage_type(usage_type_id)
-                        # Обновляем таблицу
-                        self.reload_usage_types()
-                except Exception as e:
-                    QMessageBox.critical(self, "Ошибка", f"Не удалось удалить тип использования: {str(e)}")
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите тип использования для удаления")
-
-class SettingsDialog(QDialog):
-    """Диалог для работы с настройками"""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Настройки")
-        self.resize(800, 600)
-        
-        # Получаем ссылку на главное окно
-        self.main_window = parent
-        
-        # Подключаем сигналы главного окна к слотам обновления таблиц
-        self.main_window.add_connection_signal.connect(self.reload_connections)
-        self.main_window.edit_connection_signal.connect(self.reload_connections)
-        self.main_window.delete_connection_signal.connect(self.reload_connections)
-        self.main_window.set_active_connection_signal.connect(self.reload_connections)
-        self.main_window.add_credentials_signal.connect(self.reload_credentials)
-        self.main_window.edit_credentials_signal.connect(self.reload_credentials)
-        self.main_window.delete_credentials_signal.connect(self.reload_credentials)
-        
-        layout = QVBoxLayout(self)
-        
-        # Создаем виджет с вкладками
-        self.tabs = QTabWidget()
-        layout.addWidget(self.tabs)
-        
-        # Создаем вкладки
-        self.create_connections_tab()
-        self.create_credentials_tab()
-        self.create_general_settings_tab()
-        
-        # Добавляем вкладки в виджет
-        self.tabs.addTab(self.connections_tab, "Подключения")
-        self.tabs.addTab(self.credentials_tab, "Учетные данные")
-        self.tabs.addTab(self.general_settings_tab, "Общие настройки")
-        
-        # Кнопки Ok/Cancel
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
-
-        # Подключаем обработчик изменения активной вкладки
-        self.tabs.currentChanged.connect(self.on_tab_changed)
-    
-    def showEvent(self, event):
-        """Обработчик события показа диалога"""
-        # Обновляем данные всех таблиц при показе диалога
-        self.reload_connections()
-        self.reload_credentials()
-        super().showEvent(event)
-    
-    def on_tab_changed(self, index):
-        """Обработчик изменения активной вкладки"""
-        # Обновляем данные таблицы при переключении на нее
-        if index == 0:  # Подключения
-            self.reload_connections()
-        elif index == 1:  # Учетные данные
-            self.reload_credentials()
-
-    def create_connections_tab(self):
-        """Создание вкладки подключений"""
-        self.connections_tab = QWidget()
-        layout = QVBoxLayout(self.connections_tab)
-        
-        # Создаем копию таблицы подключений и подключаем данные
-        self.connections_table = QTableWidget()
-        self.connections_table.setColumnCount(4)
-        self.connections_table.setHorizontalHeaderLabels(["ID", "Название", "URL", "Активный"])
-        
-        # Первоначальное заполнение таблицы
-        self.reload_connections()
-        
-        layout.addWidget(self.connections_table)
-        
-        # Кнопки управления подключениями
-        buttons_layout = QHBoxLayout()
-        
-        add_button = QPushButton("Добавить")
-        add_button.clicked.connect(self.on_add_connection)
-        buttons_layout.addWidget(add_button)
-        
-        edit_button = QPushButton("Изменить")
-        edit_button.clicked.connect(self.on_edit_connection)
-        buttons_layout.addWidget(edit_button)
-        
-        delete_button = QPushButton("Удалить")
-        delete_button.clicked.connect(self.on_delete_connection)
-        buttons_layout.addWidget(delete_button)
-        
-        set_active_button = QPushButton("Установить активным")
-        set_active_button.clicked.connect(self.on_set_active_connection)
-        buttons_layout.addWidget(set_active_button)
-        
-        layout.addLayout(buttons_layout)
-    
-    def reload_connections(self, *args):
-        """Обновить таблицу подключений в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.connections_table
-        self.connections_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.connections_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.connections_table.resizeColumnsToContents()
-    
-    def on_add_connection(self):
-        """Обработчик нажатия кнопки добавления подключения в диалоге"""
-        from views.dialogs import ConnectionDialog
-        dialog = ConnectionDialog(self)
-        if dialog.exec():
-            data = dialog.get_data()
-            self.main_window.add_connection_signal.emit(data['name'], data['url'])
-    
-    def on_edit_connection(self):
-        """Обработчик нажатия кнопки редактирования подключения в диалоге"""
-        from views.dialogs import ConnectionDialog
-        row = self.connections_table.currentRow()
-        if row >= 0:
-            connection_id = int(self.connections_table.item(row, 0).text())
-            name = self.connections_table.item(row, 1).text()
-            url = self.connections_table.item(row, 2).text()
-            
-            dialog = ConnectionDialog(self)
-            # Заполняем поля текущими значениями
-            dialog.name_input.setText(name)
-            dialog.url_input.setText(url)
-            
-            if dialog.exec():
-                data = dialog.get_data()
-                self.main_window.edit_connection_signal.emit(connection_id, data['name'], data['url'])
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите подключение для редактирования")
-    
-    def on_delete_connection(self):
-        """Обработчик нажатия кнопки удаления подключения в диалоге"""
-        row = self.connections_table.currentRow()
-        if row >= 0:
-            connection_id = int(self.connections_table.item(row, 0).text())
-            self.main_window.delete_connection_signal.emit(connection_id)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите подключение для удаления")
-    
-    def on_set_active_connection(self):
-        """Обработчик нажатия кнопки установки активного подключения в диалоге"""
-        row = self.connections_table.currentRow()
-        if row >= 0:
-            connection_id = int(self.connections_table.item(row, 0).text())
-            self.main_window.set_active_connection_signal.emit(connection_id)
-        else:
-            QMessageBox.warning(self, "Ошибка", "Выберите подключение для активации")
-    
-    def create_credentials_tab(self):
-        """Создание вкладки учетных данных"""
-        self.credentials_tab = QWidget()
-        layout = QVBoxLayout(self.credentials_tab)
-        
-        # Создаем копию таблицы учетных данных и подключаем данные
-        self.credentials_table = QTableWidget()
-        self.credentials_table.setColumnCount(5)
-        self.credentials_table.setHorizontalHeaderLabels(["ID", "OMS ID", "Токен", "GLN", "INN"])
-        
-        # Первоначальное заполнение таблицы
-        self.reload_credentials()
-        
-        layout.addWidget(self.credentials_table)
-        
-        # Кнопки управления учетными данными
-        buttons_layout = QHBoxLayout()
-        
-        add_button = QPushButton("Добавить")
-        add_button.clicked.connect(self.on_add_credentials)
-        buttons_layout.addWidget(add_button)
-        
-        edit_button = QPushButton("Изменить")
-        edit_button.clicked.connect(self.on_edit_credentials)
-        buttons_layout.addWidget(edit_button)
-        
-        delete_button = QPushButton("Удалить")
-        delete_button.clicked.connect(self.on_delete_credentials)
-        buttons_layout.addWidget(delete_button)
-        
-        layout.addLayout(buttons_layout)
-    
-    def reload_credentials(self, *args):
-        """Обновить таблицу учетных данных в диалоге"""
-        # Копируем данные из таблицы главного окна
-        source_table = self.main_window.credentials_table
-        self.credentials_table.setRowCount(source_table.rowCount())
-        for row in range(source_table.rowCount()):
-            for col in range(source_table.columnCount()):
-                if source_table.item(row, col):
-                    self.credentials_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
-        self.credentials_table.resizeColumnsToContents()
-    
-    def on_add_credentials(self):
-        """Обработчик нажатия кнопки добавления учетных данных в диалоге"""
-        dialog = CredentialsDialog(self)
-        if dialog.exec():
-            data = dialog.get_data()
-            
-            # Получаем выбранное подключение, если оно есть
-            connection_id = None
-            row = self.connections_table.currentRow()
-            if row >= 0:
-                connection_id = int(self.connections_table.item(row, 0).text())
-            
-            # Вызываем сигнал в главном окне
-            self.main_window.add_credentials_signal.emit(data['omsid'], data['token'], data['gln'], data['inn'], connection_id)
-    
-    def on_edit_credentials(self):
-        """Обработчик нажатия кнопки редактирования учетных данных в диалоге"""
-        selected_rows = self.credentials_table.selectedItems()
-        if not selected_rows:
-            QMessageBox.warning(self, "Предупреждение", "Выберите учетные данные для редактирования")
-            return
-        
-        row = selected_rows[0].row()
-        
-        # Получаем данные из таблицы
-        try:
-            credentials_id = int(self.credentials_table.item(row, 0).text()) if self.credentials_table.item(row, 0) else 0
-            omsid = self.credentials_table.item(row, 1).text() if self.credentials_table.item(row, 1) else ""
-            token = self.credentials_table.item(row, 2).text() if self.credentials_table.item(row, 2) else ""
-            gln = self.credentials_table.item(row, 3).text() if self.credentials_table.item(row, 3) else ""
-            inn = self.credentials_table.item(row, 4).text() if self.credentials_table.item(row, 4) else ""
-            
-            # Открываем диалог редактирования
-            dialog = CredentialsDialog(self, {"omsid": omsid, "token": token, "gln": gln, "inn": inn})
-            if dialog.exec() == QDialog.DialogCode.Accepted:
-                data = dialog.get_data()
-                self.main_window.edit_credentials_signal.emit(credentials_id, data['omsid'], data['token'], data['gln'], data['inn'])
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Ошибка при редактировании учетных данных: {str(e)}")
-    
-    def on_delete_credentials(self):
-        """Обработчик нажатия кнопки удаления учетных данных в диалоге"""
-        selected_rows = self.credentials_table.selectedItems()
-        if not selected_rows:
-            QMessageBox.warning(self, "Предупреждение", "Выберите учетные данные для удаления")
-            return
-        
-        row = selected_rows[0].row()
-        
-        try:
-            # Получаем ID учетных данных
-            credentials_id = int(self.credentials_table.item(row, 0).text()) if self.credentials_table.item(row, 0) else 0
-            
-            # Запрашиваем подтверждение
-            msg_box = QMessageBox()
-            msg_box.setIcon(QMessageBox.Icon.Question)
-            msg_box.setText("Вы уверены, что хотите удалить эти учетные данные?")
-            msg_box.setWindowTitle("Подтверждение удаления")
-            msg_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-            msg_box.setDefaultButton(QMessageBox.StandardButton.No)
-            
-            if msg_box.exec() == QMessageBox.StandardButton.Yes:
-                # Вызываем сигнал удаления учетных данных
-                self.main_window.delete_credentials_signal.emit(credentials_id)
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Ошибка при удалении учетных данных: {str(e)}")
-    
-    def create_general_settings_tab(self):
-        """Создание вкладки общих настроек"""
-        self.general_settings_tab = QWidget()
-        layout = QVBoxLayout(self.general_settings_tab)
-        
-        # Пока вкладка пустая, добавляем заглушку
-        layout.addWidget(QLabel("Общие настройки находятся в разработке"))
-
-class UtilisationReportDialog(QDialog):
-    """Диалог для создания отчета о нанесении"""
-    
-    def __init__(self, file_id, parent=None, controller=None):
-        super().__init__(parent)
-        self.file_id = file_id
-        self.setWindowTitle("Отчет о нанесении")
-        self.setMinimumWidth(600)
-        self.setMinimumHeight(400)
-        
-        # Получаем данные о файле агрегации из контроллера
-        self.parent_window = parent
-        self.controller = controller  # Сохраняем ссылку на контроллер
-        self.file_data = None
-        
-        # Создаем макет
-        layout = QVBoxLayout(self)
-        
-        # Информация о файле
-        file_info_layout = QFormLayout()
-        self.file_name_label = QLabel("Загрузка...")
-        self.product_label = QLabel("Загрузка...")
-        self.codes_count_label = QLabel("Загрузка...")
-        
-        file_info_layout.addRow("Файл:", self.file_name_label)
-        file_info_layout.addRow("Продукция:", self.product_label)
-        file_info_layout.addRow("Количество кодов:", self.codes_count_label)
-        
-        layout.addLayout(file_info_layout)
-        
-        # Добавляем поля для ввода дополнительной информации
-        additional_info_group = QGroupBox("Параметры отчета о нанесении")
-        additional_info_layout = QFormLayout()
-        
-        # Срок годности
-        self.expiration_date_edit = QDateEdit()
-        self.expiration_date_edit.setCalendarPopup(True)
-        # Устанавливаем текущую дату + 1 год
-        import datetime
-        future_date = datetime.datetime.now() + datetime.timedelta(days=365)
-        self.expiration_date_edit.setDate(QDate(future_date.year, future_date.month, future_date.day))
-        self.expiration_date_edit.setToolTip("Срок годности (может быть извлечен из поля DateExpiration файла агрегации)")
-        additional_info_layout.addRow("Срок годности:", self.expiration_date_edit)
-        
-        # Номер производственной серии
-        self.series_number_edit = QLineEdit("001")
-        self.series_number_edit.setToolTip("Номер производственной серии (может быть извлечен из поля ClaimNumber файла агрегации)")
-        additional_info_layout.addRow("Номер серии:", self.series_number_edit)
-        
-        # Тип использования
-        self.usage_type_combo = QComboBox()
-        
-        # Устанавливаем только допустимые значения согласно API
-        # По документации API, допустимые значения: PRINTED, VERIFIED
-        self.usage_type_combo.addItem("Напечатан (PRINTED)", "PRINTED")
-        self.usage_type_combo.addItem("Проверен (VERIFIED)", "VERIFIED")
-        
-        # Устанавливаем первый элемент по умолчанию
-        self.usage_type_combo.setCurrentIndex(0)
-        
-        self.usage_type_combo.setToolTip("Тип использования кодов маркировки (допустимые значения: PRINTED, VERIFIED)")
-        additional_info_layout.addRow("Тип использования:", self.usage_type_combo)
-        
-        # Добавляем информационную надпись
-        info_label = QLabel("Примечание: Номер серии и срок годности могут быть заполнены автоматически из файла агрегации")
-        info_label.setStyleSheet("color: blue; font-style: italic;")
-        additional_info_layout.addRow("", info_label)
-        
-        additional_info_group.setLayout(additional_info_layout)
-        layout.addWidget(additional_info_group)
-        
-        # Таблица для отображения кодов маркировки
-        self.codes_table = QTableWidget()
-        self.codes_table.setColumnCount(2)
-        self.codes_table.setHorizontalHeaderLabels(["Код маркировки", "Включить в отчет"])
-        self.codes_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.codes_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        
-        # Индикатор загрузки
-        self.loading_label = QLabel("Загрузка данных файла агрегации...")
-        layout.addWidget(self.loading_label)
-        
-        layout.addWidget(QLabel("Выберите коды маркировки для включения в отчет:"))
-        layout.addWidget(self.codes_table)
-        
-        # Кнопки управления
-        button_layout = QHBoxLayout()
-        self.select_all_button = QPushButton("Выбрать все")
-        self.select_all_button.clicked.connect(self.select_all_codes)
-        button_layout.addWidget(self.select_all_button)
-        
-        self.deselect_all_button = QPushButton("Снять выбор")
-        self.deselect_all_button.clicked.connect(self.deselect_all_codes)
-        button_layout.addWidget(self.deselect_all_button)
-        
-        button_layout.addStretch()
-        
-        self.cancel_button = QPushButton("Отмена")
-        self.cancel_button.clicked.connect(self.reject)
-        button_layout.addWidget(self.cancel_button)
-        
-        self.submit_button = QPushButton("Отправить отчет")
-        self.submit_button.clicked.connect(self.accept)
-        button_layout.addWidget(self.submit_button)
-        
-        layout.addLayout(button_layout)
-        
-        # Загружаем данные файла
-        self.load_file_data()
-    
-    def load_file_data(self):
-        """Загрузка данных файла агрегации"""
-        try:
-            # Получаем данные из БД через контроллер
-            from models.models import AggregationFile
-            import logging
-            
-            logger = logging.getLogger(__name__)
-            logger.info(f"Начинаем загрузку данных файла агрегации с ID={self.file_id}")
-            
-            # Проверяем, есть ли контроллер
-            if not self.controller:
-                logger.error("Отсутствует контроллер")
-                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: отсутствует контроллер")
-                self.reject()
-                return
-                
-            # Проверяем соединение с базой данных
-            if not hasattr(self.controller, 'db') or not self.controller.db:
-                logger.error("У контроллера отсутствует соединение с базой данных")
-                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: нет соединения с базой данных")
-                self.reject()
-                return
-            
-            # Получаем данные из контроллера
-            try:
-                # Получаем файл агрегации по ID через метод контроллера
-                logger.info(f"Пробуем получить файл агрегации с ID={self.file_id} через метод контроллера")
-                self.file_data = self.controller.get_aggregation_file_by_id(self.file_id)
-                
-                if self.file_data:
-                    # Файл найден, проверяем наличие кодов маркировки
-                    logger.info(f"Файл агрегации получен: {self.file_data.filename}")
-                    
-                    if not hasattr(self.file_data, 'marking_codes') or not self.file_data.marking_codes:
-                        logger.warning(f"Файл агрегации не содержит кодов маркировки")
-                        QMessageBox.warning(
-                            self,
-                            "Предупреждение",
-                            "Файл агрегации не содержит кодов маркировки для отчета"
-                        )
-                    else:
-                        logger.info(f"Количество кодов маркировки в файле: {len(self.file_data.marking_codes)}")
-                    
-                    # Обновляем UI
-                    self.update_file_info()
-                    return
-                else:
-                    logger.error(f"Файл агрегации с ID={self.file_id} не найден в базе данных")
-                    QMessageBox.critical(
-                        self,
-                        "Ошибка",
-                        f"Не удалось получить данные файла агрегации с ID {self.file_id}"
-                    )
-                    self.reject()
-                    return
-            except Exception as e:
-                logger.error(f"Ошибка при получении данных из контроллера: {str(e)}")
-                logger.exception("Подробная трассировка ошибки:")
-                QMessageBox.critical(
-                    self,
-                    "Ошибка",
-                    f"Не удалось загрузить данные файла агрегации: {str(e)}"
-                )
-                self.reject()
-                return
-            
-        except Exception as e:
-            logger.error(f"Ошибка при загрузке данных файла агрегации: {str(e)}")
-            logger.exception("Подробная трассировка ошибки:")
-            QMessageBox.critical(
-                self,
-                "Ошибка",
-                f"Не удалось загрузить данные файла агрегации: {str(e)}"
-            )
-            self.reject()
-    
-    def update_file_info(self):
-        """Обновление информации о файле и заполнение таблицы"""
-        if not self.file_data:
-            return
-        
-        # Обновляем метки с информацией о файле
-        self.file_name_label.setText(self.file_data.filename)
-        self.product_label.setText(self.file_data.product)
-        self.codes_count_label.setText(str(len(self.file_data.marking_codes)))
-        
-        # Скрываем индикатор загрузки
-        self.loading_label.hide()
-        
-        # Пробуем извлечь номер серии и срок годности из JSON-данных
-        try:
-            import json
-            import logging
-            logger = logging.getLogger(__name__)
-            
-            # Проверяем наличие JSON-содержимого
-            if hasattr(self.file_data, 'json_content') and self.file_data.json_content:
-                logger.info(f"Извлечение данных из JSON: {self.file_data.filename}")
-                
-                # Первая попытка - парсим JSON
-                try:
-                    json_data = json.loads(self.file_data.json_content)
-                    logger.info(f"JSON успешно распарсен, ключи: {', '.join(json_data.keys())}")
-                    
-                    # Извлекаем номер серии (ищем в разных полях)
-                    series_fields = ['ClaimNumber', 'SeriesNumber', 'Batch', 'BatchNumber']
-                    for field in series_fields:
-                        if field in json_data:
-                            claim_number = json_data[field]
-                            self.series_number_edit.setText(claim_number)
-                            logger.info(f"Номер серии извлечен из поля {field}: {claim_number}")
-                            break
-                    
-                    # Извлекаем срок годности (ищем в разных полях)
-                    date_fields = ['DateExpiration', 'ExpirationDate', 'ExpiryDate', 'BestBefore']
-                    for field in date_fields:
-                        if field in json_data:
-                            date_expiration = json_data[field]
-                            logger.info(f"Найдено поле с датой {field}: {date_expiration}")
-                            
-                            # Проверяем различные форматы даты
-                            date_formats = [
-                                '%Y-%m-%d',       # 2023-12-31
-                                '%d.%m.%Y',       # 31.12.2023
-                                '%Y/%m/%d',       # 2023/12/31
-                                '%d/%m/%Y',       # 31/12/2023
-                                '%m/%d/%Y',       # 12/31/2023
-                                '%Y-%m-%dT%H:%M:%S',  # ISO формат
-                                '%Y-%m-%dT%H:%M:%S.%fZ'  # ISO формат с миллисекундами
-                            ]
-                            
-                            expiration_date = None
-                            for date_format in date_formats:
-                                try:
-                                    import datetime
-                                    expiration_date = datetime.datetime.strptime(date_expiration, date_format)
-                                    logger.info(f"Срок годности извлечен из поля {field}: {date_expiration} (формат: {date_format})")
-                                    break
-                                except ValueError:
-                                    continue
-                            
-                            if expiration_date:
-                                self.expiration_date_edit.setDate(QDate(expiration_date.year, expiration_date.month, expiration_date.day))
-                                break
-                            else:
-                                logger.warning(f"Невозможно парсить дату из {field}: {date_expiration}")
-                except json.JSONDecodeError as je:
-                    logger.error(f"Ошибка парсинга JSON: {str(je)}")
-                
-                # Вторая попытка - если JSON не распарсился или не нашли нужные поля, 
-                # пробуем извлечь значения с помощью регулярных выражений
-                if not self.series_number_edit.text() or self.series_number_edit.text() == "001":
-                    import re
-                    
-                    # Ищем номер серии
-                    series_patterns = [
-                        r'ClaimNumber["\s:=]+([^"\s,}]+)',
-                        r'SeriesNumber["\s:=]+([^"\s,}]+)',
-                        r'Batch["\s:=]+([^"\s,}]+)',
-                        r'BatchNumber["\s:=]+([^"\s,}]+)'
-                    ]
-                    
-                    for pattern in series_patterns:
-                        series_match = re.search(pattern, self.file_data.json_content)
-                        if series_match:
-                            series = series_match.group(1).strip('"\'')
-                            self.series_number_edit.setText(series)
-                            logger.info(f"Номер серии извлечен с помощью regex: {series}")
-                            break
-                
-                # Ищем дату с помощью regex, если не нашли раньше
-                date_regex = r'(?:DateExpiration|ExpirationDate|ExpiryDate|BestBefore)["\s:=]+"?([^"\s,}]+)"?'
-                date_match = re.search(date_regex, self.file_data.json_content)
-                if date_match:
-                    date_str = date_match.group(1)
-                    logger.info(f"Дата извлечена с помощью regex: {date_str}")
-                    
-                    # Парсим дату с помощью regex
-                    date_parts = re.findall(r'\d+', date_str)
-                    if len(date_parts) >= 3:
-                        try:
-                            # Предполагаем разные форматы: год-месяц-день или день-месяц-год
-                            # Если первое число > 31, скорее всего это год
-                            if int(date_parts[0]) > 31:
-                                year = int(date_parts[0])
-                                month = int(date_parts[1])
-                                day = int(date_parts[2])
-                            else:
-                                # Иначе это день-месяц-год
-                                day = int(date_parts[0])
-                                month = int(date_parts[1])
-                                year = int(date_parts[2])
-                                
-                                # Если год двузначный, добавляем 2000
-                                if year < 100:
-                                    year += 2000
-                            
-                            # Проверяем валидность даты
-                            if 1 <= month <= 12 and 1 <= day <= 31 and year > 2000:
-                                from PyQt6.QtCore import QDate
-                                self.expiration_date_edit.setDate(QDate(year, month, day))
-                                logger.info(f"Срок годности извлечен из файла с помощью regex: {year}-{month}-{day}")
-                        except (ValueError, IndexError) as e:
-                            logger.warning(f"Ошибка при парсинге даты: {str(e)}")
-                
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении данных из JSON: {str(e)}")
-            logger.exception("Подробная трассировка ошибки:")
-        
-        # Заполняем таблицу кодами маркировки
-        self.codes_table.setRowCount(len(self.file_data.marking_codes))
-        
-        for i, code in enumerate(self.file_data.marking_codes):
-            # Код маркировки
-            self.codes_table.setItem(i, 0, QTableWidgetItem(code))
-            
-            # Чекбокс для выбора
-            checkbox = QTableWidgetItem()
-            checkbox.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-            checkbox.setCheckState(Qt.CheckState.Checked)
-            self.codes_table.setItem(i, 1, checkbox)
-        
-        self.codes_table.resizeColumnsToContents()
-    
-    def select_all_codes(self):
-        """Выбрать все коды маркировки"""
-        for i in range(self.codes_table.rowCount()):
-            self.codes_table.item(i, 1).setCheckState(Qt.CheckState.Checked)
-    
-    def deselect_all_codes(self):
-        """Снять выбор со всех кодов маркировки"""
-        for i in range(self.codes_table.rowCount()):
-            self.codes_table.item(i, 1).setCheckState(Qt.CheckState.Unchecked)
-    
-    def get_report_data(self):
-        """Получение данных отчета для отправки"""
-        # Собираем выбранные коды маркировки
-        selected_codes = []
-        for i in range(self.codes_table.rowCount()):
-            if self.codes_table.item(i, 1).checkState() == Qt.CheckState.Checked:
-                code = self.codes_table.item(i, 0).text()
-                # Заменяем текстовое представление [GS] на реальный символ GS (код 29)
-                code = code.replace('[GS]', '\x1d')
-                selected_codes.append(code)
-        
-        # Получаем срок годности из поля ввода
-        expiration_date = self.expiration_date_edit.date().toString('yyyy-MM-dd')
-        
-        # Получаем номер серии из поля ввода
-        series_number = self.series_number_edit.text().strip()
-        if not series_number:
-            series_number = "001"  # Значение по умолчанию
-        
-        # Получаем тип использования из выпадающего списка
-        # Сначала пытаемся получить код из данных элемента
-        usage_type = self.usage_type_combo.currentData()
-        # Если данные не установлены, используем текст
-        if not usage_type:
-            usage_type = self.usage_type_combo.currentText()
-        
-        # Получаем omsId из текущих учетных данных через контроллер
-        omsId = ""
-        try:
-            if self.controller and hasattr(self.controller, 'db'):
-                credentials = self.controller.db.get_credentials()
-                if credentials and len(credentials) > 0:
-                    omsId = credentials[0].omsid
-                    logging.getLogger(__name__).info(f"Получен omsId для отчета: {omsId}")
-        except Exception as e:
-            logging.getLogger(__name__).error(f"Ошибка при получении omsId: {str(e)}")
-            
-        # Если omsId не удалось получить из БД, пытаемся получить из api_client
-        if not omsId and self.controller and hasattr(self.controller, 'api_client'):
-            omsId = self.controller.api_client.omsid
-            if omsId:
-                logging.getLogger(__name__).info(f"Получен omsId из API-клиента: {omsId}")
-        
-        # Формируем структуру данных для отправки отчета в формате API
-        report_data = {
-            "sntins": selected_codes,
-            # Добавляем обязательные поля согласно документации
-            "expirationDate": expiration_date,
-            "seriesNumber": series_number,
-            "usageType": usage_type,
-            "omsId": omsId  # Добавляем omsId в отчет
-        }
-        
-        # Если не удалось получить omsId, показываем предупреждение пользователю
-        if not omsId:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не удалось получить идентификатор СУЗ (omsId). Отчет может быть отклонен API. "
-                "Проверьте настройки учетных данных."
-            )
-            logging.getLogger(__name__).warning("omsId не был добавлен в отчет об использовании")
-        
-        return report_data
-        
-class AggregationReportDialog(QDialog):
-    """Диалог для создания отчета об агрегации"""
-    
-    def __init__(self, file_id, parent=None, controller=None):
-        super().__init__(parent)
-        self.file_id = file_id
-        self.setWindowTitle("Отчет об агрегации")
-        self.setMinimumWidth(600)
-        self.setMinimumHeight(400)
-        
-        # Получаем данные о файле агрегации из контроллера
-        self.parent_window = parent
-        self.controller = controller  # Сохраняем ссылку на контроллер
-        self.file_data = None
-        
-        # Создаем макет
-        layout = QVBoxLayout(self)
-        
-        # Информация о файле
-        file_info_layout = QFormLayout()
-        self.file_name_label = QLabel("Загрузка...")
-        self.product_label = QLabel("Загрузка...")
-        self.units_count_label = QLabel("Загрузка...")
-        
-        file_info_layout.addRow("Файл:", self.file_name_label)
-        file_info_layout.addRow("Продукция:", self.product_label)
-        file_info_layout.addRow("Количество единиц агрегации:", self.units_count_label)
-        
-        # Добавляем текстовое поле для идентификатора производственной линии
-        self.production_line_input = QLineEdit("LINE01")
-        self.production_line_input.setPlaceholderText("Введите идентификатор производственной линии")
-        self.production_line_input.setToolTip("Идентификатор производственной линии для отчета об агрегации")
-        file_info_layout.addRow("Производственная линия:", self.production_line_input)
-        
-        # Добавляем текстовое поле для идентификатора производственного заказа
-        self.production_order_input = QLineEdit()
-        self.production_order_input.setPlaceholderText("Введите идентификатор производственного заказа")
-        self.production_order_input.setToolTip("Идентификатор производственного заказа для отчета об агрегации")
-        file_info_layout.addRow("Производственный заказ:", self.production_order_input)
-        
-        layout.addLayout(file_info_layout)
-        
-        # Таблица для отображения единиц агрегации
-        self.units_table = QTableWidget()
-        self.units_table.setColumnCount(4)
-        self.units_table.setHorizontalHeaderLabels([
-            "Код агрегата", "Тип агрегации", "Емкость упаковки", "Включить в отчет"
-        ])
-        self.units_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.units_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        self.units_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
-        self.units_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
-        
-        # Индикатор загрузки
-        self.loading_label = QLabel("Загрузка данных файла агрегации...")
-        layout.addWidget(self.loading_label)
-        
-        layout.addWidget(QLabel("Единицы агрегации для включения в отчет:"))
-        layout.addWidget(self.units_table)
-        
-        # Кнопки управления
-        button_layout = QHBoxLayout()
-        self.select_all_button = QPushButton("Выбрать все")
-        self.select_all_button.clicked.connect(self.select_all_units)
-        button_layout.addWidget(self.select_all_button)
-        
-        self.deselect_all_button = QPushButton("Снять выбор")
-        self.deselect_all_button.clicked.connect(self.deselect_all_units)
-        button_layout.addWidget(self.deselect_all_button)
-        
-        button_layout.addStretch()
-        
-        self.cancel_button = QPushButton("Отмена")
-        self.cancel_button.clicked.connect(self.reject)
-        button_layout.addWidget(self.cancel_button)
-        
-        self.submit_button = QPushButton("Отправить отчет")
-        self.submit_button.clicked.connect(self.accept)
-        button_layout.addWidget(self.submit_button)
-        
-        layout.addLayout(button_layout)
-        
-        # Загружаем данные файла
-        self.load_file_data()
-    
-    def load_file_data(self):
-        """Загрузка данных файла агрегации"""
-        try:
-            # Получаем данные из БД через контроллер
-            import logging
-            
-            logger = logging.getLogger(__name__)
-            logger.info(f"Начинаем загрузку данных файла агрегации с ID={self.file_id}")
-            
-            # Проверяем, есть ли контроллер
-            if not self.controller:
-                logger.error("Отсутствует контроллер")
-                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: отсутствует контроллер")
-                self.reject()
-                return
-                
-            # Проверяем соединение с базой данных
-            if not hasattr(self.controller, 'db') or not self.controller.db:
-                logger.error("У контроллера отсутствует соединение с базой данных")
-                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: нет соединения с базой данных")
-                self.reject()
-                return
-            
-            # Получаем данные из контроллера
-            try:
-                # Получаем файл агрегации по ID через метод контроллера
-                logger.info(f"Пробуем получить файл агрегации с ID={self.file_id} через метод контроллера")
-                self.file_data = self.controller.get_aggregation_file_by_id(self.file_id)
-                
-                if self.file_data:
-                    # Файл найден, проверяем наличие кодов агрегации
-                    logger.info(f"Файл агрегации получен: {self.file_data.filename}")
-                    
-                    # Проверяем наличие кодов агрегации 1 уровня
-                    if not hasattr(self.file_data, 'level1_codes') or not self.file_data.level1_codes:
-                        logger.warning(f"Файл агрегации не содержит кодов агрегации 1 уровня")
-                        QMessageBox.warning(
-                            self,
-                            "Предупреждение",
-                            "Файл агрегации не содержит кодов агрегации для отчета"
-                        )
-                    else:
-                        logger.info(f"Количество кодов агрегации 1 уровня в файле: {len(self.file_data.level1_codes)}")
-                    
-                    # Обновляем UI
-                    self.update_file_info()
-                    return
-                else:
-                    logger.error(f"Файл агрегации с ID={self.file_id} не найден в базе данных")
-                    QMessageBox.critical(
-                        self,
-                        "Ошибка",
-                        f"Не удалось получить данные файла агрегации с ID {self.file_id}"
-                    )
-                    self.reject()
-                    return
-            except Exception as e:
-                logger.error(f"Ошибка при получении данных из контроллера: {str(e)}")
-                logger.exception("Подробная трассировка ошибки:")
-                QMessageBox.critical(
-                    self,
-                    "Ошибка",
-                    f"Не удалось загрузить данные файла агрегации: {str(e)}"
-                )
-                self.reject()
-                return
-            
-        except Exception as e:
-            logger.error(f"Ошибка при загрузке данных файла агрегации: {str(e)}")
-            logger.exception("Подробная трассировка ошибки:")
-            QMessageBox.critical(
-                self,
-                "Ошибка",
-                f"Не удалось загрузить данные файла агрегации: {str(e)}"
-            )
-            self.reject()
-    
-    def update_file_info(self):
-        """Обновление информации о файле и заполнение таблицы"""
-        if not self.file_data:
-            return
-        
-        # Обновляем метки с информацией о файле
-        self.file_name_label.setText(self.file_data.filename)
-        self.product_label.setText(self.file_data.product)
-        
-        # Получаем количество единиц агрегации
-        level1_count = len(self.file_data.level1_codes) if hasattr(self.file_data, 'level1_codes') and self.file_data.level1_codes else 0
-        level2_count = len(self.file_data.level2_codes) if hasattr(self.file_data, 'level2_codes') and self.file_data.level2_codes else 0
-        # Изменено: учитываем только единицы level 1
-        total_units = level1_count
-        self.units_count_label.setText(str(total_units))
-        
-        # Скрываем индикатор загрузки
-        self.loading_label.hide()
-        
-        # Создаем список единиц агрегации для таблицы
-        aggregation_units = []
-        
-        # Получаем количество кодов маркировки (level 0)
-        marking_codes_count = len(self.file_data.marking_codes) if hasattr(self.file_data, 'marking_codes') and self.file_data.marking_codes else 0
-        
-        # Расчет средней емкости для каждой единицы level 1
-        # Если есть единицы level 1, распределяем коды level 0 между ними
-        capacity_per_unit = marking_codes_count // level1_count if level1_count > 0 else 0
-        
-        # Добавляем коды агрегации 1 уровня
-        if hasattr(self.file_data, 'level1_codes') and self.file_data.level1_codes:
-            for code in self.file_data.level1_codes:
-                aggregation_units.append({
-                    "code": code,
-                    "type": "AGGREGATION",  # Универсальный тип агрегации
-                    "capacity": capacity_per_unit  # Устанавливаем расчетную емкость
-                })
-        
-        # Удалено: больше не добавляем коды агрегации 2 уровня в таблицу
-        
-        # Заполняем таблицу агрегационными единицами
-        self.units_table.setRowCount(len(aggregation_units))
-        
-        for i, unit in enumerate(aggregation_units):
-            # Код агрегата
-            self.units_table.setItem(i, 0, QTableWidgetItem(unit["code"]))
-            
-            # Тип агрегации
-            type_item = QTableWidgetItem(unit["type"])
-            self.units_table.setItem(i, 1, type_item)
-            
-            # Емкость упаковки
-            capacity_spinbox = QSpinBox()
-            capacity_spinbox.setMinimum(1)
-            capacity_spinbox.setMaximum(999)
-            capacity_spinbox.setValue(unit["capacity"])
-            self.units_table.setCellWidget(i, 2, capacity_spinbox)
-            
-            # Чекбокс для выбора
-            checkbox = QTableWidgetItem()
-            checkbox.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-            checkbox.setCheckState(Qt.CheckState.Checked)
-            self.units_table.setItem(i, 3, checkbox)
-        
-        self.units_table.resizeColumnsToContents()
-    
-    def select_all_units(self):
-        """Выбрать все единицы агрегации"""
-        for i in range(self.units_table.rowCount()):
-            self.units_table.item(i, 3).setCheckState(Qt.CheckState.Checked)
-    
-    def deselect_all_units(self):
-        """Снять выбор со всех единиц агрегации"""
-        for i in range(self.units_table.rowCount()):
-            self.units_table.item(i, 3).setCheckState(Qt.CheckState.Unchecked)
-    
-    def get_report_data(self):
-        """Получение данных отчета для отправки"""
-        # Получаем omsId из текущих учетных данных через контроллер
-        omsId = ""
-        innId = ""
-        glnId = ""
-        try:
-            if self.controller and hasattr(self.controller, 'db'):
-                credentials = self.controller.db.get_credentials()
-                if credentials and len(credentials) > 0:
-                    omsId = credentials[0].omsid
-                    innId = credentials[0].inn
-                    glnId = credentials[0].gln
-                    logging.getLogger(__name__).info(f"Получен omsId для отчета: {omsId}")
-                    logging.getLogger(__name__).info(f"Получен ИНН для отчета: {innId}")
-                    logging.getLogger(__name__).info(f"Получен GLN для отчета: {glnId}")
-        except Exception as e:
-            logging.getLogger(__name__).error(f"Ошибка при получении omsId/ИНН/GLN: {str(e)}")
-            
-        # Если omsId не удалось получить из БД, пытаемся получить из api_client
-        if not omsId and self.controller and hasattr(self.controller, 'api_client'):
-            omsId = self.controller.api_client.omsid
-            if omsId:
-                logging.getLogger(__name__).info(f"Получен omsId из API-клиента: {omsId}")
-        
-        # Для отчёта нам нужны все коды маркировки
-        marking_codes = []
-        if hasattr(self.file_data, 'marking_codes') and self.file_data.marking_codes:
-            marking_codes = [self.normalize_code(code) for code in self.file_data.marking_codes]
-            logging.getLogger(__name__).info(f"Получено {len(marking_codes)} кодов маркировки для отчета")
-        
-        # Количество кодов маркировки нулевого уровня (level 0)
-        total_codes = len(marking_codes)
-        
-        # Количество единиц агрегации первого уровня (level 1)
-        level1_count = 0
-        if hasattr(self.file_data, 'level1_codes') and self.file_data.level1_codes:
-            level1_count = len(self.file_data.level1_codes)
-        
-        # Равномерно распределяем коды маркировки level 0 по единицам агрегации level 1
-        codes_per_unit = total_codes // level1_count if level1_count > 0 else 0
-        
-        # Собираем выбранные единицы агрегации
-        aggregation_units = []
-        selected_level1_units = []
-        # Удалено: больше не собираем коды level 2
-        
-        # Сначала определяем, какие единицы выбраны
-        for i in range(self.units_table.rowCount()):
-            if self.units_table.item(i, 3).checkState() == Qt.CheckState.Checked:
-                unit_code = self.units_table.item(i, 0).text()
-                unit_type = self.units_table.item(i, 1).text()
-                unit_capacity = self.units_table.cellWidget(i, 2).value()
-                
-                # Определяем, к какому уровню относится эта единица
-                if hasattr(self.file_data, 'level1_codes') and unit_code in self.file_data.level1_codes:
-                    selected_level1_units.append({
-                        "unitSerialNumber": unit_code,
-                        "aggregationType": unit_type,
-                        "aggregationUnitCapacity": unit_capacity,
-                        "aggregatedItemsCount": unit_capacity,  # Добавляем новый параметр со значением как у aggregationUnitCapacity
-                        "sntins": []  # Пока пустой список, заполним позже
-                    })
-                # Удалено: больше не обрабатываем коды level 2
-        
-        # Распределяем коды маркировки level 0 по единицам уровня 1
-        if marking_codes and selected_level1_units:
-            codes_per_unit = len(marking_codes) // len(selected_level1_units)
-            remainder = len(marking_codes) % len(selected_level1_units)
-            
-            start_idx = 0
-            for i, unit in enumerate(selected_level1_units):
-                # Количество кодов для этой единицы
-                unit_codes_count = codes_per_unit + (1 if i < remainder else 0)
-                end_idx = min(start_idx + unit_codes_count, len(marking_codes))
-                
-                # Добавляем коды в эту единицу
-                unit["sntins"] = marking_codes[start_idx:end_idx]
-                
-                # Обновляем емкость упаковки равной фактическому количеству кодов
-                unit["aggregationUnitCapacity"] = len(unit["sntins"])
-                # Обновляем количество агрегированных товаров равным емкости упаковки
-                unit["aggregatedItemsCount"] = unit["aggregationUnitCapacity"]
-                
-                start_idx = end_idx
-        
-        # Удалено: больше не распределяем коды level 1 по level 2
-        
-        # Объединяем единицы
-        aggregation_units = selected_level1_units
-        
-        # Получаем идентификатор производственной линии из текстового поля
-        productionLineId = self.production_line_input.text().strip()
-        logging.getLogger(__name__).info(f"Указана производственная линия: {productionLineId}")
-        
-        # Получаем идентификатор производственного заказа из текстового поля
-        productionOrderId = self.production_order_input.text().strip()
-        logging.getLogger(__name__).info(f"Указан производственный заказ: {productionOrderId}")
-            
-        # Формируем данные отчета об агрегации
-        report_data = {
-            "participantId": innId,  # Используем ИНН в качестве значения
-            "productionLineId": productionLineId,  # Идентификатор производственной линии
-            "productionOrderId": productionOrderId,  # Идентификатор производственного заказа
-            "aggregationUnits": aggregation_units,
-            "omsId": omsId,  # Добавляем omsId в отчет
-            "file_id": self.file_id  # Добавляем file_id для отслеживания в контроллере
-        }
-        
-        # Если не удалось получить omsId, показываем предупреждение пользователю
-        if not omsId:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не удалось получить идентификатор СУЗ (omsId). Отчет может быть отклонен API. "
-                "Проверьте настройки учетных данных."
-            )
-            logging.getLogger(__name__).warning("omsId не был добавлен в отчет об агрегации")
-            
-        # Если не удалось получить ИНН, показываем предупреждение пользователю
-        if not innId:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не удалось получить ИНН производителя (participantId). Отчет будет отклонен API. "
-                "Проверьте настройки учетных данных и добавьте ИНН."
-            )
-            logging.getLogger(__name__).warning("ИНН не был добавлен в отчет об агрегации")
-        
-        # Если не указан идентификатор производственной линии, показываем предупреждение
-        if not productionLineId:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не указан идентификатор производственной линии (productionLineId). "
-                "Отчет может быть отклонен API."
-            )
-            logging.getLogger(__name__).warning("productionLineId не был добавлен в отчет об агрегации")
-        
-        # Если не указан идентификатор производственного заказа, показываем предупреждение
-        if not productionOrderId:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не указан идентификатор производственного заказа (productionOrderId). "
-                "Отчет может быть отклонен API."
-            )
-            logging.getLogger(__name__).warning("productionOrderId не был добавлен в отчет об агрегации")
-        
-        return report_data
-        
-    def normalize_code(self, code):
-        """Преобразование символов [GS] в коде маркировки в правильный формат
-        
-        Args:
-            code (str): Код маркировки со строковым представлением [GS]
-            
-        Returns:
-            str: Код с правильным представлением разделителя групп
-        """
-        if not code:
-            return code
-            
-        # Логирование для отладки
-        logger = logging.getLogger(__name__)
-        logger.info(f"Нормализация кода: '{code}'")
-        logger.info(f"Длина кода: {len(code)}")
-        logger.info(f"Байтовое представление: {code.encode('utf-8')}")
-        logger.info(f"Unicode коды символов: {[ord(c) for c in code]}")
-        
-        # Проверяем наличие [GS] в текстовом виде
-        if '[GS]' in code:
-            normalized_code = code.split('[GS]')[0]
-            logger.info(f"Найден [GS] в текстовом виде")
-            logger.info(f"Нормализованный код: {normalized_code}")
-            return normalized_code
-            
-        # Проверяем наличие символа GS в Unicode
-        if '\u001d' in code:
-            normalized_code = code.split('\u001d')[0]
-            logger.info(f"Найден \u001d (Unicode GS)")
-            logger.info(f"Нормализованный код: {normalized_code}")
-            return normalized_code
-            
-        # Проверяем наличие символа GS в hex
-        if '\x1d' in code:
-            normalized_code = code.split('\x1d')[0]
-            logger.info(f"Найден \x1d (hex GS)")
-            logger.info(f"Нормализованный код: {normalized_code}")
-            return normalized_code
-            
-        # Проверяем все возможные представления GS в байтах
-        code_bytes = code.encode('utf-8')
-        for i in range(len(code_bytes)):
-            if code_bytes[i] == 0x1d:  # GS в hex
-                normalized_code = code_bytes[:i].decode('utf-8')
-                logger.info(f"Найден GS в позиции {i} (байт {code_bytes[i]})")
-                logger.info(f"Нормализованный код: {normalized_code}")
-                return normalized_code
-                
-        logger.info("GS символ не найден в коде")
-        return code
\ No newline at end of file
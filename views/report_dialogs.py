@@ -0,0 +1,742 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QGroupBox,
+                             QLabel, QLineEdit, QComboBox, QDateEdit, QSpinBox,
+                             QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox)
+from PyQt6.QtCore import Qt, QDate
+import logging
+import datetime
+import json
+
+logger = logging.getLogger(__name__)
+
+class UtilisationReportDialog(QDialog):
+    """Диалог для создания отчета о нанесении"""
+    
+    def __init__(self, file_id, parent=None, controller=None):
+        super().__init__(parent)
+        self.file_id = file_id
+        self.setWindowTitle("Отчет о нанесении")
+        self.setMinimumWidth(600)
+        self.setMinimumHeight(400)
+        
+        # Получаем данные о файле агрегации из контроллера
+        self.parent_window = parent
+        self.controller = controller  # Сохраняем ссылку на контроллер
+        self.file_data = None
+        
+        # Создаем макет
+        layout = QVBoxLayout(self)
+        
+        # Информация о файле
+        file_info_layout = QFormLayout()
+        self.file_name_label = QLabel("Загрузка...")
+        self.product_label = QLabel("Загрузка...")
+        self.codes_count_label = QLabel("Загрузка...")
+        
+        file_info_layout.addRow("Файл:", self.file_name_label)
+        file_info_layout.addRow("Продукция:", self.product_label)
+        file_info_layout.addRow("Количество кодов:", self.codes_count_label)
+        
+        layout.addLayout(file_info_layout)
+        
+        # Добавляем поля для ввода дополнительной информации
+        additional_info_group = QGroupBox("Параметры отчета о нанесении")
+        additional_info_layout = QFormLayout()
+        
+        # Срок годности
+        self.expiration_date_edit = QDateEdit()
+        self.expiration_date_edit.setCalendarPopup(True)
+        # Устанавливаем текущую дату + 1 год
+        import datetime
+        future_date = datetime.datetime.now() + datetime.timedelta(days=365)
+        self.expiration_date_edit.setDate(QDate(future_date.year, future_date.month, future_date.day))
+        self.expiration_date_edit.setToolTip("Срок годности (может быть извлечен из поля DateExpiration файла агрегации)")
+        additional_info_layout.addRow("Срок годности:", self.expiration_date_edit)
+        
+        # Номер производственной серии
+        self.series_number_edit = QLineEdit("001")
+        self.series_number_edit.setToolTip("Номер производственной серии (может быть извлечен из поля ClaimNumber файла агрегации)")
+        additional_info_layout.addRow("Номер серии:", self.series_number_edit)
+        
+        # Тип использования
+        self.usage_type_combo = QComboBox()
+        
+        # Устанавливаем только допустимые значения согласно API
+        # По документации API, допустимые значения: PRINTED, VERIFIED
+        self.usage_type_combo.addItem("Напечатан (PRINTED)", "PRINTED")
+        self.usage_type_combo.addItem("Проверен (VERIFIED)", "VERIFIED")
+        
+        # Устанавливаем первый элемент по умолчанию
+        self.usage_type_combo.setCurrentIndex(0)
+        
+        self.usage_type_combo.setToolTip("Тип использования кодов маркировки (допустимые значения: PRINTED, VERIFIED)")
+        additional_info_layout.addRow("Тип использования:", self.usage_type_combo)
+        
+        # Добавляем информационную надпись
+        info_label = QLabel("Примечание: Номер серии и срок годности могут быть заполнены автоматически из файла агрегации")
+        info_label.setStyleSheet("color: blue; font-style: italic;")
+        additional_info_layout.addRow("", info_label)
+        
+        additional_info_group.setLayout(additional_info_layout)
+        layout.addWidget(additional_info_group)
+        
+        # Таблица для отображения кодов маркировки
+        self.codes_table = QTableWidget()
+        self.codes_table.setColumnCount(2)
+        self.codes_table.setHorizontalHeaderLabels(["Код маркировки", "Включить в отчет"])
+        self.codes_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.codes_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        
+        # Индикатор загрузки
+        self.loading_label = QLabel("Загрузка данных файла агрегации...")
+        layout.addWidget(self.loading_label)
+        
+        layout.addWidget(QLabel("Выберите коды маркировки для включения в отчет:"))
+        layout.addWidget(self.codes_table)
+        
+        # Кнопки управления
+        button_layout = QHBoxLayout()
+        self.select_all_button = QPushButton("Выбрать все")
+        self.select_all_button.clicked.connect(self.select_all_codes)
+        button_layout.addWidget(self.select_all_button)
+        
+        self.deselect_all_button = QPushButton("Снять выбор")
+        self.deselect_all_button.clicked.connect(self.deselect_all_codes)
+        button_layout.addWidget(self.deselect_all_button)
+        
+        button_layout.addStretch()
+        
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        
+        self.submit_button = QPushButton("Отправить отчет")
+        self.submit_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.submit_button)
+        
+        layout.addLayout(button_layout)
+        
+        # Загружаем данные файла
+        self.load_file_data()
+    
+    def load_file_data(self):
+        """Загрузка данных файла агрегации"""
+        try:
+            # Получаем данные из БД через контроллер
+            from models.models import AggregationFile
+            import logging
+            
+            logger = logging.getLogger(__name__)
+            logger.info(f"Начинаем загрузку данных файла агрегации с ID={self.file_id}")
+            
+            # Проверяем, есть ли контроллер
+            if not self.controller:
+                logger.error("Отсутствует контроллер")
+                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: отсутствует контроллер")
+                self.reject()
+                return
+                
+            # Проверяем соединение с базой данных
+            if not hasattr(self.controller, 'db') or not self.controller.db:
+                logger.error("У контроллера отсутствует соединение с базой данных")
+                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: нет соединения с базой данных")
+                self.reject()
+                return
+            
+            # Получаем данные из контроллера
+            try:
+                # Получаем файл агрегации по ID через метод контроллера
+                logger.info(f"Пробуем получить файл агрегации с ID={self.file_id} через метод контроллера")
+                self.file_data = self.controller.get_aggregation_file_by_id(self.file_id)
+                
+                if self.file_data:
+                    # Файл найден, проверяем наличие кодов маркировки
+                    logger.info(f"Файл агрегации получен: {self.file_data.filename}")
+                    
+                    if not hasattr(self.file_data, 'marking_codes') or not self.file_data.marking_codes:
+                        logger.warning(f"Файл агрегации не содержит кодов маркировки")
+                        QMessageBox.warning(
+                            self,
+                            "Предупреждение",
+                            "Файл агрегации не содержит кодов маркировки для отчета"
+                        )
+                    else:
+                        logger.info(f"Количество кодов маркировки в файле: {len(self.file_data.marking_codes)}")
+                    
+                    # Обновляем UI
+                    self.update_file_info()
+                    return
+                else:
+                    logger.error(f"Файл агрегации с ID={self.file_id} не найден в базе данных")
+                    QMessageBox.critical(
+                        self,
+                        "Ошибка",
+                        f"Не удалось получить данные файла агрегации с ID {self.file_id}"
+                    )
+                    self.reject()
+                    return
+            except Exception as e:
+                logger.error(f"Ошибка при получении данных из контроллера: {str(e)}")
+                logger.exception("Подробная трассировка ошибки:")
+                QMessageBox.critical(
+                    self,
+                    "Ошибка",
+                    f"Не удалось загрузить данные файла агрегации: {str(e)}"
+                )
+                self.reject()
+                return
+            
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке данных файла агрегации: {str(e)}")
+            logger.exception("Подробная трассировка ошибки:")
+            QMessageBox.critical(
+                self,
+                "Ошибка",
+                f"Не удалось загрузить данные файла агрегации: {str(e)}"
+            )
+            self.reject()
+    
+    def update_file_info(self):
+        """Обновление информации о файле и заполнение таблицы"""
+        if not self.file_data:
+            return
+        
+        # Обновляем метки с информацией о файле
+        self.file_name_label.setText(self.file_data.filename)
+        self.product_label.setText(self.file_data.product)
+        self.codes_count_label.setText(str(len(self.file_data.marking_codes)))
+        
+        # Скрываем индикатор загрузки
+        self.loading_label.hide()
+        
+        # Пробуем извлечь номер серии и срок годности из JSON-данных
+        try:
+            import json
+            import logging
+            logger = logging.getLogger(__name__)
+            
+            # Проверяем наличие JSON-содержимого
+            if hasattr(self.file_data, 'json_content') and self.file_data.json_content:
+                logger.info(f"Извлечение данных из JSON: {self.file_data.filename}")
+                
+                # Первая попытка - парсим JSON
+                try:
+                    json_data = json.loads(self.file_data.json_content)
+                    logger.info(f"JSON успешно распарсен, ключи: {', '.join(json_data.keys())}")
+                    
+                    # Извлекаем номер серии (ищем в разных полях)
+                    series_fields = ['ClaimNumber', 'SeriesNumber', 'Batch', 'BatchNumber']
+                    for field in series_fields:
+                        if field in json_data:
+                            claim_number = json_data[field]
+                            self.series_number_edit.setText(claim_number)
+                            logger.info(f"Номер серии извлечен из поля {field}: {claim_number}")
+                            break
+                    
+                    # Извлекаем срок годности (ищем в разных полях)
+                    date_fields = ['DateExpiration', 'ExpirationDate', 'ExpiryDate', 'BestBefore']
+                    for field in date_fields:
+                        if field in json_data:
+                            date_expiration = json_data[field]
+                            logger.info(f"Найдено поле с датой {field}: {date_expiration}")
+                            
+                            # Проверяем различные форматы даты
+                            date_formats = [
+                                '%Y-%m-%d',       # 2023-12-31
+                                '%d.%m.%Y',       # 31.12.2023
+                                '%Y/%m/%d',       # 2023/12/31
+                                '%d/%m/%Y',       # 31/12/2023
+                                '%m/%d/%Y',       # 12/31/2023
+                                '%Y-%m-%dT%H:%M:%S',  # ISO формат
+                                '%Y-%m-%dT%H:%M:%S.%fZ'  # ISO формат с миллисекундами
+                            ]
+                            
+                            expiration_date = None
+                            for date_format in date_formats:
+                                try:
+                                    import datetime
+                                    expiration_date = datetime.datetime.strptime(date_expiration, date_format)
+                                    logger.info(f"Срок годности извлечен из поля {field}: {date_expiration} (формат: {date_format})")
+                                    break
+                                except ValueError:
+                                    continue
+                            
+                            if expiration_date:
+                                self.expiration_date_edit.setDate(QDate(expiration_date.year, expiration_date.month, expiration_date.day))
+                                break
+                            else:
+                                logger.warning(f"Невозможно парсить дату из {field}: {date_expiration}")
+                except json.JSONDecodeError as je:
+                    logger.error(f"Ошибка парсинга JSON: {str(je)}")
+                
+                # Вторая попытка - если JSON не распарсился или не нашли нужные поля, 
+                # пробуем извлечь значения с помощью регулярных выражений
+                if not self.series_number_edit.text() or self.series_number_edit.text() == "001":
+                    import re
+                    
+                    # Ищем номер серии
+                    series_patterns = [
+                        r'ClaimNumber["\s:=]+([^"\s,}]+)',
+                        r'SeriesNumber["\s:=]+([^"\s,}]+)',
+                        r'Batch["\s:=]+([^"\s,}]+)',
+                        r'BatchNumber["\s:=]+([^"\s,}]+)'
+                    ]
+                    
+                    for pattern in series_patterns:
+                        series_match = re.search(pattern, self.file_data.json_content)
+                        if series_match:
+                            series = series_match.group(1).strip('"\'')
+                            self.series_number_edit.setText(series)
+                            logger.info(f"Номер серии извлечен с помощью regex: {series}")
+                            break
+                
+                # Ищем дату с помощью regex, если не нашли раньше
+                date_regex = r'(?:DateExpiration|ExpirationDate|ExpiryDate|BestBefore)["\s:=]+"?([^"\s,}]+)"?'
+                date_match = re.search(date_regex, self.file_data.json_content)
+                if date_match:
+                    date_str = date_match.group(1)
+                    logger.info(f"Дата извлечена с помощью regex: {date_str}")
+                    
+                    # Парсим дату с помощью regex
+                    date_parts = re.findall(r'\d+', date_str)
+                    if len(date_parts) >= 3:
+                        try:
+                            # Предполагаем разные форматы: год-месяц-день или день-месяц-год
+                            # Если первое число > 31, скорее всего это год
+                            if int(date_parts[0]) > 31:
+                                year = int(date_parts[0])
+                                month = int(date_parts[1])
+                                day = int(date_parts[2])
+                            else:
+                                # Иначе это день-месяц-год
+                                day = int(date_parts[0])
+                                month = int(date_parts[1])
+                                year = int(date_parts[2])
+                                
+                                # Если год двузначный, добавляем 2000
+                                if year < 100:
+                                    year += 2000
+                            
+                            # Проверяем валидность даты
+                            if 1 <= month <= 12 and 1 <= day <= 31 and year > 2000:
+                                from PyQt6.QtCore import QDate
+                                self.expiration_date_edit.setDate(QDate(year, month, day))
+                                logger.info(f"Срок годности извлечен из файла с помощью regex: {year}-{month}-{day}")
+                        except (ValueError, IndexError) as e:
+                            logger.warning(f"Ошибка при парсинге даты: {str(e)}")
+                
+        except Exception as e:
+            logger.error(f"Ошибка при извлечении данных из JSON: {str(e)}")
+            logger.exception("Подробная трассировка ошибки:")
+        
+        # Заполняем таблицу кодами маркировки
+        self.codes_table.setRowCount(len(self.file_data.marking_codes))
+        
+        for i, code in enumerate(self.file_data.marking_codes):
+            # Код маркировки
+            self.codes_table.setItem(i, 0, QTableWidgetItem(code))
+            
+            # Чекбокс для выбора
+            checkbox = QTableWidgetItem()
+            checkbox.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+            checkbox.setCheckState(Qt.CheckState.Checked)
+            self.codes_table.setItem(i, 1, checkbox)
+        
+        self.codes_table.resizeColumnsToContents()
+    
+    def select_all_codes(self):
+        """Выбрать все коды маркировки"""
+        for i in range(self.codes_table.rowCount()):
+            self.codes_table.item(i, 1).setCheckState(Qt.CheckState.Checked)
+    
+    def deselect_all_codes(self):
+        """Снять выбор со всех кодов маркировки"""
+        for i in range(self.codes_table.rowCount()):
+            self.codes_table.item(i, 1).setCheckState(Qt.CheckState.Unchecked)
+    
+    def get_report_data(self):
+        """Получение данных отчета для отправки"""
+        # Собираем выбранные коды маркировки
+        selected_codes = []
+        for i in range(self.codes_table.rowCount()):
+            if self.codes_table.item(i, 1).checkState() == Qt.CheckState.Checked:
+                code = self.codes_table.item(i, 0).text()
+                # Заменяем текстовое представление [GS] на реальный символ GS (код 29)
+                code = code.replace('[GS]', '\x1d')
+                selected_codes.append(code)
+        
+        # Получаем срок годности из поля ввода
+        expiration_date = self.expiration_date_edit.date().toString('yyyy-MM-dd')
+        
+        # Получаем номер серии из поля ввода
+        series_number = self.series_number_edit.text().strip()
+        if not series_number:
+            series_number = "001"  # Значение по умолчанию
+        
+        # Получаем тип использования из выпадающего списка
+        # Сначала пытаемся получить код из данных элемента
+        usage_type = self.usage_type_combo.currentData()
+        # Если данные не установлены, используем текст
+        if not usage_type:
+            usage_type = self.usage_type_combo.currentText()
+        
+        # Получаем omsId из текущих учетных данных через контроллер
+        omsId = ""
+        try:
+            if self.controller and hasattr(self.controller, 'db'):
+                credentials = self.controller.db.get_credentials()
+                if credentials and len(credentials) > 0:
+                    omsId = credentials[0].omsid
+                    logging.getLogger(__name__).info(f"Получен omsId для отчета: {omsId}")
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Ошибка при получении omsId: {str(e)}")
+            
+        # Если omsId не удалось получить из БД, пытаемся получить из api_client
+        if not omsId and self.controller and hasattr(self.controller, 'api_client'):
+            omsId = self.controller.api_client.omsid
+            if omsId:
+                logging.getLogger(__name__).info(f"Получен omsId из API-клиента: {omsId}")
+        
+        # Формируем структуру данных для отправки отчета в формате API
+        report_data = {
+            "sntins": selected_codes,
+            # Добавляем обязательные поля согласно документации
+            "expirationDate": expiration_date,
+            "seriesNumber": series_number,
+            "usageType": usage_type,
+            "omsId": omsId,  # Добавляем omsId в отчет
+            "file_id": self.file_id  # ID файла агрегации для отправки по частям (в запрос не передается)
+        }
+        
+        # Если не удалось получить omsId, показываем предупреждение пользователю
+        if not omsId:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Не удалось получить идентификатор СУЗ (omsId). Отчет может быть отклонен API. "
+                "Проверьте настройки учетных данных."
+            )
+            logging.getLogger(__name__).warning("omsId не был добавлен в отчет об использовании")
+        
+        return report_data
+
+
+class AggregationReportDialog(QDialog):
+    """Диалог для создания отчета об агрегации"""
+    
+    def __init__(self, file_id, parent=None, controller=None):
+        super().__init__(parent)
+        self.file_id = file_id
+        self.setWindowTitle("Отчет об агрегации")
+        self.setMinimumWidth(600)
+        self.setMinimumHeight(400)
+        
+        # Получаем данные о файле агрегации из контроллера
+        self.parent_window = parent
+        self.controller = controller  # Сохраняем ссылку на контроллер
+        self.file_data = None
+        self.units = []  # Единицы агрегации 1 уровня с количеством вложенных кодов
+        
+        # Создаем макет
+        layout = QVBoxLayout(self)
+        
+        # Информация о файле
+        file_info_layout = QFormLayout()
+        self.file_name_label = QLabel("Загрузка...")
+        self.product_label = QLabel("Загрузка...")
+        self.units_count_label = QLabel("Загрузка...")
+        
+        file_info_layout.addRow("Файл:", self.file_name_label)
+        file_info_layout.addRow("Продукция:", self.product_label)
+        file_info_layout.addRow("Количество единиц агрегации:", self.units_count_label)
+        
+        # Добавляем текстовое поле для идентификатора производственной линии
+        self.production_line_input = QLineEdit("LINE01")
+        self.production_line_input.setPlaceholderText("Введите идентификатор производственной линии")
+        self.production_line_input.setToolTip("Идентификатор производственной линии для отчета об агрегации")
+        file_info_layout.addRow("Производственная линия:", self.production_line_input)
+        
+        # Добавляем текстовое поле для идентификатора производственного заказа
+        self.production_order_input = QLineEdit()
+        self.production_order_input.setPlaceholderText("Введите идентификатор производственного заказа")
+        self.production_order_input.setToolTip("Идентификатор производственного заказа для отчета об агрегации")
+        file_info_layout.addRow("Производственный заказ:", self.production_order_input)
+        
+        layout.addLayout(file_info_layout)
+        
+        # Таблица для отображения единиц агрегации
+        self.units_table = QTableWidget()
+        self.units_table.setColumnCount(4)
+        self.units_table.setHorizontalHeaderLabels([
+            "Код агрегата", "Тип агрегации", "Емкость упаковки", "Включить в отчет"
+        ])
+        self.units_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.units_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        self.units_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        self.units_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        
+        # Индикатор загрузки
+        self.loading_label = QLabel("Загрузка данных файла агрегации...")
+        layout.addWidget(self.loading_label)
+        
+        layout.addWidget(QLabel("Единицы агрегации для включения в отчет:"))
+        layout.addWidget(self.units_table)
+        
+        # Кнопки управления
+        button_layout = QHBoxLayout()
+        self.select_all_button = QPushButton("Выбрать все")
+        self.select_all_button.clicked.connect(self.select_all_units)
+        button_layout.addWidget(self.select_all_button)
+        
+        self.deselect_all_button = QPushButton("Снять выбор")
+        self.deselect_all_button.clicked.connect(self.deselect_all_units)
+        button_layout.addWidget(self.deselect_all_button)
+        
+        button_layout.addStretch()
+        
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        
+        self.submit_button = QPushButton("Отправить отчет")
+        self.submit_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.submit_button)
+        
+        layout.addLayout(button_layout)
+        
+        # Загружаем данные файла
+        self.load_file_data()
+    
+    def load_file_data(self):
+        """Загрузка данных файла агрегации"""
+        try:
+            # Получаем данные из БД через контроллер
+            import logging
+            
+            logger = logging.getLogger(__name__)
+            logger.info(f"Начинаем загрузку данных файла агрегации с ID={self.file_id}")
+            
+            # Проверяем, есть ли контроллер
+            if not self.controller:
+                logger.error("Отсутствует контроллер")
+                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: отсутствует контроллер")
+                self.reject()
+                return
+                
+            # Проверяем соединение с базой данных
+            if not hasattr(self.controller, 'db') or not self.controller.db:
+                logger.error("У контроллера отсутствует соединение с базой данных")
+                QMessageBox.critical(self, "Ошибка", "Ошибка конфигурации: нет соединения с базой данных")
+                self.reject()
+                return
+            
+            # Получаем данные из контроллера
+            try:
+                # Получаем сводку файла и единицы агрегации с количеством вложенных кодов
+                logger.info(f"Пробуем получить единицы агрегации файла с ID={self.file_id} через метод контроллера")
+                self.file_data, self.units = self.controller.get_aggregation_report_units(self.file_id)
+                
+                if self.file_data:
+                    # Файл найден, проверяем наличие кодов агрегации
+                    logger.info(f"Файл агрегации получен: {self.file_data.filename}")
+                    
+                    # Проверяем наличие кодов агрегации 1 уровня
+                    if not self.units:
+                        logger.warning(f"Файл агрегации не содержит кодов агрегации 1 уровня")
+                        QMessageBox.warning(
+                            self,
+                            "Предупреждение",
+                            "Файл агрегации не содержит кодов агрегации для отчета"
+                        )
+                    else:
+                        logger.info(f"Количество кодов агрегации 1 уровня в файле: {len(self.units)}")
+                    
+                    # Обновляем UI
+                    self.update_file_info()
+                    return
+                else:
+                    logger.error(f"Файл агрегации с ID={self.file_id} не найден в базе данных")
+                    QMessageBox.critical(
+                        self,
+                        "Ошибка",
+                        f"Не удалось получить данные файла агрегации с ID {self.file_id}"
+                    )
+                    self.reject()
+                    return
+            except Exception as e:
+                logger.error(f"Ошибка при получении данных из контроллера: {str(e)}")
+                logger.exception("Подробная трассировка ошибки:")
+                QMessageBox.critical(
+                    self,
+                    "Ошибка",
+                    f"Не удалось загрузить данные файла агрегации: {str(e)}"
+                )
+                self.reject()
+                return
+            
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке данных файла агрегации: {str(e)}")
+            logger.exception("Подробная трассировка ошибки:")
+            QMessageBox.critical(
+                self,
+                "Ошибка",
+                f"Не удалось загрузить данные файла агрегации: {str(e)}"
+            )
+            self.reject()
+    
+    def update_file_info(self):
+        """Обновление информации о файле и заполнение таблицы"""
+        if not self.file_data:
+            return
+        
+        # Обновляем метки с информацией о файле
+        self.file_name_label.setText(self.file_data.filename)
+        self.product_label.setText(self.file_data.product)
+        
+        # Учитываем только единицы level 1
+        self.units_count_label.setText(str(len(self.units)))
+        
+        # Скрываем индикатор загрузки
+        self.loading_label.hide()
+        
+        # Емкость упаковки по умолчанию равна количеству вложенных кодов
+        aggregation_units = [
+            {"code": unit["code"], "type": "AGGREGATION", "capacity": unit["items_count"]}
+            for unit in self.units
+        ]
+        
+        # Заполняем таблицу агрегационными единицами
+        self.units_table.setRowCount(len(aggregation_units))
+        
+        for i, unit in enumerate(aggregation_units):
+            # Код агрегата
+            self.units_table.setItem(i, 0, QTableWidgetItem(unit["code"]))
+            
+            # Тип агрегации
+            type_item = QTableWidgetItem(unit["type"])
+            self.units_table.setItem(i, 1, type_item)
+            
+            # Емкость упаковки
+            capacity_spinbox = QSpinBox()
+            capacity_spinbox.setMinimum(1)
+            capacity_spinbox.setMaximum(99999)
+            capacity_spinbox.setValue(unit["capacity"])
+            self.units_table.setCellWidget(i, 2, capacity_spinbox)
+            
+            # Чекбокс для выбора
+            checkbox = QTableWidgetItem()
+            checkbox.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+            checkbox.setCheckState(Qt.CheckState.Checked)
+            self.units_table.setItem(i, 3, checkbox)
+        
+        self.units_table.resizeColumnsToContents()
+    
+    def select_all_units(self):
+        """Выбрать все единицы агрегации"""
+        for i in range(self.units_table.rowCount()):
+            self.units_table.item(i, 3).setCheckState(Qt.CheckState.Checked)
+    
+    def deselect_all_units(self):
+        """Снять выбор со всех единиц агрегации"""
+        for i in range(self.units_table.rowCount()):
+            self.units_table.item(i, 3).setCheckState(Qt.CheckState.Unchecked)
+    
+    def get_report_data(self):
+        """Получение данных отчета для отправки"""
+        # Получаем omsId из текущих учетных данных через контроллер
+        omsId = ""
+        innId = ""
+        glnId = ""
+        try:
+            if self.controller and hasattr(self.controller, 'db'):
+                credentials = self.controller.db.get_credentials()
+                if credentials and len(credentials) > 0:
+                    omsId = credentials[0].omsid
+                    innId = credentials[0].inn
+                    glnId = credentials[0].gln
+                    logging.getLogger(__name__).info(f"Получен omsId для отчета: {omsId}")
+                    logging.getLogger(__name__).info(f"Получен ИНН для отчета: {innId}")
+                    logging.getLogger(__name__).info(f"Получен GLN для отчета: {glnId}")
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Ошибка при получении omsId/ИНН/GLN: {str(e)}")
+            
+        # Если omsId не удалось получить из БД, пытаемся получить из api_client
+        if not omsId and self.controller and hasattr(self.controller, 'api_client'):
+            omsId = self.controller.api_client.omsid
+            if omsId:
+                logging.getLogger(__name__).info(f"Получен omsId из API-клиента: {omsId}")
+        
+        # Собираем выбранные единицы агрегации и заданную емкость упаковки;
+        # вложенные коды подставляются при формировании отчета из базы данных
+        unit_codes = []
+        capacities = {}
+        for i in range(self.units_table.rowCount()):
+            if self.units_table.item(i, 3).checkState() == Qt.CheckState.Checked:
+                unit_code = self.units_table.item(i, 0).text()
+                unit_codes.append(unit_code)
+                capacities[unit_code] = self.units_table.cellWidget(i, 2).value()
+        
+        # Получаем идентификатор производственной линии из текстового поля
+        productionLineId = self.production_line_input.text().strip()
+        logging.getLogger(__name__).info(f"Указана производственная линия: {productionLineId}")
+        
+        # Получаем идентификатор производственного заказа из текстового поля
+        productionOrderId = self.production_order_input.text().strip()
+        logging.getLogger(__name__).info(f"Указан производственный заказ: {productionOrderId}")
+            
+        # Формируем данные отчета об агрегации
+        report_data = {
+            "participantId": innId,  # Используем ИНН в качестве значения
+            "productionLineId": productionLineId,  # Идентификатор производственной линии
+            "productionOrderId": productionOrderId,  # Идентификатор производственного заказа
+            "omsId": omsId,  # Добавляем omsId в отчет
+            "file_id": self.file_id,  # Добавляем file_id для отслеживания в контроллере
+            "unit_codes": unit_codes,  # Выбранные единицы агрегации
+            "capacities": capacities  # Емкость упаковки по коду единицы
+        }
+        
+        # Если не удалось получить omsId, показываем предупреждение пользователю
+        if not omsId:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Не удалось получить идентификатор СУЗ (omsId). Отчет может быть отклонен API. "
+                "Проверьте настройки учетных данных."
+            )
+            logging.getLogger(__name__).warning("omsId не был добавлен в отчет об агрегации")
+            
+        # Если не удалось получить ИНН, показываем предупреждение пользователю
+        if not innId:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Не удалось получить ИНН производителя (participantId). Отчет будет отклонен API. "
+                "Проверьте настройки учетных данных и добавьте ИНН."
+            )
+            logging.getLogger(__name__).warning("ИНН не был добавлен в отчет об агрегации")
+        
+        # Если не указан идентификатор производственной линии, показываем предупреждение
+        if not productionLineId:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Не указан идентификатор производственной линии (productionLineId). "
+                "Отчет может быть отклонен API."
+            )
+            logging.getLogger(__name__).warning("productionLineId не был добавлен в отчет об агрегации")
+        
+        # Если не указан идентификатор производственного заказа, показываем предупреждение
+        if not productionOrderId:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Не указан идентификатор производственного заказа (productionOrderId). "
+                "Отчет может быть отклонен API."
+            )
+            logging.getLogger(__name__).warning("productionOrderId не был добавлен в отчет об агрегации")
+        
+        return report_data
@@ -0,0 +1,278 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget,
+                             QTableWidget, QTableWidgetItem, QPushButton, QLabel, QMessageBox,
+                             QDialogButtonBox)
+
+from views.dialogs import ConnectionDialog, CredentialsDialog
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SettingsDialog(QDialog):
+    """Диалог для работы с настройками"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Настройки")
+        self.resize(800, 600)
+        
+        # Получаем ссылку на главное окно
+        self.main_window = parent
+        
+        # Подключаем сигналы главного окна к слотам обновления таблиц
+        self.main_window.add_connection_signal.connect(self.reload_connections)
+        self.main_window.edit_connection_signal.connect(self.reload_connections)
+        self.main_window.delete_connection_signal.connect(self.reload_connections)
+        self.main_window.set_active_connection_signal.connect(self.reload_connections)
+        self.main_window.add_credentials_signal.connect(self.reload_credentials)
+        self.main_window.edit_credentials_signal.connect(self.reload_credentials)
+        self.main_window.delete_credentials_signal.connect(self.reload_credentials)
+        
+        layout = QVBoxLayout(self)
+        
+        # Создаем виджет с вкладками
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs)
+        
+        # Создаем вкладки
+        self.create_connections_tab()
+        self.create_credentials_tab()
+        self.create_general_settings_tab()
+        
+        # Добавляем вкладки в виджет
+        self.tabs.addTab(self.connections_tab, "Подключения")
+        self.tabs.addTab(self.credentials_tab, "Учетные данные")
+        self.tabs.addTab(self.general_settings_tab, "Общие настройки")
+        
+        # Кнопки Ok/Cancel
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        # Подключаем обработчик изменения активной вкладки
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+    
+    def showEvent(self, event):
+        """Обработчик события показа диалога"""
+        # Обновляем данные всех таблиц при показе диалога
+        self.reload_connections()
+        self.reload_credentials()
+        super().showEvent(event)
+    
+    def on_tab_changed(self, index):
+        """Обработчик изменения активной вкладки"""
+        # Обновляем данные таблицы при переключении на нее
+        if index == 0:  # Подключения
+            self.reload_connections()
+        elif index == 1:  # Учетные данные
+            self.reload_credentials()
+
+    def create_connections_tab(self):
+        """Создание вкладки подключений"""
+        self.connections_tab = QWidget()
+        layout = QVBoxLayout(self.connections_tab)
+        
+        # Создаем копию таблицы подключений и подключаем данные
+        self.connections_table = QTableWidget()
+        self.connections_table.setColumnCount(4)
+        self.connections_table.setHorizontalHeaderLabels(["ID", "Название", "URL", "Активный"])
+        
+        # Первоначальное заполнение таблицы
+        self.reload_connections()
+        
+        layout.addWidget(self.connections_table)
+        
+        # Кнопки управления подключениями
+        buttons_layout = QHBoxLayout()
+        
+        add_button = QPushButton("Добавить")
+        add_button.clicked.connect(self.on_add_connection)
+        buttons_layout.addWidget(add_button)
+        
+        edit_button = QPushButton("Изменить")
+        edit_button.clicked.connect(self.on_edit_connection)
+        buttons_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton("Удалить")
+        delete_button.clicked.connect(self.on_delete_connection)
+        buttons_layout.addWidget(delete_button)
+        
+        set_active_button = QPushButton("Установить активным")
+        set_active_button.clicked.connect(self.on_set_active_connection)
+        buttons_layout.addWidget(set_active_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def reload_connections(self, *args):
+        """Обновить таблицу подключений в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.connections_table
+        self.connections_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.connections_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.connections_table.resizeColumnsToContents()
+    
+    def on_add_connection(self):
+        """Обработчик нажатия кнопки добавления подключения в диалоге"""
+        from views.dialogs import ConnectionDialog
+        dialog = ConnectionDialog(self)
+        if dialog.exec():
+            data = dialog.get_data()
+            self.main_window.add_connection_signal.emit(data['name'], data['url'])
+    
+    def on_edit_connection(self):
+        """Обработчик нажатия кнопки редактирования подключения в диалоге"""
+        from views.dialogs import ConnectionDialog
+        row = self.connections_table.currentRow()
+        if row >= 0:
+            connection_id = int(self.connections_table.item(row, 0).text())
+            name = self.connections_table.item(row, 1).text()
+            url = self.connections_table.item(row, 2).text()
+            
+            dialog = ConnectionDialog(self)
+            # Заполняем поля текущими значениями
+            dialog.name_input.setText(name)
+            dialog.url_input.setText(url)
+            
+            if dialog.exec():
+                data = dialog.get_data()
+                self.main_window.edit_connection_signal.emit(connection_id, data['name'], data['url'])
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите подключение для редактирования")
+    
+    def on_delete_connection(self):
+        """Обработчик нажатия кнопки удаления подключения в диалоге"""
+        row = self.connections_table.currentRow()
+        if row >= 0:
+            connection_id = int(self.connections_table.item(row, 0).text())
+            self.main_window.delete_connection_signal.emit(connection_id)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите подключение для удаления")
+    
+    def on_set_active_connection(self):
+        """Обработчик нажатия кнопки установки активного подключения в диалоге"""
+        row = self.connections_table.currentRow()
+        if row >= 0:
+            connection_id = int(self.connections_table.item(row, 0).text())
+            self.main_window.set_active_connection_signal.emit(connection_id)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Выберите подключение для активации")
+    
+    def create_credentials_tab(self):
+        """Создание вкладки учетных данных"""
+        self.credentials_tab = QWidget()
+        layout = QVBoxLayout(self.credentials_tab)
+        
+        # Создаем копию таблицы учетных данных и подключаем данные
+        self.credentials_table = QTableWidget()
+        self.credentials_table.setColumnCount(5)
+        self.credentials_table.setHorizontalHeaderLabels(["ID", "OMS ID", "Токен", "GLN", "INN"])
+        
+        # Первоначальное заполнение таблицы
+        self.reload_credentials()
+        
+        layout.addWidget(self.credentials_table)
+        
+        # Кнопки управления учетными данными
+        buttons_layout = QHBoxLayout()
+        
+        add_button = QPushButton("Добавить")
+        add_button.clicked.connect(self.on_add_credentials)
+        buttons_layout.addWidget(add_button)
+        
+        edit_button = QPushButton("Изменить")
+        edit_button.clicked.connect(self.on_edit_credentials)
+        buttons_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton("Удалить")
+        delete_button.clicked.connect(self.on_delete_credentials)
+        buttons_layout.addWidget(delete_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def reload_credentials(self, *args):
+        """Обновить таблицу учетных данных в диалоге"""
+        # Копируем данные из таблицы главного окна
+        source_table = self.main_window.credentials_table
+        self.credentials_table.setRowCount(source_table.rowCount())
+        for row in range(source_table.rowCount()):
+            for col in range(source_table.columnCount()):
+                if source_table.item(row, col):
+                    self.credentials_table.setItem(row, col, QTableWidgetItem(source_table.item(row, col).text()))
+        self.credentials_table.resizeColumnsToContents()
+    
+    def on_add_credentials(self):
+        """Обработчик нажатия кнопки добавления учетных данных в диалоге"""
+        dialog = CredentialsDialog(self)
+        if dialog.exec():
+            data = dialog.get_data()
+            
+            # Получаем выбранное подключение, если оно есть
+            connection_id = None
+            row = self.connections_table.currentRow()
+            if row >= 0:
+                connection_id = int(self.connections_table.item(row, 0).text())
+            
+            # Вызываем сигнал в главном окне
+            self.main_window.add_credentials_signal.emit(data['omsid'], data['token'], data['gln'], data['inn'], connection_id)
+    
+    def on_edit_credentials(self):
+        """Обработчик нажатия кнопки редактирования учетных данных в диалоге"""
+        selected_rows = self.credentials_table.selectedItems()
+        if not selected_rows:
+            QMessageBox.warning(self, "Предупреждение", "Выберите учетные данные для редактирования")
+            return
+        
+        row = selected_rows[0].row()
+        
+        # Получаем данные из таблицы
+        try:
+            credentials_id = int(self.credentials_table.item(row, 0).text()) if self.credentials_table.item(row, 0) else 0
+            omsid = self.credentials_table.item(row, 1).text() if self.credentials_table.item(row, 1) else ""
+            token = self.credentials_table.item(row, 2).text() if self.credentials_table.item(row, 2) else ""
+            gln = self.credentials_table.item(row, 3).text() if self.credentials_table.item(row, 3) else ""
+            inn = self.credentials_table.item(row, 4).text() if self.credentials_table.item(row, 4) else ""
+            
+            # Открываем диалог редактирования
+            dialog = CredentialsDialog(self, {"omsid": omsid, "token": token, "gln": gln, "inn": inn})
+            if dialog.exec() == QDialog.DialogCode.Accepted:
+                data = dialog.get_data()
+                self.main_window.edit_credentials_signal.emit(credentials_id, data['omsid'], data['token'], data['gln'], data['inn'])
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка при редактировании учетных данных: {str(e)}")
+    
+    def on_delete_credentials(self):
+        """Обработчик нажатия кнопки удаления учетных данных в диалоге"""
+        selected_rows = self.credentials_table.selectedItems()
+        if not selected_rows:
+            QMessageBox.warning(self, "Предупреждение", "Выберите учетные данные для удаления")
+            return
+        
+        row = selected_rows[0].row()
+        
+        try:
+            # Получаем ID учетных данных
+            credentials_id = int(self.credentials_table.item(row, 0).text()) if self.credentials_table.item(row, 0) else 0
+            
+            # Запрашиваем подтверждение
+            msg_box = QMessageBox()
+            msg_box.setIcon(QMessageBox.Icon.Question)
+            msg_box.setText("Вы уверены, что хотите удалить эти учетные данные?")
+            msg_box.setWindowTitle("Подтверждение удаления")
+            msg_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            msg_box.setDefaultButton(QMessageBox.StandardButton.No)
+            
+            if msg_box.exec() == QMessageBox.StandardButton.Yes:
+                # Вызываем сигнал удаления учетных данных
+                self.main_window.delete_credentials_signal.emit(credentials_id)
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка при удалении учетных данных: {str(e)}")
+    
+    def create_general_settings_tab(self):
+        """Создание вкладки общих настроек"""
+        self.general_settings_tab = QWidget()
+        layout = QVBoxLayout(self.general_settings_tab)
+        
+        # Пока вкладка пустая, добавляем заглушку
+        layout.addWidget(QLabel("Общие настройки находятся в разработке"))